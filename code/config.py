@@ -6,6 +6,18 @@ from pathlib import Path
 # Timeouts
 SHELL_TIMEOUT_SECONDS = 30
 
+# Zeitbudget (deadline_ms): Nachfrist, bevor ein Aufruf hart abgebrochen wird
+DEADLINE_GRACE_SECONDS = 0.25
+
+# Shell-Ressourcenlimits pro Befehl (None = unbegrenzt)
+SHELL_LIMIT_CPU_SECONDS: int | None = None  # RLIMIT_CPU
+SHELL_LIMIT_MEMORY_MB: int | None = None  # RLIMIT_AS
+SHELL_LIMIT_OPEN_FILES: int | None = None  # RLIMIT_NOFILE
+SHELL_LIMIT_OUTPUT_MB: int | None = None  # Pipe-Ausgabe + RLIMIT_FSIZE
+
+# Shell-Befehle über schlanken Spawn-Helper starten statt den Server zu forken
+SHELL_USE_SPAWN_HELPER = True
+
 # Shell Security - Gefährliche Befehle blocken
 BLOCKED_PATTERNS: list[re.Pattern] = [
     # rm -rf auf kritische Pfade (inkl. //, /./, etc.)
@@ -35,6 +47,82 @@ SUDO_NEEDS_CONFIRMATION: bool = True
 MAX_OUTPUT_BYTES = 100_000  # ~100KB
 MAX_LINES_WITHOUT_RANGE = 500  # Zeilenlimit wenn keine Range angegeben
 
+# Datenverzeichnis (Sessions, Logs, Transcripts, Ergebnisse)
+DATA_DIR = Path.home() / ".mcp_shell_tools"
+
+# Shared-Modus: ein Server-Prozess für mehrere Clients (serve --socket, bridge)
+SERVER_SOCKET = DATA_DIR / "server.sock"
+SERVER_LOG = DATA_DIR / "server.log"  # stderr des von bridge --start gestarteten Servers
+SERVER_START_TIMEOUT = 10.0  # Sekunden, die bridge --start auf den Socket wartet
+
+# Executor für blockierende Dateisystem-Arbeit der Tools
+IO_WORKERS = 8  # Threads für read/write/stat/Verzeichnis-Walks
+SEARCH_PROCESS_WORKERS = 0  # Prozesse für CPU-lastige grep-Suche (0 = aus)
+
+# Admission Control: Kostenklassen der Tools (siehe TOOL_SPECS in server.py)
+# limit = max. parallele Aufrufe, priority = 0 wird zuerst zugelassen,
+# timeout = max. Wartezeit in Sekunden, danach wird der Aufruf abgelehnt
+SCHEDULER_CLASSES = {
+    "interactive": {"limit": 16, "priority": 0, "timeout": 10.0},
+    "process": {"limit": 4, "priority": 1, "timeout": 60.0},
+    "scan": {"limit": 2, "priority": 2, "timeout": 60.0},
+}
+SCHEDULER_MAX_CONCURRENT = 16  # Gesamtlimit über alle Klassen
+
+# Event-Loop-Lag (/stats): gemessen nur, solange Tool-Aufrufe eingehen
+LOOP_LAG_INTERVAL = 0.05  # Sekunden zwischen zwei Messungen (0 = aus)
+LOOP_LAG_IDLE_SECONDS = 10.0  # so lange nach dem letzten Aufruf weiter messen
+
+# Session-Persistenz: "files" = Snapshot (session.json) + Journal (journal.jsonl),
+# "sqlite" = DATA_DIR/sessions.db mit Indizes und Volltextsuche (memory_search)
+SESSION_BACKEND = "files"
+JOURNAL_COMPACT_BYTES = 256 * 1024  # ab dieser Journal-Größe neuer Snapshot
+SESSION_FLUSH_INTERVAL = 1.0  # Sekunden; gepufferte Journal-Events werden gebündelt geschrieben
+
+# Tool-Log pro Session (Ringpuffer): große Parameter als Digest (Größe, Hash, Anfang)
+TOOL_LOG_LIMIT = 100  # Einträge
+TOOL_LOG_INLINE_BYTES = 256  # größere Parameterwerte werden zum Digest
+# Regeln pro Tool und Parameter: "keep", "digest" (immer) oder "redact" (nur Größe)
+TOOL_LOG_PARAM_RULES: dict[str, dict[str, str]] = {
+    "file_write": {"content": "digest"},
+    "str_replace": {"old_str": "digest", "new_str": "digest"},
+    "diff_preview": {"old_str": "digest", "new_str": "digest"},
+    "memory_add": {"content": "digest"},
+}
+
+# Hintergrund-Writer für Auto-Logging (Session-Log, tool.log, Transcript)
+LOG_QUEUE_SIZE = 256  # Max. wartende Records; darüber warten die Aufrufer (siehe /stats)
+LOG_BATCH_SIZE = 64  # Records pro Durchlauf
+
+# Result-Store für gekürzte Ausgaben (LRU, auf Disk)
+RESULT_STORE_DIR = DATA_DIR / "results"
+RESULT_STORE_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+RESULT_STORE_MAX_ENTRIES = 500
+
+# On-Demand-Profiling (/profile)
+PROFILE_DIR = DATA_DIR / "profiles"
+PROFILE_MAX_FILES = 100  # Älteste .pstats werden gelöscht
+PROFILE_TOP_N = 15  # Funktionen/Allokationen im Inline-Report
+
+# Transcript (/transcript): JSONL + Offset-Index, Markdown bei Bedarf
+TRANSCRIPT_DIR = DATA_DIR / "transcripts"
+TRANSCRIPT_BUFFER_BYTES = 64 * 1024  # Schreibpuffer; geschrieben wird periodisch (SESSION_FLUSH_INTERVAL)
+TRANSCRIPT_MAX_RESULT_CHARS = 50000  # Längere Ergebnisse werden gekürzt
+TRANSCRIPT_TERMS_SEGMENTS = 8  # Segmente der .terms-Datei, ab denen sie zusammengeführt wird
+
+# Archivierung (main.py maintenance, im Server gelegentlich im Hintergrund)
+ARCHIVE_DIR = DATA_DIR / "archive"  # komprimierte Transcripts und Logs + index.json
+ARCHIVE_COMPRESSION = "gzip"  # "gzip" oder "xz"
+ARCHIVE_MIN_AGE = 3600  # Sekunden ohne Änderung, ab denen ein Transcript als geschlossen gilt
+SESSION_STALE_DAYS = 30  # Sessions ohne Änderung: Journal in den Snapshot übernehmen
+DATA_QUOTA_BYTES = 1024 * 1024 * 1024  # 1 GB für DATA_DIR; älteste Archive werden gelöscht
+MAINTENANCE_INTERVAL = 6 * 3600  # Sekunden zwischen automatischen Läufen (0 = aus)
+
+# Benchmarks (main.py bench): synthetische Repos und JSON-Ergebnisse
+BENCHMARK_DIR = DATA_DIR / "benchmarks"  # repos/<name>/ und <zeitstempel>-<name>.json
+BENCHMARK_THRESHOLD = 0.2  # Median langsamer als +20% gegenüber der Baseline = Regression
+BENCHMARK_NOISE_MS = 1.0  # kleinere absolute Unterschiede gelten nie als Regression
+
 # Encoding
 DEFAULT_ENCODING = "utf-8"
 
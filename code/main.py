@@ -5,11 +5,20 @@ MCP-Server für lokale Entwicklungsarbeit - Dateisystem, Shell, Editor.
 
 Aufruf:
     python code/main.py serve                    # MCP-Server starten (stdio)
+    python code/main.py serve --socket           # Shared-Server für mehrere Clients
+    python code/main.py bridge --start           # stdio-Brücke zum Shared-Server
+    python code/main.py maintenance              # Archivieren, kompaktieren, Quota
+    python code/main.py replay <transcript>      # Aufgezeichnete Aufrufe als Benchmark
+    python code/main.py bench --scale 10k        # Tools auf synthetischem Repo messen
+    python code/main.py load --concurrency 16    # Parallele Last über stdio
+    python code/main.py importtime               # Import-Zeiten des Servers
 """
 import argparse
 import asyncio
 import signal
+import subprocess
 import sys
+import threading
 from pathlib import Path
 
 # Projekt-Root zum Pfad hinzufügen für direkte Ausführung
@@ -36,10 +45,19 @@ def _signal_handler(signum, frame):
     # Cleanup von laufenden Prozessen
     try:
         from code.tools.shell import cleanup_all_processes
+        from code.utils.process import spawn_helper
         cleanup_all_processes()
+        spawn_helper.stop()
     except Exception as e:
         print(f"Cleanup-Fehler: {e}", file=sys.stderr)
 
+    # Ausstehende Log-Records und Session-Events schreiben
+    try:
+        from code.utils.background import shutdown
+        shutdown()
+    except Exception as e:
+        print(f"Log-Flush-Fehler: {e}", file=sys.stderr)
+
     # Event-Loop beenden falls vorhanden
     try:
         loop = asyncio.get_running_loop()
@@ -57,7 +75,16 @@ def create_parser() -> argparse.ArgumentParser:
         description="MCP-Server für lokale Entwicklungsarbeit. "
                     "Dateisystem, Shell, Editor.",
         epilog="Beispiel:\n"
-               "  %(prog)s serve                     Startet den MCP-Server\n",
+               "  %(prog)s serve                     Startet den MCP-Server\n"
+               "  %(prog)s bridge --start            Verbindet mit dem Shared-Server (startet ihn bei Bedarf)\n"
+               "  %(prog)s maintenance               Alte Transcripts/Logs archivieren\n"
+               "  %(prog)s replay 2026-01-17-14-30-00 --project ~/code/app\n"
+               "                                    Transcript gegen frischen Server abspielen\n"
+               "  %(prog)s bench --scale 10k --baseline base.json\n"
+               "                                    Tools messen und mit Baseline vergleichen\n"
+               "  %(prog)s load --mix mixed --cancel-rate 0.1\n"
+               "                                    Parallele Last mit Abbrüchen gegen frischen Server\n"
+               "  %(prog)s importtime --tools        Import-Zeiten inkl. Tool-Module\n",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     
@@ -84,25 +111,664 @@ def create_parser() -> argparse.ArgumentParser:
     serve_parser = subparsers.add_parser(
         "serve",
         help="MCP-Server starten",
-        description="Startet den MCP-Server im stdio-Modus für Claude Desktop.",
+        description="Startet den MCP-Server im stdio-Modus für Claude Desktop. "
+                    "Mit --socket als Shared-Server, den mehrere Clients über "
+                    "'bridge' gemeinsam nutzen.",
     )
-    
+    serve_parser.add_argument(
+        "--socket",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PFAD",
+        help="An Unix-Socket lauschen statt stdio (Default: ~/.mcp_shell_tools/server.sock)",
+    )
+
+    # bridge - stdio <-> Shared-Server
+    bridge_parser = subparsers.add_parser(
+        "bridge",
+        help="stdio-Brücke zum Shared-Server",
+        description="Leitet stdio an einen laufenden 'serve --socket' weiter. "
+                    "In der Client-Konfiguration statt 'serve' eintragen.",
+    )
+    bridge_parser.add_argument(
+        "--socket",
+        default=None,
+        metavar="PFAD",
+        help="Socket des Shared-Servers (Default: ~/.mcp_shell_tools/server.sock)",
+    )
+    bridge_parser.add_argument(
+        "--start",
+        action="store_true",
+        help="Shared-Server im Hintergrund starten, falls keiner läuft",
+    )
+
+    # maintenance - Archivierung und Aufräumen
+    maintenance_parser = subparsers.add_parser(
+        "maintenance",
+        help="Transcripts/Logs archivieren, Sessions kompaktieren, Quota durchsetzen",
+        description="Komprimiert geschlossene Transcripts und rotierte Logs nach "
+                    "~/.mcp_shell_tools/archive/, übernimmt Journale ruhender Sessions "
+                    "in den Snapshot und löscht die am längsten nicht genutzten Archive, "
+                    "bis die Quota eingehalten ist. Mit --search wird das Archiv durchsucht.",
+    )
+    maintenance_parser.add_argument(
+        "--data-dir",
+        default=None,
+        metavar="PFAD",
+        help="Datenverzeichnis (Default: ~/.mcp_shell_tools)",
+    )
+    maintenance_parser.add_argument(
+        "--compression",
+        choices=["gzip", "xz"],
+        default=None,
+        help="Kompression für neue Archive (Default: ARCHIVE_COMPRESSION)",
+    )
+    maintenance_parser.add_argument(
+        "--quota-mb",
+        type=int,
+        default=None,
+        help="Quota für das Datenverzeichnis in MB (Default: DATA_QUOTA_BYTES)",
+    )
+    maintenance_parser.add_argument(
+        "--search",
+        default=None,
+        metavar="TEXT",
+        help="Archiv durchsuchen statt aufzuräumen",
+    )
+    maintenance_parser.add_argument(
+        "--kind",
+        choices=["transcripts", "logs"],
+        default=None,
+        help="Suche auf Transcripts oder Logs beschränken",
+    )
+    maintenance_parser.add_argument(
+        "--tool",
+        default=None,
+        help="Nur Archive, die Aufrufe dieses Tools enthalten",
+    )
+    maintenance_parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Max. Treffer (Default: 50)",
+    )
+
+    # replay - Transcript als Benchmark abspielen
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="Aufgezeichnete Tool-Aufrufe gegen einen frischen Server abspielen",
+        description="Liest die Tool-Aufrufe eines Transcripts und führt sie in einer "
+                    "Sandbox (Kopie des Projekts, eigenes HOME) gegen einen frischen "
+                    "Server aus. Berichtet Latenzen pro Tool (p50/p95/p99), Durchsatz "
+                    "und Spitzen-RSS des Servers.",
+    )
+    replay_parser.add_argument(
+        "transcript",
+        help="Transcript (.jsonl, auch .jsonl.gz/.xz) - Pfad oder Name in ~/.mcp_shell_tools/transcripts/",
+    )
+    replay_parser.add_argument(
+        "--project",
+        default=".",
+        metavar="PFAD",
+        help="Projekt, das in die Sandbox kopiert wird (Default: aktuelles Verzeichnis)",
+    )
+    replay_parser.add_argument(
+        "--original",
+        default=None,
+        metavar="PFAD",
+        help="Projektpfad zur Aufnahmezeit, falls abweichend (wird in Parametern ersetzt)",
+    )
+    replay_parser.add_argument(
+        "--mode",
+        choices=["stdio", "inprocess"],
+        default="stdio",
+        help="stdio: 'serve' mit JSON-RPC; inprocess: Tools direkt aufrufen (Default: stdio)",
+    )
+    replay_parser.add_argument(
+        "--speed",
+        choices=["max", "recorded"],
+        default="max",
+        help="Ohne Pause oder mit den aufgezeichneten Abständen (Default: max)",
+    )
+    replay_parser.add_argument(
+        "--tool",
+        action="append",
+        default=None,
+        help="Nur Aufrufe dieses Tools (mehrfach möglich)",
+    )
+    replay_parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Nur die ersten N Aufrufe",
+    )
+    replay_parser.add_argument(
+        "--no-copy",
+        action="store_true",
+        help="Projekt nicht kopieren (Vorsicht: schreibende Aufrufe ändern das Original)",
+    )
+    replay_parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Sandbox nicht löschen (Server-Log, Projektkopie)",
+    )
+    replay_parser.add_argument(
+        "--json",
+        default=None,
+        metavar="DATEI",
+        help="Bericht zusätzlich als JSON schreiben ('-' = stdout)",
+    )
+
+    # bench - Tools auf synthetischem Repo messen
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Dateisystem- und Such-Tools auf einem synthetischen Repo messen",
+        description="Erzeugt deterministisch ein synthetisches Repo (wird unter "
+                    "~/.mcp_shell_tools/benchmarks/repos/ wiederverwendet), misst jedes "
+                    "Tool warm und mit verworfenem Page-Cache und speichert das Ergebnis "
+                    "als JSON. Mit --baseline werden die Mediane verglichen; Exit-Code 1 "
+                    "bei Regressionen.",
+    )
+    bench_parser.add_argument(
+        "--scale",
+        default="1k",
+        help="Anzahl Quelldateien: 1k, 10k, 100k oder eine Zahl (Default: 1k)",
+    )
+    bench_parser.add_argument(
+        "--shape",
+        choices=["wide", "deep"],
+        default="wide",
+        help="wide: flacher Baum mit vielen Einträgen; deep: tief verschachtelt (Default: wide)",
+    )
+    bench_parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Seed des Generators (Default: 42)",
+    )
+    bench_parser.add_argument(
+        "--large-files",
+        type=int,
+        default=2,
+        help="Anzahl großer Log-Dateien (Default: 2)",
+    )
+    bench_parser.add_argument(
+        "--large-mb",
+        type=int,
+        default=8,
+        help="Größe der großen Dateien in MB (Default: 8)",
+    )
+    bench_parser.add_argument(
+        "--blobs",
+        type=int,
+        default=20,
+        help="Anzahl Binär-Blobs (Default: 20)",
+    )
+    bench_parser.add_argument(
+        "--hidden",
+        type=int,
+        default=None,
+        help="Dateien in .git/.venv, die die Tools überspringen (Default: halbe Anzahl Quelldateien)",
+    )
+    bench_parser.add_argument(
+        "--repo",
+        default=None,
+        metavar="PFAD",
+        help="Repo hier erzeugen bzw. wiederverwenden",
+    )
+    bench_parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Repo neu erzeugen, auch wenn es schon existiert",
+    )
+    bench_parser.add_argument(
+        "--case",
+        action="append",
+        default=None,
+        help="Nur Fälle mit diesem Präfix, z.B. grep oder file_read.large (mehrfach möglich)",
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Gemessene Läufe pro Fall und Variante (Default: 5)",
+    )
+    bench_parser.add_argument(
+        "--no-cold",
+        action="store_true",
+        help="Nur warm messen (kein Verwerfen des Page-Cache)",
+    )
+    bench_parser.add_argument(
+        "--drop-caches",
+        action="store_true",
+        help="Vor kalten Läufen den Cache des ganzen Hosts über /proc/sys/vm/drop_caches "
+             "verwerfen (Root; Default: posix_fadvise nur für die Repo-Dateien)",
+    )
+    bench_parser.add_argument(
+        "--output",
+        default=None,
+        metavar="DATEI",
+        help="Ergebnis hierhin schreiben (Default: ~/.mcp_shell_tools/benchmarks/<zeit>-<repo>.json)",
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        default=None,
+        metavar="DATEI",
+        help="Mit diesem gespeicherten Ergebnis vergleichen",
+    )
+    bench_parser.add_argument(
+        "--compare",
+        nargs=2,
+        default=None,
+        metavar=("BASELINE", "AKTUELL"),
+        help="Nur zwei gespeicherte Ergebnisse vergleichen, nichts messen",
+    )
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Relative Verlangsamung, ab der verglichen als Regression gilt (Default: 0.2)",
+    )
+
+    # load - parallele Last über stdio
+    load_parser = subparsers.add_parser(
+        "load",
+        help="Parallele Tool-Aufrufe über stdio gegen einen frischen Server",
+        description="Startet 'serve' in einer Sandbox und schickt aus mehreren Threads "
+                    "gleichzeitig tools/call-Anfragen nach einer gewichteten Mischung, "
+                    "optional mit Abbrüchen (notifications/cancelled). Berichtet Latenzen "
+                    "pro Tool, Durchsatz, ping-Antwortzeit und den Event-Loop-Lag des Servers.",
+    )
+    load_parser.add_argument(
+        "--mix",
+        default="mixed",
+        help="read, mixed, shell oder eigene Gewichte wie 'grep=3,file_read=1' (Default: mixed)",
+    )
+    load_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Parallele Anfragen (Default: 8)",
+    )
+    load_parser.add_argument(
+        "--requests",
+        type=int,
+        default=1000,
+        help="Anzahl Anfragen (Default: 1000)",
+    )
+    load_parser.add_argument(
+        "--duration",
+        type=float,
+        default=None,
+        metavar="SEKUNDEN",
+        help="Stattdessen so lange Last erzeugen",
+    )
+    load_parser.add_argument(
+        "--cancel-rate",
+        type=float,
+        default=0.0,
+        help="Anteil der Anfragen, die abgebrochen werden (0-1, Default: 0)",
+    )
+    load_parser.add_argument(
+        "--cancel-after",
+        type=float,
+        default=20.0,
+        metavar="MS",
+        help="Abbruch zufällig 0..MS nach dem Senden (Default: 20)",
+    )
+    load_parser.add_argument(
+        "--project",
+        default=None,
+        metavar="PFAD",
+        help="Kopie dieses Projekts statt eines synthetischen Repos",
+    )
+    load_parser.add_argument(
+        "--scale",
+        default="1k",
+        help="Größe des synthetischen Repos (wie bench, Default: 1k)",
+    )
+    load_parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Seed für Repo und Anfragen (Default: 42)",
+    )
+    load_parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Sandbox nicht löschen (Server-Log)",
+    )
+    load_parser.add_argument(
+        "--json",
+        default=None,
+        metavar="DATEI",
+        help="Bericht zusätzlich als JSON schreiben ('-' = stdout)",
+    )
+
+    # importtime - Import-Zeiten analysieren
+    importtime_parser = subparsers.add_parser(
+        "importtime",
+        help="Import-Zeiten des Servers anzeigen",
+        description="Importiert den Server in einem frischen Interpreter mit "
+                    "-X importtime und fasst die Zeiten pro Paket und Modul zusammen.",
+    )
+    importtime_parser.add_argument(
+        "--tools",
+        action="store_true",
+        help="Auch Tool-Module laden und registrieren (sonst erst beim ersten tools/list)",
+    )
+    importtime_parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Anzahl der langsamsten Module (Default: 20)",
+    )
+
     return parser
 
 
 def cmd_serve(args):
     """Startet den MCP-Server."""
+    from code.config import SHELL_USE_SPAWN_HELPER
     from code.server import mcp
+    from code.utils.mcp_compat import patch_request_cancellation
+    from code.utils.process import spawn_helper
+
+    if args.socket is not None:
+        from code.config import SERVER_SOCKET
+        from code.utils.socket_transport import server_running
+
+        path = Path(args.socket).expanduser() if args.socket else SERVER_SOCKET
+        if server_running(path):
+            print(f"Fehler: Server läuft bereits: {path}", file=sys.stderr)
+            return 1
 
     # Signal-Handler registrieren für sauberen Shutdown
     signal.signal(signal.SIGTERM, _signal_handler)
     signal.signal(signal.SIGINT, _signal_handler)
 
+    # Spawn-Helper im Hintergrund starten - der Handshake wartet nicht darauf
+    if SHELL_USE_SPAWN_HELPER:
+        threading.Thread(target=spawn_helper.start, name="spawn-helper-start", daemon=True).start()
+
+    # Archivierung, wenn fällig und gerade kein Tool-Aufruf läuft
+    _start_maintenance()
+
+    # Client-Abbrüche dürfen den Server nicht beenden (Races im MCP-SDK)
+    patch_request_cancellation()
+
+    if args.socket is not None:
+        import anyio
+        from code.utils.socket_transport import ServerAlreadyRunning
+
+        print(f"Shared-Server lauscht an {path}", file=sys.stderr)
+        try:
+            anyio.run(mcp.run_unix_async, path)
+        except ServerAlreadyRunning as e:
+            # Anderer Server kam zwischen Prüfung und bind() zuvor
+            spawn_helper.stop()
+            print(f"Fehler: {e}", file=sys.stderr)
+            return 1
+        return 0
+
     if args.verbose:
         print("Starte MCP-Server (stdio)...", file=sys.stderr)
     mcp.run()
 
 
+def _start_maintenance() -> None:
+    """Startet den Wartungs-Thread des Servers (utils/archive.py)."""
+    from code.utils.archive import start_idle_maintenance
+    from code.utils.scheduler import scheduler
+
+    def active_transcript():
+        from code.tools.commands import settings
+        return settings.transcript_file
+
+    start_idle_maintenance(lambda: scheduler.running == 0, active_transcript)
+
+
+def cmd_maintenance(args):
+    """Archiviert Transcripts/Logs, kompaktiert Sessions, setzt die Quota durch."""
+    from code.utils.archive import Archiver
+
+    options = {}
+    if args.data_dir:
+        options["data_dir"] = Path(args.data_dir).expanduser()
+    if args.compression:
+        options["compression"] = args.compression
+    if args.quota_mb:
+        options["quota_bytes"] = args.quota_mb * 1024 * 1024
+    archiver = Archiver(**options)
+
+    if args.search:
+        hits = archiver.search(args.search, kind=args.kind, tool=args.tool, limit=args.limit)
+        for hit in hits:
+            print(f"{hit['file']}:{hit['line']}: {hit['text']}")
+        if not hits:
+            print("Keine Treffer im Archiv.")
+        return 0
+
+    report = archiver.run()
+    if report is None:
+        print("Wartung läuft bereits in einem anderen Prozess.", file=sys.stderr)
+        return 1
+    print(f"Transcripts archiviert: {len(report['transcripts'])}")
+    print(f"Logs archiviert:        {len(report['logs'])}")
+    print(f"Sessions kompaktiert:   {len(report['sessions'])}")
+    print(f"Archive gelöscht (LRU): {len(report['evicted'])}")
+    print(f"Archiv: {report['archive_bytes'] / 1024 / 1024:.1f} MB, "
+          f"gesamt: {report['usage_bytes'] / 1024 / 1024:.1f} MB (Quota {archiver.quota_bytes / 1024 / 1024:.0f} MB)")
+    return 0
+
+
+def cmd_replay(args):
+    """Spielt die Tool-Aufrufe eines Transcripts gegen einen frischen Server ab."""
+    import json
+
+    from code.config import TRANSCRIPT_DIR
+    from code.utils.replay import format_report, load_calls, replay
+
+    path = Path(args.transcript).expanduser()
+    if not path.exists():
+        path = TRANSCRIPT_DIR / args.transcript
+        if not path.exists():
+            path = path.with_name(path.name + ".jsonl")
+    if not path.exists():
+        print(f"Fehler: Transcript nicht gefunden: {args.transcript}", file=sys.stderr)
+        return 1
+    project = Path(args.project).expanduser()
+    if not project.is_dir():
+        print(f"Fehler: Projektverzeichnis nicht gefunden: {project}", file=sys.stderr)
+        return 1
+
+    calls = load_calls(path, set(args.tool) if args.tool else None, args.limit)
+    if not calls:
+        print("Fehler: Keine abspielbaren Aufrufe im Transcript.", file=sys.stderr)
+        return 1
+
+    print(f"Spiele {len(calls)} Aufrufe aus {path.name} ab ({args.mode}, {args.speed})...", file=sys.stderr)
+    report = replay(
+        calls,
+        project,
+        mode=args.mode,
+        speed=args.speed,
+        original=Path(args.original).expanduser() if args.original else None,
+        copy=not args.no_copy,
+        keep=args.keep,
+    )
+    report["transcript"] = str(path)
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return 0
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+def cmd_bench(args):
+    """Misst die Tools auf einem synthetischen Repo und vergleicht mit einer Baseline."""
+    import json
+    from datetime import datetime
+
+    from code.config import BENCHMARK_DIR, BENCHMARK_THRESHOLD
+    from code.utils.benchmark import (
+        RepoSpec, compare, format_comparison, format_results, generate_repo, load_result, parse_scale, run_suite,
+    )
+
+    threshold = BENCHMARK_THRESHOLD if args.threshold is None else args.threshold
+    if args.compare:
+        baseline, current = (load_result(Path(p).expanduser()) for p in args.compare)
+    else:
+        spec = RepoSpec(
+            files=parse_scale(args.scale),
+            shape=args.shape,
+            large_files=args.large_files,
+            large_mb=args.large_mb,
+            binary_blobs=args.blobs,
+            ignored_files=args.hidden,
+            seed=args.seed,
+        )
+        root = Path(args.repo).expanduser() if args.repo else BENCHMARK_DIR / "repos" / spec.name
+        print(f"Repo {spec.name} unter {root}...", file=sys.stderr)
+        manifest = generate_repo(spec, root, force=args.regenerate)
+        current = run_suite(
+            root, manifest, repeat=args.repeat, cold=not args.no_cold,
+            drop_caches=args.drop_caches, only=args.case,
+            progress=lambda name: print(f"  {name}", file=sys.stderr),
+        )
+        output = Path(args.output).expanduser() if args.output else (
+            BENCHMARK_DIR / f"{datetime.now():%Y-%m-%d-%H-%M-%S}-{spec.name}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(format_results(current))
+        print(f"\nErgebnis: {output}")
+        if not args.baseline:
+            return 0
+        baseline = load_result(Path(args.baseline).expanduser())
+        print()
+
+    rows = compare(baseline, current, threshold)
+    print(format_comparison(rows, baseline, current, threshold))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+def cmd_load(args):
+    """Erzeugt parallele Last über stdio gegen einen frischen Server."""
+    import json
+    from dataclasses import replace
+
+    from code.utils.benchmark import parse_scale
+    from code.utils.loadgen import DEFAULT_SPEC, format_report, parse_mix, run_load
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    project = Path(args.project).expanduser() if args.project else None
+    if project is not None and not project.is_dir():
+        print(f"Fehler: Projektverzeichnis nicht gefunden: {project}", file=sys.stderr)
+        return 1
+
+    report = run_load(
+        mix,
+        project=project,
+        spec=replace(DEFAULT_SPEC, files=parse_scale(args.scale), seed=args.seed),
+        concurrency=args.concurrency,
+        requests=args.requests,
+        duration=args.duration,
+        cancel_rate=args.cancel_rate,
+        cancel_after_ms=args.cancel_after,
+        seed=args.seed,
+        keep=args.keep,
+        progress=lambda message: print(message, file=sys.stderr),
+    )
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return 0
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+def cmd_bridge(args):
+    """Verbindet stdio mit dem Shared-Server."""
+    from code.config import SERVER_SOCKET
+    from code.utils.socket_transport import bridge_stdio, connect
+
+    path = Path(args.socket).expanduser() if args.socket else SERVER_SOCKET
+    try:
+        sock = connect(path, start=args.start)
+    except OSError as e:
+        print(f"Fehler: Kein Shared-Server an {path} ({e})", file=sys.stderr)
+        return 1
+    bridge_stdio(sock)
+    return 0
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Parst -X importtime Ausgabe zu (Modul, eigene µs, kumulierte µs, Tiefe)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Kopfzeile
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def cmd_importtime(args):
+    """Zeigt die Import-Zeiten des Servers (wie -X importtime, zusammengefasst)."""
+    code = "import code.server"
+    if args.tools:
+        code += "; code.server.ensure_tools_registered()"
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return 1
+
+    entries = _parse_importtime(result.stderr)
+    total = sum(cumulative for _, _, cumulative, depth in entries if depth == 0)
+
+    per_package: dict[str, int] = {}
+    for name, own, _, _ in entries:
+        package = name.split(".")[0]
+        per_package[package] = per_package.get(package, 0) + own
+
+    print(f"Import-Zeiten für '{code}'")
+    print(f"Gesamt: {total / 1000:.1f} ms, {len(entries)} Module\n")
+
+    print("Nach Paket (eigene Zeit summiert):")
+    for package, own in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:15]:
+        print(f"  {own / 1000:8.1f} ms  {package}")
+
+    print(f"\nTop {args.top} Module (eigene Zeit):")
+    print(f"  {'eigen ms':>8}  {'kumul. ms':>9}  Modul")
+    for name, own, cumulative, _ in sorted(entries, key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"  {own / 1000:8.1f}  {cumulative / 1000:9.1f}  {name}")
+
+    own_modules = [e for e in entries if e[0] == "code" or e[0].startswith("code.")]
+    print(f"\nProjekt-Module (code.*): {sum(e[1] for e in own_modules) / 1000:.1f} ms eigene Zeit")
+    return 0
+
+
 def main() -> int:
     """Hauptfunktion."""
     parser = create_parser()
@@ -114,6 +780,12 @@ def main() -> int:
     
     commands = {
         "serve": cmd_serve,
+        "bridge": cmd_bridge,
+        "maintenance": cmd_maintenance,
+        "replay": cmd_replay,
+        "bench": cmd_bench,
+        "load": cmd_load,
+        "importtime": cmd_importtime,
     }
     
     try:
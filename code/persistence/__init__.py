@@ -1,7 +1,13 @@
 """Persistenz-Modul für Session und Memory."""
 
 from code.persistence.models import SessionData, MemoryEntry, ToolCall
-from code.persistence.session_manager import SessionManager, session_manager
+from code.persistence.session_manager import (
+    SessionManager,
+    create_session_manager,
+    current_session_manager,
+    session_manager,
+    session_scope,
+)
 
 __all__ = [
     "SessionData",
@@ -9,4 +15,7 @@ __all__ = [
     "ToolCall",
     "SessionManager",
     "session_manager",
+    "create_session_manager",
+    "current_session_manager",
+    "session_scope",
 ]
@@ -0,0 +1,52 @@
+"""Kompakte Parameter für das Tool-Log: Digest statt kompletter Payload."""
+
+import hashlib
+import json
+from typing import Any
+
+from code.config import TOOL_LOG_INLINE_BYTES, TOOL_LOG_PARAM_RULES
+
+# Zeichen, die ein Digest vom Anfang des Werts behält
+PREFIX_CHARS = 40
+
+
+def digest_value(value: Any) -> dict:
+    """Größe, Hash und Anfang eines Werts (statt des Werts selbst)."""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    data = text.encode("utf-8", errors="replace")
+    return {
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest()[:16],
+        "prefix": text[:PREFIX_CHARS],
+    }
+
+
+def compact_params(tool: str, params: dict) -> dict:
+    """Parameter eines Tool-Aufrufs fürs Session-Log.
+
+    Regeln pro Tool und Parameter (TOOL_LOG_PARAM_RULES):
+    - "keep": Wert unverändert
+    - "digest": immer Digest (z.B. Dateiinhalte)
+    - "redact": nur die Größe (z.B. Geheimnisse)
+    Ohne Regel werden Werte ab TOOL_LOG_INLINE_BYTES durch einen Digest ersetzt.
+    """
+    rules = TOOL_LOG_PARAM_RULES.get(tool, {})
+    compact = {}
+    for name, value in params.items():
+        rule = rules.get(name)
+        if rule == "keep" or value is None or isinstance(value, (bool, int, float)):
+            compact[name] = value
+        elif rule == "redact":
+            compact[name] = {"redacted": True, "size": digest_value(value)["size"]}
+        elif rule == "digest" or _size(value) > TOOL_LOG_INLINE_BYTES:
+            compact[name] = digest_value(value)
+        else:
+            compact[name] = value
+    return compact
+
+
+def _size(value: Any) -> int:
+    """Ungefähre Größe in Bytes (Strings ohne Kodieren abgeschätzt)."""
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value.encode("utf-8", errors="replace"))
+    return len(json.dumps(value, ensure_ascii=False, default=str))
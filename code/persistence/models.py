@@ -1,9 +1,13 @@
 """Datenmodelle für Persistenz."""
 
+from collections import deque
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+
+from code.config import TOOL_LOG_LIMIT
+from code.persistence.digest import compact_params
 
 
 class MemoryEntry(BaseModel):
@@ -14,12 +18,13 @@ class MemoryEntry(BaseModel):
     
 
 class ToolCall(BaseModel):
-    """Log eines Tool-Aufrufs."""
+    """Log eines Tool-Aufrufs (params kompakt, siehe digest.py)."""
     timestamp: datetime = Field(default_factory=datetime.now)
     tool: str
     params: dict
     result_summary: str = ""
     success: bool = True
+    duration_ms: Optional[float] = None
 
 
 class SessionData(BaseModel):
@@ -33,8 +38,8 @@ class SessionData(BaseModel):
     # Gedächtnis
     memories: list[MemoryEntry] = Field(default_factory=list)
     
-    # Tool-Log (letzte N Einträge)
-    tool_log: list[ToolCall] = Field(default_factory=list)
+    # Tool-Log (Ringpuffer der letzten TOOL_LOG_LIMIT Einträge)
+    tool_log: deque[ToolCall] = Field(default_factory=lambda: deque(maxlen=TOOL_LOG_LIMIT))
     
     # Kontext aus CLAUDE.md
     project_context: Optional[str] = None
@@ -42,20 +47,84 @@ class SessionData(BaseModel):
     # Zusammenfassung beim Speichern
     summary: str = ""
     
+    # Letztes im Snapshot enthaltene Journal-Event (siehe SessionManager):
+    # journal_seq für Events ohne Writer-ID, journal_marks pro Writer
+    journal_seq: int = 0
+    journal_marks: dict[str, int] = Field(default_factory=dict)
+
+    # Wird bei jedem Snapshot erhöht (optimistische Versionierung)
+    version: int = 0
+
+    # Stand der Dateien beim Laden/Schreiben: (inode, mtime, Größe) von
+    # session.json und Bytes im Journal - weicht er ab, hat ein anderer
+    # Prozess geschrieben
+    _disk_stamp: Optional[tuple] = PrivateAttr(default=None)
+    _journal_size: int = PrivateAttr(default=0)
+    
+    @field_validator("tool_log", mode="after")
+    @classmethod
+    def _bounded_tool_log(cls, value: deque) -> deque:
+        """Auch geladene Logs sind auf TOOL_LOG_LIMIT begrenzt."""
+        if value.maxlen != TOOL_LOG_LIMIT:
+            value = deque(value, maxlen=TOOL_LOG_LIMIT)
+        return value
+
     def add_memory(self, content: str, category: str = "note") -> None:
         """Fügt einen Memory-Eintrag hinzu."""
         self.memories.append(MemoryEntry(content=content, category=category))
         self.updated_at = datetime.now()
     
-    def log_tool_call(self, tool: str, params: dict, result_summary: str = "", success: bool = True) -> None:
-        """Loggt einen Tool-Aufruf."""
+    def log_tool_call(
+        self,
+        tool: str,
+        params: dict,
+        result_summary: str = "",
+        success: bool = True,
+        duration_ms: Optional[float] = None,
+    ) -> None:
+        """Loggt einen Tool-Aufruf (große Parameter als Digest).
+
+        Der Ringpuffer verdrängt den ältesten Eintrag ohne Kopieren.
+        """
         self.tool_log.append(ToolCall(
             tool=tool,
-            params=params,
+            params=compact_params(tool, params),
             result_summary=result_summary,
-            success=success
+            success=success,
+            duration_ms=duration_ms,
         ))
-        # Nur letzte 100 Einträge behalten
-        if len(self.tool_log) > 100:
-            self.tool_log = self.tool_log[-100:]
         self.updated_at = datetime.now()
+    
+    def has_applied(self, event: dict) -> bool:
+        """True wenn das Event schon im Snapshot enthalten ist."""
+        writer = event.get("w")
+        if writer is None:
+            return event["seq"] <= self.journal_seq
+        return event["seq"] <= self.journal_marks.get(writer, 0)
+
+    def apply_event(self, event: dict) -> None:
+        """Spielt ein Journal-Event ein (beim Laden einer Session).
+        
+        Events: memory (MemoryEntry), tool (ToolCall), clear_memories.
+        """
+        op, data = event["op"], event.get("data")
+        if op == "memory":
+            entry = MemoryEntry.model_validate(data)
+            self.memories.append(entry)
+            self.updated_at = entry.timestamp
+        elif op == "tool":
+            call = ToolCall.model_validate(data)
+            self.tool_log.append(call)
+            self.updated_at = call.timestamp
+        elif op == "clear_memories":
+            self.memories = []
+            self.updated_at = datetime.fromisoformat(data["timestamp"])
+        self.mark_applied(event)
+
+    def mark_applied(self, event: dict) -> None:
+        """Merkt sich das Event als enthalten (Nummer pro Writer)."""
+        writer = event.get("w")
+        if writer is None:
+            self.journal_seq = event["seq"]
+        else:
+            self.journal_marks[writer] = max(self.journal_marks.get(writer, 0), event["seq"])
@@ -2,33 +2,105 @@
 
 import json
 import fcntl
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import ContextManager, Iterator, Optional
 
+from code.config import JOURNAL_COMPACT_BYTES, SESSION_BACKEND
 from code.persistence.models import SessionData, MemoryEntry
+from code.utils.background import session_flusher
 from code.utils.logging import get_logger
+from code.utils.scoped import ScopedProxy, scoped
 
 logger = get_logger("persistence.session_manager")
 
-# Minimaler Abstand zwischen Auto-Saves in Sekunden
-AUTO_SAVE_THROTTLE_SECONDS = 5
+# Format von sessions_manifest.json
+MANIFEST_VERSION = 1
+
+
+def _write_atomic(path: Path, text: str, fsync: bool = False) -> None:
+    """Schreibt über eine temporäre Datei und rename (nie halb geschrieben).
+
+    fsync=True: Inhalt und Verzeichniseintrag sind danach auf der Platte.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fsync:
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _stat_stamp(path: Path) -> Optional[tuple]:
+    """(inode, mtime, Größe) - ändert sich bei jedem Schreiben per rename."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
 
 
 class SessionManager:
     """Verwaltet Session-Persistenz.
 
-    Sessions werden unter ~/.mcp_shell_tools/sessions/<projekt>/ gespeichert.
+    Sessions werden unter ~/.mcp_shell_tools/sessions/<projekt>/ gespeichert:
+    session.json ist ein Snapshot, journal.jsonl enthält die Änderungen
+    danach (Memories, Tool-Aufrufe) als angehängte Events. Laden = Snapshot
+    + Journal einspielen; ab JOURNAL_COMPACT_BYTES wird das Journal in einen
+    neuen Snapshot übernommen. Jedes Event trägt eine fortlaufende Nummer,
+    der Snapshot die letzte enthaltene - Events davor werden beim Laden
+    übersprungen (Absturz zwischen Snapshot und Kürzen des Journals).
+
+    Mehrere Prozesse (z.B. mehrere Desktop-Fenster) dürfen dasselbe Projekt
+    nutzen: Schreiben und Kompaktieren laufen unter einem exklusiven flock
+    auf .lock, Lesen unter einem geteilten. Event-Nummern gelten pro Writer
+    (journal_marks). session.json wird per tmp-Datei, fsync und rename
+    ersetzt. Hat seit dem Laden ein anderer Prozess geschrieben (Stempel
+    von session.json oder Journal-Größe weichen ab), wird vor dem Snapshot
+    zusammengeführt: Memories und Tool-Aufrufe aus Snapshot + Journal auf
+    der Platte (die eigenen Events stehen dort bereits), Zusammenfassung
+    und Working Directory aus dem eigenen Stand.
+
+    Events werden gepuffert (write-behind): session_flusher schreibt sie
+    spätestens nach SESSION_FLUSH_INTERVAL Sekunden in einem Rutsch, beim
+    Shutdown synchron. Lesende Methoden schreiben den Puffer vorher.
+
+    memory.md ist nur für Menschen: sie wird nur neu erzeugt, wenn sich
+    Memories oder Zusammenfassung geändert haben (Inhaltsversion), und zwar
+    beim nächsten flush() bzw. bei session_save - nicht pro Tool-Aufruf.
+
+    Thread-sicher: Tool-Aufrufe werden vom Hintergrund-Writer geloggt.
     """
 
     def __init__(self, base_dir: Optional[Path] = None):
         self.base_dir = base_dir or Path.home() / ".mcp_shell_tools"
+        # Verzeichnis wird erst beim ersten Speichern angelegt (kein I/O beim Import)
         self.sessions_dir = self.base_dir / "sessions"
-        self.sessions_dir.mkdir(parents=True, exist_ok=True)
 
         self.current_session: Optional[SessionData] = None
         self.current_project: Optional[str] = None
-        self._last_save: Optional[datetime] = None
+        self._lock = threading.RLock()
+        # Writer-ID für Journal-Events (eindeutig pro Manager und Prozess)
+        self._writer = uuid.uuid4().hex[:12]
+        self._seq = 0
+        # Serialisierte Journal-Events, die noch nicht geschrieben sind
+        self._pending: list[str] = []
+        self._pending_memories = False
+        # Inhaltsversion (Memories, Zusammenfassung) und Stand von memory.md
+        self._content_version = 0
+        self._markdown_version = 0
     
     def _project_dir(self, project_name: str) -> Path:
         """Gibt das Verzeichnis für ein Projekt zurück."""
@@ -44,79 +116,285 @@ class SessionManager:
         """Pfad zur memory.md."""
         return self._project_dir(project_name) / "memory.md"
     
+    def _journal_file(self, project_name: str) -> Path:
+        """Pfad zum journal.jsonl."""
+        return self._project_dir(project_name) / "journal.jsonl"
+
+    @contextmanager
+    def _file_lock(self, project_name: str, shared: bool = False) -> Iterator[None]:
+        """flock auf <projekt>/.lock - zwischen Prozessen (und Managern)."""
+        with open(self._project_dir(project_name) / ".lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
     def init_session(self, project_path: Path, project_name: Optional[str] = None) -> SessionData:
         """Initialisiert eine neue Session oder lädt eine bestehende."""
         name = project_name or project_path.name
-        self.current_project = name
+        # Events der bisherigen Session gehören in deren Journal
+        self.flush()
         
         # Bestehende Session laden falls vorhanden
         existing = self.load_session(name)
-        if existing:
-            existing.working_dir = str(project_path)
-            existing.updated_at = datetime.now()
-            self.current_session = existing
-            return existing
-        
-        # Neue Session erstellen
-        self.current_session = SessionData(
-            project_path=str(project_path),
-            project_name=name,
-            working_dir=str(project_path),
-        )
-        return self.current_session
+        with self._lock:
+            self.current_project = name
+            if existing:
+                existing.working_dir = str(project_path)
+                existing.updated_at = datetime.now()
+                self.current_session = existing
+                return existing
+            
+            # Neue Session erstellen
+            self.current_session = SessionData(
+                project_path=str(project_path),
+                project_name=name,
+                working_dir=str(project_path),
+            )
+            return self.current_session
     
     def load_session(self, project_name: str) -> Optional[SessionData]:
-        """Lädt eine Session aus der Datei."""
-        session_file = self._session_file(project_name)
-        
-        if not session_file.exists():
+        """Lädt eine Session: Snapshot plus Journal."""
+        self.flush()
+        if not self._session_file(project_name).exists():
             return None
-        
+        with self._file_lock(project_name, shared=True):
+            return self._read_session(project_name)
+
+    def _read_session(self, project_name: str) -> Optional[SessionData]:
+        """Liest Snapshot + Journal und merkt sich deren Stand (flock gehalten)."""
+        session_file = self._session_file(project_name)
         try:
+            stamp = _stat_stamp(session_file)
             data = json.loads(session_file.read_text(encoding="utf-8"))
-            return SessionData.model_validate(data)
+            session = SessionData.model_validate(data)
         except Exception:
             return None
+
+        session._disk_stamp = stamp
+        session._journal_size = self._replay_journal(session, self._journal_file(project_name))
+        return session
     
-    def save_session(self, summary: str = "", force: bool = False) -> bool:
-        """Speichert die aktuelle Session.
+    def _replay_journal(self, session: SessionData, journal_file: Path) -> int:
+        """Spielt die Events nach dem Snapshot ein, gibt die Journal-Größe zurück."""
+        try:
+            with open(journal_file, "rb") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        if not session.has_applied(event):
+                            session.apply_event(event)
+                    except Exception:
+                        # Unvollständige letzte Zeile (Absturz beim Schreiben)
+                        logger.warning(f"Journal-Eintrag übersprungen: {journal_file}")
+                return f.tell()
+        except FileNotFoundError:
+            return 0
+    
+    def save_session(self, summary: str = "") -> bool:
+        """Speichert die aktuelle Session (Snapshot wird immer geschrieben).
 
         Args:
             summary: Optionale Zusammenfassung
-            force: True = immer speichern, False = Throttling beachten
         """
+        with self._lock:
+            return self._save_session(summary)
+
+    def _save_session(self, summary: str) -> bool:
+        """Speichert die aktuelle Session (Lock muss gehalten werden)."""
         if not self.current_session or not self.current_project:
             return False
 
-        if summary:
+        if summary and summary != self.current_session.summary:
             self.current_session.summary = summary
+            self._content_changed()
+        elif not self._memory_file(self.current_project).exists():
+            self._content_changed()
 
         self.current_session.updated_at = datetime.now()
 
-        project_dir = self._project_dir(self.current_project)
-        project_dir.mkdir(parents=True, exist_ok=True)
+        if not self._write_snapshot():
+            return False
+
+        # Explizites Speichern: memory.md sofort aktualisieren (falls nötig)
+        self._flush_markdown()
+
+        return True
+
+    def _write_snapshot(self) -> bool:
+        """Schreibt session.json und leert das Journal (Lock muss gehalten werden).
+
+        Hat ein anderer Prozess seit dem Laden geschrieben, wird vorher
+        zusammengeführt (siehe Klassen-Docstring).
+        """
+        project = self.current_project
+        self._project_dir(project).mkdir(parents=True, exist_ok=True)
+        session_file = self._session_file(project)
+        journal_file = self._journal_file(project)
 
-        # JSON speichern mit File-Locking
-        session_file = self._session_file(self.current_project)
         try:
-            with open(session_file, 'w', encoding='utf-8') as f:
-                # Exclusive Lock für Schreibzugriff
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                try:
-                    f.write(self.current_session.model_dump_json(indent=2))
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-            self._last_save = datetime.now()
-            logger.debug(f"Session gespeichert: {self.current_project}")
+            with self._file_lock(project):
+                session = self.current_session
+                if (_stat_stamp(session_file) != session._disk_stamp
+                        or self._journal_bytes(journal_file) != session._journal_size):
+                    session = self._merge_from_disk()
+
+                session.version += 1
+                _write_atomic(session_file, session.model_dump_json(indent=2), fsync=True)
+                # Alle Events (auch gepufferte) stecken jetzt im Snapshot
+                journal_file.unlink(missing_ok=True)
+                session._disk_stamp = _stat_stamp(session_file)
+                session._journal_size = 0
+            self._pending.clear()
+            self._pending_memories = False
+            logger.debug(f"Session gespeichert: {project}")
         except Exception as e:
             logger.error(f"Session-Speicherfehler: {e}")
             return False
+        self._update_manifest()
+        return True
+
+    @staticmethod
+    def _journal_bytes(journal_file: Path) -> int:
+        try:
+            return journal_file.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _merge_from_disk(self) -> SessionData:
+        """Führt den eigenen Stand mit dem eines anderen Prozesses zusammen.
+
+        Die eigenen gepufferten Events landen zuerst im Journal; danach
+        enthält Snapshot + Journal auf der Platte alle Memories und
+        Tool-Aufrufe. Vom eigenen Stand kommen die Einzelwerte dazu.
+        (Lock und flock müssen gehalten werden.)
+        """
+        ours = self.current_session
+        self._write_pending()
+        merged = self._read_session(self.current_project)
+        if merged is None:
+            # Kein (lesbarer) Snapshot auf der Platte - eigener Stand gilt
+            return ours
+
+        merged.summary = ours.summary
+        merged.working_dir = ours.working_dir
+        merged.project_context = ours.project_context
+        merged.updated_at = max(merged.updated_at, ours.updated_at)
+        merged.journal_marks[self._writer] = max(merged.journal_marks.get(self._writer, 0), self._seq)
+        logger.info(f"Session {self.current_project}: Änderungen eines anderen Prozesses übernommen")
+
+        self.current_session = merged
+        self._content_changed()
+        return merged
+
+    def compact_session(self, project_name: str) -> bool:
+        """Übernimmt das Journal einer (ruhenden) Session in ihren Snapshot.
+
+        Für Wartungsläufe (utils/archive.py); die aktuelle Session dieses
+        Managers kompaktiert sich selbst.
+        """
+        if project_name == self.current_project or not self._journal_file(project_name).exists():
+            return False
+        with self._lock, self._file_lock(project_name):
+            session = self._read_session(project_name)
+            if session is None:
+                return False
+            session.version += 1
+            try:
+                _write_atomic(self._session_file(project_name), session.model_dump_json(indent=2), fsync=True)
+                self._journal_file(project_name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Kompaktieren fehlgeschlagen: {project_name}: {e}")
+                return False
+        return True
+
+    def _append_event(self, op: str, data: dict) -> bool:
+        """Puffert ein Event fürs Journal (Lock muss gehalten werden).
+
+        Kosten unabhängig von der Session-Größe und ohne I/O; nur beim
+        ersten Event (noch kein Snapshot) wird session.json sofort
+        geschrieben. Den Rest erledigt flush().
+        """
+        if not self.current_session or not self.current_project:
+            return False
+
+        self._seq += 1
+        event = {"seq": self._seq, "w": self._writer, "op": op, "data": data}
+        self.current_session.mark_applied(event)
+        self._pending.append(json.dumps(event, ensure_ascii=False) + "\n")
 
-        # Markdown generieren
-        self._write_memory_markdown()
+        if self.current_session._disk_stamp is None:
+            # Snapshot als Basis fürs Einspielen (enthält das Event bereits;
+            # beim Zusammenführen kommt es über den Puffer ins Journal)
+            return self._write_snapshot()
 
+        if op != "tool":
+            self._pending_memories = True
+        session_flusher.mark_dirty(self)
         return True
-    
+
+    def flush(self) -> bool:
+        """Schreibt gepufferte Events und ggf. memory.md (vom session_flusher)."""
+        with self._lock:
+            ok = self._flush_journal()
+            self._flush_markdown()
+            return ok
+
+    def _flush_journal(self) -> bool:
+        """Schreibt gepufferte Events mit einem Schreibvorgang ins Journal.
+
+        Ab JOURNAL_COMPACT_BYTES wird stattdessen ein Snapshot geschrieben.
+        """
+        if not self._pending:
+            return True
+
+        try:
+            with self._file_lock(self.current_project):
+                size = self._write_pending()
+        except Exception as e:
+            logger.error(f"Journal-Schreibfehler: {e}")
+            return False
+
+        if size >= JOURNAL_COMPACT_BYTES:
+            return self._write_snapshot()
+        if self._pending_memories:
+            self._pending_memories = False
+            self._update_manifest()
+        return True
+
+    def _write_pending(self) -> int:
+        """Hängt den Puffer ans Journal, gibt dessen Größe zurück (flock gehalten).
+
+        Hat zwischendurch ein anderer Prozess angehängt, bleibt die gemerkte
+        Größe abweichend - der nächste Snapshot führt dann zusammen.
+        """
+        session = self.current_session
+        with open(self._journal_file(self.current_project), "ab") as f:
+            before = f.seek(0, os.SEEK_END)
+            f.write("".join(self._pending).encode("utf-8"))
+            size = f.tell()
+        if before == session._journal_size:
+            session._journal_size = size
+        self._pending.clear()
+        return size
+
+    def _content_changed(self) -> None:
+        """Memories oder Zusammenfassung geändert: memory.md beim nächsten flush()."""
+        self._content_version += 1
+        session_flusher.mark_dirty(self)
+
+    def _flush_markdown(self) -> None:
+        """Erzeugt memory.md, falls sich der Inhalt seit dem letzten Mal geändert hat."""
+        if self._markdown_version == self._content_version:
+            return
+        try:
+            self._write_memory_markdown()
+        except OSError as e:
+            logger.error(f"memory.md nicht geschrieben: {e}")
+            return
+        self._markdown_version = self._content_version
+
     def _write_memory_markdown(self) -> None:
         """Schreibt memory.md im Markdown-Format."""
         if not self.current_session or not self.current_project:
@@ -166,72 +444,260 @@ class SessionManager:
         # Letzte Tool-Aufrufe
         if session.tool_log:
             lines.extend(["## Letzte Aktionen", ""])
-            for call in session.tool_log[-10:]:
+            for call in list(session.tool_log)[-10:]:
                 timestamp = call.timestamp.strftime("%H:%M:%S")
                 status = "✓" if call.success else "✗"
                 lines.append(f"- `{timestamp}` {status} **{call.tool}** {call.result_summary[:50]}")
             lines.append("")
         
-        memory_file = self._memory_file(self.current_project)
-        memory_file.write_text("\n".join(lines), encoding="utf-8")
+        # Atomar: Leser sehen nie eine halb geschriebene Datei
+        _write_atomic(self._memory_file(self.current_project), "\n".join(lines))
     
     def list_sessions(self) -> list[dict]:
-        """Listet alle verfügbaren Sessions."""
-        sessions = []
-        
-        for project_dir in self.sessions_dir.iterdir():
-            if not project_dir.is_dir():
-                continue
-            
-            session_file = project_dir / "session.json"
-            if session_file.exists():
-                try:
-                    data = json.loads(session_file.read_text(encoding="utf-8"))
-                    sessions.append({
-                        "name": data.get("project_name", project_dir.name),
-                        "path": data.get("project_path", ""),
-                        "updated": data.get("updated_at", ""),
-                        "summary": data.get("summary", "")[:100],
-                        "memories": len(data.get("memories", [])),
-                    })
-                except Exception:
+        """Listet alle verfügbaren Sessions (über das Manifest).
+
+        Pro Session werden nur session.json und journal.jsonl gestat'et;
+        gelesen werden nur Sessions, die sich seit dem Manifest geändert
+        haben. Neue oder gelöschte Projekte erkennt die mtime von
+        sessions_dir, ein kaputtes Manifest wird neu aufgebaut.
+        """
+        self.flush()
+        if not self.sessions_dir.is_dir():
+            return []
+
+        with self._lock, self._manifest_lock():
+            manifest = self._read_manifest()
+            entries = manifest["entries"] if manifest else {}
+            dir_mtime = self.sessions_dir.stat().st_mtime_ns
+
+            if manifest and manifest["dir_mtime"] == dir_mtime:
+                names = list(entries)
+            else:
+                names = [p.name for p in self.sessions_dir.iterdir() if p.is_dir()]
+
+            changed = manifest is None or manifest["dir_mtime"] != dir_mtime
+            current = {}
+            for name in names:
+                project_dir = self.sessions_dir / name
+                stamp = self._stamp(project_dir)
+                entry = entries.get(name)
+                if entry is not None and entry["stamp"] == stamp:
+                    current[name] = entry
                     continue
-        
+                changed = True
+                info = self._read_session_info(project_dir) if stamp is not None else None
+                if info is not None:
+                    current[name] = {"stamp": stamp, "session": info}
+
+            if changed:
+                self._write_manifest({"version": MANIFEST_VERSION, "dir_mtime": dir_mtime, "entries": current})
+
+        sessions = [entry["session"] for entry in current.values()]
         # Nach Aktualisierungsdatum sortieren
         sessions.sort(key=lambda x: x["updated"], reverse=True)
         return sessions
+
+    # --- Manifest (session_list ohne alle session.json zu parsen) ---
+
+    def _manifest_file(self) -> Path:
+        """Pfad zum Manifest (außerhalb von sessions_dir, damit dessen mtime
+        nur neue/gelöschte Projekte anzeigt)."""
+        return self.base_dir / "sessions_manifest.json"
+
+    @contextmanager
+    def _manifest_lock(self) -> Iterator[None]:
+        """flock auf .manifest.lock - Lesen, Ändern und Schreiben des Manifests
+        ist sonst zwischen Prozessen nicht atomar (verlorene Einträge)."""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.base_dir / ".manifest.lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _stamp(project_dir: Path) -> Optional[list[int]]:
+        """mtime und Größe von session.json und journal.jsonl (None = keine Session)."""
+        stamp = []
+        for name in ("session.json", "journal.jsonl"):
+            try:
+                st = (project_dir / name).stat()
+            except OSError:
+                if name == "session.json":
+                    return None
+                stamp += [0, 0]
+            else:
+                stamp += [st.st_mtime_ns, st.st_size]
+        return stamp
+
+    @staticmethod
+    def _session_info(session: SessionData) -> dict:
+        """Die Felder, die session_list/session_resume brauchen."""
+        return {
+            "name": session.project_name,
+            "path": session.project_path,
+            "updated": session.updated_at.isoformat(),
+            "summary": session.summary[:100],
+            "memories": len(session.memories),
+        }
+
+    def _read_session_info(self, project_dir: Path) -> Optional[dict]:
+        """Liest eine Session vollständig (Snapshot + Journal)."""
+        try:
+            data = json.loads((project_dir / "session.json").read_text(encoding="utf-8"))
+            session = SessionData.model_validate(data)
+        except Exception:
+            return None
+        # Memories/Zeitstempel seit dem Snapshot stehen im Journal
+        self._replay_journal(session, project_dir / "journal.jsonl")
+        return self._session_info(session)
+
+    def _read_manifest(self) -> Optional[dict]:
+        """Manifest oder None (fehlt, kaputt oder alte Version)."""
+        try:
+            manifest = json.loads(self._manifest_file().read_text(encoding="utf-8"))
+            if manifest.get("version") != MANIFEST_VERSION:
+                return None
+            manifest["dir_mtime"], manifest["entries"]
+            return manifest
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Session-Manifest unbrauchbar, wird neu aufgebaut: {e}")
+            return None
+
+    def _write_manifest(self, manifest: dict) -> None:
+        try:
+            _write_atomic(self._manifest_file(), json.dumps(manifest, ensure_ascii=False))
+        except OSError as e:
+            logger.error(f"Session-Manifest nicht geschrieben: {e}")
+
+    def _update_manifest(self) -> None:
+        """Trägt die aktuelle Session ins Manifest ein (Lock muss gehalten werden)."""
+        with self._manifest_lock():
+            manifest = self._read_manifest()
+            if manifest is None:
+                return  # wird beim nächsten list_sessions() aufgebaut
+            name = self._project_dir(self.current_project).name
+            stamp = self._stamp(self._project_dir(self.current_project))
+            if stamp is None:
+                return
+            manifest["entries"][name] = {"stamp": stamp, "session": self._session_info(self.current_session)}
+            self._write_manifest(manifest)
     
+    def search_memories(
+        self,
+        query: str,
+        project: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Sucht Memory-Einträge über alle (oder ein) Projekt(e).
+
+        Alle Wörter der Anfrage müssen vorkommen (ohne Groß-/Kleinschreibung).
+        Dateibasiert: liest jede Session - für viele Projekte SqliteSessionManager.
+        """
+        self.flush()
+        words = query.lower().split()
+        if not words or not self.sessions_dir.is_dir():
+            return []
+
+        hits = []
+        for project_dir in self.sessions_dir.iterdir():
+            session_file = project_dir / "session.json"
+            if not session_file.exists():
+                continue
+            try:
+                session = SessionData.model_validate_json(session_file.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            if project and session.project_name != project:
+                continue
+            self._replay_journal(session, project_dir / "journal.jsonl")
+            for mem in session.memories:
+                text = mem.content.lower()
+                if all(word in text for word in words):
+                    hits.append({
+                        "project": session.project_name,
+                        "timestamp": mem.timestamp,
+                        "category": mem.category,
+                        "content": mem.content,
+                    })
+
+        hits.sort(key=lambda hit: hit["timestamp"], reverse=True)
+        return hits[:limit]
+
     def add_memory(self, content: str, category: str = "note") -> bool:
         """Fügt einen Memory-Eintrag hinzu und speichert."""
-        if not self.current_session:
-            return False
-        
-        self.current_session.add_memory(content, category)
-        return self.save_session()
-    
-    def log_tool_call(self, tool: str, params: dict, result_summary: str = "", success: bool = True) -> None:
-        """Loggt einen Tool-Aufruf."""
-        if self.current_session:
-            self.current_session.log_tool_call(tool, params, result_summary, success)
-            # Auto-Save mit Throttling (nicht bei jedem Aufruf)
-            if self._should_auto_save():
-                self.save_session()
-
-    def _should_auto_save(self) -> bool:
-        """Prüft ob Auto-Save durchgeführt werden soll (Throttling)."""
-        if self._last_save is None:
+        with self._lock:
+            if not self.current_session:
+                return False
+            
+            self.current_session.add_memory(content, category)
+            entry = self.current_session.memories[-1]
+            if not self._append_event("memory", entry.model_dump(mode="json")):
+                return False
+            self._content_changed()
             return True
-        elapsed = (datetime.now() - self._last_save).total_seconds()
-        return elapsed >= AUTO_SAVE_THROTTLE_SECONDS
     
+    def log_tool_call(
+        self,
+        tool: str,
+        params: dict,
+        result_summary: str = "",
+        success: bool = True,
+        duration_ms: Optional[float] = None,
+    ) -> None:
+        """Loggt einen Tool-Aufruf (ein Journal-Event, kein Snapshot)."""
+        with self._lock:
+            if self.current_session:
+                self.current_session.log_tool_call(tool, params, result_summary, success, duration_ms)
+                call = self.current_session.tool_log[-1]
+                self._append_event("tool", call.model_dump(mode="json"))
+    
+    def close(self) -> None:
+        """Schreibt gepufferte Events (Datei-Backend: sonst nichts zu tun)."""
+        self.flush()
+
     def clear_memories(self) -> bool:
         """Löscht alle Memory-Einträge."""
-        if not self.current_session:
-            return False
-        
-        self.current_session.memories = []
-        return self.save_session()
+        with self._lock:
+            if not self.current_session:
+                return False
+            
+            self.current_session.memories = []
+            self.current_session.updated_at = datetime.now()
+            if not self._append_event("clear_memories", {"timestamp": self.current_session.updated_at.isoformat()}):
+                return False
+            self._content_changed()
+            return True
+
+
+def create_session_manager(base_dir: Optional[Path] = None) -> SessionManager:
+    """SessionManager für das konfigurierte Backend (SESSION_BACKEND)."""
+    if SESSION_BACKEND == "sqlite":
+        from code.persistence.sqlite_store import SqliteSessionManager
+        return SqliteSessionManager(base_dir)
+    return SessionManager(base_dir)
+
+
+# Session des Prozesses (stdio-Modus bzw. außerhalb einer Verbindung)
+_default_manager = create_session_manager()
+
+# Session der aktuellen Client-Verbindung (Shared-Modus)
+_current_manager: ContextVar[Optional[SessionManager]] = ContextVar("session_manager", default=None)
+
+
+def current_session_manager() -> SessionManager:
+    """SessionManager der aktuellen Verbindung, sonst der des Prozesses."""
+    value = _current_manager.get()
+    return _default_manager if value is None else value
+
+
+def session_scope(manager: SessionManager) -> ContextManager[SessionManager]:
+    """Setzt den SessionManager für alles, was im aktuellen Kontext läuft."""
+    return scoped(_current_manager, manager)
 
 
 # Globale Instanz
-session_manager = SessionManager()
+session_manager: SessionManager = ScopedProxy(_current_manager, _default_manager)
@@ -0,0 +1,290 @@
+"""SQLite-Backend für Sessions: Indizes und Volltextsuche über alle Projekte."""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from code.config import TOOL_LOG_LIMIT
+from code.persistence.models import MemoryEntry, SessionData, ToolCall
+from code.persistence.session_manager import SessionManager
+from code.utils.logging import get_logger
+
+logger = get_logger("persistence.sqlite_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    project_path TEXT NOT NULL,
+    working_dir TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    project_context TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    category TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memories_project ON memories(project, timestamp);
+
+CREATE TABLE IF NOT EXISTS tool_calls (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result_summary TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    duration_ms REAL
+);
+CREATE INDEX IF NOT EXISTS tool_calls_project ON tool_calls(project, timestamp);
+"""
+
+# Volltextindex über memories.content, per Trigger synchron gehalten
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+    content, content='memories', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+def _fts_query(query: str) -> str:
+    """Anfrage als FTS5-Ausdruck: jedes Wort als Phrase (keine Operatoren)."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+
+class SqliteSessionManager(SessionManager):
+    """SessionManager mit SQLite (WAL) statt session.json/journal.jsonl.
+
+    Tabellen sessions, memories und tool_calls mit Indizes auf Projekt und
+    Zeitstempel; memory_search nutzt einen FTS5-Index (ohne FTS5: LIKE).
+    memory.md wird weiterhin ins Projektverzeichnis geschrieben.
+    """
+
+    def __init__(self, base_dir: Optional[Path] = None, db_path: Optional[Path] = None):
+        super().__init__(base_dir)
+        self.db_path = db_path or self.base_dir / "sessions.db"
+        self._db: Optional[sqlite3.Connection] = None
+        self._fts = False
+
+    def _conn(self) -> sqlite3.Connection:
+        """Verbindung (lazy); Zugriffe sind über self._lock serialisiert."""
+        if self._db is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.executescript(_SCHEMA)
+            try:
+                db.executescript(_FTS_SCHEMA)
+                self._fts = True
+            except sqlite3.OperationalError:
+                logger.warning("SQLite ohne FTS5 - memory_search nutzt LIKE")
+            self._db = db
+        return self._db
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- Laden ---
+
+    def load_session(self, project_name: str) -> Optional[SessionData]:
+        """Lädt eine Session mit Memories und den letzten Tool-Aufrufen."""
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT project_path, working_dir, created_at, updated_at, summary, project_context "
+                "FROM sessions WHERE name = ?",
+                (project_name,),
+            ).fetchone()
+            if row is None:
+                return None
+            memories = db.execute(
+                "SELECT timestamp, category, content FROM memories WHERE project = ? ORDER BY id",
+                (project_name,),
+            ).fetchall()
+            calls = db.execute(
+                "SELECT timestamp, tool, params, result_summary, success, duration_ms FROM ("
+                "  SELECT * FROM tool_calls WHERE project = ? ORDER BY id DESC LIMIT ?"
+                ") ORDER BY id",
+                (project_name, TOOL_LOG_LIMIT),
+            ).fetchall()
+
+        return SessionData(
+            project_name=project_name,
+            project_path=row[0],
+            working_dir=row[1],
+            created_at=datetime.fromisoformat(row[2]),
+            updated_at=datetime.fromisoformat(row[3]),
+            summary=row[4],
+            project_context=row[5],
+            memories=[
+                MemoryEntry(timestamp=datetime.fromisoformat(ts), category=category, content=content)
+                for ts, category, content in memories
+            ],
+            tool_log=[
+                ToolCall(
+                    timestamp=datetime.fromisoformat(ts),
+                    tool=tool,
+                    params=json.loads(params),
+                    result_summary=summary,
+                    success=bool(success),
+                    duration_ms=duration_ms,
+                )
+                for ts, tool, params, summary, success, duration_ms in calls
+            ],
+        )
+
+    def list_sessions(self) -> list[dict]:
+        """Listet alle Sessions (eine Abfrage über den Index auf updated_at)."""
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT s.name, s.project_path, s.updated_at, substr(s.summary, 1, 100), "
+                "  (SELECT count(*) FROM memories m WHERE m.project = s.name) "
+                "FROM sessions s ORDER BY s.updated_at DESC"
+            ).fetchall()
+        return [
+            {"name": name, "path": path, "updated": updated, "summary": summary, "memories": count}
+            for name, path, updated, summary, count in rows
+        ]
+
+    def search_memories(
+        self,
+        query: str,
+        project: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Volltextsuche über Memory-Einträge, nach Relevanz sortiert."""
+        if not query.split():
+            return []
+
+        with self._lock:
+            db = self._conn()
+            if self._fts:
+                sql = (
+                    "SELECT m.project, m.timestamp, m.category, m.content FROM memories_fts "
+                    "JOIN memories m ON m.id = memories_fts.rowid "
+                    "WHERE memories_fts MATCH ?"
+                )
+                params: list = [_fts_query(query)]
+                order = " ORDER BY bm25(memories_fts)"
+            else:
+                words = query.split()
+                sql = "SELECT m.project, m.timestamp, m.category, m.content FROM memories m WHERE "
+                sql += " AND ".join("m.content LIKE ?" for _ in words)
+                params = [f"%{word}%" for word in words]
+                order = " ORDER BY m.timestamp DESC"
+            if project:
+                sql += " AND m.project = ?"
+                params.append(project)
+            rows = db.execute(sql + order + " LIMIT ?", (*params, limit)).fetchall()
+
+        return [
+            {
+                "project": project_name,
+                "timestamp": datetime.fromisoformat(ts),
+                "category": category,
+                "content": content,
+            }
+            for project_name, ts, category, content in rows
+        ]
+
+    # --- Schreiben ---
+
+    def _write_snapshot(self) -> bool:
+        """Schreibt die Session-Zeile (Memories/Tool-Aufrufe liegen schon in der DB)."""
+        session = self.current_session
+        try:
+            self._conn().execute(
+                "INSERT INTO sessions (name, project_path, working_dir, created_at, updated_at, "
+                "  summary, project_context) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET project_path = excluded.project_path, "
+                "  working_dir = excluded.working_dir, updated_at = excluded.updated_at, "
+                "  summary = excluded.summary, project_context = excluded.project_context",
+                (
+                    self.current_project,
+                    session.project_path,
+                    session.working_dir,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    session.summary,
+                    session.project_context,
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Session-Speicherfehler: {e}")
+            return False
+        return True
+
+    def _append_event(self, op: str, data: dict) -> bool:
+        """Schreibt die Änderung als Zeile(n) in einer Transaktion."""
+        if not self.current_session or not self.current_project:
+            return False
+
+        project = self.current_project
+        db = self._conn()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if not self._write_snapshot():
+                    raise sqlite3.Error("Session-Zeile nicht geschrieben")
+                if op == "memory":
+                    db.execute(
+                        "INSERT INTO memories (project, timestamp, category, content) VALUES (?, ?, ?, ?)",
+                        (project, data["timestamp"], data["category"], data["content"]),
+                    )
+                elif op == "tool":
+                    cursor = db.execute(
+                        "INSERT INTO tool_calls (project, timestamp, tool, params, result_summary, "
+                        "  success, duration_ms) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            project, data["timestamp"], data["tool"],
+                            json.dumps(data["params"], ensure_ascii=False),
+                            data["result_summary"], int(data["success"]), data["duration_ms"],
+                        ),
+                    )
+                    if cursor.lastrowid % TOOL_LOG_LIMIT == 0:
+                        # Gelegentlich alte Aufrufe des Projekts entfernen
+                        db.execute(
+                            "DELETE FROM tool_calls WHERE project = ? AND id <= ("
+                            "  SELECT id FROM tool_calls WHERE project = ? "
+                            "  ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                            (project, project, TOOL_LOG_LIMIT),
+                        )
+                elif op == "clear_memories":
+                    db.execute("DELETE FROM memories WHERE project = ?", (project,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.error(f"Session-Speicherfehler: {e}")
+            return False
+        return True
+
+    def _update_manifest(self) -> None:
+        """Kein Manifest nötig: list_sessions() ist eine Indexabfrage."""
+
+    def _write_memory_markdown(self) -> None:
+        """memory.md wie beim Datei-Backend (Verzeichnis bei Bedarf anlegen)."""
+        if self.current_project:
+            self._project_dir(self.current_project).mkdir(parents=True, exist_ok=True)
+        super()._write_memory_markdown()
@@ -9,43 +9,76 @@ Bietet Claude Zugriff auf:
 - Session-Management
 """
 
+import inspect
+import threading
+import time
 from functools import wraps
-from typing import Any, Callable
+from pathlib import Path
+from typing import Annotated, Any, Callable, NamedTuple, Optional
 
 from mcp.server.fastmcp import FastMCP
+from pydantic import Field
 
-from code.persistence import session_manager
+from code.config import DEADLINE_GRACE_SECONDS
+from code.state import WorkstationState, request_scope, state_scope
+from code.utils.background import log_writer
+from code.utils.executor import Deadline, DeadlineExceeded, deadline_scope
+from code.utils.mcp_compat import patch_request_cancellation
+from code.utils.metrics import loop_monitor, measure_call, metrics, payload_bytes
+from code.utils.output import is_error_result
+from code.utils.profiling import profiler
+from code.utils.scheduler import AdmissionRejected, scheduler
+from code.utils.socket_transport import serve_unix
 
-# Tool-Imports
-from code.tools.filesystem import (
-    file_read,
-    file_write,
-    file_list,
-    glob_search,
-)
-from code.tools.editor import (
-    str_replace,
-    diff_preview,
-)
-from code.tools.search import grep
-from code.tools.shell import shell_exec
-from code.tools.project import cd, cwd, project_init
-from code.tools.memory import (
-    memory_add,
-    memory_show,
-    memory_clear,
-)
-from code.tools.session import (
-    session_save,
-    session_resume,
-    session_list,
-)
-from code.tools.commands import command, settings as command_settings
+# Tool-Module werden erst bei Bedarf importiert (siehe ensure_tools_registered)
+import code.tools as tools
 
 
 # --- Server Setup ---
 
-mcp = FastMCP(
+class LazyFastMCP(FastMCP):
+    """FastMCP mit verzögerter Tool-Registrierung.
+
+    Tool-Module werden erst beim ersten tools/list bzw. tools/call
+    importiert und registriert - der initialize-Handshake wartet nicht
+    darauf. Jeder tools/call hält die Messung des Event-Loop-Lags am
+    Laufen (loop_monitor).
+    """
+
+    async def list_tools(self):
+        ensure_tools_registered()
+        return await super().list_tools()
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]):
+        ensure_tools_registered()
+        loop_monitor.touch()
+        return await super().call_tool(name, arguments)
+
+    async def run_unix_async(self, path: Path) -> None:
+        """Shared-Modus: mehrere Clients über einen Unix-Socket.
+
+        Pools, Result-Store und Metriken werden geteilt, jede Verbindung
+        hat ihren eigenen WorkstationState (Working Directory, CLAUDE.md)
+        und ihre eigene aktuelle Session.
+        """
+        from code.persistence.session_manager import create_session_manager, session_scope
+
+        async def handle(read_stream, write_stream):
+            manager = create_session_manager()
+            try:
+                with state_scope(WorkstationState()), session_scope(manager):
+                    await self._mcp_server.run(
+                        read_stream,
+                        write_stream,
+                        self._mcp_server.create_initialization_options(),
+                    )
+            finally:
+                manager.close()
+
+        await serve_unix(path, handle)
+
+
+mcp = LazyFastMCP(
     "mcp_shell_tools",
     instructions="""Workstation MCP Server für lokale Entwicklung.
 
@@ -56,8 +89,10 @@ Workflow-Empfehlungen:
 4. 'str_replace' für präzise Änderungen (nie ganze Datei überschreiben)
 5. 'grep' und 'glob_search' zum Finden von Code
 6. 'shell_exec' für Git, Tests, Build-Befehle
-7. 'memory_add' für Erkenntnisse und Entscheidungen
-8. 'session_save' am Ende mit Zusammenfassung
+7. 'result_page' für den Rest gekürzter Ausgaben (statt erneut ausführen)
+8. 'transcript_search' für Ausgaben früherer Aufrufe (statt erneut ausführen)
+9. 'memory_add' für Erkenntnisse und Entscheidungen
+10. 'session_save' am Ende mit Zusammenfassung
 
 Tool-Aufrufe werden automatisch geloggt und persistiert.
 """
@@ -66,51 +101,147 @@ Tool-Aufrufe werden automatisch geloggt und persistiert.
 
 # --- Auto-Log Wrapper ---
 
-def with_auto_log(tool_name: str, func: Callable) -> Callable:
-    """Wrapper der Tool-Aufrufe automatisch loggt."""
+def _log_tool_call(
+    tool_name: str,
+    params: dict,
+    result_str: str,
+    success: bool,
+    duration_ms: Optional[float] = None,
+) -> None:
+    """Schreibt einen Tool-Aufruf in Session-Log, tool.log und Transcript.
+
+    Läuft im Hintergrund-Writer, nicht im Request-Pfad.
+    """
+    start = time.perf_counter()
+
+    # Summary für Session-Log (kurz)
+    summary = result_str[:50].replace('\n', ' ') if success else result_str[:50]
+
+    from code.persistence import session_manager
+    from code.tools.commands import settings as command_settings
+
+    # Session-Log (nur wenn Session aktiv)
+    session_manager.log_tool_call(
+        tool=tool_name,
+        params=params,
+        result_summary=summary,
+        success=success,
+        duration_ms=duration_ms,
+    )
+
+    # File-Log + Transcript (vollständiges Result für Transcript!)
+    command_settings.log_call(tool_name, params, result_str, success, duration_ms)
+
+    metrics.record_log(tool_name, time.perf_counter() - start)
+
+
+async def _within_deadline(coro, deadline: Optional[Deadline]) -> Any:
+    """Führt den Tool-Aufruf aus; mit Zeitbudget hart begrenzt (+ Nachfrist)."""
     import asyncio
 
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        # Params sind jetzt direkt in kwargs (flache Signatur)
-        params = kwargs.copy()
+    if deadline is None:
+        return await coro
+    try:
+        return await asyncio.wait_for(coro, max(0.0, deadline.remaining()) + DEADLINE_GRACE_SECONDS)
+    except (DeadlineExceeded, asyncio.TimeoutError):
+        # Tool hat das Budget nicht selbst abgefangen bzw. nicht reagiert
+        return f"Fehler: Zeitbudget von {deadline.budget_ms} ms überschritten"
 
-        try:
-            result = await func(*args, **kwargs)
-
-            # Result als String
-            result_str = result if isinstance(result, str) else str(result)
-            
-            # Summary für Session-Log (kurz)
-            summary = result_str[:50].replace('\n', ' ')
-
-            # Session-Log (nur wenn Session aktiv)
-            session_manager.log_tool_call(
-                tool=tool_name,
-                params=params,
-                result_summary=summary,
-                success=True
-            )
 
-            # File-Log + Transcript (vollständiges Result für Transcript!)
-            command_settings.log_call(tool_name, params, result_str, True)
-
-            return result
-
-        except asyncio.CancelledError:
-            # Request wurde abgebrochen - nicht loggen, direkt weitergeben
-            raise
-        except Exception as e:
-            error_str = str(e)
-            session_manager.log_tool_call(
-                tool=tool_name,
-                params=params,
-                result_summary=error_str[:50],
-                success=False
-            )
-            command_settings.log_call(tool_name, params, error_str, False)
-            raise
+def with_auto_log(
+    tool_name: str,
+    func: Callable,
+    log: bool = True,
+    cost: str = "interactive",
+) -> Callable:
+    """Wrapper der Tool-Aufrufe zulässt, misst und (optional) automatisch loggt.
+
+    Der Scheduler lässt den Aufruf gemäß Kostenklasse zu (Limit, Priorität,
+    max. Wartezeit). Gemessen werden Ausführungszeit, Wartezeit (Scheduler
+    und Worker-Threads), Parameter-/Ergebnisgröße und Fehler (siehe /stats).
+
+    Jedes Tool erhält zusätzlich den optionalen Parameter deadline_ms: Das
+    Budget gilt ab Eingang inkl. Wartezeit; Walker und Scanner liefern bei
+    Ablauf ein als unvollständig markiertes Teilergebnis. Reagiert ein Tool
+    nicht rechtzeitig, wird es nach DEADLINE_GRACE_SECONDS abgebrochen.
+    """
+    import asyncio
 
+    @wraps(func)
+    async def wrapper(*args, deadline_ms: Optional[int] = None, **kwargs):
+        # Params sind jetzt direkt in kwargs (flache Signatur)
+        params = kwargs.copy()
+        if deadline_ms is not None:
+            params["deadline_ms"] = deadline_ms
+        bytes_in = payload_bytes(params)
+
+        with measure_call() as timing, deadline_scope(deadline_ms) as deadline:
+            try:
+                timing.queue_seconds += await scheduler.acquire(
+                    cost, deadline.remaining() if deadline else None
+                )
+            except AdmissionRejected as e:
+                # Zu lange in der Warteschlange - ablehnen statt verspätet ausführen
+                metrics.record_call(tool_name, 0.0, e.waited, bytes_in, 0, "error")
+                if log:
+                    await log_writer.submit_async(_log_tool_call, tool_name, params, str(e), False)
+                return f"Fehler: {e}"
+
+            # Ab hier gibt finally den Slot frei - auch wenn profiler.begin() scheitert
+            profile = None
+            start = time.perf_counter()
+            try:
+                # /profile: cProfile (+ tracemalloc) für ausgewählte Tools
+                profile = profiler.begin(tool_name)
+                start = time.perf_counter()
+                # Eigene State-Kopie: parallele Aufrufe sehen ein stabiles cwd
+                with request_scope():
+                    result = await _within_deadline(func(*args, **kwargs), deadline)
+            except asyncio.CancelledError:
+                # Request wurde abgebrochen - nicht loggen, direkt weitergeben
+                metrics.record_call(tool_name, time.perf_counter() - start,
+                                    timing.queue_seconds, bytes_in, 0, "cancelled")
+                raise
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                metrics.record_call(tool_name, elapsed, timing.queue_seconds, bytes_in, 0, "error")
+                if log:
+                    await log_writer.submit_async(_log_tool_call, tool_name, params, str(e), False, elapsed * 1000)
+                raise
+            finally:
+                scheduler.release(cost)
+                if profile is not None:
+                    profile.finish()
+
+        elapsed = time.perf_counter() - start
+
+        # Result als String
+        result_str = result if isinstance(result, str) else str(result)
+        success = not is_error_result(result_str)
+        metrics.record_call(tool_name, elapsed, timing.queue_seconds, bytes_in,
+                            len(result_str.encode("utf-8", errors="replace")), "ok" if success else "error")
+        if log:
+            await log_writer.submit_async(_log_tool_call, tool_name, params, result_str, success, elapsed * 1000)
+
+        if profile is not None and isinstance(result, str):
+            result = f"{result}\n\n{profile.report()}"
+
+        return result
+
+    # deadline_ms im Schema jedes Tools anbieten (FastMCP liest __signature__)
+    signature = inspect.signature(func, eval_str=True)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter(
+            "deadline_ms",
+            inspect.Parameter.KEYWORD_ONLY,
+            default=None,
+            annotation=Annotated[Optional[int], Field(
+                description="Zeitbudget in ms; bei Ablauf Teilergebnis statt Weiterarbeit",
+                ge=1,
+            )],
+        ),
+    ])
     return wrapper
 
 
@@ -124,10 +255,11 @@ def register_tool(
     destructive: bool = False,
     idempotent: bool = True,
     open_world: bool = False,
-    log: bool = True
+    log: bool = True,
+    cost: str = "interactive",
 ):
-    """Registriert ein Tool mit optionalem Auto-Logging."""
-    wrapped = with_auto_log(name, func) if log else func
+    """Registriert ein Tool mit Admission Control, Metriken und optionalem Auto-Logging."""
+    wrapped = with_auto_log(name, func, log=log, cost=cost)
     
     mcp.tool(
         name=name,
@@ -143,46 +275,89 @@ def register_tool(
 
 # --- Tool Registration ---
 
-# Filesystem
-register_tool("file_read", file_read, "Datei lesen")
-register_tool("file_write", file_write, "Datei schreiben", read_only=False, destructive=True)
-register_tool("file_list", file_list, "Verzeichnis auflisten")
-register_tool("glob_search", glob_search, "Dateien suchen (glob)")
-
-# Editor
-register_tool("str_replace", str_replace, "Text ersetzen", read_only=False)
-register_tool("diff_preview", diff_preview, "Änderungsvorschau")
-
-# Search
-register_tool("grep", grep, "Textsuche in Dateien")
-
-# Shell
-register_tool("shell_exec", shell_exec, "Shell-Befehl ausführen", 
-              read_only=False, destructive=True, idempotent=False, open_world=True)
-
-# Project
-register_tool("cd", cd, "Verzeichnis wechseln", read_only=False, log=False)  # cd loggt nicht sich selbst
-register_tool("cwd", cwd, "Aktuelles Verzeichnis")
-register_tool("project_init", project_init, "Projekt initialisieren")
-
-# Memory
-register_tool("memory_add", memory_add, "Erkenntnis speichern", read_only=False, log=False)
-register_tool("memory_show", memory_show, "Gedächtnis anzeigen")
-register_tool("memory_clear", memory_clear, "Gedächtnis löschen", read_only=False, destructive=True, log=False)
-
-# Session
-register_tool("session_save", session_save, "Session speichern", read_only=False, log=False)
-register_tool("session_resume", session_resume, "Session laden", read_only=False, log=False)
-register_tool("session_list", session_list, "Sessions auflisten")
-
-# Commands (Slash-Kommandos)
-register_tool("command", command, "Slash-Kommando ausführen", read_only=False, log=False)
+class ToolSpec(NamedTuple):
+    """Registrierungsdaten eines Tools (Funktion kommt aus code.tools).
+
+    cost ist die Kostenklasse für den Scheduler (SCHEDULER_CLASSES):
+    interactive (billig, bevorzugt), process (Shell) oder scan (große Walks).
+    """
+    name: str
+    title: str
+    read_only: bool = True
+    destructive: bool = False
+    idempotent: bool = True
+    open_world: bool = False
+    log: bool = True
+    cost: str = "interactive"
+
+
+TOOL_SPECS = [
+    # Filesystem
+    ToolSpec("file_read", "Datei lesen"),
+    ToolSpec("file_write", "Datei schreiben", read_only=False, destructive=True),
+    ToolSpec("file_list", "Verzeichnis auflisten", cost="scan"),
+    ToolSpec("glob_search", "Dateien suchen (glob)", cost="scan"),
+    # Editor
+    ToolSpec("str_replace", "Text ersetzen", read_only=False),
+    ToolSpec("diff_preview", "Änderungsvorschau"),
+    # Search
+    ToolSpec("grep", "Textsuche in Dateien", cost="scan"),
+    # Shell
+    ToolSpec("shell_exec", "Shell-Befehl ausführen",
+             read_only=False, destructive=True, idempotent=False, open_world=True, cost="process"),
+    # Project
+    ToolSpec("cd", "Verzeichnis wechseln", read_only=False, log=False),  # cd loggt nicht sich selbst
+    ToolSpec("cwd", "Aktuelles Verzeichnis"),
+    ToolSpec("project_init", "Projekt initialisieren"),
+    # Memory
+    ToolSpec("memory_add", "Erkenntnis speichern", read_only=False, log=False),
+    ToolSpec("memory_show", "Gedächtnis anzeigen"),
+    ToolSpec("memory_clear", "Gedächtnis löschen", read_only=False, destructive=True, log=False),
+    ToolSpec("memory_search", "Gedächtnis durchsuchen"),
+    # Session
+    ToolSpec("session_save", "Session speichern", read_only=False, log=False),
+    ToolSpec("session_resume", "Session laden", read_only=False, log=False),
+    ToolSpec("session_list", "Sessions auflisten"),
+    # Results
+    ToolSpec("result_page", "Gekürzte Ausgabe weiterlesen"),
+    # Transcripts (sucht nicht sich selbst: log=False)
+    ToolSpec("transcript_search", "Frühere Tool-Aufrufe suchen", log=False),
+    # Commands (Slash-Kommandos)
+    ToolSpec("command", "Slash-Kommando ausführen", read_only=False, log=False),
+]
+
+_tools_registered = False
+_tools_lock = threading.Lock()
+
+
+def ensure_tools_registered() -> None:
+    """Importiert alle Tool-Module und registriert die Tools (einmalig)."""
+    global _tools_registered
+    if _tools_registered:
+        return
+    with _tools_lock:
+        if _tools_registered:
+            return
+        for spec in TOOL_SPECS:
+            register_tool(
+                spec.name,
+                getattr(tools, spec.name),
+                spec.title,
+                read_only=spec.read_only,
+                destructive=spec.destructive,
+                idempotent=spec.idempotent,
+                open_world=spec.open_world,
+                log=spec.log,
+                cost=spec.cost,
+            )
+        _tools_registered = True
 
 
 # --- Entry Point ---
 
 def main():
     """Entry Point für das Package."""
+    patch_request_cancellation()
     mcp.run()
 
 
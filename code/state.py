@@ -1,10 +1,19 @@
-"""Globaler Zustand für mcp_shell_tools."""
+"""Globaler Zustand für mcp_shell_tools.
 
-from dataclasses import dataclass, field
+Im Shared-Modus (ein Server, mehrere Clients über einen Unix-Socket) hat
+jede Verbindung ihren eigenen WorkstationState, jeder Tool-Aufruf arbeitet
+auf einer Kopie davon (request_scope). Die globale Instanz state reicht
+Zugriffe an den State des aktuellen Kontexts weiter.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Optional
+from typing import ContextManager, Iterator, Optional
 
 from code.config import INITIAL_WORKING_DIR, PROJECT_FILE
+from code.utils.scoped import ScopedProxy, scoped
 
 
 @dataclass
@@ -38,5 +47,42 @@ class WorkstationState:
         return (self.working_dir / p).resolve()
 
 
+# State des Prozesses (stdio-Modus bzw. außerhalb einer Verbindung)
+_default_state = WorkstationState()
+
+# State der aktuellen Verbindung bzw. des aktuellen Tool-Aufrufs
+_current_state: ContextVar[Optional[WorkstationState]] = ContextVar("workstation_state", default=None)
+
+
+def current_state() -> WorkstationState:
+    """State des aktuellen Kontexts, sonst der des Prozesses."""
+    value = _current_state.get()
+    return _default_state if value is None else value
+
+
+def state_scope(scoped_state: WorkstationState) -> ContextManager[WorkstationState]:
+    """Setzt den State für alles, was im aktuellen Kontext läuft (Verbindung)."""
+    return scoped(_current_state, scoped_state)
+
+
+@contextmanager
+def request_scope() -> Iterator[WorkstationState]:
+    """Eigene Kopie des States für einen Tool-Aufruf.
+
+    Parallele Aufrufe lösen relative Pfade gegen das Working Directory
+    bei ihrem Start auf. Änderungen (cd, project_init) werden erst nach
+    erfolgreichem Ende übernommen; bei gleichzeitigen Änderungen gewinnt
+    der zuletzt fertige Aufruf.
+    """
+    shared = current_state()
+    before = replace(shared)
+    snapshot = replace(shared)
+    with scoped(_current_state, snapshot):
+        yield snapshot
+    if snapshot != before:
+        shared.working_dir = snapshot.working_dir
+        shared.project_context = snapshot.project_context
+
+
 # Globale Instanz
-state = WorkstationState()
+state: WorkstationState = ScopedProxy(_current_state, _default_state)
@@ -1,13 +1,31 @@
 """Tool-Module für mcp_shell_tools."""
 
-from code.tools.filesystem import file_read, file_write, file_list, glob_search
-from code.tools.editor import str_replace, diff_preview
-from code.tools.search import grep
-from code.tools.shell import shell_exec
-from code.tools.project import cd, cwd, project_init
-from code.tools.memory import memory_add, memory_show, memory_clear
-from code.tools.session import session_save, session_resume, session_list
-from code.tools.commands import command
+import importlib
+
+# Tool -> Modul; Module werden erst beim ersten Zugriff importiert
+_TOOL_MODULES = {
+    "file_read": "filesystem",
+    "file_write": "filesystem",
+    "file_list": "filesystem",
+    "glob_search": "filesystem",
+    "str_replace": "editor",
+    "diff_preview": "editor",
+    "grep": "search",
+    "shell_exec": "shell",
+    "cd": "project",
+    "cwd": "project",
+    "project_init": "project",
+    "memory_add": "memory",
+    "memory_show": "memory",
+    "memory_clear": "memory",
+    "memory_search": "memory",
+    "session_save": "session",
+    "session_resume": "session",
+    "session_list": "session",
+    "result_page": "results",
+    "transcript_search": "transcripts",
+    "command": "commands",
+}
 
 __all__ = [
     # Filesystem
@@ -30,10 +48,23 @@ __all__ = [
     "memory_add",
     "memory_show",
     "memory_clear",
+    "memory_search",
     # Session
     "session_save",
     "session_resume",
     "session_list",
+    # Results
+    "result_page",
+    # Transcripts
+    "transcript_search",
     # Commands
     "command",
 ]
+
+
+def __getattr__(name: str):
+    """Lädt Tool-Funktionen lazy (PEP 562)."""
+    module = _TOOL_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
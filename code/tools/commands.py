@@ -1,25 +1,37 @@
-"""Slash-Kommandos: /verbose, /log, /status, /transcript."""
+"""Slash-Kommandos: /verbose, /log, /status, /transcript, /stats, /profile."""
 
+import json
+import shutil
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Annotated, Optional
 
 from pydantic import Field
 
+from code.config import ARCHIVE_DIR, TRANSCRIPT_DIR
 from code.state import state
 from code.persistence import session_manager
+from code.utils.background import log_writer
+from code.utils.metrics import metrics
+from code.utils.profiling import profiler
+from code.utils.scheduler import scheduler
+from code.utils.transcript import TranscriptWriter, render_markdown
 
 # Log-Konfiguration
 DEFAULT_LOG_DIR = Path.home() / ".mcp_shell_tools"
 DEFAULT_LOG_FILE = DEFAULT_LOG_DIR / "tool.log"
-TRANSCRIPT_DIR = DEFAULT_LOG_DIR / "transcripts"
 MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB
-LOG_BACKUP_COUNT = 3  # tool.log, tool.log.1, tool.log.2, tool.log.3
+LOG_BACKUP_COUNT = 3  # tool.log, tool.log.1, tool.log.2, tool.log.3 (ältere -> ARCHIVE_DIR/logs)
 MAX_TRANSCRIPT_SIZE = 10 * 1024 * 1024  # 10 MB pro Transcript
 
 
 class CommandSettings:
-    """Globale Einstellungen für Kommandos."""
+    """Globale Einstellungen für Kommandos.
+
+    log_call() läuft im Hintergrund-Writer; Transcript-Start/-Stop sind
+    deshalb per Lock gegen gleichzeitiges Schreiben geschützt.
+    """
 
     def __init__(self):
         self.verbose: bool = False
@@ -28,8 +40,10 @@ class CommandSettings:
         # Transcript - vollständige Protokollierung
         self.transcript_enabled: bool = False
         self.transcript_file: Optional[Path] = None
+        self._transcript: Optional[TranscriptWriter] = None
         self._transcript_started: Optional[datetime] = None
         self._auto_transcript_checked: bool = False
+        self._lock = threading.RLock()
 
     def _ensure_auto_transcript(self) -> None:
         """Startet Transcript automatisch beim ersten Tool-Call (lazy init)."""
@@ -40,41 +54,70 @@ class CommandSettings:
 
     def _start_transcript(self) -> str:
         """Startet ein neues Transcript."""
-        TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
-        
+        with self._lock:
+            return self._open_transcript()
+
+    def _open_transcript(self) -> str:
+        """Legt eine neue Transcript-Datei an (Lock muss gehalten werden)."""
         now = datetime.now()
-        self._transcript_started = now
-        filename = now.strftime("%Y-%m-%d-%H-%M-%S.md")
-        self.transcript_file = TRANSCRIPT_DIR / filename
+        path = TRANSCRIPT_DIR / now.strftime("%Y-%m-%d-%H-%M-%S.jsonl")
+        n = 1
+        while path.exists():  # Rotation innerhalb derselben Sekunde
+            path = TRANSCRIPT_DIR / now.strftime(f"%Y-%m-%d-%H-%M-%S-{n}.jsonl")
+            n += 1
+
+        self._transcript = TranscriptWriter(path, server="stdio (Claude Desktop)")
+        self._transcript_started = self._transcript.started
+        self.transcript_file = path
         self.transcript_enabled = True
-        
-        # Header schreiben
-        header = f"""# MCP Shell Tools Transcript
-**Gestartet:** {now.strftime("%Y-%m-%d %H:%M:%S")}
-**Server:** stdio (Claude Desktop)
-
----
-
-"""
-        self.transcript_file.write_text(header, encoding='utf-8')
         return f"Transcript gestartet: {self.transcript_file}"
 
     def _stop_transcript(self) -> str:
         """Stoppt das aktuelle Transcript."""
+        with self._lock:
+            return self._close_transcript()
+
+    def _close_transcript(self) -> str:
+        """Schließt das aktuelle Transcript (Lock muss gehalten werden)."""
         if not self.transcript_enabled:
             return "Kein aktives Transcript"
-        
-        # Footer schreiben
-        if self.transcript_file and self.transcript_file.exists():
-            with open(self.transcript_file, 'a', encoding='utf-8') as f:
-                f.write(f"\n---\n**Beendet:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
+
+        if self._transcript is not None:
+            self._transcript.close()
+
         result = f"Transcript beendet: {self.transcript_file}"
         self.transcript_enabled = False
         self.transcript_file = None
+        self._transcript = None
         self._transcript_started = None
         return result
 
+    def flush_transcript(self) -> None:
+        """Schreibt gepufferte Aufrufe des aktuellen Transcripts (vor dem Lesen)."""
+        with self._lock:
+            if self._transcript is not None:
+                self._transcript.flush()
+
+    def render_transcript(self, name: Optional[str] = None) -> str:
+        """Schreibt die Markdown-Ansicht eines Transcripts neben die .jsonl."""
+        with self._lock:
+            if name:
+                path = TRANSCRIPT_DIR / Path(name).name
+                if path.suffix != ".jsonl":
+                    path = path.with_suffix(".jsonl")
+            elif self.transcript_file:
+                path = self.transcript_file
+            else:
+                return "Kein aktives Transcript (Dateiname angeben)"
+            if path == self.transcript_file and self._transcript is not None:
+                self._transcript.flush()
+
+        if not path.exists():
+            return f"Transcript nicht gefunden: {path}"
+        target = path.with_suffix(".md")
+        target.write_text(render_markdown(path), encoding="utf-8")
+        return f"Markdown geschrieben: {target}"
+
     def _setup_rotating_log(self, file_path: Path) -> None:
         """Richtet rollierendes Logging ein."""
         file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -101,8 +144,17 @@ class CommandSettings:
             self.log_file = None
             return "Logging: OFF"
 
-    def log_call(self, tool: str, params: dict, result: str, success: bool) -> None:
+    def log_call(
+        self, tool: str, params: dict, result: str, success: bool, duration_ms: Optional[float] = None
+    ) -> None:
         """Schreibt einen Tool-Call ins Log (mit Rotation) und Transcript."""
+        with self._lock:
+            self._log_call(tool, params, result, success, duration_ms)
+
+    def _log_call(
+        self, tool: str, params: dict, result: str, success: bool, duration_ms: Optional[float] = None
+    ) -> None:
+        """Schreibt Log-Zeile und Transcript-Eintrag (Lock muss gehalten werden)."""
         # Auto-start Transcript beim ersten Call
         self._ensure_auto_transcript()
         
@@ -125,8 +177,8 @@ class CommandSettings:
                 pass
 
         # --- Vollständiges Transcript ---
-        if self.transcript_enabled and self.transcript_file:
-            self._write_transcript(timestamp, tool, params, result, success)
+        if self.transcript_enabled:
+            self._write_transcript(tool, params, result, success, duration_ms)
     
     def _rotate_if_needed(self) -> None:
         """Rotiert Log wenn zu groß."""
@@ -136,56 +188,47 @@ class CommandSettings:
         if self.log_file.stat().st_size < MAX_LOG_SIZE:
             return
         
-        # Rotation: .3 löschen, .2->.3, .1->.2, log->.1
+        # Rotation: .3 ins Archiv (wird dort komprimiert), .2->.3, .1->.2, log->.1
         for i in range(LOG_BACKUP_COUNT, 0, -1):
             old = self.log_file.with_suffix(f".log.{i}")
-            new = self.log_file.with_suffix(f".log.{i+1}" if i < LOG_BACKUP_COUNT else ".log.delete")
-            if old.exists():
-                if i == LOG_BACKUP_COUNT:
-                    old.unlink()  # Ältestes löschen
-                else:
-                    old.rename(new)
+            if not old.exists():
+                continue
+            if i == LOG_BACKUP_COUNT:
+                archived = self._archived_log_path()
+                shutil.move(old, archived)  # eigener Log-Pfad evtl. auf anderem Dateisystem
+            else:
+                old.rename(self.log_file.with_suffix(f".log.{i+1}"))
         
         # Aktuelles Log -> .1
         self.log_file.rename(self.log_file.with_suffix(".log.1"))
 
-    def _write_transcript(self, timestamp: str, tool: str, params: dict, result: str, success: bool) -> None:
-        """Schreibt vollständigen Tool-Call ins Transcript."""
-        if not self.transcript_file:
+    def _archived_log_path(self) -> Path:
+        """Freier Zielname in archive/logs/ (Mikrosekunden, bei Kollision Zähler)."""
+        directory = ARCHIVE_DIR / "logs"
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.log_file.stem}-{datetime.now():%Y%m%d-%H%M%S-%f}"
+        archived = directory / f"{stem}.log"
+        counter = 1
+        # auch schon komprimierte Fassungen (.log.gz/.log.xz) zählen als belegt
+        while archived.exists() or any(directory.glob(f"{archived.name}.*")):
+            archived = directory / f"{stem}-{counter}.log"
+            counter += 1
+        return archived
+
+    def _write_transcript(
+        self, tool: str, params: dict, result: str, success: bool, duration_ms: Optional[float]
+    ) -> None:
+        """Hängt den vollständigen Tool-Call an das Transcript an (nur im Speicher)."""
+        if self._transcript is None:
             return
-            
-        # Transcript-Rotation prüfen
-        if self.transcript_file.exists() and self.transcript_file.stat().st_size > MAX_TRANSCRIPT_SIZE:
-            # Neues Transcript starten
-            self._stop_transcript()
-            self._start_transcript()
-        
-        status_emoji = "✓" if success else "✗"
-        
-        # Params formatieren
-        params_formatted = "\n".join(f"  {k}: {v}" for k, v in params.items()) if params else "  (keine)"
-        
-        # Result kürzen wenn extrem lang (>50KB)
-        result_text = result
-        if len(result) > 50000:
-            result_text = result[:50000] + f"\n\n... (gekürzt, {len(result)} Zeichen total)"
-        
-        entry = f"""
-## [{timestamp}] {status_emoji} `{tool}`
-
-**Parameter:**
-{params_formatted}
 
-**Result:**
-```
-{result_text}
-```
+        # Transcript-Rotation (Größe wird mitgezählt, kein stat)
+        if self._transcript.size + self._transcript.pending_chars > MAX_TRANSCRIPT_SIZE:
+            self._close_transcript()
+            self._open_transcript()
 
----
-"""
         try:
-            with open(self.transcript_file, 'a', encoding='utf-8') as f:
-                f.write(entry)
+            self._transcript.append_call(tool, params, result, success, duration_ms)
         except Exception:
             pass  # Silent fail
 
@@ -207,22 +250,28 @@ settings = CommandSettings()
 # --- Tool Function ---
 
 async def command(
-    cmd: Annotated[str, Field(description="Kommando: verbose, log, transcript, status")],
-    arg: Annotated[Optional[str], Field(description="Argument: on/off oder Dateipfad")] = None,
+    cmd: Annotated[str, Field(description="Kommando: verbose, log, transcript, status, stats, profile")],
+    arg: Annotated[Optional[str], Field(description="Argument: on/off, Dateipfad, md [datei] (transcript), json/reset (stats) oder 'on [tools] [mem]' (profile)")] = None,
 ) -> str:
     """Führt ein Slash-Kommando aus.
 
     Verfügbare Kommandos:
     - /verbose on|off - Ausführliche Ausgaben
     - /log on|off [datei] - Tool-Logging in Datei (kurz)
-    - /transcript on|off - Vollständiges Transcript aller Tool-Calls
+    - /transcript on|off - Vollständiges Transcript aller Tool-Calls (JSONL)
+    - /transcript md [datei] - Markdown-Ansicht des (aktuellen) Transcripts erzeugen
     - /status - Zeigt aktuelle Einstellungen
+    - /stats [json|reset] - Latenzen (p50/p95/p99) pro Tool, Scheduler-Queues
+    - /profile on|off [tool,...] [mem] - cProfile (+ tracemalloc) pro Tool-Call
 
     Beispiele:
       command(cmd="verbose", arg="on")
       command(cmd="log", arg="on")
       command(cmd="transcript", arg="off")
+      command(cmd="transcript", arg="md")
       command(cmd="status")
+      command(cmd="stats", arg="json")
+      command(cmd="profile", arg="on grep mem")
     """
     cmd_lower = cmd.lower().strip().lstrip('/')
 
@@ -260,8 +309,10 @@ async def command(
             if settings.transcript_enabled:
                 return f"Transcript bereits aktiv: {settings.transcript_file}"
             return settings._start_transcript()
+        elif arg.lower() == "md" or arg.lower().startswith("md "):
+            return settings.render_transcript(arg[3:].strip() or None)
         else:
-            return "Unbekanntes Argument. Nutze: on/off"
+            return "Unbekanntes Argument. Nutze: on/off/md [datei]"
 
     elif cmd_lower == "status":
         lines = ["# Aktuelle Einstellungen\n"]
@@ -283,6 +334,10 @@ async def command(
         else:
             lines.append("- **Transcript:** OFF")
 
+        # Profiling
+        if profiler.enabled:
+            lines.append(f"- **Profiling:** ON -> {profiler.describe()}")
+
         # Working Directory
         lines.append(f"- **Working Dir:** `{state.working_dir}`")
 
@@ -297,5 +352,45 @@ async def command(
 
         return "\n".join(lines)
 
+    elif cmd_lower == "stats":
+        if arg is None:
+            writer = log_writer.snapshot()
+            return (
+                f"{metrics.format_table()}\n\n{scheduler.format_table()}\n\n"
+                f"Log-Queue: {writer['pending']} wartend, {writer['throttled']}x voll (Aufrufer gebremst)"
+            )
+
+        if arg.lower() == "json":
+            return json.dumps(
+                {**metrics.snapshot(), "scheduler": scheduler.snapshot(), "log_writer": log_writer.snapshot()},
+                indent=2,
+            )
+        elif arg.lower() == "reset":
+            metrics.reset()
+            return "Statistik zurückgesetzt"
+        else:
+            return "Unbekanntes Argument. Nutze: json/reset"
+
+    elif cmd_lower == "profile":
+        if arg is None:
+            if profiler.enabled:
+                return f"Profiling: ON -> {profiler.describe()}"
+            return "Profiling: OFF"
+
+        words = arg.split()
+        switch = words[0].lower()
+        if switch in ("off", "0", "false", "no"):
+            return profiler.disable()
+        elif switch in ("on", "1", "true", "yes"):
+            memory = any(w.lower() == "mem" for w in words[1:])
+            tools = {
+                name.strip()
+                for w in words[1:] if w.lower() != "mem"
+                for name in w.split(",") if name.strip()
+            }
+            return profiler.enable(tools, memory=memory)
+        else:
+            return "Unbekanntes Argument. Nutze: on [tool,...] [mem] / off"
+
     else:
-        return f"Unbekanntes Kommando: {cmd}\n\nVerfügbar: verbose, log, transcript, status"
+        return f"Unbekanntes Kommando: {cmd}\n\nVerfügbar: verbose, log, transcript, status, stats, profile"
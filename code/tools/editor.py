@@ -6,6 +6,8 @@ from typing import Annotated
 from pydantic import Field
 
 from code.config import DEFAULT_ENCODING
+from code.utils.executor import DeadlineExceeded, check_cancelled, run_blocking
+from code.utils.output import format_incomplete
 from code.utils.paths import resolve_path
 
 
@@ -24,6 +26,11 @@ async def str_replace(
     
     Für neue Dateien nutze file_write.
     """
+    return await run_blocking(_str_replace, path, old_str, new_str, encoding)
+
+
+def _str_replace(path: str, old_str: str, new_str: str, encoding: str) -> str:
+    """Blockierender Teil von str_replace."""
     resolved = resolve_path(path)
     
     if not resolved.exists():
@@ -79,6 +86,11 @@ async def diff_preview(
     
     Nützlich um Änderungen zu prüfen bevor str_replace aufgerufen wird.
     """
+    return await run_blocking(_diff_preview, path, old_str, new_str, context_lines, encoding)
+
+
+def _diff_preview(path: str, old_str: str, new_str: str, context_lines: int, encoding: str) -> str:
+    """Blockierender Teil von diff_preview."""
     resolved = resolve_path(path)
     
     if not resolved.exists():
@@ -112,9 +124,19 @@ async def diff_preview(
         n=context_lines
     )
     
-    diff_text = "".join(diff)
-    
-    if not diff_text:
+    # Zeilenweise sammeln, damit ein knappes Zeitbudget einen Teil-Diff liefert
+    parts = []
+    incomplete = ""
+    try:
+        for i, line in enumerate(diff):
+            if i % 256 == 0:
+                check_cancelled()
+            parts.append(line)
+    except DeadlineExceeded as e:
+        incomplete = format_incomplete(f"{e} nach {len(parts)} Diff-Zeilen")
+    diff_text = "".join(parts)
+    
+    if not diff_text and not incomplete:
         return "Keine Änderungen (old_str == new_str)"
     
-    return f"Vorschau für {resolved}:\n\n{diff_text}"
+    return f"Vorschau für {resolved}:\n\n{diff_text}{incomplete}"
@@ -1,4 +1,8 @@
-"""Filesystem-Tools: Lesen, Schreiben, Auflisten, Suchen."""
+"""Filesystem-Tools: Lesen, Schreiben, Auflisten, Suchen.
+
+Die eigentliche Arbeit läuft über run_blocking() im IO-Pool, damit
+große Dateien und Verzeichnisbäume den Event-Loop nicht blockieren.
+"""
 
 from pathlib import Path
 from typing import Optional, Annotated
@@ -6,8 +10,10 @@ from typing import Optional, Annotated
 from pydantic import Field
 
 from code.config import DEFAULT_ENCODING, MAX_LINES_WITHOUT_RANGE
-from code.utils.output import truncate_output, format_with_line_numbers
+from code.utils.executor import DeadlineExceeded, check_cancelled, run_blocking
+from code.utils.output import format_incomplete, format_with_line_numbers, truncate_output
 from code.utils.paths import resolve_path
+from code.utils.walk import walk_sorted
 
 
 # --- Tool Functions ---
@@ -23,6 +29,11 @@ async def file_read(
     Gibt Inhalt mit Zeilennummern zurück. Bei großen Dateien ohne
     Range-Angabe werden nur die ersten 500 Zeilen gezeigt.
     """
+    return await run_blocking(_file_read, path, start_line, end_line, encoding)
+
+
+def _file_read(path: str, start_line: Optional[int], end_line: Optional[int], encoding: str) -> str:
+    """Blockierender Teil von file_read."""
     resolved = resolve_path(path)
     
     if not resolved.exists():
@@ -61,7 +72,7 @@ async def file_read(
     if 'hint' in locals():
         formatted += hint
     
-    return truncate_output(formatted)
+    return truncate_output(formatted, spill=True)
 
 
 async def file_write(
@@ -74,6 +85,11 @@ async def file_write(
     Erstellt Verzeichnisse falls nötig. Für präzise Änderungen
     nutze stattdessen str_replace.
     """
+    return await run_blocking(_file_write, path, content, encoding)
+
+
+def _file_write(path: str, content: str, encoding: str) -> str:
+    """Blockierender Teil von file_write."""
     resolved = resolve_path(path)
     
     try:
@@ -90,8 +106,20 @@ async def file_list(
     recursive: Annotated[bool, Field(description="Rekursiv auflisten")] = False,
     max_depth: Annotated[int, Field(description="Max. Tiefe bei rekursiv")] = 3,
     show_hidden: Annotated[bool, Field(description="Versteckte Dateien zeigen")] = False,
+    after: Annotated[Optional[str], Field(description="Cursor aus unvollständigem Ergebnis: erst nach diesem Eintrag weiter")] = None,
 ) -> str:
     """Listet Dateien und Verzeichnisse auf."""
+    return await run_blocking(_file_list, path, recursive, max_depth, show_hidden, after)
+
+
+def _file_list(
+    path: str,
+    recursive: bool,
+    max_depth: int,
+    show_hidden: bool,
+    after: Optional[str] = None,
+) -> str:
+    """Blockierender Teil von file_list."""
     resolved = resolve_path(path)
     
     if not resolved.exists():
@@ -101,40 +129,40 @@ async def file_list(
         return f"Fehler: Kein Verzeichnis: {resolved}"
     
     lines = [f"📁 {resolved}\n"]
+    last_item = None
     
     try:
-        if recursive:
-            items = sorted(resolved.rglob("*"))
-        else:
-            items = sorted(resolved.iterdir())
+        # Sortierter Walk; versteckte Verzeichnisse und alles unter
+        # max_depth werden gar nicht erst gelesen
+        items = walk_sorted(
+            resolved,
+            max_depth=max_depth if recursive else 1,
+            show_hidden=show_hidden,
+            after=Path(after).parts if after else None,
+        )
         
-        for item in items:
-            # Hidden files filtern
-            if not show_hidden and item.name.startswith("."):
-                continue
-            
-            # Bei rekursiv: Tiefe prüfen
-            if recursive:
-                try:
-                    relative = item.relative_to(resolved)
-                    depth = len(relative.parts)
-                    if depth > max_depth:
-                        continue
-                    indent = "  " * (depth - 1)
-                except ValueError:
-                    continue
-            else:
-                indent = ""
-                relative = item.name
+        for item, depth in items:
+            last_item = item
+            indent = "  " * (depth - 1)
             
             if item.is_dir():
                 lines.append(f"{indent}📁 {item.name}/")
             else:
-                size = item.stat().st_size
+                try:
+                    size = item.stat().st_size
+                except OSError:
+                    lines.append(f"{indent}📄 {item.name}  (nicht lesbar)")
+                    continue
                 lines.append(f"{indent}📄 {item.name}  ({size:,} bytes)")
         
-        return truncate_output("\n".join(lines))
+        return truncate_output("\n".join(lines), spill=True)
         
+    except DeadlineExceeded as e:
+        resume = None
+        if last_item is not None:
+            resume = f'after="{Path(last_item.path).relative_to(resolved).as_posix()}"'
+        lines.append(format_incomplete(f"{e} nach {len(lines) - 1} Einträgen", resume))
+        return truncate_output("\n".join(lines), spill=True)
     except PermissionError:
         return f"Fehler: Keine Berechtigung für {resolved}"
     except Exception as e:
@@ -152,6 +180,11 @@ async def glob_search(
       - '**/*.py' - Python-Dateien rekursiv
       - 'src/**/*.{js,ts}' - JS/TS-Dateien unter src/
     """
+    return await run_blocking(_glob_search, pattern, path)
+
+
+def _glob_search(pattern: str, path: str) -> str:
+    """Blockierender Teil von glob_search."""
     resolved = resolve_path(path)
     
     if not resolved.exists():
@@ -161,10 +194,19 @@ async def glob_search(
         return f"Fehler: Kein Verzeichnis: {resolved}"
     
     try:
-        matches = sorted(resolved.glob(pattern))
+        matches = []
+        incomplete = None
+        try:
+            for match in resolved.glob(pattern):
+                check_cancelled()
+                matches.append(match)
+        except DeadlineExceeded as e:
+            # glob liefert keine stabile Reihenfolge - daher kein Cursor
+            incomplete = format_incomplete(f"{e} nach {len(matches)} Treffern")
+        matches.sort()
         
         if not matches:
-            return f"Keine Treffer für '{pattern}' in {resolved}"
+            return f"Keine Treffer für '{pattern}' in {resolved}" + (incomplete or "")
         
         lines = [f"Treffer für '{pattern}' in {resolved}:\n"]
         
@@ -177,6 +219,8 @@ async def glob_search(
         
         if len(matches) > 100:
             lines.append(f"\n[... und {len(matches) - 100} weitere Treffer]")
+        if incomplete:
+            lines.append(incomplete)
         
         return "\n".join(lines)
         
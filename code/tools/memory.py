@@ -1,10 +1,11 @@
 """Memory-Tools: Erkenntnisse speichern und abrufen."""
 
-from typing import Literal, Annotated
+from typing import Literal, Annotated, Optional
 
 from pydantic import Field
 
 from code.persistence import session_manager
+from code.utils.executor import run_blocking
 
 
 # --- Tool Functions ---
@@ -32,7 +33,7 @@ async def memory_add(
     if not session_manager.current_session:
         return "Fehler: Keine aktive Session. Nutze erst 'cd' um in ein Projektverzeichnis zu wechseln."
     
-    success = session_manager.add_memory(content, category)
+    success = await run_blocking(session_manager.add_memory, content, category)
     
     if success:
         category_emoji = {
@@ -100,9 +101,37 @@ async def memory_clear() -> str:
     if count == 0:
         return "Gedächtnis ist bereits leer."
     
-    success = session_manager.clear_memories()
+    success = await run_blocking(session_manager.clear_memories)
     
     if success:
         return f"🗑️ {count} Einträge gelöscht."
     else:
         return "Fehler beim Löschen."
+
+
+async def memory_search(
+    query: Annotated[str, Field(description="Suchbegriffe (alle müssen vorkommen)")],
+    project: Annotated[Optional[str], Field(description="Nur in diesem Projekt suchen. Ohne Angabe: alle Projekte.")] = None,
+    limit: Annotated[int, Field(description="Maximale Anzahl Treffer", ge=1, le=200)] = 20,
+) -> str:
+    """Durchsucht gespeicherte Erkenntnisse über alle Projekte.
+    
+    Mit SESSION_BACKEND = "sqlite" über einen Volltextindex (nach
+    Relevanz sortiert), sonst durch Lesen aller Sessions (neueste zuerst).
+    
+    Beispiele:
+    - memory_search("SQLite Deployment")
+    - memory_search("Bug", project="mcp_shell_tools")
+    """
+    hits = await run_blocking(session_manager.search_memories, query, project, limit)
+    
+    if not hits:
+        scope = f"in '{project}'" if project else "in allen Projekten"
+        return f"Keine Einträge zu '{query}' {scope}."
+    
+    lines = [f"# Gedächtnis-Suche: {query} ({len(hits)} Treffer)\n"]
+    for hit in hits:
+        timestamp = hit["timestamp"].strftime("%Y-%m-%d %H:%M")
+        lines.append(f"- **{hit['project']}** [{timestamp}, {hit['category']}] {hit['content']}")
+    
+    return "\n".join(lines)
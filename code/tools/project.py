@@ -7,6 +7,7 @@ from pydantic import Field
 from code.config import PROJECT_FILE
 from code.state import state
 from code.persistence import session_manager
+from code.utils.executor import run_blocking
 
 
 # --- Tool Functions ---
@@ -42,10 +43,10 @@ async def cd(
     if not new_path.is_dir():
         return f"Fehler: Kein Verzeichnis: {new_path}"
     
-    state.change_directory(new_path)
+    await run_blocking(state.change_directory, new_path)
     
     # Session initialisieren/laden
-    session = session_manager.init_session(new_path)
+    session = await run_blocking(session_manager.init_session, new_path)
     if state.project_context:
         session.project_context = state.project_context
     
@@ -0,0 +1,53 @@
+"""Result-Tools: Ausgelagerte Ausgaben seitenweise lesen."""
+
+from typing import Annotated, Optional
+
+from pydantic import Field
+
+from code.config import MAX_OUTPUT_BYTES, MAX_LINES_WITHOUT_RANGE
+from code.utils.result_store import result_store
+
+
+# --- Tool Function ---
+
+async def result_page(
+    handle: Annotated[str, Field(description="Handle aus einer gekürzten Ausgabe ([... TRUNCATED ...])")],
+    offset: Annotated[int, Field(description="Byte-Offset (wird ignoriert wenn start_line gesetzt ist)", ge=0)] = 0,
+    length: Annotated[int, Field(description="Anzahl Bytes", ge=1, le=MAX_OUTPUT_BYTES)] = MAX_OUTPUT_BYTES,
+    start_line: Annotated[Optional[int], Field(description="Erste Zeile (1-basiert) - seitenweise nach Zeilen statt Bytes", ge=1)] = None,
+    line_count: Annotated[int, Field(description="Anzahl Zeilen bei start_line", ge=1)] = MAX_LINES_WITHOUT_RANGE,
+) -> str:
+    """Liest eine weitere Seite einer gekürzten Ausgabe.
+
+    shell_exec, grep, file_list und file_read legen zu große Ausgaben
+    vollständig im Result-Store ab. Statt den Befehl erneut auszuführen,
+    kann der Rest hier nach Bytes oder Zeilen abgerufen werden.
+
+    Beispiele:
+      - result_page(handle="3f2a9c0d1e4b", offset=100000)
+      - result_page(handle="3f2a9c0d1e4b", start_line=2000, line_count=200)
+    """
+    if start_line is not None:
+        page = result_store.read_lines(handle, start_line, line_count)
+        if page is None:
+            return f"Fehler: Unbekanntes oder abgelaufenes Handle: {handle}"
+        text, last, total = page
+        if not text:
+            return f"[Ergebnis {handle}: hat nur {total} Zeilen]"
+        header = f"[Ergebnis {handle}: Zeilen {start_line}-{last} von {total}]"
+        if last < total:
+            footer = f"[weiter mit result_page(handle=\"{handle}\", start_line={last + 1})]"
+            return f"{header}\n{text}\n{footer}"
+        return f"{header}\n{text}"
+
+    page = result_store.read_bytes(handle, offset, length)
+    if page is None:
+        return f"Fehler: Unbekanntes oder abgelaufenes Handle: {handle}"
+    text, end, total = page
+    if offset >= total:
+        return f"[Ergebnis {handle}: hat nur {total:,} Bytes]"
+    header = f"[Ergebnis {handle}: Bytes {offset:,}-{end:,} von {total:,}]"
+    if end < total:
+        footer = f"[weiter mit result_page(handle=\"{handle}\", offset={end})]"
+        return f"{header}\n{text}\n{footer}"
+    return f"{header}\n{text}"
@@ -1,14 +1,22 @@
 """Search-Tool: Textsuche in Dateien."""
 
+import fnmatch
 import re
+from collections import deque
+from itertools import islice
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Iterator, Optional
 
 from pydantic import Field
 
-from code.config import DEFAULT_ENCODING
-from code.utils.output import truncate_output
+from code.config import DEFAULT_ENCODING, SEARCH_PROCESS_WORKERS
+from code.utils.executor import DeadlineExceeded, check_cancelled, cpu_executor, run_blocking
+from code.utils.output import format_incomplete, truncate_output
 from code.utils.paths import resolve_path
+from code.utils.walk import walk_sorted
+
+# Dateien pro Auftrag an den Prozess-Pool
+PROCESS_CHUNK_SIZE = 64
 
 
 # --- Helper ---
@@ -70,6 +78,95 @@ def _search_in_file(
     return results
 
 
+def _search_in_files(
+    files: list[Path],
+    pattern: str,
+    ignore_case: bool,
+    is_regex: bool,
+    context_lines: int
+) -> list[list[dict]]:
+    """Sucht in mehreren Dateien (Einheit für den Prozess-Pool)."""
+    return [
+        _search_in_file(f, pattern, ignore_case, is_regex, context_lines)
+        for f in files
+    ]
+
+
+def _iter_files(
+    resolved: Path,
+    file_pattern: str,
+    recursive: bool,
+    after: Optional[tuple[str, ...]] = None,
+) -> Iterator[Path]:
+    """Liefert die zu durchsuchenden Dateien in sortierter Reihenfolge.
+
+    Versteckte Dateien und Verzeichnisse (unterhalb von resolved) werden
+    übersprungen, ohne sie zu lesen. after ist der Cursor eines
+    unvollständigen Aufrufs (relative Pfadteile der letzten Datei).
+    """
+    if "/" in file_pattern:
+        # Pfad-Pattern: auf glob zurückfallen
+        matches = resolved.rglob(file_pattern) if recursive else resolved.glob(file_pattern)
+        files = []
+        for f in matches:
+            check_cancelled()
+            relative = f.relative_to(resolved)
+            if after is not None and relative.parts <= after:
+                continue
+            if f.is_file() and not any(part.startswith(".") for part in relative.parts):
+                files.append(f)
+        yield from sorted(files)
+        return
+
+    for entry, _ in walk_sorted(resolved, max_depth=None if recursive else 1, after=after):
+        if fnmatch.fnmatchcase(entry.name, file_pattern) and entry.is_file():
+            yield Path(entry.path)
+
+
+def _iter_results(
+    files: Iterator[Path],
+    pattern: str,
+    ignore_case: bool,
+    is_regex: bool,
+    context_lines: int
+) -> Iterator[tuple[Path, list[dict]]]:
+    """Durchsucht Dateien nacheinander oder gebündelt im Prozess-Pool."""
+    pool = cpu_executor()
+    if pool is None:
+        for file in files:
+            check_cancelled()
+            yield file, _search_in_file(file, pattern, ignore_case, is_regex, context_lines)
+        return
+
+    # Begrenzte Anzahl Chunks in Arbeit halten, Ergebnisse in Reihenfolge abholen
+    files = iter(files)
+    pending: deque = deque()
+
+    def submit_next() -> bool:
+        chunk = list(islice(files, PROCESS_CHUNK_SIZE))
+        if chunk:
+            pending.append((chunk, pool.submit(
+                _search_in_files, chunk, pattern, ignore_case, is_regex, context_lines
+            )))
+        return bool(chunk)
+
+    try:
+        for _ in range(2 * SEARCH_PROCESS_WORKERS):
+            if not submit_next():
+                break
+
+        while pending:
+            check_cancelled()
+            chunk, future = pending.popleft()
+            results = future.result()
+            submit_next()
+            yield from zip(chunk, results)
+    finally:
+        # Bei Abbruch oder erreichtem Limit: Rest nicht mehr ausführen
+        for _, future in pending:
+            future.cancel()
+
+
 # --- Tool Function ---
 
 async def grep(
@@ -81,6 +178,7 @@ async def grep(
     file_pattern: Annotated[str, Field(description="Glob-Pattern für Dateien, z.B. '*.py'")] = "*",
     context_lines: Annotated[int, Field(description="Kontext-Zeilen vor/nach Treffer (0-5)")] = 0,
     max_results: Annotated[int, Field(description="Maximale Anzahl Treffer")] = 50,
+    after: Annotated[Optional[str], Field(description="Cursor aus unvollständigem Ergebnis: erst nach dieser Datei weitersuchen")] = None,
 ) -> str:
     """Sucht nach einem Muster in Dateien.
     
@@ -90,63 +188,83 @@ async def grep(
     Beispiele:
       - grep(pattern="TODO", path=".", recursive=True)
       - grep(pattern="def.*test", is_regex=True, file_pattern="*.py")
+      - grep(pattern="TODO", deadline_ms=500) - Teilergebnis mit Cursor nach 500 ms
     """
+    return await run_blocking(
+        _grep,
+        pattern, path, recursive, ignore_case, is_regex, file_pattern, context_lines, max_results, after,
+    )
+
+
+def _grep(
+    pattern: str,
+    path: str,
+    recursive: bool,
+    ignore_case: bool,
+    is_regex: bool,
+    file_pattern: str,
+    context_lines: int,
+    max_results: int,
+    after: Optional[str] = None,
+) -> str:
+    """Blockierender Teil von grep (läuft im IO-Pool)."""
     resolved = resolve_path(path)
     context = min(context_lines, 5)  # Max 5 Kontext-Zeilen
     
     if not resolved.exists():
         return f"Fehler: Pfad existiert nicht: {resolved}"
     
-    # Dateien sammeln
+    # Dateien lazy sammeln - die Suche stoppt beim Limit, ohne den Rest zu walken
     if resolved.is_file():
-        files = [resolved]
+        files = iter([resolved])
     elif resolved.is_dir():
-        if recursive:
-            files = list(resolved.rglob(file_pattern))
-        else:
-            files = list(resolved.glob(file_pattern))
-        files = [f for f in files if f.is_file()]
+        cursor = Path(after).parts if after else None
+        files = _iter_files(resolved, file_pattern, recursive, cursor)
     else:
         return f"Fehler: Weder Datei noch Verzeichnis: {resolved}"
     
-    if not files:
-        return f"Keine Dateien gefunden für '{file_pattern}' in {resolved}"
-    
     # Suchen
     all_results = []
     files_with_matches = 0
+    files_searched = 0
+    last_file = None
+    incomplete = None
     
-    for file in sorted(files):
-        # Versteckte Dateien/Verzeichnisse überspringen
-        if any(part.startswith(".") for part in file.parts):
-            continue
-        
-        results = _search_in_file(
-            file, 
-            pattern, 
-            ignore_case, 
-            is_regex,
-            context
-        )
-        
-        if results:
-            # Fehler prüfen
-            if results and "error" in results[0]:
-                return results[0]["error"]
+    try:
+        for file, results in _iter_results(files, pattern, ignore_case, is_regex, context):
+            files_searched += 1
+            last_file = file
             
-            files_with_matches += 1
-            for r in results:
-                r["file"] = file
-                all_results.append(r)
+            if results:
+                # Fehler prüfen
+                if results and "error" in results[0]:
+                    return results[0]["error"]
                 
-                if len(all_results) >= max_results:
-                    break
-        
-        if len(all_results) >= max_results:
-            break
+                files_with_matches += 1
+                for r in results:
+                    r["file"] = file
+                    all_results.append(r)
+                    
+                    if len(all_results) >= max_results:
+                        break
+            
+            if len(all_results) >= max_results:
+                break
+    except DeadlineExceeded as e:
+        # Teilergebnis mit Cursor auf die letzte vollständig durchsuchte Datei
+        resume = None
+        if last_file is not None and resolved.is_dir():
+            resume = f'after="{last_file.relative_to(resolved).as_posix()}"'
+        incomplete = format_incomplete(f"{e} nach {files_searched} Dateien", resume)
+    
+    if incomplete and not all_results:
+        return f"Keine Treffer für '{pattern}' in {files_searched} Dateien\n{incomplete}"
+
+    if files_searched == 0:
+        return f"Keine Dateien gefunden für '{file_pattern}' in {resolved}"
     
     if not all_results:
-        return f"Keine Treffer für '{pattern}' in {len(files)} Dateien"
+        return f"Keine Treffer für '{pattern}' in {files_searched} Dateien"
     
     # Formatieren
     output_lines = [
@@ -177,5 +295,7 @@ async def grep(
     
     if len(all_results) >= max_results:
         output_lines.append(f"\n[Limit erreicht: {max_results} Treffer]")
+    if incomplete:
+        output_lines.append(incomplete)
     
-    return truncate_output("\n".join(output_lines))
+    return truncate_output("\n".join(output_lines), spill=True)
@@ -6,6 +6,8 @@ from pydantic import Field
 
 from code.persistence import session_manager
 from code.state import state
+from code.utils.background import log_writer
+from code.utils.executor import run_blocking
 
 
 # --- Tool Functions ---
@@ -25,7 +27,9 @@ async def session_save(
     if not session_manager.current_session:
         return "Keine aktive Session. Nutze 'cd' um in ein Projektverzeichnis zu wechseln."
     
-    success = session_manager.save_session(summary)
+    # Noch ausstehende Tool-Log-Einträge mitspeichern
+    await run_blocking(log_writer.flush)
+    success = await run_blocking(session_manager.save_session, summary)
     
     if success:
         session = session_manager.current_session
@@ -54,7 +58,7 @@ async def session_resume(
     Ohne Angabe eines Projektnamens wird die zuletzt aktualisierte Session geladen.
     Zeigt die gespeicherten Erkenntnisse und die letzte Zusammenfassung.
     """
-    sessions = session_manager.list_sessions()
+    sessions = await run_blocking(session_manager.list_sessions)
     
     if not sessions:
         return "Keine gespeicherten Sessions gefunden."
@@ -69,7 +73,7 @@ async def session_resume(
         target = sessions[0]  # Neueste
     
     # Session laden
-    session_data = session_manager.load_session(target["name"])
+    session_data = await run_blocking(session_manager.load_session, target["name"])
     if not session_data:
         return f"Fehler beim Laden der Session '{target['name']}'."
     
@@ -132,7 +136,7 @@ async def session_list() -> str:
     
     Zeigt Projektname, letztes Update und Zusammenfassung.
     """
-    sessions = session_manager.list_sessions()
+    sessions = await run_blocking(session_manager.list_sessions)
     
     if not sessions:
         return "Keine gespeicherten Sessions gefunden."
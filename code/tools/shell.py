@@ -9,21 +9,30 @@ from pydantic import Field
 
 from code.config import (
     SHELL_TIMEOUT_SECONDS,
+    SHELL_LIMIT_CPU_SECONDS,
+    SHELL_LIMIT_MEMORY_MB,
+    SHELL_LIMIT_OPEN_FILES,
+    SHELL_LIMIT_OUTPUT_MB,
     DEFAULT_ENCODING,
     BLOCKED_PATTERNS,
     SUDO_NEEDS_CONFIRMATION,
 )
 from code.state import state
+from code.utils.executor import current_deadline, run_blocking
 from code.utils.output import truncate_output
 from code.utils.logging import get_logger
+from code.utils.process import ResourceLimits, ShellProcess, spawn_shell
 
 logger = get_logger("tools.shell")
 
 # Registry für laufende Prozesse (für Cleanup bei Shutdown)
-_running_processes: Set[asyncio.subprocess.Process] = set()
+_running_processes: Set[ShellProcess] = set()
 
+# Tasks, die Prozesse abgebrochener Starts beenden (siehe _kill_orphan)
+_orphan_kills: Set[asyncio.Task] = set()
 
-async def _kill_process_tree(proc: asyncio.subprocess.Process):
+
+async def _kill_process_tree(proc: ShellProcess):
     """Killt einen Prozess und alle seine Kindprozesse.
 
     Da wir start_new_session=True nutzen, können wir die ganze
@@ -36,8 +45,10 @@ async def _kill_process_tree(proc: asyncio.subprocess.Process):
     logger.info(f"Killing process tree (PID {pid})")
 
     try:
-        # Ganze Process-Group terminieren (SIGTERM an die Gruppe)
-        os.killpg(pid, signal.SIGTERM)
+        # Ganze Process-Group terminieren (SIGTERM an die Gruppe); direkt
+        # nach dem Start ist das Kind evtl. noch nicht Gruppenführer - dann
+        # fällt terminate() auf den Prozess selbst zurück
+        proc.terminate()
 
         # Kurz warten auf sauberes Beenden
         try:
@@ -46,7 +57,7 @@ async def _kill_process_tree(proc: asyncio.subprocess.Process):
             # Force kill der Process-Group
             logger.warning(f"Process {pid} didn't terminate, force killing")
             try:
-                os.killpg(pid, signal.SIGKILL)
+                proc.kill()
             except ProcessLookupError:
                 pass
             await proc.wait()
@@ -62,6 +73,22 @@ async def _kill_process_tree(proc: asyncio.subprocess.Process):
             pass
 
 
+def _kill_orphan(spawn: "asyncio.Future[ShellProcess]") -> None:
+    """Beendet einen Prozess, dessen Aufrufer während des Starts abgebrochen hat."""
+    if spawn.cancelled() or spawn.exception() is not None:
+        return
+    proc = spawn.result()
+    _running_processes.add(proc)
+    task = asyncio.ensure_future(_kill_process_tree(proc))
+    _orphan_kills.add(task)  # starke Referenz, sonst kann der Task verschwinden
+
+    def done(_: asyncio.Future) -> None:
+        _orphan_kills.discard(task)
+        _running_processes.discard(proc)
+
+    task.add_done_callback(done)
+
+
 def cleanup_all_processes():
     """Beendet alle laufenden Subprozesse (synchron, für Shutdown)."""
     for proc in list(_running_processes):
@@ -96,17 +123,48 @@ def check_command_safety(command: str) -> tuple[bool, str]:
     return True, ""
 
 
+def _limits_from_params(
+    cpu_limit: Optional[int],
+    memory_limit_mb: Optional[int],
+    max_open_files: Optional[int],
+    max_output_mb: Optional[int],
+) -> ResourceLimits:
+    """Kombiniert Tool-Parameter mit den Defaults aus config.py."""
+    output_mb = max_output_mb or SHELL_LIMIT_OUTPUT_MB
+    return ResourceLimits(
+        cpu_seconds=cpu_limit or SHELL_LIMIT_CPU_SECONDS,
+        memory_mb=memory_limit_mb or SHELL_LIMIT_MEMORY_MB,
+        open_files=max_open_files or SHELL_LIMIT_OPEN_FILES,
+        output_bytes=output_mb * 1024 * 1024 if output_mb else None,
+    )
+
+
+def _format_exit_code(returncode: int) -> str:
+    """Exit-Code, bei Signal-Ende mit Signalname (z.B. SIGXCPU)."""
+    if returncode < 0:
+        try:
+            return f"[Exit Code: {returncode} ({signal.Signals(-returncode).name})]"
+        except ValueError:
+            pass
+    return f"[Exit Code: {returncode}]"
+
+
 # --- Tool Function ---
 
 async def shell_exec(
     command: Annotated[str, Field(description="Shell-Befehl (bash)")],
     timeout: Annotated[int, Field(description="Timeout in Sekunden", ge=1, le=300)] = SHELL_TIMEOUT_SECONDS,
     working_dir: Annotated[Optional[str], Field(description="Working Directory (default: aktuelles)")] = None,
+    cpu_limit: Annotated[Optional[int], Field(description="CPU-Zeit-Limit in Sekunden (RLIMIT_CPU)", ge=1)] = None,
+    memory_limit_mb: Annotated[Optional[int], Field(description="Adressraum-Limit in MB (RLIMIT_AS)", ge=16)] = None,
+    max_open_files: Annotated[Optional[int], Field(description="Max. offene Dateien (RLIMIT_NOFILE)", ge=16)] = None,
+    max_output_mb: Annotated[Optional[int], Field(description="Max. Ausgabe in MB (Pipes + RLIMIT_FSIZE)", ge=1)] = None,
 ) -> str:
     """Führt einen Shell-Befehl aus.
     
     Läuft im aktuellen Working Directory (siehe cwd/cd).
-    Stdout und Stderr werden zurückgegeben.
+    Stdout und Stderr werden zurückgegeben, dazu Wall-/CPU-Zeit,
+    max. RSS und Block-I/O des Befehls.
     
     Für lang laufende Prozesse den Timeout erhöhen.
     Für interaktive Befehle (vim, less, etc.) nicht geeignet.
@@ -124,30 +182,40 @@ async def shell_exec(
             return f"💻 $ {command}\n\nFehler: Working Directory existiert nicht: {cwd}"
     else:
         cwd = state.working_dir
+
+    limits = _limits_from_params(cpu_limit, memory_limit_mb, max_open_files, max_output_mb)
+
+    # Ein Zeitbudget (deadline_ms) verkürzt den Timeout, verlängert ihn aber nie
+    deadline = current_deadline()
+    if deadline is not None:
+        timeout = max(0.0, min(timeout, deadline.remaining()))
     
     proc = None
     try:
-        proc = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd,
-            # Neue Process-Group für sauberes Kill
-            start_new_session=True,
-        )
+        # Start im IO-Pool: Handshake mit dem Spawn-Helper (bis zu
+        # SPAWN_HELPER_TIMEOUT) darf den Event-Loop nicht blockieren
+        spawn = asyncio.ensure_future(run_blocking(spawn_shell, command, cwd, limits))
+        try:
+            proc = await asyncio.shield(spawn)
+        except asyncio.CancelledError:
+            spawn.add_done_callback(_kill_orphan)
+            raise
 
         # Prozess registrieren für Cleanup
         _running_processes.add(proc)
 
         try:
-            stdout, stderr = await asyncio.wait_for(
+            result = await asyncio.wait_for(
                 proc.communicate(),
                 timeout=timeout
             )
         except asyncio.TimeoutError:
             await _kill_process_tree(proc)
-            logger.warning(f"Command timeout after {timeout}s: {command[:50]}")
-            return f"💻 $ {command}\n\nFehler: Timeout nach {timeout}s - Prozess wurde beendet"
+            logger.warning(f"Command timeout after {timeout:g}s: {command[:50]}")
+            message = f"💻 $ {command}\n\nFehler: Timeout nach {timeout:g}s - Prozess wurde beendet"
+            if proc.result:
+                message += f"\n{proc.result.usage.format()}"
+            return message
         except asyncio.CancelledError:
             # KRITISCH: Client hat Request abgebrochen (Claude Desktop)
             logger.warning(f"Command cancelled: {command[:50]}")
@@ -166,23 +234,29 @@ async def shell_exec(
         result_parts.append("")  # Leerzeile
 
         # Stdout
-        if stdout:
-            stdout_text = stdout.decode(DEFAULT_ENCODING, errors="replace")
-            result_parts.append(truncate_output(stdout_text))
+        if result.stdout:
+            stdout_text = result.stdout.decode(DEFAULT_ENCODING, errors="replace")
+            result_parts.append(truncate_output(stdout_text, spill=True))
 
         # Stderr
-        if stderr:
-            stderr_text = stderr.decode(DEFAULT_ENCODING, errors="replace")
-            result_parts.append(f"[STDERR]\n{truncate_output(stderr_text)}")
+        if result.stderr:
+            stderr_text = result.stderr.decode(DEFAULT_ENCODING, errors="replace")
+            result_parts.append(f"[STDERR]\n{truncate_output(stderr_text, spill=True)}")
+
+        if result.output_limited:
+            result_parts.append(f"[Ausgabe-Limit erreicht ({max_output_mb or SHELL_LIMIT_OUTPUT_MB} MB) - Prozess wurde beendet]")
 
         # Exit Code (nur bei Fehler)
-        if proc.returncode != 0:
-            result_parts.append(f"[Exit Code: {proc.returncode}]")
+        if result.returncode != 0:
+            result_parts.append(_format_exit_code(result.returncode))
 
         # Wenn keine Ausgabe
-        if not stdout and not stderr:
+        if not result.stdout and not result.stderr:
             result_parts.append("(keine Ausgabe)")
 
+        # Ressourcenverbrauch
+        result_parts.append(result.usage.format())
+
         return "\n".join(result_parts)
 
     except asyncio.CancelledError:
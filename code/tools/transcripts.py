@@ -0,0 +1,99 @@
+"""Transcript-Tools: frühere Tool-Aufrufe nachschlagen."""
+
+import re
+from datetime import datetime, timedelta
+from typing import Annotated, Optional
+
+from pydantic import Field
+
+from code.tools.commands import settings
+from code.utils.executor import run_blocking
+from code.utils.transcript import transcript_catalog
+
+_RELATIVE = re.compile(r"^(\d+)\s*([smhd])$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def _parse_time(value: str) -> str:
+    """'90m', '2h', '1d' (vor jetzt) oder ISO-Zeit -> ISO-Zeitstempel."""
+    value = value.strip()
+    match = _RELATIVE.match(value)
+    if match:
+        moment = datetime.now() - timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+    else:
+        moment = datetime.fromisoformat(value)
+    return moment.isoformat()
+
+
+def _excerpt(text: str, query: Optional[str], max_chars: int) -> str:
+    """Ausschnitt um den ersten Suchbegriff (sonst Anfang), höchstens max_chars."""
+    if len(text) <= max_chars:
+        return text
+    start = 0
+    if query:
+        lowered = text.lower()
+        positions = [lowered.find(word) for word in query.lower().split()]
+        pos = min((p for p in positions if p >= 0), default=0)
+        if pos > max_chars // 2:
+            start = pos - max_chars // 4
+    excerpt = text[start:start + max_chars]
+    prefix = f"... ({start} Zeichen ausgelassen)\n" if start else ""
+    return f"{prefix}{excerpt}\n... (gekürzt, {len(text)} Zeichen total)"
+
+
+def _search(query, tool, success, since, until, file, limit, max_chars) -> str:
+    settings.flush_transcript()
+    hits = transcript_catalog.search(query, tool, success, since, until, file, limit)
+    if not hits:
+        return "Keine passenden Aufrufe in den Transcripts."
+
+    lines = [f"# Transcript-Suche ({len(hits)} Treffer, neueste zuerst)\n"]
+    for path, event in hits:
+        status = "✓" if event["success"] else "✗"
+        duration = f" ({event['duration_ms']:.1f} ms)" if event.get("duration_ms") is not None else ""
+        lines.append(f"## {path.name} #{event['seq']} [{event['ts']}] {status} `{event['tool']}`{duration}")
+        params = event.get("params") or {}
+        for key, value in params.items():
+            text = str(value)
+            if len(text) > 200:
+                text = text[:200] + f"... ({len(text)} Zeichen)"
+            lines.append(f"  {key}: {text}")
+        result = event.get("result", "")
+        fence = "```"
+        while fence in result:
+            fence += "`"
+        lines.append(f"{fence}\n{_excerpt(result, query, max_chars)}\n{fence}\n")
+    return "\n".join(lines)
+
+
+# --- Tool Function ---
+
+async def transcript_search(
+    query: Annotated[Optional[str], Field(description="Suchbegriffe in Parametern oder Ergebnis (alle müssen vorkommen, auch als Teilwort; Groß-/Kleinschreibung egal)")] = None,
+    tool: Annotated[Optional[str], Field(description="Nur Aufrufe dieses Tools, z.B. shell_exec")] = None,
+    success: Annotated[Optional[bool], Field(description="Nur erfolgreiche (true) bzw. fehlgeschlagene (false) Aufrufe")] = None,
+    since: Annotated[Optional[str], Field(description="Ab Zeitpunkt: ISO-Zeit ('2026-01-17 14:00') oder relativ ('90m', '2h', '1d')")] = None,
+    until: Annotated[Optional[str], Field(description="Bis Zeitpunkt, Format wie since")] = None,
+    file: Annotated[Optional[str], Field(description="Nur in diesem Transcript (Dateiname)")] = None,
+    limit: Annotated[int, Field(description="Maximale Anzahl Treffer", ge=1, le=100)] = 10,
+    max_chars: Annotated[int, Field(description="Maximale Zeichen pro Ergebnis", ge=100, le=50000)] = 2000,
+) -> str:
+    """Sucht frühere Tool-Aufrufe in den Transcripts.
+
+    Filter über den Offset-Index (Tool, Status, Zeit) und einen
+    invertierten Index über Parameter und Ergebnisse; gelesen werden nur
+    die Treffer. Archivierte Transcripts durchsucht
+    `python code/main.py maintenance --search`.
+
+    Beispiele:
+    - transcript_search(query="FAILED", tool="shell_exec", since="2h")
+    - transcript_search(tool="grep", success=False)
+    - transcript_search(query="calculate_returns", since="2026-01-17 09:00", until="2026-01-17 12:00")
+    """
+    try:
+        since_ts = _parse_time(since) if since else None
+        until_ts = _parse_time(until) if until else None
+    except ValueError as e:
+        return f"Fehler: Ungültige Zeitangabe: {e}"
+
+    return await run_blocking(_search, query, tool, success, since_ts, until_ts, file, limit, max_chars)
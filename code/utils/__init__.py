@@ -1,14 +1,18 @@
 """Utility-Funktionen für mcp_shell_tools."""
 
-from code.utils.output import truncate_output, format_with_line_numbers
-from code.utils.paths import resolve_path
-from code.utils.logging import (
-    setup_logging,
-    get_logger,
-    set_log_level,
-    enable_file_logging,
-    disable_file_logging,
-)
+import importlib
+
+# Funktion -> Modul; Module werden erst beim ersten Zugriff importiert
+_EXPORTS = {
+    "truncate_output": "output",
+    "format_with_line_numbers": "output",
+    "resolve_path": "paths",
+    "setup_logging": "logging",
+    "get_logger": "logging",
+    "set_log_level": "logging",
+    "enable_file_logging": "logging",
+    "disable_file_logging": "logging",
+}
 
 __all__ = [
     "truncate_output",
@@ -20,3 +24,11 @@ __all__ = [
     "enable_file_logging",
     "disable_file_logging",
 ]
+
+
+def __getattr__(name: str):
+    """Lädt Hilfsfunktionen lazy (PEP 562)."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f"{__name__}.{module}"), name)
@@ -0,0 +1,386 @@
+"""Archivierung: alte Transcripts und Logs komprimieren, Sessions kompaktieren, Quota."""
+
+import fcntl
+import gzip
+import json
+import lzma
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterator, Optional
+
+from code.config import (
+    ARCHIVE_COMPRESSION,
+    ARCHIVE_MIN_AGE,
+    DATA_DIR,
+    DATA_QUOTA_BYTES,
+    MAINTENANCE_INTERVAL,
+    SESSION_STALE_DAYS,
+)
+from code.utils.logging import get_logger
+
+logger = get_logger("utils.archive")
+
+INDEX_VERSION = 1
+
+_SUFFIXES = {"gzip": ".gz", "xz": ".xz"}
+
+# Aufrufe im Transcript (JSONL bzw. schon archivierte Markdown-Dateien) und Zeilen in tool.log (für den Index)
+_TRANSCRIPT_ENTRY = re.compile(
+    rb'^(?:\{"type": "call", "seq": \d+, "ts": "([^"]+)", "tool": "([^"]+)"'
+    rb"|## \[([^\]]+)\] \S+ `([^`]+)`)"
+)
+_LOG_ENTRY = re.compile(rb"^\[([^\]]+)\] (?:OK|FAIL) (\S+)")
+
+
+def _open_compressed(path: Path, mode: str, compression: Optional[str] = None) -> IO[bytes]:
+    """Öffnet gzip/xz (ohne Angabe: passend zur Endung)."""
+    if (compression or ("xz" if path.suffix == ".xz" else "gzip")) == "xz":
+        return lzma.open(path, mode)
+    return gzip.open(path, mode)
+
+
+class Archiver:
+    """Hält DATA_DIR klein: komprimiert, kompaktiert, löscht nach LRU.
+
+    Layout unter <data_dir>/archive/:
+        transcripts/<name>.jsonl.gz  geschlossene Transcripts
+        logs/<name>.log.gz           rotierte tool.log-Dateien
+        index.json                   ein Eintrag pro Archivdatei (Größen,
+                                     Zeitraum, Tool-Zähler, letzte Nutzung)
+
+    Der Index hält Suche und Quota-Prüfung unabhängig von der Anzahl
+    archivierter Dateien. Ein Lauf ist per flock auf archive/.lock
+    exklusiv (mehrere Server-Prozesse, main.py maintenance).
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        compression: str = ARCHIVE_COMPRESSION,
+        min_age: float = ARCHIVE_MIN_AGE,
+        stale_days: float = SESSION_STALE_DAYS,
+        quota_bytes: int = DATA_QUOTA_BYTES,
+    ):
+        if compression not in _SUFFIXES:
+            raise ValueError(f"Unbekannte Kompression: {compression} (gzip, xz)")
+        self.data_dir = data_dir or DATA_DIR
+        self.archive_dir = self.data_dir / "archive"
+        self.transcript_dir = self.data_dir / "transcripts"
+        self.compression = compression
+        self.min_age = min_age
+        self.stale_days = stale_days
+        self.quota_bytes = quota_bytes
+        self._lock = threading.Lock()
+
+    # --- Index ---
+
+    def _index_file(self) -> Path:
+        return self.archive_dir / "index.json"
+
+    def load_index(self) -> dict[str, dict]:
+        """Einträge nach Archivpfad (relativ zu archive/); kaputt = neu aufbauen."""
+        try:
+            index = json.loads(self._index_file().read_text(encoding="utf-8"))
+            if index.get("version") == INDEX_VERSION:
+                return index["entries"]
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Archiv-Index unbrauchbar, wird neu aufgebaut: {e}")
+        return self._rebuild_index()
+
+    def _save_index(self, entries: dict[str, dict]) -> None:
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self._index_file()
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "entries": entries}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _rebuild_index(self) -> dict[str, dict]:
+        """Liest alle Archivdateien neu ein (nur nach Beschädigung des Index)."""
+        entries = {}
+        for kind in ("transcripts", "logs"):
+            directory = self.archive_dir / kind
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.suffix in (".gz", ".xz"):
+                    with _open_compressed(path, "rb") as f:
+                        entry = self._scan(f, kind)
+                    entry["stored"] = path.stat().st_size
+                    entry["used"] = path.stat().st_mtime
+                    entries[f"{kind}/{path.name}"] = entry
+        self._save_index(entries)
+        return entries
+
+    @staticmethod
+    def _scan(lines: Iterator[bytes], kind: str, sink: Optional[IO[bytes]] = None) -> dict:
+        """Zeitraum und Tool-Zähler einer Datei (schreibt optional mit)."""
+        pattern = _TRANSCRIPT_ENTRY if kind == "transcripts" else _LOG_ENTRY
+        first = last = None
+        tools: dict[str, int] = {}
+        size = 0
+        for line in lines:
+            size += len(line)
+            if sink is not None:
+                sink.write(line)
+            match = pattern.match(line)
+            if match:
+                groups = [group for group in match.groups() if group is not None]
+                stamp = groups[0].decode("utf-8", errors="replace")
+                first = first or stamp
+                last = stamp
+                tool = groups[1].decode("utf-8", errors="replace")
+                tools[tool] = tools.get(tool, 0) + 1
+        return {"kind": kind, "size": size, "first": first, "last": last, "tools": tools}
+
+    # --- Komprimieren ---
+
+    def _compress(self, source: Path, kind: str, entries: dict[str, dict]) -> Optional[str]:
+        """Komprimiert source nach archive/<kind>/ und löscht das Original."""
+        target = self.archive_dir / kind / (source.name + _SUFFIXES[self.compression])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        try:
+            with open(source, "rb") as src, _open_compressed(tmp, "wb", self.compression) as dst:
+                entry = self._scan(src, kind, sink=dst)
+            os.replace(tmp, target)
+        except OSError as e:
+            logger.error(f"Archivieren fehlgeschlagen: {source}: {e}")
+            tmp.unlink(missing_ok=True)
+            return None
+
+        entry["source"] = source.name
+        entry["stored"] = target.stat().st_size
+        entry["used"] = source.stat().st_mtime
+        source.unlink()
+        name = f"{kind}/{target.name}"
+        entries[name] = entry
+        return name
+
+    def archive_transcripts(self, entries: dict[str, dict], active: Optional[Path] = None) -> list[str]:
+        """Komprimiert geschlossene Transcripts (seit min_age unverändert).
+
+        Jeder TranscriptWriter hält auf seiner .jsonl einen geteilten flock,
+        solange sie offen ist; Dateien, auf die kein exklusiver flock geht,
+        schreibt noch ein (evtl. seit Stunden ruhender) Server-Prozess und
+        bleiben liegen. Nur die .jsonl selbst: Offset-Index (.idx) und Suchindex (.terms)
+        werden gelöscht, Markdown-Renders (/transcript md) bleiben liegen -
+        alle drei lassen sich aus der .jsonl jederzeit neu aufbauen.
+        """
+        if not self.transcript_dir.is_dir():
+            return []
+        cutoff = time.time() - self.min_age
+        archived = []
+        for entry in os.scandir(self.transcript_dir):
+            path = Path(entry.path)
+            if path.suffix != ".jsonl" or (active is not None and path == active):
+                continue
+            if entry.stat().st_mtime > cutoff:
+                continue
+            try:
+                probe = open(path, "rb")
+            except OSError:
+                continue
+            with probe:
+                try:
+                    fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # noch von einem TranscriptWriter geöffnet
+                name = self._compress(path, "transcripts", entries)
+            if name:
+                archived.append(name)
+                for side in (".idx", ".terms"):
+                    path.with_suffix(side).unlink(missing_ok=True)
+        return archived
+
+    def archive_logs(self, entries: dict[str, dict]) -> list[str]:
+        """Komprimiert rotierte Logs, die tool.log ins Archiv verschoben hat."""
+        directory = self.archive_dir / "logs"
+        if not directory.is_dir():
+            return []
+        archived = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".log"):
+                name = self._compress(Path(entry.path), "logs", entries)
+                if name:
+                    archived.append(name)
+        return archived
+
+    # --- Sessions ---
+
+    def compact_sessions(self) -> list[str]:
+        """Übernimmt Journale von Sessions, die seit stale_days ruhen, in den Snapshot."""
+        from code.persistence.session_manager import SessionManager
+
+        manager = SessionManager(base_dir=self.data_dir)
+        if not manager.sessions_dir.is_dir():
+            return []
+        cutoff = time.time() - self.stale_days * 86400
+        compacted = []
+        for project_dir in manager.sessions_dir.iterdir():
+            journal = project_dir / "journal.jsonl"
+            try:
+                if journal.stat().st_mtime > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if manager.compact_session(project_dir.name):
+                compacted.append(project_dir.name)
+        return compacted
+
+    # --- Quota ---
+
+    def _usage(self, entries: dict[str, dict]) -> int:
+        """Belegter Platz: Archiv laut Index, Rest per Verzeichnis-Walk."""
+        total = sum(entry["stored"] for entry in entries.values())
+        stack = [self.data_dir]
+        while stack:
+            try:
+                it = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != str(self.archive_dir):
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        return total
+
+    def enforce_quota(self, entries: dict[str, dict]) -> list[str]:
+        """Löscht am längsten nicht genutzte Archivdateien, bis die Quota passt."""
+        excess = self._usage(entries) - self.quota_bytes
+        evicted = []
+        for name in sorted(entries, key=lambda n: entries[n]["used"]):
+            if excess <= 0:
+                break
+            (self.archive_dir / name).unlink(missing_ok=True)
+            excess -= entries.pop(name)["stored"]
+            evicted.append(name)
+        if excess > 0:
+            logger.warning(f"Quota überschritten ohne löschbare Archive: {excess:,} bytes")
+        return evicted
+
+    # --- Suche ---
+
+    def search(self, query: str, kind: Optional[str] = None, tool: Optional[str] = None,
+               limit: int = 50) -> list[dict]:
+        """Sucht Zeilen in Archivdateien (neueste zuerst, Filter über den Index)."""
+        needle = query.lower().encode("utf-8")
+        hits: list[dict] = []
+        with self._lock:
+            entries = self.load_index()
+            candidates = [
+                name for name, entry in entries.items()
+                if (kind is None or entry["kind"] == kind) and (tool is None or tool in entry["tools"])
+            ]
+            candidates.sort(key=lambda n: entries[n]["last"] or "", reverse=True)
+            for name in candidates:
+                found = len(hits)
+                try:
+                    with _open_compressed(self.archive_dir / name, "rb") as f:
+                        for line_no, line in enumerate(f, start=1):
+                            if needle in line.lower():
+                                hits.append({"file": name, "line": line_no,
+                                             "text": line.decode("utf-8", errors="replace").rstrip()})
+                                if len(hits) >= limit:
+                                    break
+                except OSError as e:
+                    logger.warning(f"Archivdatei nicht lesbar: {name}: {e}")
+                    continue
+                if len(hits) > found:
+                    entries[name]["used"] = time.time()  # LRU: Treffer zählen als Nutzung
+                if len(hits) >= limit:
+                    break
+            if hits:
+                self._save_index(entries)
+        return hits
+
+    # --- Lauf ---
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[bool]:
+        """flock auf archive/.lock ohne Warten (False = läuft schon woanders)."""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.archive_dir / ".lock", "a") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def run(self, active_transcript: Optional[Path] = None) -> Optional[dict]:
+        """Ein Wartungslauf; None wenn gerade ein anderer Prozess archiviert."""
+        with self._lock, self._exclusive() as acquired:
+            if not acquired:
+                return None
+            entries = self.load_index()
+            report = {
+                "transcripts": self.archive_transcripts(entries, active_transcript),
+                "logs": self.archive_logs(entries),
+                "sessions": self.compact_sessions(),
+            }
+            report["evicted"] = self.enforce_quota(entries)
+            self._save_index(entries)
+            report["archive_bytes"] = sum(entry["stored"] for entry in entries.values())
+            report["usage_bytes"] = self._usage(entries)
+            (self.archive_dir / ".last_run").touch()
+        return report
+
+    def due(self, interval: float = MAINTENANCE_INTERVAL) -> bool:
+        """True wenn der letzte Lauf (irgendeines Prozesses) länger her ist."""
+        if interval <= 0:
+            return False
+        try:
+            return time.time() - (self.archive_dir / ".last_run").stat().st_mtime >= interval
+        except FileNotFoundError:
+            return True
+
+
+# Globale Instanz
+archiver = Archiver()
+
+
+def start_idle_maintenance(
+    is_idle: Callable[[], bool],
+    active_transcript: Callable[[], Optional[Path]] = lambda: None,
+    check_every: float = 60.0,
+) -> Optional[threading.Thread]:
+    """Startet Wartungsläufe im Hintergrund, wenn sie fällig sind und der Server ruht.
+
+    Geprüft wird alle check_every Sekunden (ein stat auf archive/.last_run);
+    gelaufen wird nur, wenn gerade kein Tool-Aufruf aktiv ist.
+    """
+    if MAINTENANCE_INTERVAL <= 0:
+        return None
+
+    def loop() -> None:
+        while True:
+            time.sleep(check_every)
+            if not is_idle() or not archiver.due():
+                continue
+            try:
+                report = archiver.run(active_transcript())
+            except Exception as e:
+                logger.error(f"Wartungslauf fehlgeschlagen: {e}")
+                continue
+            if report:
+                logger.info(
+                    f"Wartung: {len(report['transcripts'])} Transcripts, {len(report['logs'])} Logs archiviert, "
+                    f"{len(report['sessions'])} Sessions kompaktiert, {len(report['evicted'])} Archive gelöscht"
+                )
+
+    thread = threading.Thread(target=loop, name="archiver", daemon=True)
+    thread.start()
+    return thread
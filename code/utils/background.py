@@ -0,0 +1,232 @@
+"""Hintergrund-Writer: Buchhaltung (Logs, Persistenz) aus dem Request-Pfad nehmen."""
+
+import atexit
+import contextvars
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from code.config import LOG_BATCH_SIZE, LOG_QUEUE_SIZE, SESSION_FLUSH_INTERVAL
+from code.utils.executor import run_blocking
+from code.utils.logging import get_logger
+
+logger = get_logger("utils.background")
+
+# Markiert das Ende der Queue
+_STOP = object()
+
+
+class BackgroundWriter:
+    """Führt Schreibaufträge gebündelt in einem eigenen Thread aus.
+
+    Aufträge gehen nie verloren: Ist die begrenzte Queue voll, wartet der
+    Aufrufer auf einen freien Platz (Backpressure). submit_async() wartet
+    dabei in einem IO-Worker, der Event-Loop bleibt frei; `throttled` zählt
+    die Aufträge, die warten mussten (sichtbar in /stats). close() arbeitet
+    alle ausstehenden Aufträge ab.
+    """
+
+    def __init__(
+        self,
+        name: str = "background-writer",
+        maxsize: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.throttled = 0
+        self._overflowing = False
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Anzahl wartender Aufträge."""
+        return self._queue.qsize()
+
+    def snapshot(self) -> dict:
+        """Wartende und (seit dem Start) durch volle Queue gebremste Aufträge."""
+        return {"pending": self.pending, "throttled": self.throttled}
+
+    def _ensure_started(self) -> None:
+        """Startet den Worker-Thread beim ersten Auftrag."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _try_put(self, item: tuple) -> bool:
+        """Reiht ohne Warten ein; False (und gezählt) wenn die Queue voll ist."""
+        try:
+            self._queue.put_nowait(item)
+            self._overflowing = False
+            return True
+        except queue.Full:
+            self.throttled += 1
+            if not self._overflowing:  # eine Warnung pro Überlauf, nicht pro Auftrag
+                self._overflowing = True
+                logger.warning(f"{self.name}: Queue voll, Aufrufer warten")
+            return False
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> None:
+        """Reiht einen Schreibauftrag ein (blockiert, solange die Queue voll ist).
+
+        Der Auftrag läuft im Kontext des Aufrufers (State und Session der
+        Verbindung, siehe utils/scoped.py).
+        """
+        if self._closed:
+            self._execute(func, args)
+            return
+
+        self._ensure_started()
+        item = (func, args, contextvars.copy_context())
+        if not self._try_put(item):
+            self._queue.put(item)
+
+    async def submit_async(self, func: Callable[..., Any], *args: Any) -> None:
+        """Wie submit(), für den Event-Loop: bei voller Queue wartet nur der Aufrufer."""
+        if self._closed:
+            self._execute(func, args)
+            return
+
+        self._ensure_started()
+        item = (func, args, contextvars.copy_context())
+        if not self._try_put(item):
+            await run_blocking(self._queue.put, item)
+
+    def flush(self) -> None:
+        """Wartet bis alle eingereihten Aufträge erledigt sind."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Arbeitet die Queue ab und beendet den Worker (idempotent)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _execute(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        context: Optional[contextvars.Context] = None,
+    ) -> None:
+        try:
+            if context is None:
+                func(*args)
+            else:
+                context.run(func, *args)
+        except Exception as e:
+            logger.error(f"{self.name}: Auftrag fehlgeschlagen: {e}")
+
+    def _run(self) -> None:
+        """Worker: holt Aufträge gebündelt ab und führt sie aus."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                else:
+                    self._execute(*item)
+                self._queue.task_done()
+
+            if stop:
+                return
+
+
+class PeriodicFlusher:
+    """Ruft flush() gemeldeter Objekte gebündelt in einem eigenen Thread auf.
+
+    Objekte mit ungeschriebenen Änderungen melden sich per mark_dirty();
+    spätestens nach `interval` Sekunden werden sie geschrieben. Mehrere
+    Änderungen dazwischen kosten einen Schreibvorgang. close() schreibt
+    alles Ausstehende synchron.
+    """
+
+    def __init__(self, name: str = "periodic-flusher", interval: float = SESSION_FLUSH_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        """Anzahl Objekte mit ungeschriebenen Änderungen."""
+        return len(self._dirty)
+
+    def mark_dirty(self, target: Any) -> None:
+        """Meldet ein Objekt mit ungeschriebenen Änderungen (target.flush())."""
+        with self._lock:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._dirty.add(target)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+        if closed:
+            self._flush_one(target)
+
+    def flush(self) -> None:
+        """Schreibt alle gemeldeten Objekte synchron."""
+        with self._lock:
+            targets, self._dirty = self._dirty, set()
+        for target in targets:
+            self._flush_one(target)
+
+    def close(self) -> None:
+        """Beendet den Thread und schreibt alles Ausstehende (idempotent)."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            thread.join()
+        self.flush()
+
+    def _flush_one(self, target: Any) -> None:
+        try:
+            target.flush()
+        except Exception as e:
+            logger.error(f"{self.name}: Flush fehlgeschlagen: {e}")
+
+    def _run(self) -> None:
+        """Worker: schreibt alle `interval` Sekunden, was sich angesammelt hat."""
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self.flush()
+
+
+# Globale Instanzen für Auto-Logging und Session-Persistenz
+log_writer = BackgroundWriter("log-writer")
+session_flusher = PeriodicFlusher("session-flusher")
+
+
+def shutdown() -> None:
+    """Schreibt alles Ausstehende: erst die Log-Queue, dann die Sessions."""
+    log_writer.close()
+    session_flusher.close()
+
+
+atexit.register(shutdown)
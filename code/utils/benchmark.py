@@ -0,0 +1,505 @@
+"""Benchmark der Dateisystem- und Such-Tools auf synthetischen Repos.
+
+generate_repo() erzeugt deterministisch (gleicher Seed = gleiche Bytes)
+ein Repository in wählbarer Größe: breite oder tiefe Verzeichnisbäume,
+große Log-Dateien, Binär-Blobs und versteckte Verzeichnisse (.git, .venv),
+die die Tools überspringen sollen. run_suite() misst jedes Tool warm
+(Page-Cache gefüllt) und kalt (Cache vor jedem Lauf verworfen) und
+liefert ein JSON-fähiges Ergebnis; compare() vergleicht es mit einer
+gespeicherten Baseline und markiert Regressionen.
+
+Die Tools werden direkt (ohne MCP-Transport) in einem Event-Loop
+aufgerufen - gemessen wird die Arbeit der Tools, nicht das Protokoll
+(dafür: main.py replay).
+"""
+
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import string
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+from code.config import BENCHMARK_NOISE_MS, BENCHMARK_THRESHOLD
+from code.utils.output import is_error_result
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+SHAPES = ("wide", "deep")
+
+MANIFEST = ".bench-repo.json"
+FORMAT_VERSION = 1
+
+# Suchbegriffe, die der Generator gezielt verteilt
+NEEDLE = "BENCH_NEEDLE"  # in jeder 97. Quelldatei: ab ~5k Dateien bricht grep nach max_results ab
+RARE = "BENCH_RARE_TOKEN"  # genau einmal, in der letzten Quelldatei: grep liest alles
+MARKER = "BENCH_EDIT_MARKER"  # einmal am Anfang jeder großen Datei, Ziel für str_replace
+
+_EXTENSIONS = [(".py", 5), (".js", 2), (".md", 1), (".txt", 1), (".json", 1)]
+_FILES_PER_DIR = 40
+_LARGE_LINE = 120
+
+
+@dataclass(frozen=True)
+class RepoSpec:
+    """Parameter eines synthetischen Repos (bestimmen Inhalt und Name)."""
+    files: int = 1_000  # Quelldateien (ohne große Dateien, Blobs, versteckte)
+    shape: str = "wide"  # "wide": wenige Ebenen, viele Einträge; "deep": binärer Baum
+    large_files: int = 2
+    large_mb: int = 8
+    binary_blobs: int = 20
+    ignored_files: Optional[int] = None  # in .git/.venv; None = files // 2
+    seed: int = 42
+
+    @property
+    def hidden(self) -> int:
+        return self.files // 2 if self.ignored_files is None else self.ignored_files
+
+    @property
+    def name(self) -> str:
+        return (f"{self.shape}-{self.files}-L{self.large_files}x{self.large_mb}"
+                f"-B{self.binary_blobs}-H{self.hidden}-s{self.seed}")
+
+
+def parse_scale(value: str) -> int:
+    """'1k', '10k', '100k' oder eine Zahl -> Anzahl Quelldateien."""
+    return SCALES.get(value.lower()) or int(value)
+
+
+# --- Generator ---
+
+def _line_pool(rng: random.Random, size: int = 4096) -> list[str]:
+    """Vorrat an Code-ähnlichen Zeilen, aus dem die Dateien zusammengesetzt werden."""
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(600)]
+    templates = [
+        "    {a} = {b}({c}, {d})",
+        "    if {a} is not None and {b} > {n}:",
+        "        return {a}.{b}({c})",
+        "    # {a} {b} {c} {d}",
+        "    for {a} in {b}:",
+        "        {a}[{n}] = '{b} {c}'",
+        "    logger.debug('{a}: %s', {b})",
+        "",
+    ]
+    return [
+        rng.choice(templates).format(
+            a=rng.choice(words), b=rng.choice(words), c=rng.choice(words), d=rng.choice(words),
+            n=rng.randint(0, 999),
+        )
+        for _ in range(size)
+    ]
+
+
+def _source_dir(spec: RepoSpec, index: int) -> Path:
+    leaf = index // _FILES_PER_DIR
+    if spec.shape == "wide":
+        return Path("src") / f"pkg_{leaf // 25:03d}" / f"mod_{leaf % 25:03d}"
+    leaves = max(1, -(-spec.files // _FILES_PER_DIR))
+    depth = max(8, (leaves - 1).bit_length())
+    bits = format(leaf, f"0{depth}b")
+    return Path("src").joinpath(*(f"d{bit}" for bit in bits))
+
+
+def _source_file(spec: RepoSpec, rng: random.Random, pool: list[str], index: int) -> tuple[Path, str]:
+    extensions, weights = zip(*_EXTENSIONS)
+    ext = rng.choices(extensions, weights)[0]
+    start = rng.randrange(len(pool))
+    count = rng.randint(20, 200)
+    body = [pool[(start + i) % len(pool)] for i in range(count)]
+    lines = [f"# file {index}", "", f"def handler_{index}(request):"] + body
+    if index % 97 == 0:
+        lines.insert(rng.randint(3, len(lines)), f"    # {NEEDLE} {index}")
+    if index == spec.files - 1:
+        lines.append(f"    # {RARE}")
+    return _source_dir(spec, index) / f"file_{index:06d}{ext}", "\n".join(lines) + "\n"
+
+
+def _write(root: Path, relative: Path, data: bytes) -> int:
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return len(data)
+
+
+def generate_repo(spec: RepoSpec, root: Path, force: bool = False) -> dict:
+    """Erzeugt das Repo unter root (oder nutzt ein vorhandenes gleicher Spec).
+
+    Liefert das Manifest: Spec, Dateizahlen, Bytes und die Zielpfade
+    (relativ) der Benchmark-Fälle. Das Manifest liegt als versteckte
+    Datei im Repo und ist erst am Ende vollständig - ein abgebrochener
+    Lauf wird beim nächsten Mal neu erzeugt. Ein nicht leeres Verzeichnis
+    ohne Manifest wird nie gelöscht.
+    """
+    if spec.shape not in SHAPES:
+        raise ValueError(f"Unbekannte Form: {spec.shape} ({', '.join(SHAPES)})")
+    manifest_path = root / MANIFEST
+    if not force and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("spec") == asdict(spec) and manifest.get("complete"):
+            return manifest
+    if root.exists() and any(root.iterdir()):
+        if not manifest_path.exists():
+            raise ValueError(f"{root} ist nicht leer und kein Benchmark-Repo")
+        shutil.rmtree(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps({"version": FORMAT_VERSION, "complete": False}), encoding="utf-8")
+
+    rng = random.Random(spec.seed)
+    pool = _line_pool(rng)
+    total = 0
+    sample = edit = None
+
+    for index in range(spec.files):
+        relative, text = _source_file(spec, rng, pool, index)
+        total += _write(root, relative, text.encode("utf-8"))
+        if index == spec.files // 2:
+            sample = relative
+        if edit is None and relative.suffix == ".py" and index >= spec.files // 3:
+            edit = relative
+
+    large = []
+    for i in range(spec.large_files):
+        relative = Path("data") / f"large_{i:02d}.log"
+        lines = [f"{MARKER} {i}"]
+        size = len(lines[0]) + 1
+        target = spec.large_mb * 1024 * 1024
+        while size < target:
+            line = f"2026-01-17T{len(lines) % 24:02d}:00:00 INFO {pool[len(lines) % len(pool)].strip()}"
+            line = line[:_LARGE_LINE].ljust(_LARGE_LINE)
+            lines.append(line)
+            size += len(line) + 1
+        total += _write(root, relative, ("\n".join(lines) + "\n").encode("utf-8"))
+        large.append({"path": str(relative), "lines": len(lines)})
+
+    blobs = []
+    for i in range(spec.binary_blobs):
+        relative = Path("assets") / f"blob_{i:03d}.bin"
+        data = b"\x00BENCH" + rng.randbytes(rng.randint(16 * 1024, 512 * 1024))
+        total += _write(root, relative, data)
+        blobs.append(str(relative))
+
+    hidden_bytes = 0
+    for i in range(spec.hidden):
+        digest = f"{rng.getrandbits(160):040x}"
+        if i % 2:
+            relative = Path(".git") / "objects" / digest[:2] / digest[2:]
+            data = rng.randbytes(rng.randint(200, 2048))
+        else:
+            relative = Path(".venv") / "lib" / "site-packages" / f"pkg_{i // 50:04d}" / f"mod_{i:06d}.py"
+            data = f"# {NEEDLE} {RARE} hidden {digest}\n".encode("utf-8") * rng.randint(5, 50)
+        hidden_bytes += _write(root, relative, data)
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "complete": True,
+        "spec": asdict(spec),
+        "name": spec.name,
+        "files": {
+            "source": spec.files,
+            "large": spec.large_files,
+            "binary": spec.binary_blobs,
+            "hidden": spec.hidden,
+        },
+        "bytes": {"visible": total, "hidden": hidden_bytes},
+        "targets": {
+            "sample": str(sample) if sample else None,
+            "edit": str(edit or sample) if sample else None,
+            "large": large,
+            "binary": blobs,
+        },
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+# --- Page-Cache ---
+
+def drop_page_cache(root: Path, global_drop: bool = False) -> str:
+    """Verwirft den Page-Cache für das Repo; liefert die genutzte Methode.
+
+    Standard ist posix_fadvise(DONTNEED) pro Datei unter root - dann
+    bleiben Verzeichniseinträge im Cache, Dateiinhalte nicht. Nur mit
+    global_drop (und Root-Rechten) wird über /proc/sys/vm/drop_caches
+    der gesamte Page-, Dentry- und Inode-Cache des Hosts verworfen.
+    """
+    if global_drop:
+        try:
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as f:
+                f.write("3\n")
+            return "drop_caches"
+        except OSError:
+            pass
+    if not hasattr(os, "posix_fadvise"):
+        return "none"
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fdatasync(fd)  # geänderte Seiten lassen sich sonst nicht verwerfen
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+    return "fadvise"
+
+
+# --- Fälle ---
+
+class Case(NamedTuple):
+    """Ein Benchmark-Fall: Tool, Parameter und optionales Zurücksetzen danach."""
+    name: str
+    tool: str
+    params: dict
+    reset: Optional[dict] = None  # Parameter für einen ungemessenen Aufruf danach
+
+
+def build_cases(root: Path, manifest: dict) -> list[Case]:
+    """Fälle für alle Dateisystem- und Such-Tools auf dem Repo."""
+    targets = manifest["targets"]
+    r = str(root)
+    cases = [
+        Case("file_list.root", "file_list", {"path": r}),
+        Case("file_list.recursive", "file_list", {"path": r, "recursive": True, "max_depth": 3}),
+        Case("glob_search.all_py", "glob_search", {"pattern": "**/*.py", "path": r}),
+        Case("glob_search.md", "glob_search", {"pattern": "**/*.md", "path": r}),
+        Case("grep.common", "grep", {"pattern": NEEDLE, "path": r}),
+        Case("grep.full_scan", "grep", {"pattern": RARE, "path": r}),
+        Case("grep.regex_py", "grep", {"pattern": r"def handler_\d+7\(", "path": r,
+                                        "is_regex": True, "file_pattern": "*.py"}),
+        Case("grep.ignore_case", "grep", {"pattern": RARE.lower(), "path": r, "ignore_case": True}),
+        Case("file_write.1mb", "file_write", {"path": f"{r}/.bench-out/write.txt",
+                                              "content": ("x" * 127 + "\n") * 8192}),
+    ]
+    if targets["sample"]:
+        sample = f"{r}/{targets['sample']}"
+        edit = f"{r}/{targets['edit']}"
+        cases += [
+            Case("file_read.small", "file_read", {"path": sample}),
+            Case("str_replace.small", "str_replace",
+                 {"path": edit, "old_str": "(request):", "new_str": "(request, bench):"},
+                 {"path": edit, "old_str": "(request, bench):", "new_str": "(request):"}),
+        ]
+    if targets["large"]:
+        large = targets["large"][0]
+        path = f"{r}/{large['path']}"
+        middle = large["lines"] // 2
+        cases += [
+            Case("file_read.large_head", "file_read", {"path": path}),
+            Case("file_read.large_range", "file_read", {"path": path, "start_line": middle, "end_line": middle + 100}),
+            Case("str_replace.large", "str_replace",
+                 {"path": path, "old_str": f"{MARKER} 0", "new_str": f"{MARKER} X"},
+                 {"path": path, "old_str": f"{MARKER} X", "new_str": f"{MARKER} 0"}),
+            Case("diff_preview.large", "diff_preview", {"path": path, "old_str": f"{MARKER} 0", "new_str": "x"}),
+        ]
+    if targets["binary"]:
+        cases.append(Case("file_read.binary", "file_read", {"path": f"{r}/{targets['binary'][0]}"}))
+    return cases
+
+
+def _tool_functions() -> dict[str, Callable]:
+    from code.tools.editor import diff_preview, str_replace
+    from code.tools.filesystem import file_list, file_read, file_write, glob_search
+    from code.tools.search import grep
+
+    return {
+        "file_read": file_read,
+        "file_write": file_write,
+        "file_list": file_list,
+        "glob_search": glob_search,
+        "grep": grep,
+        "str_replace": str_replace,
+        "diff_preview": diff_preview,
+    }
+
+
+# --- Messung ---
+
+def _stats(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": statistics.median(ordered),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+
+def run_suite(
+    root: Path,
+    manifest: dict,
+    repeat: int = 5,
+    cold: bool = True,
+    drop_caches: bool = False,
+    only: Optional[list[str]] = None,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Misst alle Fälle warm (nach einem Aufwärmlauf) und optional kalt.
+
+    only filtert Fälle per Präfix ("grep", "file_read.large").
+    drop_caches verwirft vor kalten Läufen den Cache des ganzen Hosts
+    statt nur den der Repo-Dateien (siehe drop_page_cache).
+    """
+    from code.state import state
+
+    tools = _tool_functions()
+    cases = [c for c in build_cases(root, manifest) if not only or any(c.name.startswith(p) for p in only)]
+    loop = asyncio.new_event_loop()
+    previous_dir = state.working_dir
+    state.working_dir = root
+    cold_method = None
+    results: dict[str, dict] = {}
+
+    def call(case: Case) -> tuple[float, str]:
+        start = time.perf_counter()
+        text = loop.run_until_complete(tools[case.tool](**case.params))
+        elapsed = (time.perf_counter() - start) * 1000
+        if case.reset:
+            loop.run_until_complete(tools[case.tool](**case.reset))
+        return elapsed, text
+
+    try:
+        for case in cases:
+            if progress:
+                progress(case.name)
+            _, text = call(case)  # Aufwärmen, prüft zugleich die Parameter
+            if is_error_result(text):
+                results[case.name] = {"tool": case.tool, "error": text[:500]}
+                continue
+            entry = {"tool": case.tool, "result_chars": len(text)}
+            entry["warm"] = _stats([call(case)[0] for _ in range(repeat)])
+            if cold:
+                samples = []
+                for _ in range(repeat):
+                    cold_method = drop_page_cache(root, global_drop=drop_caches)
+                    samples.append(call(case)[0])
+                entry["cold"] = _stats(samples)
+            results[case.name] = entry
+    finally:
+        state.working_dir = previous_dir
+        loop.close()
+        shutil.rmtree(root / ".bench-out", ignore_errors=True)
+
+    return {
+        "version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "repo": {key: manifest[key] for key in ("name", "spec", "files", "bytes")},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "repeat": repeat,
+        "cold_method": cold_method,
+        "cases": results,
+    }
+
+
+# --- Vergleich ---
+
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = BENCHMARK_THRESHOLD,
+    noise_ms: float = BENCHMARK_NOISE_MS,
+) -> list[dict]:
+    """Vergleicht die Mediane pro Fall und Variante (warm/kalt).
+
+    status: "regression" (langsamer als threshold und mehr als noise_ms),
+    "faster", "ok", "new" (nur aktuell) oder "missing" (nur Baseline).
+    """
+    rows = []
+    names = list(current["cases"]) + [n for n in baseline["cases"] if n not in current["cases"]]
+    for name in names:
+        old_case = baseline["cases"].get(name, {})
+        new_case = current["cases"].get(name, {})
+        for variant in ("warm", "cold"):
+            old = old_case.get(variant, {}).get("median_ms")
+            new = new_case.get(variant, {}).get("median_ms")
+            if old is None and new is None:
+                continue
+            row = {"case": name, "variant": variant, "baseline_ms": old, "current_ms": new, "change": None}
+            if old is None:
+                row["status"] = "new"
+            elif new is None:
+                row["status"] = "missing"
+            else:
+                row["change"] = new / old - 1 if old > 0 else 0.0
+                if row["change"] > threshold and new - old > noise_ms:
+                    row["status"] = "regression"
+                elif row["change"] < -threshold and old - new > noise_ms:
+                    row["status"] = "faster"
+                else:
+                    row["status"] = "ok"
+            rows.append(row)
+    return rows
+
+
+def format_comparison(rows: list[dict], baseline: dict, current: dict, threshold: float) -> str:
+    """Tabelle für die Konsole; Hinweis, wenn Repo oder Umgebung abweichen."""
+    lines = []
+    if baseline["repo"]["spec"] != current["repo"]["spec"]:
+        lines.append(f"Achtung: anderes Repo ({baseline['repo']['name']} vs. {current['repo']['name']})")
+    if baseline.get("cold_method") != current.get("cold_method"):
+        lines.append(f"Achtung: Cache-Methode {baseline.get('cold_method')} vs. {current.get('cold_method')}")
+    header = f"{'Fall':<24} {'':<5} {'Baseline':>10} {'Aktuell':>10} {'Änderung':>9}  Status"
+    lines += [header + "  (ms, Median)", "-" * len(header)]
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:.2f}" if value is not None else "-"
+
+    for row in rows:
+        change = f"{row['change']:+.0%}" if row["change"] is not None else "-"
+        status = row["status"].upper() if row["status"] == "regression" else row["status"]
+        lines.append(
+            f"{row['case']:<24} {row['variant']:<5} {ms(row['baseline_ms']):>10} "
+            f"{ms(row['current_ms']):>10} {change:>9}  {status}"
+        )
+    regressions = sum(row["status"] == "regression" for row in rows)
+    lines.append(f"\n{regressions} Regression(en) über {threshold:.0%}")
+    return "\n".join(lines)
+
+
+def format_results(result: dict) -> str:
+    """Ergebnistabelle eines Laufs (ms)."""
+    repo = result["repo"]
+    visible_mb = repo["bytes"]["visible"] / 1024 / 1024
+    lines = [
+        f"Repo {repo['name']}: {repo['files']['source']} Quelldateien, {visible_mb:.1f} MB sichtbar, "
+        f"{repo['files']['hidden']} versteckte Dateien",
+        f"{result['repeat']} Läufe pro Variante, Cache verwerfen: {result['cold_method'] or '-'}",
+    ]
+    header = f"{'Fall':<24} {'warm p50':>9} {'min':>9} {'kalt p50':>9} {'min':>9} {'Zeichen':>9}"
+    lines += ["", header + "  (ms)", "-" * len(header)]
+
+    def cell(stats: Optional[dict], key: str) -> str:
+        return f"{stats[key]:.2f}" if stats else "-"
+
+    for name, entry in result["cases"].items():
+        if "error" in entry:
+            lines.append(f"{name:<24} {entry['error'].splitlines()[0]}")
+            continue
+        warm, cold = entry.get("warm"), entry.get("cold")
+        lines.append(
+            f"{name:<24} {cell(warm, 'median_ms'):>9} {cell(warm, 'min_ms'):>9} "
+            f"{cell(cold, 'median_ms'):>9} {cell(cold, 'min_ms'):>9} {entry['result_chars']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def load_result(path: Path) -> dict[str, Any]:
+    result = json.loads(path.read_text(encoding="utf-8"))
+    if result.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unbekanntes Benchmark-Format in {path}")
+    return result
@@ -0,0 +1,195 @@
+"""Executor: Blockierende Tool-Arbeit aus dem Event-Loop auslagern."""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from code.config import IO_WORKERS, SEARCH_PROCESS_WORKERS
+from code.utils.metrics import add_queue_wait
+from code.utils.profiling import current_profile
+
+T = TypeVar("T")
+
+
+class OperationCancelled(Exception):
+    """Die ausgelagerte Arbeit wurde abgebrochen (Client-Cancel)."""
+
+
+class DeadlineExceeded(OperationCancelled):
+    """Das Zeitbudget (deadline_ms) des Tool-Aufrufs ist aufgebraucht."""
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        super().__init__(f"Zeitbudget von {budget_ms} ms erreicht")
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Zeitbudget eines Tool-Aufrufs (monotone Uhr)."""
+    expires: float
+    budget_ms: int
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+
+class CancelToken:
+    """Kooperatives Abbruch-Signal für Arbeit in Worker-Threads."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Wirft OperationCancelled wenn abgebrochen wurde."""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+# Token der aktuell ausgeführten Arbeit (per Kontext in den Worker kopiert)
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+# Zeitbudget des laufenden Tool-Aufrufs (ebenfalls in den Worker kopiert)
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    """Token der laufenden Arbeit oder None außerhalb von run_blocking()."""
+    return _current_token.get()
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Zeitbudget des laufenden Tool-Aufrufs oder None."""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline_ms: Optional[int]) -> Iterator[Optional[Deadline]]:
+    """Setzt das Zeitbudget für alles, was im aktuellen Kontext läuft."""
+    if deadline_ms is None:
+        yield None
+        return
+    deadline = Deadline(time.monotonic() + deadline_ms / 1000, deadline_ms)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_cancelled() -> None:
+    """Abbruchpunkt für Walker und Scanner.
+
+    Raises:
+        OperationCancelled: Aufruf wurde abgebrochen (nur in run_blocking)
+        DeadlineExceeded: Zeitbudget des Tool-Aufrufs ist aufgebraucht
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded(deadline.budget_ms)
+
+
+# --- Pools ---
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """Gemeinsamer Thread-Pool für Dateisystem-Arbeit (lazy)."""
+    global _io_executor
+    if _io_executor is None:
+        with _pool_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="tool-io")
+    return _io_executor
+
+
+def cpu_executor() -> Optional[ProcessPoolExecutor]:
+    """Optionaler Prozess-Pool für CPU-lastiges Scannen (None wenn deaktiviert)."""
+    global _cpu_executor
+    if SEARCH_PROCESS_WORKERS <= 0:
+        return None
+    if _cpu_executor is None:
+        with _pool_lock:
+            if _cpu_executor is None:
+                # forkserver: Worker forken nicht den großen Server-Prozess
+                _cpu_executor = ProcessPoolExecutor(
+                    max_workers=SEARCH_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+    return _cpu_executor
+
+
+def shutdown_executors() -> None:
+    """Beendet die Pools; laufende Arbeit wird per Token nicht mehr abgewartet."""
+    global _io_executor, _cpu_executor
+    with _pool_lock:
+        for pool in (_io_executor, _cpu_executor):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _io_executor = None
+        _cpu_executor = None
+
+
+atexit.register(shutdown_executors)
+
+
+def _run_queued(submitted: float, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Läuft im Worker: misst die Wartezeit auf einen freien Thread."""
+    add_queue_wait(time.perf_counter() - submitted)
+    profile = current_profile()
+    if profile is not None:
+        return profile.run(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+async def run_blocking(
+    func: Callable[..., T],
+    *args: Any,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> T:
+    """Führt eine blockierende Funktion im IO-Pool aus.
+
+    Der Kontext (State, Deadlines) wird in den Worker kopiert. Wird der
+    aufrufende Task abgebrochen, setzt run_blocking den Cancel-Token;
+    die Funktion beendet sich beim nächsten check_cancelled().
+    """
+    loop = asyncio.get_running_loop()
+    token = CancelToken()
+    context = contextvars.copy_context()
+    context.run(_current_token.set, token)
+
+    future = loop.run_in_executor(
+        executor or io_executor(),
+        functools.partial(context.run, _run_queued, time.perf_counter(), func, *args, **kwargs),
+    )
+    try:
+        return await future
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
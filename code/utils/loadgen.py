@@ -0,0 +1,327 @@
+"""Lastgenerator: parallele MCP-Aufrufe gegen `main.py serve` über stdio.
+
+Mehrere Threads schicken über einen StdioClient gleichzeitig tools/call-
+Anfragen nach einer gewichteten Mischung, ein Teil davon wird nach kurzer
+Zeit per notifications/cancelled abgebrochen. Ein Probe-Thread misst mit
+ping die Antwortzeit des Event-Loops von außen; der Server selbst meldet
+am Ende seinen Event-Loop-Lag und die Wartezeiten pro Tool (/stats).
+
+Der Server läuft wie bei replay in einer Sandbox mit eigenem HOME, gegen
+ein synthetisches Repo (utils/benchmark.py) oder eine Projektkopie.
+"""
+
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from code.utils.benchmark import NEEDLE, RARE, RepoSpec, generate_repo
+from code.utils.mcp_client import McpClientError, StdioClient, tool_result
+from code.utils.metrics import Histogram
+from code.utils.replay import Sandbox, latency_stats, summarize
+
+# Gewichtete Mischungen (Tool -> relatives Gewicht)
+MIXES = {
+    "read": {"file_read": 4, "grep": 2, "glob_search": 2, "file_list": 2},
+    "mixed": {"file_read": 4, "grep": 2, "glob_search": 1, "file_list": 1,
+              "str_replace": 1, "diff_preview": 1, "shell_exec": 1, "cwd": 1},
+    "shell": {"shell_exec": 3, "cwd": 1},
+}
+
+# Repo für Lasttests: klein genug, um es für jeden Lauf neu zu erzeugen
+DEFAULT_SPEC = RepoSpec(files=1_000, large_files=1, large_mb=2, binary_blobs=5)
+
+
+class RequestFactory:
+    """Erzeugt Tool-Parameter für ein Projekt (zufällig, aber per Seed reproduzierbar)."""
+
+    TOOLS = ("file_read", "grep", "glob_search", "file_list", "str_replace", "diff_preview", "shell_exec", "cwd")
+
+    def __init__(self, project: Path):
+        self.project = project
+        self.files = sorted(
+            p for p in project.rglob("*")
+            if p.is_file() and not any(part.startswith(".") for part in p.relative_to(project).parts)
+        )
+        if not self.files:
+            raise ValueError(f"Keine Dateien in {project}")
+        self.dirs = sorted({p.parent for p in self.files})
+        self.sources = [p for p in self.files if p.suffix == ".py"] or self.files
+
+    def make(self, tool: str, rng: random.Random) -> dict:
+        if tool == "file_read":
+            return {"path": str(rng.choice(self.files))}
+        if tool == "grep":
+            return rng.choice([
+                {"pattern": NEEDLE, "path": str(self.project)},
+                {"pattern": RARE, "path": str(self.project)},
+                {"pattern": r"def \w+_\d+\(", "is_regex": True, "path": str(rng.choice(self.dirs))},
+                {"pattern": "return", "ignore_case": True, "path": str(rng.choice(self.dirs))},
+            ])
+        if tool == "glob_search":
+            return {"pattern": rng.choice(["**/*.py", "*.md", "**/*.json"]), "path": str(rng.choice(self.dirs).parent)}
+        if tool == "file_list":
+            return {"path": str(rng.choice(self.dirs)), "recursive": rng.random() < 0.3}
+        if tool in ("str_replace", "diff_preview"):
+            # Erste Zeile durch sich selbst ersetzen: volle Arbeit, Datei bleibt gleich
+            path = rng.choice(self.sources)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                first = f.readline()
+            return {"path": str(path), "old_str": first, "new_str": first}
+        if tool == "shell_exec":
+            return {"command": rng.choice(["echo ok", "ls", "sleep 0.2"])}
+        if tool == "cwd":
+            return {}
+        raise ValueError(f"Kein Lastprofil für Tool: {tool}")
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """Name einer Mischung ('read', 'mixed', 'shell') oder 'grep=3,file_read=1'."""
+    if value in MIXES:
+        return dict(MIXES[value])
+    mix = {}
+    for part in value.split(","):
+        tool, _, weight = part.partition("=")
+        tool = tool.strip()
+        if tool not in RequestFactory.TOOLS:
+            raise ValueError(f"Unbekanntes Tool in der Mischung: {tool} ({', '.join(RequestFactory.TOOLS)})")
+        mix[tool] = int(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("Mischung ohne Gewichte")
+    return mix
+
+
+class _Run:
+    """Gemeinsamer Zustand der Worker-Threads eines Laufs."""
+
+    def __init__(self, requests: Optional[int], duration: Optional[float]):
+        self.requests = requests
+        self.deadline = time.perf_counter() + duration if duration else None
+        self.issued = 0
+        self.samples: list[tuple[str, int, str]] = []  # (Tool, µs, ok|error|cancelled|late)
+        self.ack_us = Histogram()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Nächste Anfrage erlaubt? (Anzahl bzw. Dauer)"""
+        with self.lock:
+            if self.requests is not None and self.issued >= self.requests:
+                return False
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return False
+            self.issued += 1
+            return True
+
+    def record(self, tool: str, micros: int, outcome: str) -> None:
+        with self.lock:
+            self.samples.append((tool, micros, outcome))
+            if outcome == "cancelled":
+                self.ack_us.record(micros)
+
+
+def _worker(
+    client: StdioClient,
+    factory: RequestFactory,
+    mix: dict[str, int],
+    run: _Run,
+    rng: random.Random,
+    cancel_rate: float,
+    cancel_after_ms: float,
+    timeout: float,
+) -> None:
+    tools, weights = zip(*mix.items())
+    while run.take():
+        tool = rng.choices(tools, weights)[0]
+        params = factory.make(tool, rng)
+        cancel = rng.random() < cancel_rate
+        delay = rng.uniform(0, cancel_after_ms) / 1000
+        start = time.perf_counter()
+        try:
+            request_id, pending = client.send_request("tools/call", {"name": tool, "arguments": params})
+        except McpClientError:
+            run.record(tool, 0, "error")
+            return
+        cancel_sent = False
+        if cancel and not pending.event.wait(delay):
+            client.cancel(request_id, "Lasttest")
+            cancel_sent = True
+        try:
+            _, failed = tool_result(client.wait(pending, timeout))
+            outcome = "error" if failed else ("late" if cancel_sent else "ok")
+        except McpClientError as e:
+            outcome = "cancelled" if cancel_sent and e.code == 0 else "error"
+        run.record(tool, int((time.perf_counter() - start) * 1_000_000), outcome)
+
+
+def _probe(client: StdioClient, histogram: Histogram, stop: threading.Event, interval: float) -> None:
+    """ping in festen Abständen; misst, wie schnell der Event-Loop antwortet."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            client.ping(timeout=30)
+        except McpClientError:
+            return
+        histogram.record((time.perf_counter() - start) * 1_000_000)
+        stop.wait(interval)
+
+
+def run_load(
+    mix: dict[str, int],
+    project: Optional[Path] = None,
+    spec: Optional[RepoSpec] = None,
+    concurrency: int = 8,
+    requests: Optional[int] = 1_000,
+    duration: Optional[float] = None,
+    cancel_rate: float = 0.0,
+    cancel_after_ms: float = 20.0,
+    probe_interval: float = 0.05,
+    seed: int = 42,
+    timeout: float = 60.0,
+    keep: bool = False,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Startet einen Server in der Sandbox, erzeugt Last und liefert den Bericht.
+
+    Ohne project wird ein synthetisches Repo (spec, Default DEFAULT_SPEC)
+    erzeugt. Bei duration endet der Lauf nach Zeit, sonst nach requests
+    Anfragen. Jede Anfrage wird mit Wahrscheinlichkeit cancel_rate nach
+    zufällig 0..cancel_after_ms abgebrochen (falls noch nicht beantwortet).
+    """
+    progress = progress or (lambda message: None)
+    scratch = None
+    if project is None:
+        scratch = Path(tempfile.mkdtemp(prefix="mcp-load-"))
+        project = scratch / "repo"
+        progress("Erzeuge synthetisches Repo...")
+        generate_repo(spec or DEFAULT_SPEC, project)
+        sandbox = Sandbox(project, copy=False)
+    else:
+        sandbox = Sandbox(project)
+    factory = RequestFactory(sandbox.project)
+
+    try:
+        with open(sandbox.root / "server.log", "wb") as log:
+            client = StdioClient(env=sandbox.env(), cwd=sandbox.project, stderr=log)
+            try:
+                client.initialize()
+                client.call_tool("cd", {"path": str(sandbox.project)}, timeout)
+                warmup = random.Random(seed)
+                for tool in mix:
+                    client.call_tool(tool, factory.make(tool, warmup), timeout)
+
+                idle_ping = Histogram()
+                for _ in range(20):
+                    start = time.perf_counter()
+                    client.ping(timeout=10)
+                    idle_ping.record((time.perf_counter() - start) * 1_000_000)
+                client.call_tool("command", {"cmd": "stats", "arg": "reset"}, timeout)
+
+                progress(f"Last: {concurrency} parallel, Mischung {mix}")
+                run = _Run(None if duration else requests, duration)
+                ping = Histogram()
+                stop = threading.Event()
+                probe = threading.Thread(target=_probe, args=(client, ping, stop, probe_interval), daemon=True)
+                workers = [
+                    threading.Thread(
+                        target=_worker,
+                        args=(client, factory, mix, run, random.Random(seed * 1000 + n),
+                              cancel_rate, cancel_after_ms, timeout),
+                        daemon=True,
+                    )
+                    for n in range(concurrency)
+                ]
+                start = time.perf_counter()
+                probe.start()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                wall = time.perf_counter() - start
+                stop.set()
+                probe.join()
+
+                text, _ = client.call_tool("command", {"cmd": "stats", "arg": "json"}, timeout)
+                server_stats = json.loads(text)
+            finally:
+                usage = client.close()
+    finally:
+        if not keep:
+            sandbox.cleanup()
+            if scratch is not None:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    completed = [(tool, micros, outcome == "error") for tool, micros, outcome in run.samples if outcome != "cancelled"]
+    report = summarize(completed, wall, usage)
+    for tool in {tool for tool, _, _ in run.samples}:
+        outcomes = [outcome for t, _, outcome in run.samples if t == tool]
+        entry = report["tools"].setdefault(tool, {"errors": 0, **latency_stats(Histogram())})
+        entry["cancelled"] = outcomes.count("cancelled")
+        server = server_stats["tools"].get(tool)
+        if server:
+            entry["server_exec_p95"] = server["exec_us"]["p95"]
+            entry["server_queue_p95"] = server["queue_us"]["p95"]
+    report["tools"] = dict(sorted(report["tools"].items()))
+
+    outcomes = [outcome for _, _, outcome in run.samples]
+    lag = server_stats.get("loop_lag_us", {})
+    report.update(
+        mix=mix,
+        concurrency=concurrency,
+        cancellations={
+            "sent": outcomes.count("cancelled") + outcomes.count("late"),
+            "confirmed": outcomes.count("cancelled"),
+            "completed_first": outcomes.count("late"),
+            "ack_us": latency_stats(run.ack_us),
+        },
+        ping_idle_us=latency_stats(idle_ping),
+        ping_us=latency_stats(ping),
+        server_loop_lag_us={key: value for key, value in lag.items() if key != "buckets"},
+        sandbox=str(sandbox.root) if keep else None,
+    )
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Tabelle für die Konsole (Zeiten in ms)."""
+    def ms(value: Optional[float]) -> str:
+        return f"{value / 1000:.2f}" if value is not None else "-"
+
+    cancels = report["cancellations"]
+    lines = [
+        f"Last ({report['concurrency']} parallel): {report['calls']} beantwortet, {report['errors']} Fehler, "
+        f"{cancels['confirmed']} abgebrochen, {report['wall_seconds']:.2f} s, "
+        f"{report['throughput'] or 0:.1f} Aufrufe/s",
+        f"Abbrüche: {cancels['sent']} gesendet, {cancels['confirmed']} bestätigt "
+        f"(p50 {ms(cancels['ack_us']['p50'])} ms), {cancels['completed_first']} vorher fertig",
+    ]
+    ping, idle, lag = report["ping_us"], report["ping_idle_us"], report["server_loop_lag_us"]
+    lines.append(
+        f"ping: p50 {ms(ping['p50'])} / p99 {ms(ping['p99'])} / max {ms(ping['max'])} ms "
+        f"(ohne Last p50 {ms(idle['p50'])} ms)"
+    )
+    if lag.get("count"):
+        lines.append(
+            f"Event-Loop-Lag (Server): p50 {ms(lag['p50'])} / p99 {ms(lag['p99'])} / max {ms(lag['max'])} ms"
+        )
+    if "server" in report:
+        server = report["server"]
+        lines.append(
+            f"Server: Peak-RSS {server['peak_rss_kb'] / 1024:.1f} MB, "
+            f"CPU {server['cpu_user_s']:.2f} s user / {server['cpu_sys_s']:.2f} s sys"
+        )
+    header = (f"{'Tool':<14} {'n':>6} {'err':>5} {'abbr':>5} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'max':>8} {'srv p95':>8} {'queue':>8}")
+    lines += ["", header + "  (ms)", "-" * len(header)]
+    for tool, stats in report["tools"].items():
+        lines.append(
+            f"{tool:<14} {stats['count']:>6} {stats['errors']:>5} {stats.get('cancelled', 0):>5} "
+            f"{ms(stats['p50']):>8} {ms(stats['p95']):>8} {ms(stats['p99']):>8} {ms(stats['max']):>8} "
+            f"{ms(stats.get('server_exec_p95')):>8} {ms(stats.get('server_queue_p95')):>8}"
+        )
+    if report.get("sandbox"):
+        lines.append(f"\nSandbox behalten: {report['sandbox']}")
+    return "\n".join(lines)
@@ -65,17 +65,27 @@ def get_logger(name: str) -> logging.Logger:
     Returns:
         Logger-Instanz
     """
+    _package_logger()
     return logging.getLogger(f"mcp_shell_tools.{name}")
 
 
-# Standard-Logger initialisieren
-_root_logger = setup_logging()
+# Standard-Logger wird beim ersten get_logger() initialisiert (nicht beim Import)
+_root_logger: Optional[logging.Logger] = None
+
+
+def _package_logger() -> logging.Logger:
+    """Gibt den Package-Logger zurück und konfiguriert ihn beim ersten Aufruf."""
+    global _root_logger
+    if _root_logger is None:
+        _root_logger = setup_logging()
+    return _root_logger
 
 
 def set_log_level(level: int) -> None:
     """Ändert das Log-Level zur Laufzeit."""
-    _root_logger.setLevel(level)
-    for handler in _root_logger.handlers:
+    root = _package_logger()
+    root.setLevel(level)
+    for handler in root.handlers:
         handler.setLevel(level)
 
 
@@ -87,12 +97,13 @@ def enable_file_logging(log_file: Path, level: int = DEFAULT_LOG_LEVEL) -> None:
     file_handler.setFormatter(
         logging.Formatter(DEFAULT_LOG_FORMAT, DEFAULT_DATE_FORMAT)
     )
-    _root_logger.addHandler(file_handler)
+    _package_logger().addHandler(file_handler)
 
 
 def disable_file_logging() -> None:
     """Deaktiviert File-Logging."""
-    _root_logger.handlers = [
-        h for h in _root_logger.handlers
+    root = _package_logger()
+    root.handlers = [
+        h for h in root.handlers
         if not isinstance(h, logging.FileHandler)
     ]
@@ -0,0 +1,189 @@
+"""Minimaler MCP-Client über stdio (JSON-RPC, eine Nachricht pro Zeile).
+
+Für Replay und Lasttests: startet `main.py serve` als Kindprozess und
+schickt Anfragen (auch Abbrüche und ping) aus beliebig vielen Threads. Ein Reader-Thread ordnet
+Antworten über die id zu. close() liefert die rusage des Servers
+(os.wait4), u.a. den Spitzen-RSS.
+"""
+
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from code.utils.output import is_error_result
+
+PROTOCOL_VERSION = "2025-06-18"
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+
+class McpClientError(RuntimeError):
+    """JSON-RPC-Fehler, Timeout oder beendeter Server (code nur bei JSON-RPC-Fehlern)."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def tool_result(result: dict) -> tuple[str, bool]:
+    """Text eines tools/call-Ergebnisses und ob es ein Fehler ist."""
+    text = "".join(block.get("text", "") for block in result.get("content", []))
+    return text, bool(result.get("isError")) or is_error_result(text)
+
+
+class _Pending:
+    __slots__ = ("event", "message")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.message: Optional[dict] = None
+
+
+class StdioClient:
+    """Spricht MCP mit einem Server-Prozess über dessen stdin/stdout."""
+
+    def __init__(
+        self,
+        argv: Optional[list[str]] = None,
+        env: Optional[dict[str, str]] = None,
+        cwd: Optional[Path] = None,
+        stderr: Optional[IO] = None,
+    ):
+        argv = argv or [sys.executable, str(ROOT_DIR / "code" / "main.py"), "serve"]
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr if stderr is not None else subprocess.DEVNULL,
+            cwd=cwd,
+            env=env,
+        )
+        self._ids = itertools.count(1)
+        self._pending: dict[int, _Pending] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, name="mcp-client-reader", daemon=True)
+        self._reader.start()
+
+    # --- Transport ---
+
+    def _send(self, message: dict) -> None:
+        line = json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._write_lock:
+            try:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                raise McpClientError(f"Server nicht erreichbar: {e}") from e
+
+    def _read(self) -> None:
+        """Reader-Thread: Antworten den wartenden Anfragen zuordnen."""
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if "id" not in message or "method" in message:
+                continue  # Notification oder Anfrage des Servers
+            with self._lock:
+                pending = self._pending.pop(message["id"], None)
+            if pending is not None:
+                pending.message = message
+                pending.event.set()
+        # Server beendet: alle Wartenden freigeben
+        with self._lock:
+            pending_all, self._pending = list(self._pending.values()), {}
+        for pending in pending_all:
+            pending.event.set()
+
+    # --- JSON-RPC ---
+
+    def send_request(self, method: str, params: Optional[dict] = None) -> tuple[int, _Pending]:
+        """Schickt eine Anfrage ohne zu warten; (id, Platzhalter für wait())."""
+        request_id = next(self._ids)
+        pending = _Pending()
+        with self._lock:
+            self._pending[request_id] = pending
+        self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+        return request_id, pending
+
+    def wait(self, pending: _Pending, timeout: Optional[float] = None) -> dict:
+        """Wartet auf die Antwort; result oder McpClientError."""
+        if not pending.event.wait(timeout):
+            raise McpClientError(f"Timeout nach {timeout} s")
+        if pending.message is None:
+            raise McpClientError("Server beendet")
+        if "error" in pending.message:
+            error = pending.message["error"]
+            raise McpClientError(f"{error.get('code')}: {error.get('message')}", error.get("code"))
+        return pending.message.get("result", {})
+
+    def request(self, method: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        """Anfrage schicken und auf die Antwort warten."""
+        _, pending = self.send_request(method, params)
+        return self.wait(pending, timeout)
+
+    def notify(self, method: str, params: Optional[dict] = None) -> None:
+        self._send({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    def cancel(self, request_id: int, reason: Optional[str] = None) -> None:
+        """notifications/cancelled für eine laufende Anfrage.
+
+        Der Server bricht sie ab und antwortet mit einem Fehler (Code 0);
+        war sie schon fertig, kommt das normale Ergebnis.
+        """
+        params: dict[str, Any] = {"requestId": request_id}
+        if reason:
+            params["reason"] = reason
+        self.notify("notifications/cancelled", params)
+
+    # --- MCP ---
+
+    def initialize(self, timeout: float = 30.0) -> dict:
+        """initialize-Handshake inkl. notifications/initialized."""
+        result = self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-shell-tools-client", "version": "1.0.0"},
+            },
+            timeout,
+        )
+        self.notify("notifications/initialized")
+        return result
+
+    def ping(self, timeout: Optional[float] = None) -> None:
+        """ping - beantwortet der Server direkt im Event-Loop."""
+        self.request("ping", None, timeout)
+
+    def call_tool(self, name: str, arguments: dict[str, Any], timeout: Optional[float] = None) -> tuple[str, bool]:
+        """tools/call; (Text des Ergebnisses, Fehler ja/nein)."""
+        return tool_result(self.request("tools/call", {"name": name, "arguments": arguments}, timeout))
+
+    def close(self, timeout: float = 10.0) -> Optional[resource.struct_rusage]:
+        """Schließt stdin (Server beendet sich) und liefert dessen rusage."""
+        if self._closed:
+            return None
+        self._closed = True
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        timer = threading.Timer(timeout, self.process.kill)
+        timer.start()
+        try:
+            _, status, usage = os.wait4(self.process.pid, 0)
+        except ChildProcessError:
+            return None
+        finally:
+            timer.cancel()
+        self.process.returncode = os.waitstatus_to_exitcode(status)
+        self._reader.join(timeout=1.0)
+        return usage
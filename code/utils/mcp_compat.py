@@ -0,0 +1,74 @@
+"""Korrekturen für Races im MCP-SDK (mcp.shared.session.RequestResponder).
+
+Client-Abbrüche (notifications/cancelled) beenden mit dem unveränderten
+SDK in zwei Fällen den ganzen Server (gefunden mit main.py load):
+- Abbruch, bevor der Handler-Task den Request übernommen hat, bzw. nach
+  der Antwort: cancel() wirft im Empfangs-Loop bzw. schickt eine zweite
+  Antwort. Der Abbruch wird ignoriert (laut Spezifikation erlaubt), der
+  Aufruf endet normal.
+- Abbruch nach fertigem Handler, aber vor der Antwort: die Fehlerantwort
+  des Abbruchs ist schon raus, respond() scheitert an einer Assertion.
+  Die zweite Antwort wird verworfen.
+
+Die Korrektur stützt sich auf die privaten Attribute _entered und
+_completed. Fehlen sie in einer SDK-Version, bleiben die Originalmethoden
+unverändert. Angewendet wird sie nur beim Start des Servers
+(patch_request_cancellation), nicht beim Import.
+"""
+
+from mcp.shared.session import RequestResponder
+
+from code.utils.logging import get_logger
+
+logger = get_logger("utils.mcp_compat")
+
+# Von RequestResponder.__init__ gesetzte Attribute, auf die sich die Korrektur stützt
+_REQUIRED_ATTRIBUTES = ("_entered", "_completed")
+
+_patched = False
+
+
+def _supported(cls: type) -> bool:
+    """True wenn cls die Attribute und Methoden hat, auf die die Korrektur baut."""
+    init = getattr(cls, "__init__", None)
+    names = getattr(getattr(init, "__code__", None), "co_names", ())
+    return (
+        all(name in names for name in _REQUIRED_ATTRIBUTES)
+        and all(callable(getattr(cls, name, None)) for name in ("cancel", "respond"))
+        and isinstance(getattr(cls, "cancelled", None), property)
+    )
+
+
+def patch_request_cancellation(cls: type = RequestResponder) -> bool:
+    """Ersetzt cancel()/respond() durch robuste Varianten (idempotent).
+
+    Liefert False, wenn die SDK-Version die nötigen Attribute nicht hat -
+    dann bleibt das Verhalten des SDK unverändert.
+    """
+    global _patched
+    if _patched and cls is RequestResponder:
+        return True
+    if not _supported(cls):
+        logger.warning(
+            f"{cls.__name__} ohne {', '.join(_REQUIRED_ATTRIBUTES)} - Abbruch-Korrektur nicht angewendet"
+        )
+        return False
+    cancel, respond = cls.cancel, cls.respond
+
+    async def safe_cancel(self) -> None:
+        if not self._entered or self._completed:
+            logger.info(f"Abbruch für Request {self.request_id} ignoriert (nicht gestartet oder beantwortet)")
+            return
+        await cancel(self)
+
+    async def safe_respond(self, response) -> None:
+        if self._completed and self.cancelled:
+            logger.info(f"Request {self.request_id} nach Abschluss abgebrochen - Antwort verworfen")
+            return
+        await respond(self, response)
+
+    cls.cancel = safe_cancel
+    cls.respond = safe_respond
+    if cls is RequestResponder:
+        _patched = True
+    return True
@@ -0,0 +1,299 @@
+"""Metriken: Latenz- und Größen-Histogramme pro Tool, Event-Loop-Lag."""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional
+
+from code.config import LOOP_LAG_IDLE_SECONDS, LOOP_LAG_INTERVAL
+
+# Auflösung der Histogramme: 2**SUB_BUCKET_BITS Sub-Buckets pro Zweierpotenz
+# (relative Abweichung der Perzentile <= ~3%)
+SUB_BUCKET_BITS = 5
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+PERCENTILES = (50, 95, 99)
+
+
+def _bucket_index(value: int) -> int:
+    """Bucket-Index für einen nicht-negativen Integer-Wert."""
+    exp = max(value.bit_length() - SUB_BUCKET_BITS, 0)
+    return exp * _HALF + (value >> exp)
+
+
+def _bucket_upper(index: int) -> int:
+    """Größter Wert, der in den Bucket fällt."""
+    if index < 2 * _HALF:
+        return index
+    exp = index // _HALF - 1
+    mantissa = index - exp * _HALF
+    return ((mantissa + 1) << exp) - 1
+
+
+class Histogram:
+    """HDR-artiges Histogramm mit logarithmischen Buckets.
+
+    Speichert nur Zähler pro Bucket (dict), Aufzeichnung ist O(1).
+    Werte sind nicht-negative Integer (Mikrosekunden bzw. Bytes).
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, value: int) -> None:
+        value = max(int(value), 0)
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> Optional[int]:
+        """Wert beim Perzentil p (0-100), None wenn leer."""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * p // 100))  # ceil
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        """JSON-fähige Darstellung inkl. Rohdaten der Buckets."""
+        data = {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+        }
+        for p in PERCENTILES:
+            data[f"p{p}"] = self.percentile(p)
+        data["buckets"] = {str(_bucket_upper(i)): n for i, n in sorted(self.counts.items())}
+        return data
+
+
+@dataclass
+class ToolStats:
+    """Gesammelte Metriken eines Tools (Zeiten in µs, Größen in Bytes)."""
+    calls: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    queue_us: Histogram = field(default_factory=Histogram)
+    exec_us: Histogram = field(default_factory=Histogram)
+    log_us: Histogram = field(default_factory=Histogram)
+    bytes_in: Histogram = field(default_factory=Histogram)
+    bytes_out: Histogram = field(default_factory=Histogram)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "queue_us": self.queue_us.to_dict(),
+            "exec_us": self.exec_us.to_dict(),
+            "log_us": self.log_us.to_dict(),
+            "bytes_in": self.bytes_in.to_dict(),
+            "bytes_out": self.bytes_out.to_dict(),
+        }
+
+
+# --- Zeitmessung pro Aufruf ---
+
+@dataclass
+class CallTiming:
+    """Zeiten eines laufenden Tool-Aufrufs (per Kontext in Worker kopiert)."""
+    queue_seconds: float = 0.0
+
+
+_current_call: ContextVar[Optional[CallTiming]] = ContextVar("call_timing", default=None)
+
+
+def add_queue_wait(seconds: float) -> None:
+    """Addiert Wartezeit auf einen Worker zum laufenden Tool-Aufruf."""
+    timing = _current_call.get()
+    if timing is not None:
+        timing.queue_seconds += seconds
+
+
+@contextmanager
+def measure_call() -> Iterator[CallTiming]:
+    """Setzt die Zeitmessung für den aktuellen Tool-Aufruf."""
+    timing = CallTiming()
+    token = _current_call.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_call.reset(token)
+
+
+class MetricsRegistry:
+    """In-Memory-Metriken aller Tools.
+
+    Wird aus dem Event-Loop (Aufrufe) und dem Hintergrund-Writer
+    (Log-Phase) beschrieben, daher per Lock geschützt.
+    """
+
+    def __init__(self):
+        self._tools: dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+        self.loop_lag_us = Histogram()
+        self.started = datetime.now()
+
+    def _stats(self, tool: str) -> ToolStats:
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools[tool] = ToolStats()
+        return stats
+
+    def record_call(
+        self,
+        tool: str,
+        exec_seconds: float,
+        queue_seconds: float,
+        bytes_in: int,
+        bytes_out: int,
+        outcome: str = "ok",
+    ) -> None:
+        """Zeichnet einen Tool-Aufruf auf (outcome: ok|error|cancelled)."""
+        with self._lock:
+            stats = self._stats(tool)
+            stats.calls += 1
+            if outcome == "error":
+                stats.errors += 1
+            elif outcome == "cancelled":
+                stats.cancelled += 1
+            stats.exec_us.record(exec_seconds * 1e6)
+            stats.queue_us.record(queue_seconds * 1e6)
+            stats.bytes_in.record(bytes_in)
+            stats.bytes_out.record(bytes_out)
+
+    def record_log(self, tool: str, seconds: float) -> None:
+        """Zeichnet die Dauer der Log-Phase (Session, tool.log, Transcript) auf."""
+        with self._lock:
+            self._stats(tool).log_us.record(seconds * 1e6)
+
+    def record_loop_lag(self, seconds: float) -> None:
+        """Zeichnet eine Verspätung des Event-Loops auf (s. LoopLagMonitor)."""
+        with self._lock:
+            self.loop_lag_us.record(seconds * 1e6)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tools.clear()
+            self.loop_lag_us = Histogram()
+            self.started = datetime.now()
+
+    def snapshot(self) -> dict:
+        """JSON-fähiger Schnappschuss aller Metriken."""
+        with self._lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "captured": datetime.now().isoformat(timespec="seconds"),
+                "tools": {name: stats.to_dict() for name, stats in sorted(self._tools.items())},
+                "loop_lag_us": self.loop_lag_us.to_dict(),
+            }
+
+    def format_table(self) -> str:
+        """Markdown-Tabelle mit p50/p95/p99 pro Tool."""
+        snapshot = self.snapshot()
+        if not snapshot["tools"]:
+            return "Noch keine Tool-Aufrufe gemessen."
+
+        lines = [
+            f"# Tool-Statistik (seit {snapshot['started'].replace('T', ' ')})\n",
+            "| Tool | Calls | Fehler | p50 | p95 | p99 | max | Queue p95 | Log p95 | In Ø | Out Ø |",
+            "|------|------:|-------:|----:|----:|----:|----:|----------:|--------:|-----:|------:|",
+        ]
+        for name, stats in snapshot["tools"].items():
+            exec_us = stats["exec_us"]
+            lines.append(
+                f"| {name} | {stats['calls']} | {stats['errors']} "
+                f"| {_ms(exec_us['p50'])} | {_ms(exec_us['p95'])} | {_ms(exec_us['p99'])} "
+                f"| {_ms(exec_us['max'])} | {_ms(stats['queue_us']['p95'])} "
+                f"| {_ms(stats['log_us']['p95'])} "
+                f"| {_size(stats['bytes_in']['mean'])} | {_size(stats['bytes_out']['mean'])} |"
+            )
+        lag = snapshot["loop_lag_us"]
+        if lag["count"]:
+            lines.append(
+                f"\nEvent-Loop-Lag: p50 {_ms(lag['p50'])} / p99 {_ms(lag['p99'])} / "
+                f"max {_ms(lag['max'])} ({lag['count']} Messungen)"
+            )
+        lines.append("\nZeiten in ms. Export: `command(cmd=\"stats\", arg=\"json\")`")
+        return "\n".join(lines)
+
+
+def _ms(us: Optional[float]) -> str:
+    return "-" if us is None else f"{us / 1000:.1f}"
+
+
+def _size(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    if value >= 1024 * 1024:
+        return f"{value / 1024 / 1024:.1f}M"
+    if value >= 1024:
+        return f"{value / 1024:.1f}K"
+    return f"{value:.0f}"
+
+
+def payload_bytes(params: dict) -> int:
+    """Ungefähre Größe der Tool-Parameter in Bytes."""
+    return sum(len(str(v).encode("utf-8", errors="replace")) for v in params.values() if v is not None)
+
+
+class LoopLagMonitor:
+    """Misst den Event-Loop-Lag, solange Tool-Aufrufe eingehen.
+
+    Ein Task schläft jeweils interval Sekunden; wie viel später er
+    aufwacht, ist der Lag (blockierender Code im Loop, zu viele fertige
+    Tasks auf einmal). touch() startet den Task bei Bedarf, nach idle
+    Sekunden ohne Aufruf endet er - ein ruhender Server wacht nicht auf.
+    """
+
+    def __init__(self, registry: MetricsRegistry, interval: float, idle: float):
+        self.registry = registry
+        self.interval = interval
+        self.idle = idle
+        self._last = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def touch(self) -> None:
+        """Meldet Aktivität; aus dem Event-Loop aufrufen."""
+        if self.interval <= 0:
+            return
+        self._last = time.monotonic()
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while time.monotonic() - self._last < self.idle:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.registry.record_loop_lag(max(0.0, loop.time() - start - self.interval))
+
+
+# Globale Instanz
+metrics = MetricsRegistry()
+loop_monitor = LoopLagMonitor(metrics, LOOP_LAG_INTERVAL, LOOP_LAG_IDLE_SECONDS)
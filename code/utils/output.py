@@ -1,18 +1,67 @@
 """Output-Formatierung und Truncation."""
 
+import re
+
 from code.config import MAX_OUTPUT_BYTES, DEFAULT_ENCODING
+from code.utils.result_store import result_store
+
+# shell_exec stellt jeder Antwort "💻 $ <befehl>" voran; Fehler (und geblockte
+# Befehle) folgen direkt nach der Leerzeile, die Ausgabe eines Befehls ebenso
+_SHELL_ERROR = re.compile(r"💻 \$ .*?\n\n(?:Fehler: |❌ |⚠️ )", re.DOTALL)
+
+
+def is_error_result(text: str) -> bool:
+    """True wenn ein Tool-Ergebnis einen Fehler meldet (für Metriken, Logs, Replay).
+
+    Fehler beginnen mit "Fehler", bei shell_exec stehen sie (wie geblockte
+    Befehle) nach dem Befehlskopf. Ein Exit-Code != 0 zählt nicht als
+    Fehler - der Befehl wurde ausgeführt; nur eine Ausgabe, die selbst mit
+    "Fehler: " beginnt, ist davon nicht zu unterscheiden.
+    """
+    return text.startswith("Fehler") or _SHELL_ERROR.match(text) is not None
 
 
-def truncate_output(text: str, max_bytes: int = MAX_OUTPUT_BYTES) -> str:
-    """Kürzt Output wenn zu lang."""
+def truncate_output(text: str, max_bytes: int = MAX_OUTPUT_BYTES, spill: bool = False) -> str:
+    """Kürzt Output wenn zu lang.
+
+    Args:
+        text: Vollständige Ausgabe
+        max_bytes: Maximale Größe der Antwort
+        spill: True = vollständige Ausgabe im Result-Store ablegen und
+            ein Handle für result_page anhängen
+    """
     encoded = text.encode(DEFAULT_ENCODING, errors="replace")
     if len(encoded) <= max_bytes:
         return text
     
     truncated = encoded[:max_bytes].decode(DEFAULT_ENCODING, errors="replace")
+
+    if spill:
+        try:
+            handle = result_store.put(text)
+        except (OSError, ValueError):
+            pass  # nicht speicherbar: nur gekürzt zurückgeben
+        else:
+            return (
+                f"{truncated}\n\n[... TRUNCATED ({len(encoded):,} bytes total) - "
+                f"weiter mit result_page(handle=\"{handle}\", offset={max_bytes}) ...]"
+            )
+
     return f"{truncated}\n\n[... TRUNCATED ({len(encoded):,} bytes total) ...]"
 
 
+def format_incomplete(reason: str, resume: str | None = None) -> str:
+    """Markierung für Teilergebnisse (z.B. Zeitbudget erreicht).
+
+    Args:
+        reason: Grund, z.B. "Zeitbudget von 500 ms erreicht nach 120 Dateien"
+        resume: Optionaler Aufruf-Hinweis zum Fortsetzen, z.B. 'after="src/a.py"'
+    """
+    if resume:
+        return f"\n[UNVOLLSTÄNDIG: {reason} - fortsetzen mit {resume}]"
+    return f"\n[UNVOLLSTÄNDIG: {reason}]"
+
+
 def format_with_line_numbers(
     content: str,
     start_line: int = 1,
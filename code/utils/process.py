@@ -0,0 +1,488 @@
+"""Prozess-Start mit Ressourcen-Accounting und -Limits für shell_exec."""
+
+import asyncio
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from code.config import SHELL_USE_SPAWN_HELPER
+from code.utils.logging import get_logger
+from code.utils.spawn_helper import apply_rlimits
+
+logger = get_logger("utils.process")
+
+# Blockgröße für das Lesen der Ausgabe-Pipes
+READ_CHUNK_SIZE = 65536
+
+# Spawn-Helper
+SPAWN_HELPER_SCRIPT = Path(__file__).with_name("spawn_helper.py")
+SPAWN_HELPER_TIMEOUT = 5.0  # Sekunden für Start und Fork-Antwort
+
+
+@dataclass
+class ResourceLimits:
+    """Optionale rlimits für einen Shell-Befehl (None = unbegrenzt)."""
+
+    cpu_seconds: Optional[int] = None
+    memory_mb: Optional[int] = None
+    open_files: Optional[int] = None
+    output_bytes: Optional[int] = None
+
+    def rlimits(self) -> list[tuple[int, int, int]]:
+        """Gibt die zu setzenden Limits als (resource, soft, hard) zurück."""
+        limits = []
+        if self.cpu_seconds:
+            # Soft-Limit -> SIGXCPU, Hard-Limit eine Sekunde später -> SIGKILL
+            limits.append((resource.RLIMIT_CPU, self.cpu_seconds, self.cpu_seconds + 1))
+        if self.memory_mb:
+            size = self.memory_mb * 1024 * 1024
+            limits.append((resource.RLIMIT_AS, size, size))
+        if self.open_files:
+            limits.append((resource.RLIMIT_NOFILE, self.open_files, self.open_files))
+        if self.output_bytes:
+            # Begrenzt Dateien, die der Befehl schreibt; Pipes begrenzt der Reader
+            limits.append((resource.RLIMIT_FSIZE, self.output_bytes, self.output_bytes))
+        return limits
+
+    def apply(self) -> None:
+        """Setzt die Limits im Kindprozess (als preexec_fn)."""
+        apply_rlimits(self.rlimits())
+
+
+def rss_kb(ru_maxrss: int) -> int:
+    """ru_maxrss in KiB - Linux liefert KiB, macOS Bytes."""
+    return ru_maxrss // 1024 if sys.platform == "darwin" else ru_maxrss
+
+
+@dataclass
+class ResourceUsage:
+    """Ressourcenverbrauch eines beendeten Befehls (aus os.wait4)."""
+
+    wall_seconds: float
+    user_seconds: float
+    system_seconds: float
+    max_rss_kb: int
+    block_in: int
+    block_out: int
+
+    @classmethod
+    def from_rusage(cls, wall_seconds: float, rusage: Any) -> "ResourceUsage":
+        """Erstellt die Auswertung aus einem resource.struct_rusage."""
+        return cls(
+            wall_seconds=wall_seconds,
+            user_seconds=rusage.ru_utime,
+            system_seconds=rusage.ru_stime,
+            max_rss_kb=rss_kb(rusage.ru_maxrss),
+            block_in=rusage.ru_inblock,
+            block_out=rusage.ru_oublock,
+        )
+
+    def format(self) -> str:
+        """Kompakte einzeilige Darstellung für Tool-Ausgabe und Transcript."""
+        return (
+            f"[Ressourcen: {self.wall_seconds:.2f}s Wall | "
+            f"{self.user_seconds:.2f}s User | {self.system_seconds:.2f}s Sys | "
+            f"RSS {self.max_rss_kb / 1024:.1f} MB | "
+            f"I/O {self.block_in}/{self.block_out} Blöcke]"
+        )
+
+
+@dataclass
+class ProcessResult:
+    """Ergebnis eines Shell-Befehls."""
+
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    usage: ResourceUsage
+    output_limited: bool = False
+
+
+class ShellProcess:
+    """Laufender Shell-Befehl in eigener Process-Group.
+
+    Die Ausgabe wird in einem Worker-Thread gelesen und der Prozess per
+    os.wait4 eingesammelt, damit die rusage des Befehls (inkl. seiner
+    bereits beendeten Kindprozesse) verfügbar ist.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        stdout_fd: int,
+        stderr_fd: int,
+        reap: Callable[[], tuple[int, Any]],
+        max_output_bytes: Optional[int] = None,
+    ):
+        self.pid = pid
+        self.returncode: Optional[int] = None
+        self.result: Optional[ProcessResult] = None
+        self._fds = (stdout_fd, stderr_fd)
+        self._reap = reap
+        self._max_output_bytes = max_output_bytes
+        self._started = time.monotonic()
+        self._stop_reading = threading.Event()
+        self._future: Optional[asyncio.Future] = None
+
+    # --- Signale ---
+
+    def send_signal(self, sig: int) -> None:
+        """Sendet ein Signal an die ganze Process-Group."""
+        try:
+            os.killpg(self.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            os.kill(self.pid, sig)
+
+    def terminate(self) -> None:
+        """SIGTERM an die Process-Group."""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """SIGKILL an die Process-Group, Lesen der Pipes abbrechen."""
+        self._stop_reading.set()
+        self.send_signal(signal.SIGKILL)
+
+    # --- Warten ---
+
+    def communicate(self) -> "asyncio.Future[ProcessResult]":
+        """Liest die Ausgabe und wartet auf das Prozessende.
+
+        Mehrfach aufrufbar; Abbruch des Aufrufers stoppt das Einsammeln nicht.
+        """
+        if self._future is None:
+            loop = asyncio.get_running_loop()
+            self._future = loop.run_in_executor(None, self._collect)
+        return asyncio.shield(self._future)
+
+    async def wait(self) -> int:
+        """Wartet auf das Prozessende und gibt den Exit-Code zurück."""
+        await self.communicate()
+        return self.returncode
+
+    def _collect(self) -> ProcessResult:
+        """Blockierend: Pipes lesen, dann per wait4 einsammeln."""
+        stdout_fd, stderr_fd = self._fds
+        buffers = {stdout_fd: bytearray(), stderr_fd: bytearray()}
+        total = 0
+        output_limited = False
+
+        with selectors.DefaultSelector() as selector:
+            for fd in buffers:
+                selector.register(fd, selectors.EVENT_READ)
+
+            while selector.get_map() and not self._stop_reading.is_set():
+                for key, _ in selector.select(timeout=0.1):
+                    data = os.read(key.fd, READ_CHUNK_SIZE)
+                    if not data:
+                        selector.unregister(key.fd)
+                        continue
+
+                    limit = self._max_output_bytes
+                    if limit is not None and total + len(data) > limit:
+                        buffers[key.fd] += data[:limit - total]
+                        total = limit
+                        output_limited = True
+                        self._stop_reading.set()
+                        self.send_signal(signal.SIGKILL)
+                        break
+
+                    buffers[key.fd] += data
+                    total += len(data)
+
+        for fd in buffers:
+            os.close(fd)
+
+        status, rusage = self._reap()
+        self.returncode = os.waitstatus_to_exitcode(status)
+        self.result = ProcessResult(
+            returncode=self.returncode,
+            stdout=bytes(buffers[stdout_fd]),
+            stderr=bytes(buffers[stderr_fd]),
+            usage=ResourceUsage.from_rusage(time.monotonic() - self._started, rusage),
+            output_limited=output_limited,
+        )
+        return self.result
+
+
+class _PendingSpawn:
+    """Zustand eines über den Spawn-Helper gestarteten Befehls."""
+
+    __slots__ = ("started", "finished", "pid", "error", "status", "rusage")
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.finished = threading.Event()
+        self.pid: Optional[int] = None
+        self.error: Optional[str] = None
+        self.status: Optional[int] = None
+        self.rusage: Optional[SimpleNamespace] = None
+
+
+class SpawnHelper:
+    """Client für den Spawn-Helper-Prozess (siehe spawn_helper.py).
+
+    Der Helper wird einmal beim Serverstart gestartet und forkt die
+    Shell-Befehle. Fällt er aus, startet spawn_shell() direkt.
+    """
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pending: dict[int, _PendingSpawn] = {}
+        self._next_id = 0
+        self._failed = False
+
+    @property
+    def available(self) -> bool:
+        """True wenn der Helper läuft."""
+        return self._sock is not None and self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> bool:
+        """Startet den Helper-Prozess (idempotent)."""
+        with self._start_lock:
+            if self.available:
+                return True
+            if self._failed:
+                return False
+
+            parent_sock = child_sock = None
+            try:
+                # SOCK_SEQPACKET über AF_UNIX gibt es z.B. unter macOS nicht (OSError)
+                parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+                self._proc = subprocess.Popen(
+                    [sys.executable, "-I", "-S", str(SPAWN_HELPER_SCRIPT), str(child_sock.fileno())],
+                    pass_fds=(child_sock.fileno(),),
+                    # stdout ist der MCP-Kanal - nie erben
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+                child_sock.close()
+
+                parent_sock.settimeout(SPAWN_HELPER_TIMEOUT)
+                ready = json.loads(parent_sock.recv(READ_CHUNK_SIZE) or b"{}")
+                if not ready.get("ready"):
+                    raise RuntimeError("Spawn-Helper meldet sich nicht bereit")
+                parent_sock.settimeout(None)
+            except Exception as e:
+                logger.warning(f"Spawn-Helper nicht verfügbar, starte direkt: {e}")
+                for sock in (parent_sock, child_sock):
+                    if sock is not None:
+                        sock.close()
+                if self._proc:
+                    self._proc.kill()
+                self._proc = None
+                self._failed = True
+                return False
+
+            self._sock = parent_sock
+            threading.Thread(target=self._reader_loop, name="spawn-helper-reader", daemon=True).start()
+            logger.info(f"Spawn-Helper gestartet (PID {self._proc.pid})")
+            return True
+
+    def stop(self) -> None:
+        """Beendet den Helper (laufende Befehle erhalten SIGTERM)."""
+        sock, self._sock = self._sock, None
+        if sock:
+            # shutdown() weckt auch den blockierten Reader-Thread
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        if self._proc:
+            try:
+                self._proc.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
+
+    def spawn(
+        self,
+        command: str,
+        cwd: os.PathLike,
+        limits: ResourceLimits,
+        env: Optional[dict[str, str]] = None,
+    ) -> ShellProcess:
+        """Startet einen Befehl über den Helper.
+
+        Raises:
+            OSError: Helper nicht erreichbar oder Fork fehlgeschlagen
+        """
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        pending = _PendingSpawn()
+        request_id = None
+
+        try:
+            with self._send_lock:
+                if not self._sock:
+                    raise OSError("Spawn-Helper nicht verbunden")
+                self._next_id += 1
+                request_id = self._next_id
+                self._pending[request_id] = pending
+                request = {
+                    "id": request_id,
+                    "command": command,
+                    "cwd": str(cwd),
+                    "env": dict(os.environ if env is None else env),
+                    "limits": limits.rlimits(),
+                }
+                socket.send_fds(self._sock, [json.dumps(request).encode()], [stdout_w, stderr_w])
+
+            if not pending.started.wait(SPAWN_HELPER_TIMEOUT):
+                raise OSError("Spawn-Helper antwortet nicht")
+            if pending.error:
+                raise OSError(pending.error)
+        except BaseException:
+            self._pending.pop(request_id, None)
+            os.close(stdout_r)
+            os.close(stderr_r)
+            raise
+        finally:
+            os.close(stdout_w)
+            os.close(stderr_w)
+
+        def reap() -> tuple[int, Any]:
+            pending.finished.wait()
+            self._pending.pop(request_id, None)
+            if pending.status is None:
+                # Helper ausgefallen - Status des Befehls unbekannt
+                return signal.SIGKILL, SimpleNamespace(
+                    ru_utime=0.0, ru_stime=0.0, ru_maxrss=0, ru_inblock=0, ru_oublock=0
+                )
+            return pending.status, pending.rusage
+
+        return ShellProcess(
+            pending.pid,
+            stdout_r,
+            stderr_r,
+            reap,
+            max_output_bytes=limits.output_bytes,
+        )
+
+    def _reader_loop(self) -> None:
+        """Verteilt Antworten des Helpers auf die wartenden Befehle."""
+        sock = self._sock
+        while True:
+            try:
+                message = sock.recv(READ_CHUNK_SIZE)
+            except OSError:
+                message = b""
+            if not message:
+                break
+
+            reply = json.loads(message)
+            pending = self._pending.get(reply.get("id"))
+            if pending is None:
+                continue
+
+            if "pid" in reply:
+                pending.pid = reply["pid"]
+                pending.started.set()
+            elif "error" in reply:
+                pending.error = reply["error"]
+                pending.started.set()
+                pending.finished.set()
+            elif "status" in reply:
+                utime, stime, maxrss, inblock, oublock = reply["rusage"]
+                pending.rusage = SimpleNamespace(
+                    ru_utime=utime, ru_stime=stime, ru_maxrss=maxrss,
+                    ru_inblock=inblock, ru_oublock=oublock,
+                )
+                pending.status = reply["status"]
+                pending.finished.set()
+
+        # Verbindung verloren: Wartende freigeben
+        if self._sock is sock:
+            logger.warning("Spawn-Helper beendet")
+            self._sock = None
+        for pending in list(self._pending.values()):
+            pending.error = pending.error or "Spawn-Helper beendet"
+            pending.started.set()
+            pending.finished.set()
+
+
+# Globale Instanz
+spawn_helper = SpawnHelper()
+
+
+def spawn_shell(
+    command: str,
+    cwd: os.PathLike,
+    limits: Optional[ResourceLimits] = None,
+    env: Optional[dict[str, str]] = None,
+) -> ShellProcess:
+    """Startet einen Shell-Befehl in neuer Session mit optionalen rlimits.
+
+    Nutzt den Spawn-Helper falls aktiviert, sonst (oder bei dessen
+    Ausfall) einen direkten Fork des Server-Prozesses.
+    """
+    limits = limits or ResourceLimits()
+
+    if SHELL_USE_SPAWN_HELPER and spawn_helper.start():
+        try:
+            return spawn_helper.spawn(command, cwd, limits, env)
+        except OSError as e:
+            logger.warning(f"Spawn-Helper fehlgeschlagen, starte direkt: {e}")
+
+    return _spawn_direct(command, cwd, limits, env)
+
+
+def _spawn_direct(
+    command: str,
+    cwd: os.PathLike,
+    limits: ResourceLimits,
+    env: Optional[dict[str, str]],
+) -> ShellProcess:
+    """Startet einen Shell-Befehl per Fork des Server-Prozesses."""
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+
+    try:
+        popen = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=stdout_w,
+            stderr=stderr_w,
+            cwd=cwd,
+            env=env,
+            # Neue Process-Group für sauberes Kill
+            start_new_session=True,
+            preexec_fn=limits.apply if limits.rlimits() else None,
+        )
+    except BaseException:
+        for fd in (stdout_r, stderr_r):
+            os.close(fd)
+        raise
+    finally:
+        os.close(stdout_w)
+        os.close(stderr_w)
+
+    def reap() -> tuple[int, Any]:
+        _, status, rusage = os.wait4(popen.pid, 0)
+        # Popen soll den (schon eingesammelten) Prozess nicht erneut abfragen
+        popen.returncode = os.waitstatus_to_exitcode(status)
+        return status, rusage
+
+    return ShellProcess(
+        popen.pid,
+        stdout_r,
+        stderr_r,
+        reap,
+        max_output_bytes=limits.output_bytes,
+    )
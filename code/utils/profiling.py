@@ -0,0 +1,251 @@
+"""Profiling: cProfile und tracemalloc pro Tool-Aufruf (/profile)."""
+
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar, Token
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+from code.config import PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_TOP_N
+
+T = TypeVar("T")
+
+# Nur ein Profiler gleichzeitig im Event-Loop-Thread (setprofile ist pro Thread)
+_loop_profile_lock = threading.Lock()
+
+# tracemalloc ist global: Referenzzähler für parallele Aufrufe
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _tracemalloc_acquire() -> bool:
+    """Startet tracemalloc falls nötig. False wenn es von außen läuft."""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            return False
+        if _tracemalloc_users == 0:
+            tracemalloc.start()
+        _tracemalloc_users += 1
+        return True
+
+
+def _tracemalloc_release() -> None:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def _short_path(filename: str) -> str:
+    """Kürzt Pfade auf die letzten zwei Komponenten."""
+    parts = Path(filename).parts
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+def _format_size(size: int) -> str:
+    sign = "-" if size < 0 else "+"
+    size = abs(size)
+    if size >= 1024 * 1024:
+        return f"{sign}{size / 1024 / 1024:.1f} MB"
+    if size >= 1024:
+        return f"{sign}{size / 1024:.1f} KB"
+    return f"{sign}{size} B"
+
+
+class CallProfile:
+    """Profil eines einzelnen Tool-Aufrufs.
+
+    Sammelt cProfile-Daten aus dem Event-Loop-Thread und aus jedem
+    Worker-Thread, in dem run_blocking() Arbeit dieses Aufrufs ausführt.
+    """
+
+    def __init__(self, tool: str, output_dir: Path, memory: bool = False):
+        self.tool = tool
+        self.output_dir = output_dir
+        self.profiles: list[cProfile.Profile] = []
+        self.notes: list[str] = []
+        self._lock = threading.Lock()
+        self._loop_profile: Optional[cProfile.Profile] = None
+        self._token: Optional[Token] = None
+        self._memory = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._memory_stats: Optional[list[tracemalloc.StatisticDiff]] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._start = 0.0
+        self.elapsed = 0.0
+        self.path: Optional[Path] = None
+
+        if memory:
+            if _tracemalloc_acquire():
+                self._memory = True
+            else:
+                self.notes.append("tracemalloc läuft bereits extern, Speicher-Report übersprungen")
+
+    def _new_profile(self) -> Optional[cProfile.Profile]:
+        """Startet einen Profiler im aktuellen Thread (None wenn nicht möglich)."""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Ab Python 3.12 ist nur ein Profiler gleichzeitig erlaubt
+            with self._lock:
+                self.notes.append(f"Profiler nicht verfügbar: {e}")
+            return None
+        with self._lock:
+            self.profiles.append(profile)
+        return profile
+
+    def start(self) -> None:
+        if self._memory:
+            self._snapshot = tracemalloc.take_snapshot()
+        self._token = _current_profile.set(self)
+        if _loop_profile_lock.acquire(blocking=False):
+            self._loop_profile = self._new_profile()
+            if self._loop_profile is None:
+                _loop_profile_lock.release()
+        else:
+            self.notes.append("Event-Loop-Thread nicht profiliert (paralleler Aufruf)")
+        self._start = time.perf_counter()
+
+    def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Führt func im aktuellen (Worker-)Thread unter cProfile aus."""
+        profile = self._new_profile()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+
+    def finish(self) -> None:
+        """Stoppt das Profiling und schreibt die .pstats-Datei."""
+        self.elapsed = time.perf_counter() - self._start
+        if self._loop_profile is not None:
+            self._loop_profile.disable()
+            _loop_profile_lock.release()
+        if self._token is not None:
+            _current_profile.reset(self._token)
+
+        if self._memory:
+            try:
+                after = tracemalloc.take_snapshot()
+                if self._snapshot is not None:
+                    self._memory_stats = after.compare_to(self._snapshot, "lineno")
+            finally:
+                _tracemalloc_release()
+            self._snapshot = None
+
+        self._stats = self._merged_stats()
+        if self._stats is not None:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                stamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f")
+                self.path = self.output_dir / f"{stamp}-{self.tool}.pstats"
+                self._stats.dump_stats(self.path)
+                _prune(self.output_dir)
+            except OSError as e:
+                self.notes.append(f"pstats nicht geschrieben: {e}")
+                self.path = None
+
+    def _merged_stats(self) -> Optional[pstats.Stats]:
+        with self._lock:
+            profiles = [p for p in self.profiles if p.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def report(self, top: int = PROFILE_TOP_N) -> str:
+        """Kompakter Text-Report: Top-Funktionen nach Eigenzeit, Top-Allokationen."""
+        lines = [f"[Profil: {self.tool} | {self.elapsed * 1000:.1f} ms"
+                 + (f" | {self.path}]" if self.path else "]")]
+
+        if self._stats is not None:
+            rows = sorted(self._stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+            lines.append(f"  {'tottime':>9} {'cumtime':>9} {'calls':>8}  Funktion")
+            for (filename, lineno, name), (_, calls, tottime, cumtime, _) in rows[:top]:
+                # Builtins haben keine Datei ("~", Zeile 0)
+                location = f"{_short_path(filename)}:{lineno}({name})" if lineno else name
+                lines.append(f"  {tottime:9.4f} {cumtime:9.4f} {calls:8d}  {location}")
+
+        if self._memory_stats is not None:
+            net = sum(stat.size_diff for stat in self._memory_stats)
+            lines.append(f"[Speicher: {_format_size(net)} netto]")
+            growth = sorted(self._memory_stats, key=lambda stat: stat.size_diff, reverse=True)
+            for stat in growth[:top]:
+                if stat.size_diff <= 0:
+                    break
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {_format_size(stat.size_diff):>10}  "
+                    f"{_short_path(frame.filename)}:{frame.lineno} ({stat.count_diff:+d} Blöcke)"
+                )
+
+        for note in self.notes:
+            lines.append(f"  Hinweis: {note}")
+        return "\n".join(lines)
+
+
+def _prune(directory: Path) -> None:
+    """Löscht die ältesten Profile über PROFILE_MAX_FILES."""
+    files = sorted(directory.glob("*.pstats"))
+    for old in files[:-PROFILE_MAX_FILES]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+# Profil des laufenden Tool-Aufrufs (per Kontext in Worker kopiert)
+_current_profile: ContextVar[Optional[CallProfile]] = ContextVar("call_profile", default=None)
+
+
+def current_profile() -> Optional[CallProfile]:
+    """Profil des laufenden Aufrufs oder None."""
+    return _current_profile.get()
+
+
+class ToolProfiler:
+    """Schaltbares Profiling für ausgewählte Tools."""
+
+    def __init__(self, output_dir: Optional[Path] = None):
+        self.output_dir = output_dir or PROFILE_DIR
+        self.enabled = False
+        self.tools: Optional[set[str]] = None  # None = alle Tools
+        self.memory = False
+
+    def enable(self, tools: Optional[set[str]] = None, memory: bool = False) -> str:
+        self.enabled = True
+        self.tools = tools or None
+        self.memory = memory
+        return f"Profiling: ON -> {self.describe()}"
+
+    def disable(self) -> str:
+        self.enabled = False
+        self.tools = None
+        self.memory = False
+        return "Profiling: OFF"
+
+    def describe(self) -> str:
+        targets = ", ".join(sorted(self.tools)) if self.tools else "alle Tools"
+        memory = " + tracemalloc" if self.memory else ""
+        return f"{targets}{memory} ({self.output_dir})"
+
+    def begin(self, tool: str) -> Optional[CallProfile]:
+        """Startet ein Profil für den Aufruf, falls das Tool ausgewählt ist."""
+        if not self.enabled or (self.tools is not None and tool not in self.tools):
+            return None
+        profile = CallProfile(tool, self.output_dir, memory=self.memory)
+        profile.start()
+        return profile
+
+
+# Globale Instanz
+profiler = ToolProfiler()
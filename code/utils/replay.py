@@ -0,0 +1,312 @@
+"""Replay: aufgezeichnete Tool-Aufrufe als Benchmark erneut ausführen.
+
+Ein Transcript (utils/transcript.py) wird gegen einen frischen Server
+abgespielt - über stdio (`main.py serve`, mit JSON-RPC) oder in-process
+(Kindprozess ruft mcp.call_tool direkt auf, ohne Transport). Beides läuft
+in einer Sandbox: Kopie des Projekts, eigenes HOME (also auch eigenes
+~/.mcp_shell_tools), Pfade des Originalprojekts in den Parametern werden
+auf die Kopie umgeschrieben.
+"""
+
+import asyncio
+import gzip
+import json
+import lzma
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+from code.utils.mcp_client import ROOT_DIR, StdioClient
+from code.utils.metrics import PERCENTILES, Histogram
+from code.utils.output import is_error_result
+from code.utils.process import rss_kb
+
+# Tools, die Einstellungen des Servers ändern statt Arbeit zu messen
+SKIP_TOOLS = {"command", "transcript_search"}
+
+MODES = ("stdio", "inprocess")
+
+
+class RecordedCall(NamedTuple):
+    """Ein Tool-Aufruf aus dem Transcript (offset: Sekunden seit dem ersten)."""
+    offset: float
+    tool: str
+    params: dict
+
+
+def _lines(path: Path) -> Iterator[bytes]:
+    if path.suffix == ".gz":
+        opener = gzip.open
+    elif path.suffix == ".xz":
+        opener = lzma.open
+    else:
+        opener = open
+    with opener(path, "rb") as f:
+        yield from f
+
+
+def load_calls(path: Path, tools: Optional[set[str]] = None, limit: Optional[int] = None) -> list[RecordedCall]:
+    """Tool-Aufrufe eines JSONL-Transcripts (auch archiviert als .gz/.xz)."""
+    calls: list[RecordedCall] = []
+    start: Optional[datetime] = None
+    for line in _lines(path):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue  # abgeschnittene letzte Zeile
+        if event.get("type") != "call" or event["tool"] in SKIP_TOOLS:
+            continue
+        if tools and event["tool"] not in tools:
+            continue
+        ts = datetime.fromisoformat(event["ts"])
+        start = start or ts
+        calls.append(RecordedCall((ts - start).total_seconds(), event["tool"], event.get("params") or {}))
+        if limit and len(calls) >= limit:
+            break
+    return calls
+
+
+class Sandbox:
+    """Temporäres Verzeichnis mit Projektkopie und eigenem HOME."""
+
+    def __init__(self, project: Path, original: Optional[Path] = None, copy: bool = True):
+        self.root = Path(tempfile.mkdtemp(prefix="mcp-replay-"))
+        self.home = self.root / "home"
+        self.home.mkdir()
+        self.original = (original or project).resolve()
+        if copy:
+            self.project = self.root / project.resolve().name
+            shutil.copytree(project, self.project, symlinks=True)
+        else:
+            self.project = project.resolve()
+        # Nur ganze Pfadkomponenten: /a/proj, /a/proj/x, nicht /a/project2
+        self._original_path = re.compile(rf"(?<![\w.-]){re.escape(str(self.original))}(?![\w.-])")
+
+    def rewrite(self, value: Any) -> Any:
+        """Ersetzt Pfade des Originalprojekts durch die Kopie (rekursiv)."""
+        if isinstance(value, str):
+            return self._original_path.sub(lambda _: str(self.project), value)
+        if isinstance(value, dict):
+            return {key: self.rewrite(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.rewrite(item) for item in value]
+        return value
+
+    def env(self) -> dict[str, str]:
+        """Umgebung für den Server: HOME in der Sandbox, Projekt-Root importierbar."""
+        env = dict(os.environ)
+        env["HOME"] = str(self.home)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT_DIR), env.get("PYTHONPATH")]))
+        return env
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def run_paced(
+    calls: list[RecordedCall],
+    invoke: Callable[[str, dict], bool],
+    speed: str = "max",
+) -> tuple[list[tuple[str, int, bool]], float]:
+    """Führt die Aufrufe nacheinander aus; (Tool, µs, Fehler) pro Aufruf und Wall-Zeit.
+
+    speed="recorded" hält die Abstände aus dem Transcript ein (ein Aufruf
+    startet frühestens zu seinem aufgezeichneten Zeitpunkt), "max" ruft
+    ohne Pause auf.
+    """
+    samples = []
+    start = time.perf_counter()
+    for call in calls:
+        if speed == "recorded":
+            delay = start + call.offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        try:
+            failed = invoke(call.tool, call.params)
+        except Exception:
+            failed = True
+        samples.append((call.tool, int((time.perf_counter() - t0) * 1_000_000), failed))
+    return samples, time.perf_counter() - start
+
+
+# --- Modi ---
+
+def _replay_stdio(calls: list[RecordedCall], sandbox: Sandbox, speed: str, timeout: float) -> dict:
+    with open(sandbox.root / "server.log", "wb") as log:
+        client = StdioClient(env=sandbox.env(), cwd=sandbox.project, stderr=log)
+        try:
+            client.initialize()
+            client.call_tool("cd", {"path": str(sandbox.project)}, timeout)
+            samples, wall = run_paced(
+                calls, lambda tool, params: client.call_tool(tool, params, timeout)[1], speed
+            )
+        finally:
+            usage = client.close()
+    return {"samples": samples, "wall": wall, "rusage": usage}
+
+
+def _log_tail(path: Path, lines: int = 20) -> str:
+    """Die letzten Zeilen eines Logs."""
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError as e:
+        return f"(Log nicht lesbar: {e})"
+    return "\n".join(text.splitlines()[-lines:]) or "(Log leer)"
+
+
+def _replay_inprocess(calls: list[RecordedCall], sandbox: Sandbox, speed: str, timeout: float) -> dict:
+    spec = sandbox.root / "replay.json"
+    out = sandbox.root / "samples.json"
+    spec.write_text(json.dumps({
+        "calls": [list(call) for call in calls],
+        "project": str(sandbox.project),
+        "speed": speed,
+        "timeout": timeout,
+        "out": str(out),
+    }), encoding="utf-8")
+    with open(sandbox.root / "server.log", "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-c", "import sys; from code.utils.replay import _worker; sys.exit(_worker(sys.argv[1]))",
+             str(spec)],
+            cwd=sandbox.project, env=sandbox.env(), stdout=log, stderr=log,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        # Die Sandbox samt server.log ist gleich gelöscht (ohne keep) - Ende mitgeben
+        raise RuntimeError(
+            f"Replay-Prozess fehlgeschlagen (Exit {process.returncode}):\n{_log_tail(sandbox.root / 'server.log')}"
+        )
+    result = json.loads(out.read_text(encoding="utf-8"))
+    return {"samples": [tuple(s) for s in result["samples"]], "wall": result["wall"], "rusage": usage}
+
+
+def _worker(spec_path: str) -> int:
+    """Kindprozess für mode="inprocess": ruft die Tools direkt über mcp.call_tool auf."""
+    spec = json.loads(Path(spec_path).read_text(encoding="utf-8"))
+    from code.server import mcp
+    from code.utils.background import shutdown
+
+    loop = asyncio.new_event_loop()
+
+    def invoke(tool: str, params: dict) -> bool:
+        coro = asyncio.wait_for(mcp.call_tool(tool, params), spec["timeout"])
+        result = loop.run_until_complete(coro)
+        if isinstance(result, tuple):
+            result = result[0]
+        text = "".join(getattr(block, "text", "") for block in result) if isinstance(result, list) else str(result)
+        return is_error_result(text)
+
+    invoke("cd", {"path": spec["project"]})
+    calls = [RecordedCall(*call) for call in spec["calls"]]
+    samples, wall = run_paced(calls, invoke, spec["speed"])
+    shutdown()
+    Path(spec["out"]).write_text(json.dumps({"samples": samples, "wall": wall}), encoding="utf-8")
+    return 0
+
+
+def replay(
+    calls: list[RecordedCall],
+    project: Path,
+    mode: str = "stdio",
+    speed: str = "max",
+    original: Optional[Path] = None,
+    copy: bool = True,
+    timeout: float = 120.0,
+    keep: bool = False,
+) -> dict:
+    """Spielt die Aufrufe in einer Sandbox ab und liefert den Bericht (s. summarize)."""
+    if mode not in MODES:
+        raise ValueError(f"Unbekannter Modus: {mode} ({', '.join(MODES)})")
+    sandbox = Sandbox(project, original, copy)
+    try:
+        calls = [RecordedCall(c.offset, c.tool, sandbox.rewrite(c.params)) for c in calls]
+        run = _replay_stdio if mode == "stdio" else _replay_inprocess
+        result = run(calls, sandbox, speed, timeout)
+    finally:
+        if not keep:
+            sandbox.cleanup()
+    report = summarize(result["samples"], result["wall"], result["rusage"])
+    report.update(mode=mode, speed=speed, sandbox=str(sandbox.root) if keep else None)
+    return report
+
+
+# --- Bericht ---
+
+def latency_stats(histogram: Histogram) -> dict:
+    """Anzahl, Mittel, Maximum und Perzentile eines Histogramms (ohne Buckets)."""
+    data = {"count": histogram.count, "mean": histogram.mean, "max": histogram.max}
+    data.update({f"p{p}": histogram.percentile(p) for p in PERCENTILES})
+    return data
+
+
+def summarize(
+    samples: list[tuple[str, int, bool]],
+    wall: float,
+    usage: Optional[resource.struct_rusage] = None,
+) -> dict:
+    """Latenzverteilung pro Tool (µs), Durchsatz und Ressourcen des Servers."""
+    per_tool: dict[str, dict] = {}
+    overall = Histogram()
+    for tool, micros, failed in samples:
+        stats = per_tool.setdefault(tool, {"latency": Histogram(), "errors": 0})
+        stats["latency"].record(micros)
+        stats["errors"] += int(failed)
+        overall.record(micros)
+
+    report = {
+        "calls": len(samples),
+        "errors": sum(int(failed) for _, _, failed in samples),
+        "wall_seconds": wall,
+        "throughput": len(samples) / wall if wall > 0 else None,
+        "latency_us": latency_stats(overall),
+        "tools": {
+            tool: {"errors": stats["errors"], **latency_stats(stats["latency"])}
+            for tool, stats in sorted(per_tool.items())
+        },
+    }
+    if usage is not None:
+        report["server"] = {
+            "peak_rss_kb": rss_kb(usage.ru_maxrss),
+            "cpu_user_s": usage.ru_utime,
+            "cpu_sys_s": usage.ru_stime,
+        }
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Tabelle für die Konsole (Zeiten in ms)."""
+    def ms(value: Optional[float]) -> str:
+        return f"{value / 1000:.2f}" if value is not None else "-"
+
+    lines = [
+        f"Replay ({report['mode']}, {report['speed']}): {report['calls']} Aufrufe, "
+        f"{report['errors']} Fehler, {report['wall_seconds']:.2f} s, "
+        f"{report['throughput'] or 0:.1f} Aufrufe/s",
+    ]
+    if "server" in report:
+        server = report["server"]
+        lines.append(
+            f"Server: Peak-RSS {server['peak_rss_kb'] / 1024:.1f} MB, "
+            f"CPU {server['cpu_user_s']:.2f} s user / {server['cpu_sys_s']:.2f} s sys"
+        )
+    header = f"{'Tool':<16} {'n':>6} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    lines += ["", header + "  (ms)", "-" * len(header)]
+    rows = list(report["tools"].items()) + [("gesamt", {"errors": report["errors"], **report["latency_us"]})]
+    for tool, stats in rows:
+        lines.append(
+            f"{tool:<16} {stats['count']:>6} {stats['errors']:>5} {ms(stats['p50']):>9} "
+            f"{ms(stats['p95']):>9} {ms(stats['p99']):>9} {ms(stats['max']):>9}"
+        )
+    if report.get("sandbox"):
+        lines.append(f"\nSandbox behalten: {report['sandbox']}")
+    return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""Result-Store: Gekürzte Ausgaben auf Disk auslagern und seitenweise lesen."""
+
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from code.config import (
+    DEFAULT_ENCODING,
+    RESULT_STORE_DIR,
+    RESULT_STORE_MAX_BYTES,
+    RESULT_STORE_MAX_ENTRIES,
+)
+from code.utils.logging import get_logger
+
+logger = get_logger("utils.result_store")
+
+HANDLE_PATTERN = re.compile(r"^[0-9a-f]{12}$")
+
+
+class ResultStore:
+    """Begrenzter LRU-Speicher für vollständige Tool-Ausgaben.
+
+    Jede Ausgabe liegt als eigene Datei unter results/<handle>.txt.
+    Die LRU-Reihenfolge ergibt sich aus der mtime (wird bei Zugriff
+    aktualisiert), sodass sie einen Server-Neustart übersteht.
+    """
+
+    def __init__(
+        self,
+        base_dir: Optional[Path] = None,
+        max_bytes: int = RESULT_STORE_MAX_BYTES,
+        max_entries: int = RESULT_STORE_MAX_ENTRIES,
+    ):
+        self.base_dir = base_dir or RESULT_STORE_DIR
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: Optional[OrderedDict[str, int]] = None  # handle -> Größe
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, handle: str) -> Path:
+        return self.base_dir / f"{handle}.txt"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        """Baut den LRU-Index beim ersten Zugriff aus dem Verzeichnis auf."""
+        if self._entries is not None:
+            return self._entries
+
+        entries = []
+        if self.base_dir.is_dir():
+            for entry in os.scandir(self.base_dir):
+                handle = entry.name.removesuffix(".txt")
+                if entry.is_file() and HANDLE_PATTERN.match(handle):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, handle, stat.st_size))
+
+        entries.sort()
+        self._entries = OrderedDict((handle, size) for _, handle, size in entries)
+        self._total_bytes = sum(self._entries.values())
+        return self._entries
+
+    def _evict(self) -> None:
+        """Entfernt die am längsten nicht genutzten Einträge."""
+        entries = self._load_index()
+        while entries and (len(entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            handle, size = entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                self._path(handle).unlink()
+            except FileNotFoundError:
+                pass
+
+    def put(self, text: str) -> str:
+        """Speichert eine Ausgabe und gibt das Handle zurück.
+
+        Raises:
+            ValueError: Ausgabe größer als das ganze Budget (würde sofort
+                wieder verdrängt)
+        """
+        data = text.encode(DEFAULT_ENCODING, errors="replace")
+        if len(data) > self.max_bytes or self.max_entries < 1:
+            raise ValueError(f"Ausgabe zu groß für den Result-Store ({len(data):,} bytes)")
+        handle = secrets.token_hex(6)
+
+        with self._lock:
+            entries = self._load_index()
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(handle)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+
+            entries[handle] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+        logger.debug(f"Ergebnis gespeichert: {handle} ({len(data):,} bytes)")
+        return handle
+
+    def lookup(self, handle: str) -> Optional[Path]:
+        """Gibt den Pfad zu einem Handle zurück und markiert es als benutzt."""
+        if not HANDLE_PATTERN.match(handle):
+            return None
+
+        with self._lock:
+            entries = self._load_index()
+            if handle not in entries:
+                return None
+            path = self._path(handle)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self._total_bytes -= entries.pop(handle)
+                return None
+            entries.move_to_end(handle)
+            return path
+
+    def read_bytes(self, handle: str, offset: int, length: int) -> Optional[tuple[str, int, int]]:
+        """Liest einen Byte-Bereich.
+
+        Returns:
+            (Text, tatsächliches Ende, Gesamtgröße) oder None bei unbekanntem Handle
+        """
+        path = self.lookup(handle)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                total = os.fstat(f.fileno()).st_size
+                f.seek(offset)
+                data = f.read(length)
+        except FileNotFoundError:
+            return None  # zwischen lookup() und open() verdrängt
+
+        # Nicht mitten in einem UTF-8-Zeichen beginnen oder enden
+        while offset > 0 and data and (data[0] & 0xC0) == 0x80:
+            data = data[1:]
+            offset += 1
+        end = offset + len(data)
+        if end < total:
+            cut = len(data)
+            while cut > 0 and (data[cut - 1] & 0xC0) == 0x80:
+                cut -= 1
+            if cut > 0 and data[cut - 1] >= 0xC0:
+                cut -= 1
+            if cut > 0:
+                data = data[:cut]
+                end = offset + cut
+
+        return data.decode(DEFAULT_ENCODING, errors="replace"), end, total
+
+    def read_lines(self, handle: str, start_line: int, count: int) -> Optional[tuple[str, int, int]]:
+        """Liest einen Zeilenbereich (1-basiert).
+
+        Returns:
+            (Text, letzte gelesene Zeile, Gesamtzahl Zeilen) oder None
+        """
+        path = self.lookup(handle)
+        if path is None:
+            return None
+
+        selected = []
+        total = 0
+        try:
+            with open(path, "r", encoding=DEFAULT_ENCODING, errors="replace") as f:
+                for total, line in enumerate(f, start=1):
+                    if start_line <= total < start_line + count:
+                        selected.append(line)
+        except FileNotFoundError:
+            return None  # zwischen lookup() und open() verdrängt
+
+        last = start_line + len(selected) - 1
+        return "".join(selected), last, total
+
+
+# Globale Instanz
+result_store = ResultStore()
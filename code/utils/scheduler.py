@@ -0,0 +1,181 @@
+"""Scheduler: Admission Control und Prioritäten für Tool-Aufrufe."""
+
+import asyncio
+import bisect
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from code.config import SCHEDULER_CLASSES, SCHEDULER_MAX_CONCURRENT
+
+
+class AdmissionRejected(Exception):
+    """Aufruf wartete länger als erlaubt auf einen freien Slot."""
+
+    def __init__(self, cost_class: str, waited: float, queued: int):
+        self.cost_class = cost_class
+        self.waited = waited
+        self.queued = queued
+        super().__init__(
+            f"Server ausgelastet - nach {waited:.1f}s kein freier Slot "
+            f"(Klasse {cost_class}, {queued} wartend)"
+        )
+
+
+@dataclass
+class CostClass:
+    """Kostenklasse mit eigenem Parallelitäts-Limit."""
+    name: str
+    limit: int
+    priority: int
+    timeout: float
+    running: int = 0
+    admitted: int = 0
+    rejected: int = 0
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    cost_class: CostClass = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class Scheduler:
+    """Lässt Tool-Aufrufe nach Kostenklasse und Priorität zu.
+
+    Jede Klasse hat ein eigenes Limit, zusätzlich gilt ein Gesamtlimit.
+    Wartende Aufrufe werden nach (Priorität, Ankunft) bedient; ist die
+    eigene Klasse voll, kommen andere Klassen vorher dran. Läuft nur im
+    Event-Loop, daher ohne Locks.
+    """
+
+    def __init__(
+        self,
+        classes: Optional[dict[str, dict]] = None,
+        max_concurrent: int = SCHEDULER_MAX_CONCURRENT,
+    ):
+        classes = classes if classes is not None else SCHEDULER_CLASSES
+        self.classes = {name: CostClass(name=name, **conf) for name, conf in classes.items()}
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def _can_run(self, cost_class: CostClass) -> bool:
+        return cost_class.running < cost_class.limit and self.running < self.max_concurrent
+
+    def _start(self, cost_class: CostClass) -> None:
+        cost_class.running += 1
+        cost_class.admitted += 1
+        self.running += 1
+
+    def _queued(self, cost_class: CostClass) -> int:
+        return sum(1 for w in self._waiters if w.cost_class is cost_class)
+
+    async def acquire(self, name: str, timeout: Optional[float] = None) -> float:
+        """Wartet auf einen Slot der Klasse. Gibt die Wartezeit zurück.
+
+        Args:
+            name: Kostenklasse
+            timeout: Kürzeres Warte-Limit als das der Klasse (z.B. Zeitbudget)
+
+        Raises:
+            AdmissionRejected: Wartezeit überschreitet das Timeout
+        """
+        cost_class = self.classes[name]
+        # Fast Path: release() lässt Wartende sofort zu - wer noch wartet,
+        # ist durch sein Klassen- oder das Gesamtlimit blockiert
+        if self._can_run(cost_class):
+            self._start(cost_class)
+            return 0.0
+
+        start = time.perf_counter()
+        waiter = _Waiter(
+            cost_class.priority,
+            next(self._seq),
+            cost_class,
+            asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(self._waiters, waiter)
+        try:
+            limit = cost_class.timeout if timeout is None else min(timeout, cost_class.timeout)
+            await asyncio.wait_for(waiter.future, timeout=limit)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                return time.perf_counter() - start  # Slot kam gleichzeitig mit dem Timeout
+            cost_class.rejected += 1
+            raise AdmissionRejected(name, time.perf_counter() - start, self._queued(cost_class))
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(name)  # Slot erhalten, aber Aufruf abgebrochen
+            raise
+        return time.perf_counter() - start
+
+    def release(self, name: str) -> None:
+        """Gibt einen Slot frei und lässt wartende Aufrufe nach Priorität zu."""
+        cost_class = self.classes[name]
+        cost_class.running -= 1
+        self.running -= 1
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _dispatch(self) -> None:
+        for waiter in list(self._waiters):
+            if self.running >= self.max_concurrent:
+                break
+            if waiter.future.done():
+                self._remove(waiter)
+            elif self._can_run(waiter.cost_class):
+                self._remove(waiter)
+                self._start(waiter.cost_class)
+                waiter.future.set_result(None)
+
+    def snapshot(self) -> dict:
+        """Laufende/wartende Aufrufe pro Klasse (Queue-Tiefe)."""
+        return {
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "queued": len(self._waiters),
+            "classes": {
+                c.name: {
+                    "running": c.running,
+                    "queued": self._queued(c),
+                    "limit": c.limit,
+                    "priority": c.priority,
+                    "timeout": c.timeout,
+                    "admitted": c.admitted,
+                    "rejected": c.rejected,
+                }
+                for c in sorted(self.classes.values(), key=lambda c: c.priority)
+            },
+        }
+
+    def format_table(self) -> str:
+        """Markdown-Tabelle der Klassen mit Queue-Tiefe."""
+        snapshot = self.snapshot()
+        lines = [
+            f"## Scheduler ({snapshot['running']}/{snapshot['max_concurrent']} aktiv, "
+            f"{snapshot['queued']} wartend)\n",
+            "| Klasse | Prio | Aktiv | Limit | Wartend | Zugelassen | Abgelehnt |",
+            "|--------|-----:|------:|------:|--------:|-----------:|----------:|",
+        ]
+        for name, c in snapshot["classes"].items():
+            lines.append(
+                f"| {name} | {c['priority']} | {c['running']} | {c['limit']} "
+                f"| {c['queued']} | {c['admitted']} | {c['rejected']} |"
+            )
+        return "\n".join(lines)
+
+
+# Globale Instanz
+scheduler = Scheduler()
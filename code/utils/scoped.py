@@ -0,0 +1,45 @@
+"""Kontext-lokale Instanzen hinter einem globalen Namen.
+
+Module wie state oder session_manager bleiben als globale Instanzen
+importierbar; der Zugriff landet beim Objekt der aktuellen Verbindung bzw.
+des aktuellen Tool-Aufrufs (ContextVar), sonst beim Prozess-Default.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Generic, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ScopedProxy(Generic[T]):
+    """Reicht Attribut-Zugriffe an den Wert der ContextVar weiter."""
+
+    __slots__ = ("_var", "_default")
+
+    def __init__(self, var: ContextVar[Optional[T]], default: T):
+        object.__setattr__(self, "_var", var)
+        object.__setattr__(self, "_default", default)
+
+    def _target(self) -> T:
+        value = self._var.get()
+        return self._default if value is None else value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._target())
+
+
+@contextmanager
+def scoped(var: ContextVar[Optional[T]], value: T) -> Iterator[T]:
+    """Setzt var für alles, was im aktuellen Kontext läuft."""
+    token = var.set(value)
+    try:
+        yield value
+    finally:
+        var.reset(token)
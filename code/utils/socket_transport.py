@@ -0,0 +1,212 @@
+"""Unix-Socket-Transport: mehrere MCP-Clients teilen sich einen Server-Prozess.
+
+Das Protokoll entspricht stdio (ein JSON-RPC-Objekt pro Zeile), daher
+reicht clientseitig eine dünne stdio-Brücke (bridge_stdio), die nur Bytes
+kopiert. anyio und mcp werden nur serverseitig importiert, damit die
+Brücke schnell startet.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable
+
+from code.config import SERVER_LOG, SERVER_START_TIMEOUT
+from code.utils.logging import get_logger
+
+if TYPE_CHECKING:
+    import anyio.abc
+    from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+    ConnectionHandler = Callable[
+        [MemoryObjectReceiveStream, MemoryObjectSendStream], Awaitable[None]
+    ]
+
+logger = get_logger("utils.socket_transport")
+
+# Größte akzeptierte Nachricht (z.B. file_write mit großem Inhalt)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ServerAlreadyRunning(Exception):
+    """Am Socket lauscht bereits ein Server."""
+
+
+@asynccontextmanager
+async def connection_streams(
+    stream: anyio.abc.ByteStream,
+) -> AsyncIterator[tuple[MemoryObjectReceiveStream, MemoryObjectSendStream]]:
+    """Wie mcp.server.stdio.stdio_server, aber für eine Socket-Verbindung."""
+    import anyio
+    from anyio.streams.buffered import BufferedByteReceiveStream
+
+    import mcp.types as types
+    from mcp.shared.message import SessionMessage
+
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    buffered = BufferedByteReceiveStream(stream)
+
+    async def socket_reader():
+        async with read_stream_writer:
+            while True:
+                try:
+                    line = await buffered.receive_until(b"\n", MAX_MESSAGE_BYTES)
+                except (anyio.EndOfStream, anyio.IncompleteRead,
+                        anyio.BrokenResourceError, anyio.ClosedResourceError):
+                    return
+                except anyio.DelimiterNotFound:
+                    logger.warning(f"Nachricht größer als {MAX_MESSAGE_BYTES} Bytes - Verbindung getrennt")
+                    return
+                if not line.strip():
+                    continue
+                try:
+                    message = types.JSONRPCMessage.model_validate_json(line)
+                except Exception as exc:
+                    await read_stream_writer.send(exc)
+                    continue
+                await read_stream_writer.send(SessionMessage(message))
+
+    async def socket_writer():
+        async with write_stream_reader:
+            async for session_message in write_stream_reader:
+                json = session_message.message.model_dump_json(by_alias=True, exclude_none=True)
+                try:
+                    await stream.send(json.encode("utf-8") + b"\n")
+                except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                    return
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(socket_reader)
+        tg.start_soon(socket_writer)
+        try:
+            yield read_stream, write_stream
+        finally:
+            tg.cancel_scope.cancel()
+
+
+def server_running(path: Path) -> bool:
+    """True wenn am Socket ein Server Verbindungen annimmt."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+async def serve_unix(path: Path, handle: ConnectionHandler) -> None:
+    """Nimmt Verbindungen am Unix-Socket an, jede in einem eigenen Task.
+
+    Ein verwaister Socket (Server abgestürzt) wird ersetzt, ein lebender
+    nicht. Der Socket ist nur für den eigenen Benutzer zugänglich.
+
+    Raises:
+        ServerAlreadyRunning: Am Socket lauscht bereits ein Server
+    """
+    import anyio
+
+    if path.exists():
+        if server_running(path):
+            raise ServerAlreadyRunning(f"Server läuft bereits: {path}")
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    old_umask = os.umask(0o177)
+    try:
+        listener = await anyio.create_unix_listener(path)
+    finally:
+        os.umask(old_umask)
+
+    connections = 0
+
+    async def on_connect(stream: anyio.abc.SocketStream) -> None:
+        nonlocal connections
+        connections += 1
+        logger.debug(f"Client verbunden ({connections} aktiv)")
+        try:
+            async with stream, connection_streams(stream) as (read_stream, write_stream):
+                await handle(read_stream, write_stream)
+        except Exception as e:
+            logger.error(f"Verbindung mit Fehler beendet: {e}")
+        finally:
+            connections -= 1
+            logger.debug(f"Client getrennt ({connections} aktiv)")
+
+    try:
+        async with listener:
+            await listener.serve(on_connect)
+    finally:
+        path.unlink(missing_ok=True)
+
+
+# --- Client-Seite ---
+
+def _start_server(path: Path) -> None:
+    """Startet einen Shared-Server im Hintergrund (eigene Session, Log-Datei)."""
+    SERVER_LOG.parent.mkdir(parents=True, exist_ok=True)
+    main = Path(__file__).parent.parent / "main.py"
+    with open(SERVER_LOG, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, str(main), "serve", "--socket", str(path)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            start_new_session=True,
+        )
+
+
+def connect(path: Path, start: bool = False) -> socket.socket:
+    """Verbindet mit dem Shared-Server, startet ihn bei Bedarf.
+
+    Raises:
+        OSError: Kein Server erreichbar (bzw. Start fehlgeschlagen)
+    """
+    deadline = None
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(path))
+            return sock
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            if not start or (deadline is not None and time.monotonic() > deadline):
+                raise
+        if deadline is None:
+            _start_server(path)
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+        time.sleep(0.05)
+
+
+def bridge_stdio(sock: socket.socket) -> None:
+    """Kopiert stdin -> Socket und Socket -> stdout bis eine Seite schließt."""
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+
+    def upstream():
+        try:
+            while chunk := stdin.read1(65536):
+                sock.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=upstream, name="bridge-stdin", daemon=True).start()
+
+    try:
+        while chunk := sock.recv(65536):
+            stdout.write(chunk)
+            stdout.flush()
+    finally:
+        sock.close()
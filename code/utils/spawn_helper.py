@@ -0,0 +1,144 @@
+"""Schlanker Spawn-Helper für shell_exec (Forkserver-Prinzip).
+
+Läuft als eigener, minimaler Python-Prozess (nur Standardbibliothek) und
+startet Shell-Befehle im Auftrag des Servers. Dadurch forkt nicht der
+große Server-Prozess (mcp, pydantic, Caches), sondern dieser kleine
+Prozess - Startlatenz und Copy-on-Write-Kosten bleiben konstant.
+
+Protokoll (SOCK_SEQPACKET, eine JSON-Nachricht pro Paket):
+    Server -> Helper: {"id", "command", "cwd", "env", "limits"} + fds [stdout, stderr]
+    Helper -> Server: {"ready": true}                       (einmalig nach Start)
+                      {"id", "pid"} oder {"id", "error"}    (nach dem Fork)
+                      {"id", "status", "rusage"}            (nach wait4)
+
+Aufruf nur durch code.utils.process.SpawnHelper:
+    python -I -S spawn_helper.py <socket-fd>
+"""
+
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+
+# Maximale Größe einer Anfrage (Befehl + Umgebung)
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+def apply_rlimits(limits: list) -> None:
+    """Setzt rlimits als (resource, soft, hard), nie über das aktuelle Hard-Limit."""
+    for res, soft, hard in limits:
+        _, current_hard = resource.getrlimit(res)
+        if current_hard != resource.RLIM_INFINITY:
+            soft = min(soft, current_hard)
+            hard = min(hard, current_hard)
+        resource.setrlimit(res, (soft, hard))
+
+
+def _exec_child(request: dict, stdout_fd: int, stderr_fd: int) -> None:
+    """Im Kindprozess: Session, Pipes, Limits, exec. Kehrt nie zurück."""
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+
+        # Python ignoriert SIGPIPE/SIGXFSZ - für den Befehl wiederherstellen
+        for sig in (signal.SIGPIPE, signal.SIGXFSZ, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+
+        apply_rlimits(request.get("limits") or [])
+        os.chdir(request["cwd"])
+        os.execve("/bin/sh", ["/bin/sh", "-c", request["command"]], request["env"])
+    except BaseException as e:
+        try:
+            os.write(2, f"spawn-helper: {e}\n".encode())
+        finally:
+            os._exit(127)
+
+
+def _spawn(request: dict, fds: list) -> int:
+    """Forkt einen Befehl und gibt die PID zurück."""
+    stdout_fd, stderr_fd = fds
+    try:
+        pid = os.fork()
+        if pid == 0:
+            _exec_child(request, stdout_fd, stderr_fd)
+        return pid
+    finally:
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+
+
+def _send(sock: socket.socket, message: dict) -> None:
+    sock.send(json.dumps(message).encode())
+
+
+def _reap(sock: socket.socket, children: dict) -> None:
+    """Sammelt beendete Kinder per wait4 ein und meldet Status + rusage."""
+    while True:
+        try:
+            pid, status, ru = os.wait4(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+        request_id = children.pop(pid, None)
+        if request_id is None:
+            continue
+        _send(sock, {
+            "id": request_id,
+            "status": status,
+            "rusage": [ru.ru_utime, ru.ru_stime, ru.ru_maxrss, ru.ru_inblock, ru.ru_oublock],
+        })
+
+
+def serve(sock: socket.socket) -> None:
+    """Hauptschleife: Anfragen annehmen, Kinder einsammeln."""
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    children: dict[int, int] = {}
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+
+    _send(sock, {"ready": True})
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == wakeup_r:
+                os.read(wakeup_r, 4096)
+                _reap(sock, children)
+                continue
+
+            message, fds, _, _ = socket.recv_fds(sock, MAX_MESSAGE_SIZE, 2)
+            if not message:
+                # Server weg - verwaiste Befehle beenden
+                for pid in children:
+                    try:
+                        os.killpg(pid, signal.SIGTERM)
+                    except OSError:
+                        pass
+                return
+
+            request = json.loads(message)
+            try:
+                pid = _spawn(request, fds)
+            except OSError as e:
+                _send(sock, {"id": request["id"], "error": str(e)})
+                continue
+            children[pid] = request["id"]
+            _send(sock, {"id": request["id"], "pid": pid})
+
+
+if __name__ == "__main__":
+    serve(socket.socket(fileno=int(sys.argv[1])))
@@ -0,0 +1,558 @@
+"""Transcript als JSONL: gepuffert schreiben, per Offset-Index lesen, Markdown bei Bedarf.
+
+Ein Transcript besteht aus zwei Dateien:
+    <name>.jsonl   ein JSON-Objekt pro Zeile (start, call, end); Zeilenumbrüche
+                   in Ergebnissen sind escaped, jede Zeile ist ein Event
+    <name>.idx     pro Tool-Aufruf eine Zeile {"seq", "ts", "tool", "ok",
+                   "off", "len"} - Byte-Offset und Länge in der .jsonl
+
+Für transcript_search kommt <name>.terms dazu: ein invertierter Index
+(Begriff -> seq) über Parameter und Ergebnisse, als angehängte Segmente
+inkrementell nachgeführt.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from code.config import (
+    TRANSCRIPT_BUFFER_BYTES,
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_MAX_RESULT_CHARS,
+    TRANSCRIPT_TERMS_SEGMENTS,
+)
+from code.utils.background import session_flusher
+from code.utils.logging import get_logger
+
+logger = get_logger("utils.transcript")
+
+FORMAT_VERSION = 1
+
+
+def encode_event(event: dict) -> bytes:
+    """Eine JSONL-Zeile; nicht kodierbare Zeichen (z.B. Surrogates) werden escaped."""
+    try:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        return line.encode("utf-8") + b"\n"
+    except UnicodeEncodeError:
+        return json.dumps(event, ensure_ascii=True, default=str).encode("ascii") + b"\n"
+
+
+def index_path(path: Path) -> Path:
+    """Pfad des Offset-Index zu einer .jsonl-Datei."""
+    return path.with_suffix(".idx")
+
+
+class TranscriptWriter:
+    """Schreibt Events über dauerhaft geöffnete, gepufferte Dateien.
+
+    append_call() hängt das Event nur an eine Liste an; kodiert und
+    geschrieben wird in flush() (periodisch über session_flusher, also
+    außerhalb des Aufrufpfads) und bei close(). Solange die .jsonl offen
+    ist, liegt ein geteilter flock darauf - der Archiver lässt sie dann liegen.
+    """
+
+    def __init__(self, path: Path, server: str = "stdio"):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._data: Optional[IO[bytes]] = open(path, "ab", buffering=TRANSCRIPT_BUFFER_BYTES)
+        fcntl.flock(self._data, fcntl.LOCK_SH)  # gelöst mit close() bzw. Prozessende
+        self._index: IO[bytes] = open(index_path(path), "ab", buffering=TRANSCRIPT_BUFFER_BYTES)
+        self._pending: list[dict] = []
+        self.size = self._data.tell()  # geschriebene Bytes (ohne _pending)
+        self.pending_chars = 0  # Ergebnis-Zeichen in _pending (für die Rotation)
+        self.calls = 0
+        self.started = datetime.now()
+        self._write({"type": "start", "ts": self.started.isoformat(timespec="seconds"),
+                     "server": server, "version": FORMAT_VERSION})
+
+    def _write(self, event: dict) -> tuple[int, int]:
+        """Kodiert ein Event in den Dateipuffer (Lock muss gehalten werden); (Offset, Länge)."""
+        line = encode_event(event)
+        offset = self.size
+        self._data.write(line)
+        self.size += len(line)
+        return offset, len(line)
+
+    def append_call(
+        self,
+        tool: str,
+        params: dict,
+        result: str,
+        success: bool,
+        duration_ms: Optional[float] = None,
+    ) -> None:
+        """Protokolliert einen Tool-Aufruf (vollständige Parameter, Ergebnis begrenzt)."""
+        event = {
+            "type": "call",
+            "seq": 0,
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "tool": tool,
+            "params": params,
+            "success": success,
+            "duration_ms": duration_ms,
+            "result": result[:TRANSCRIPT_MAX_RESULT_CHARS],
+            "result_chars": len(result),
+        }
+        with self._lock:
+            if self._data is None:
+                return
+            self.calls += 1
+            event["seq"] = self.calls
+            self._pending.append(event)
+            self.pending_chars += len(event["result"])
+        session_flusher.mark_dirty(self)
+
+    def _write_pending(self) -> None:
+        """Kodiert gepufferte Aufrufe samt Index-Zeilen (Lock muss gehalten werden)."""
+        events, self._pending = self._pending, []
+        self.pending_chars = 0
+        for event in events:
+            offset, length = self._write(event)
+            self._index.write(encode_event({
+                "seq": event["seq"], "ts": event["ts"], "tool": event["tool"],
+                "ok": event["success"], "off": offset, "len": length,
+            }))
+
+    def flush(self) -> None:
+        """Schreibt gepufferte Aufrufe auf die Platte."""
+        with self._lock:
+            if self._data is not None:
+                self._write_pending()
+                self._data.flush()
+                self._index.flush()
+
+    def close(self) -> None:
+        """Schreibt Ausstehendes und das end-Event, schließt beide Dateien (idempotent)."""
+        with self._lock:
+            if self._data is None:
+                return
+            self._write_pending()
+            self._write({"type": "end", "ts": datetime.now().isoformat(timespec="seconds"),
+                         "calls": self.calls})
+            self._data.close()
+            self._index.close()
+            self._data = None
+
+
+# --- Lesen ---
+
+def iter_events(path: Path) -> Iterator[tuple[int, dict]]:
+    """(Offset, Event) für jede lesbare Zeile; eine abgeschnittene letzte Zeile wird übersprungen."""
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                logger.warning(f"Transcript-Zeile übersprungen: {path}@{offset}")
+            else:
+                yield offset, event
+            offset += len(line)
+
+
+def load_index(path: Path) -> list[dict]:
+    """Offset-Index eines Transcripts; fehlt oder passt er nicht, wird er neu aufgebaut."""
+    entries = []
+    try:
+        with open(index_path(path), "rb") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # abgeschnittene letzte Zeile
+    except FileNotFoundError:
+        pass
+
+    size = path.stat().st_size
+    if entries and entries[-1]["off"] + entries[-1]["len"] > size:
+        entries = []  # Index weiter als die Daten (Absturz vor flush der .jsonl)
+    if not entries and size > 0:
+        entries = rebuild_index(path)
+    return entries
+
+
+def rebuild_index(path: Path) -> list[dict]:
+    """Baut den Offset-Index aus der .jsonl neu auf und speichert ihn."""
+    entries = []
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = {}
+            if event.get("type") == "call":
+                entries.append({
+                    "seq": event["seq"], "ts": event["ts"], "tool": event["tool"],
+                    "ok": event["success"], "off": offset, "len": len(line),
+                })
+            offset += len(line)
+    with open(index_path(path), "wb") as f:
+        f.write(b"".join(encode_event(entry) for entry in entries))
+    return entries
+
+
+def read_call(path: Path, offset: int, length: int) -> dict:
+    """Liest genau einen Aufruf per seek (Offset/Länge aus dem Index)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def render_markdown(path: Path) -> str:
+    """Markdown-Ansicht eines JSONL-Transcripts (Format wie früher /transcript)."""
+    parts = []
+    for _, event in iter_events(path):
+        kind = event.get("type")
+        if kind == "start":
+            started = datetime.fromisoformat(event["ts"])
+            parts.append(
+                "# MCP Shell Tools Transcript\n"
+                f"**Gestartet:** {started:%Y-%m-%d %H:%M:%S}\n"
+                f"**Server:** {event.get('server', 'stdio')}\n\n---\n"
+            )
+        elif kind == "call":
+            timestamp = datetime.fromisoformat(event["ts"])
+            status = "✓" if event["success"] else "✗"
+            params = event.get("params") or {}
+            params_text = "\n".join(f"  {k}: {v}" for k, v in params.items()) if params else "  (keine)"
+            result = event.get("result", "")
+            if event.get("result_chars", len(result)) > len(result):
+                result += f"\n\n... (gekürzt, {event['result_chars']} Zeichen total)"
+            # Zaun länger als jede Backtick-Folge im Ergebnis
+            fence = "```"
+            while fence in result:
+                fence += "`"
+            parts.append(
+                f"\n## [{timestamp:%Y-%m-%d %H:%M:%S}] {status} `{event['tool']}`\n\n"
+                f"**Parameter:**\n{params_text}\n\n"
+                f"**Result:**\n{fence}\n{result}\n{fence}\n\n---\n"
+            )
+        elif kind == "end":
+            ended = datetime.fromisoformat(event["ts"])
+            parts.append(f"\n---\n**Beendet:** {ended:%Y-%m-%d %H:%M:%S}\n")
+    return "".join(parts)
+
+
+# --- Suche ---
+
+_MAX_TOKEN = 64
+_TOKEN = re.compile(rf"\w{{2,{_MAX_TOKEN}}}")
+
+# Format der .terms-Datei (unabhängig von FORMAT_VERSION der .jsonl)
+TERMS_VERSION = 2
+
+
+def tokenize(text: str) -> set[str]:
+    """Suchbegriffe eines Textes (Wörter ab 2 Zeichen, klein geschrieben)."""
+    return set(_TOKEN.findall(text.lower()))
+
+
+def _searchable(event: dict) -> str:
+    """Text eines Aufrufs, der durchsucht wird: Parameterwerte und Ergebnis."""
+    params = event.get("params") or {}
+    return " ".join(str(value) for value in params.values()) + "\n" + event.get("result", "")
+
+
+def terms_path(path: Path) -> Path:
+    """Pfad des invertierten Index zu einer .jsonl-Datei."""
+    return path.with_suffix(".terms")
+
+
+class TranscriptIndex:
+    """Offset-Index und invertierter Index (Begriff -> seq) eines Transcripts.
+
+    Wird inkrementell nachgeführt: refresh() liest nur Aufrufe, die seit dem
+    letzten Stand an die .jsonl angehängt wurden. Der invertierte Index liegt
+    als <name>.terms neben dem Transcript und besteht aus Segmenten: je eine
+    JSON-Kopfzeile {"version", "covered", "size", "terms": {Begriff:
+    [Offset, Anzahl]}}, danach size Bytes seq-Listen als uint32. refresh()
+    hängt pro Durchlauf ein Segment an (unter flock); ab
+    TRANSCRIPT_TERMS_SEGMENTS Segmenten werden alle zu einem
+    zusammengeführt (neue Datei per os.replace). Im Speicher liegen nur die
+    Köpfe, die Listen werden pro Suchbegriff per seek gelesen.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: list[dict] = []
+        self.covered = 0  # Bytes der .jsonl, die im invertierten Index stecken
+        self._segments: list[tuple[int, dict[str, list[int]]]] = []  # (Start der Listen, Begriff -> [Offset, Anzahl])
+        self._end = 0  # Ende des letzten vollständigen Segments
+        self._inode: Optional[int] = None
+        self._size = -1
+        try:
+            with open(terms_path(self.path), "rb") as f:
+                self._read_segments(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Suchindex unbrauchbar, wird neu aufgebaut: {self.path}: {e}")
+            self._reset()
+
+    def _reset(self) -> None:
+        self._segments, self.covered, self._end, self._inode = [], 0, 0, None
+
+    def _read_segments(self, f: IO[bytes], start: int = 0) -> None:
+        """Liest die Segment-Köpfe ab start; ein unvollständiges Ende wird ignoriert."""
+        total = os.fstat(f.fileno()).st_size
+        self._inode = os.fstat(f.fileno()).st_ino
+        f.seek(start)
+        while True:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            try:
+                header = json.loads(line)
+            except ValueError:
+                break
+            base = f.tell()
+            size = header.get("size")
+            if header.get("version") != TERMS_VERSION or size is None or base + size > total:
+                break
+            self._segments.append((base, header["terms"]))
+            self.covered = header["covered"]
+            self._end = base + size
+            f.seek(self._end)
+
+    def _sync(self, f: IO[bytes]) -> None:
+        """Gleicht die Köpfe mit der geöffneten .terms-Datei ab (anderer Prozess)."""
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != self._inode or stat.st_size < self._end:
+            self._reset()  # zusammengeführt, neu angelegt oder geleert
+        self._read_segments(f, self._end)
+
+    def refresh(self) -> None:
+        """Übernimmt neu angehängte Aufrufe in beide Indizes."""
+        size = self.path.stat().st_size
+        if size == self._size:
+            return
+        self._size = size
+        self.entries = load_index(self.path)
+        if size >= self.covered and (not self.entries or self.entries[-1]["off"] < self.covered):
+            return
+
+        path = terms_path(self.path)
+        while True:
+            f = open(path, "a+b")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    continue  # während des Wartens zusammengeführt
+                self._sync(f)
+                if self.covered > size:  # Transcript ersetzt
+                    f.truncate(0)
+                    self._reset()
+                    self._inode = os.fstat(f.fileno()).st_ino
+                self._append(f)
+                return
+            except FileNotFoundError:
+                continue
+            finally:
+                f.close()  # gibt auch den flock frei
+
+    def _append(self, f: IO[bytes]) -> None:
+        """Indexiert Aufrufe hinter covered als neues Segment (flock gehalten)."""
+        new = [entry for entry in self.entries if entry["off"] >= self.covered]
+        if not new:
+            return
+        terms: dict[str, list[int]] = {}
+        with open(self.path, "rb") as jsonl:
+            for entry in new:
+                jsonl.seek(entry["off"])
+                event = json.loads(jsonl.read(entry["len"]))
+                for term in tokenize(_searchable(event)):
+                    terms.setdefault(term, []).append(entry["seq"])
+        covered = new[-1]["off"] + new[-1]["len"]
+
+        if len(self._segments) + 1 >= TRANSCRIPT_TERMS_SEGMENTS:
+            for term, seqs in self._load_all(f).items():
+                terms[term] = seqs + terms.get(term, [])
+            self._write_merged(terms, covered)
+            return
+
+        f.truncate(self._end)  # unvollständiges Segment eines abgebrochenen Laufs
+        f.seek(self._end)
+        f.write(_encode_segment(terms, covered))
+        f.flush()
+        self._read_segments(f, self._end)
+
+    def _load_all(self, f: IO[bytes]) -> dict[str, list[int]]:
+        """Alle Listen aller Segmente (zum Zusammenführen)."""
+        merged: dict[str, list[int]] = {}
+        for base, slots in self._segments:
+            f.seek(base)
+            blob = array("I")
+            size = max((offset + count * blob.itemsize for offset, count in slots.values()), default=0)
+            blob.frombytes(f.read(size))
+            for term, (offset, count) in slots.items():
+                start = offset // blob.itemsize
+                merged.setdefault(term, []).extend(blob[start:start + count])
+        return merged
+
+    def _write_merged(self, terms: dict[str, list[int]], covered: int) -> None:
+        path = terms_path(self.path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as out:
+            out.write(_encode_segment(terms, covered))
+        os.replace(tmp, path)
+        self._reset()
+        with open(path, "rb") as f:
+            self._read_segments(f)
+
+    def _postings(self, terms: set[str]) -> set[int]:
+        """seq aller Aufrufe, die einen der Begriffe enthalten (per seek aus .terms)."""
+        postings = array("I")
+        with open(terms_path(self.path), "rb") as f:
+            self._sync(f)
+            for base, slots in self._segments:
+                for term in terms:
+                    slot = slots.get(term)
+                    if slot:
+                        f.seek(base + slot[0])
+                        postings.frombytes(f.read(slot[1] * postings.itemsize))
+        return set(postings)
+
+    def candidates(self, query: Optional[str]) -> Optional[set[int]]:
+        """seq der Aufrufe, in denen jedes Wort der Anfrage vorkommen kann (None = kein Filter).
+
+        Wie die Prüfung in TranscriptCatalog.search zählen Teilwörter:
+        "return" nutzt die Listen aller Begriffe, die es enthalten
+        ("calculate_returns").
+        """
+        words = tokenize(query) if query else set()
+        if not words or not self._segments:
+            return None
+        vocabulary = {term for _, slots in self._segments for term in slots}
+        chunked = any(len(term) == _MAX_TOKEN for term in vocabulary)
+        result: Optional[set[int]] = None
+        for word in sorted(words, key=len, reverse=True):  # lange Wörter passen seltener
+            matching = {term for term in vocabulary if word in term}
+            if not matching:
+                if chunked:
+                    continue  # kann über die Grenze eines langen Worts reichen: Prüfung beim Lesen
+                return set()
+            try:
+                seqs = self._postings(matching)
+            except OSError:
+                return None  # .terms weg (archiviert): linear prüfen
+            result = seqs if result is None else result & seqs
+            if not result:
+                return set()
+        return result
+
+
+def _encode_segment(terms: dict[str, list[int]], covered: int) -> bytes:
+    """Ein Segment der .terms-Datei: Kopfzeile und seq-Listen."""
+    slots = {}
+    blob = array("I")
+    for term, seqs in terms.items():
+        slots[term] = [len(blob) * blob.itemsize, len(seqs)]
+        blob.extend(seqs)
+    header = json.dumps(
+        {"version": TERMS_VERSION, "covered": covered, "size": len(blob) * blob.itemsize, "terms": slots},
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return header.encode("utf-8", errors="surrogatepass") + b"\n" + blob.tobytes()
+
+
+class TranscriptCatalog:
+    """Durchsucht alle Transcripts eines Verzeichnisses (neueste zuerst).
+
+    Hält pro Datei einen TranscriptIndex im Speicher. Dateien außerhalb des
+    Zeitraums werden über Dateiname (Start) und mtime (letzter Aufruf)
+    übersprungen, ohne ihren Index zu lesen.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._indexes: dict[Path, TranscriptIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, path: Path) -> TranscriptIndex:
+        index = self._indexes.get(path)
+        if index is None:
+            index = self._indexes[path] = TranscriptIndex(path)
+        index.refresh()
+        return index
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        tool: Optional[str] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        file: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[tuple[Path, dict]]:
+        """(Transcript, Aufruf) aller Treffer, neueste zuerst.
+
+        since/until sind ISO-Zeitstempel (Vergleich als Zeichenkette).
+        Gelesen werden per seek nur Aufrufe, die Index-Filter und
+        invertierten Index passieren; dort wird geprüft, dass jedes Wort der
+        Anfrage wörtlich vorkommt.
+        """
+        words = query.lower().split() if query else []
+        hits: list[tuple[Path, dict]] = []
+        with self._lock:
+            try:
+                paths = sorted(self.directory.glob("*.jsonl"), reverse=True)
+            except OSError:
+                return []
+            if file:
+                paths = [p for p in paths if p.name in (file, f"{file}.jsonl")]
+            for stale in [p for p in self._indexes if not p.exists()]:
+                del self._indexes[stale]  # archiviert oder gelöscht
+
+            for path in paths:
+                try:
+                    if until and _compact(path.stem) > _compact(until):
+                        continue  # erst nach dem Zeitraum gestartet
+                    if since and datetime.fromtimestamp(path.stat().st_mtime).isoformat() < since:
+                        continue  # letzter Aufruf vor dem Zeitraum
+                    index = self._index(path)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Transcript nicht lesbar: {path}: {e}")
+                    continue
+
+                seqs = index.candidates(query)
+                matches = [
+                    entry for entry in reversed(index.entries)
+                    if (seqs is None or entry["seq"] in seqs)
+                    and (tool is None or entry["tool"] == tool)
+                    and (success is None or entry["ok"] == success)
+                    and (since is None or entry["ts"] >= since)
+                    and (until is None or entry["ts"] <= until)
+                ]
+                if not matches:
+                    continue
+                with open(path, "rb") as f:
+                    for entry in matches:
+                        f.seek(entry["off"])
+                        event = json.loads(f.read(entry["len"]))
+                        if words:
+                            text = _searchable(event).lower()
+                            if not all(word in text for word in words):
+                                continue
+                        hits.append((path, event))
+                        if len(hits) >= limit:
+                            return hits
+        return hits
+
+
+def _compact(timestamp: str) -> str:
+    """ISO-Zeitstempel als Ziffernfolge YYYYMMDDHHMMSS (für den Vergleich mit Dateinamen)."""
+    return "".join(ch for ch in timestamp if ch.isdigit())[:14]
+
+
+# Globale Instanz
+transcript_catalog = TranscriptCatalog(TRANSCRIPT_DIR)
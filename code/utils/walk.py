@@ -0,0 +1,64 @@
+"""Sortierter Verzeichnis-Walk mit Abbruchpunkten."""
+
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from code.utils.executor import check_cancelled
+
+
+def _sorted_entries(path: str) -> list[os.DirEntry]:
+    with os.scandir(path) as it:
+        return sorted(it, key=lambda entry: entry.name)
+
+
+def walk_sorted(
+    root: Path,
+    max_depth: Optional[int] = None,
+    show_hidden: bool = False,
+    after: Optional[tuple[str, ...]] = None,
+) -> Iterator[tuple[os.DirEntry, int]]:
+    """Durchläuft einen Verzeichnisbaum in sortierter Reihenfolge.
+
+    Liefert (Eintrag, Tiefe) in derselben Reihenfolge wie
+    sorted(root.rglob("*")), aber lazy: versteckte Verzeichnisse und
+    alles unterhalb von max_depth werden gar nicht erst gelesen.
+    Symlinks auf Verzeichnisse werden nicht verfolgt.
+
+    after ist ein Cursor (relative Pfadteile des zuletzt gelieferten
+    Eintrags): Es kommen nur Einträge danach, Teilbäume davor werden
+    nicht gelesen.
+
+    Fehler beim Lesen von root werden weitergegeben, unlesbare
+    Unterverzeichnisse übersprungen.
+    """
+    check_cancelled()
+    # (Einträge, relative Pfadteile des Verzeichnisses)
+    stack = [(iter(_sorted_entries(str(root))), ())]
+
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        if not show_hidden and entry.name.startswith("."):
+            continue
+
+        parts = prefix + (entry.name,)
+        depth = len(stack)
+        if after is not None and parts <= after:
+            # Vor dem Cursor: nur absteigen, wenn der Cursor darin liegt
+            if after[:len(parts)] != parts:
+                continue
+        else:
+            after = None  # Cursor passiert, ab hier alles liefern
+            yield entry, depth
+
+        if (max_depth is None or depth < max_depth) and entry.is_dir(follow_symlinks=False):
+            check_cancelled()
+            try:
+                stack.append((iter(_sorted_entries(entry.path)), parts))
+            except OSError:
+                continue
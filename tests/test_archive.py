@@ -0,0 +1,206 @@
+"""Tests für utils/archive.py."""
+
+import gzip
+import json
+import lzma
+import os
+import time
+
+import pytest
+
+from code.persistence.session_manager import SessionManager
+from code.utils.archive import Archiver
+from code.utils.transcript import TranscriptWriter
+
+TRANSCRIPT = (
+    '{"type": "start", "ts": "2026-01-05T10:00:00", "cwd": "/tmp"}\n'
+    '{"type": "call", "seq": 1, "ts": "2026-01-05T10:00:00.000", "tool": "grep", '
+    '"result": "main.py:3: def calculate_returns"}\n'
+    '{"type": "call", "seq": 2, "ts": "2026-01-05T10:05:00.000", "tool": "shell_exec", "result": ""}\n'
+)
+
+
+def _age(path, seconds):
+    """Setzt die mtime um `seconds` zurück."""
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+@pytest.fixture
+def archiver(temp_dir):
+    """Archiver auf einem leeren Datenverzeichnis."""
+    return Archiver(data_dir=temp_dir, min_age=60, stale_days=1, quota_bytes=10 * 1024 * 1024)
+
+
+class TestArchiver:
+    """Tests für Archiver."""
+
+    def test_closed_transcripts_compressed_and_indexed(self, archiver, temp_dir):
+        """Alte Transcripts werden komprimiert, aktive und frische bleiben, Renders auch."""
+        transcripts = temp_dir / "transcripts"
+        transcripts.mkdir()
+        for name in ["alt.jsonl", "aktiv.jsonl", "frisch.jsonl"]:
+            (transcripts / name).write_text(TRANSCRIPT)
+        for name in ["alt.idx", "alt.terms", "alt.md"]:
+            (transcripts / name).write_text("x")
+        for name in ["alt.jsonl", "aktiv.jsonl", "alt.md"]:
+            _age(transcripts / name, 3600)
+
+        report = archiver.run(active_transcript=transcripts / "aktiv.jsonl")
+
+        assert report["transcripts"] == ["transcripts/alt.jsonl.gz"]
+        assert sorted(p.name for p in transcripts.iterdir()) == ["aktiv.jsonl", "alt.md", "frisch.jsonl"]
+        archived = temp_dir / "archive" / "transcripts" / "alt.jsonl.gz"
+        assert gzip.decompress(archived.read_bytes()).decode() == TRANSCRIPT
+
+        entry = archiver.load_index()["transcripts/alt.jsonl.gz"]
+        assert entry["tools"] == {"grep": 1, "shell_exec": 1}
+        assert entry["first"] == "2026-01-05T10:00:00.000"
+        assert entry["size"] == len(TRANSCRIPT.encode())
+        assert entry["stored"] == archived.stat().st_size
+
+    def test_open_transcript_of_other_process_kept(self, archiver, temp_dir):
+        """Ein offenes Transcript bleibt liegen, auch wenn es lange nicht geändert wurde."""
+        path = temp_dir / "transcripts" / "fremd.jsonl"
+        writer = TranscriptWriter(path)
+        writer.flush()
+        _age(path, 3600)
+
+        assert archiver.run()["transcripts"] == []
+        writer.append_call("grep", {}, "spät", True)
+        writer.close()
+        _age(path, 3600)
+        assert archiver.run()["transcripts"] == ["transcripts/fremd.jsonl.gz"]
+        archived = gzip.decompress((temp_dir / "archive" / "transcripts" / "fremd.jsonl.gz").read_bytes())
+        assert b"sp\xc3\xa4t" in archived and b'"type": "end"' in archived
+
+    def test_xz_and_search(self, temp_dir):
+        """xz-Archive sind über den Index durchsuchbar, gefiltert nach Tool."""
+        archiver = Archiver(data_dir=temp_dir, compression="xz", min_age=0)
+        (temp_dir / "transcripts").mkdir()
+        (temp_dir / "transcripts" / "a.jsonl").write_text(TRANSCRIPT)
+        archiver.run()
+
+        assert lzma.decompress((temp_dir / "archive" / "transcripts" / "a.jsonl.xz").read_bytes())
+        hits = archiver.search("CALCULATE_returns")
+        assert [(h["file"], h["line"]) for h in hits] == [("transcripts/a.jsonl.xz", 2)]
+        assert archiver.search("calculate_returns", tool="file_write") == []
+
+    def test_rotated_logs_archived(self, archiver, temp_dir, monkeypatch):
+        """Rotation verschiebt das älteste Backup ins Archiv statt es zu löschen."""
+        from code.tools import commands
+
+        monkeypatch.setattr(commands, "ARCHIVE_DIR", temp_dir / "archive")
+        monkeypatch.setattr(commands, "MAX_LOG_SIZE", 10)
+        settings = commands.CommandSettings()
+        settings._auto_transcript_checked = True
+        settings.set_logging(True, str(temp_dir / "tool.log"))
+        for i in range(6):
+            settings.log_call("grep", {"i": i}, "", True)
+
+        assert len(list((temp_dir / "archive" / "logs").iterdir())) == 2  # zwei Rotationen in einer Sekunde
+        report = archiver.run()
+        assert len(report["logs"]) == 2
+        assert all(archiver.load_index()[name]["tools"] == {"grep": 1} for name in report["logs"])
+
+    def test_rotations_in_same_second_kept(self, archiver, temp_dir, monkeypatch):
+        """Mehrere Rotationen in derselben Sekunde überschreiben sich nicht."""
+        from datetime import datetime
+
+        from code.tools import commands
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2026, 1, 5, 10, 0, 0)
+
+        monkeypatch.setattr(commands, "ARCHIVE_DIR", temp_dir / "archive")
+        monkeypatch.setattr(commands, "MAX_LOG_SIZE", 10)
+        monkeypatch.setattr(commands, "datetime", FrozenDatetime)
+        settings = commands.CommandSettings()
+        settings._auto_transcript_checked = True
+        settings.set_logging(True, str(temp_dir / "tool.log"))
+        for i in range(6):
+            settings.log_call("grep", {"i": i}, "", True)
+        archiver.run()  # komprimierte Backups belegen ihren Namen weiter
+        settings.log_call("grep", {"i": 6}, "", True)
+
+        logs = sorted(p.name for p in (temp_dir / "archive" / "logs").iterdir())
+        assert logs == ["tool-20260105-100000-000000-1.log.gz", "tool-20260105-100000-000000-2.log",
+                        "tool-20260105-100000-000000.log.gz"]
+
+    def test_stale_sessions_compacted(self, archiver, temp_dir):
+        """Ruhende Sessions: Journal landet im Snapshot, aktive bleiben unberührt."""
+        manager = SessionManager(base_dir=temp_dir)
+        for name in ["ruhend", "aktiv"]:
+            manager.init_session(temp_dir / name)
+            manager.save_session()
+            manager.add_memory(f"Notiz {name}")
+            manager.flush()
+        _age(manager._journal_file("ruhend"), 3 * 86400)
+
+        report = archiver.run()
+
+        assert report["sessions"] == ["ruhend"]
+        assert not manager._journal_file("ruhend").exists()
+        assert manager._journal_file("aktiv").exists()
+        loaded = SessionManager(base_dir=temp_dir).load_session("ruhend")
+        assert [m.content for m in loaded.memories] == ["Notiz ruhend"]
+
+    def test_quota_evicts_least_recently_used(self, temp_dir):
+        """Über der Quota werden die am längsten nicht genutzten Archive gelöscht."""
+        archiver = Archiver(data_dir=temp_dir, min_age=0, quota_bytes=0)
+        transcripts = temp_dir / "transcripts"
+        transcripts.mkdir()
+        for i in range(3):
+            (transcripts / f"t{i}.jsonl").write_bytes(os.urandom(20_000))
+            _age(transcripts / f"t{i}.jsonl", 3600 * (3 - i))
+        entries = archiver.load_index()
+        archiver.archive_transcripts(entries)
+        archiver._save_index(entries)
+
+        archiver.quota_bytes = archiver._usage(entries) - 1
+        evicted = archiver.enforce_quota(entries)
+
+        assert evicted == ["transcripts/t0.jsonl.gz"]
+        assert not (temp_dir / "archive" / "transcripts" / "t0.jsonl.gz").exists()
+        assert sorted(entries) == ["transcripts/t1.jsonl.gz", "transcripts/t2.jsonl.gz"]
+
+    def test_corrupt_index_rebuilt(self, archiver, temp_dir):
+        """Ein kaputter Index wird aus den Archivdateien neu aufgebaut."""
+        (temp_dir / "transcripts").mkdir()
+        (temp_dir / "transcripts" / "a.jsonl").write_text(TRANSCRIPT)
+        _age(temp_dir / "transcripts" / "a.jsonl", 3600)
+        archiver.run()
+        (temp_dir / "archive" / "index.json").write_text("{kaputt")
+
+        entry = archiver.load_index()["transcripts/a.jsonl.gz"]
+        assert entry["tools"] == {"grep": 1, "shell_exec": 1}
+        assert json.loads((temp_dir / "archive" / "index.json").read_text())["version"] == 1
+
+    def test_run_exclusive_and_due(self, archiver):
+        """Nur ein Lauf gleichzeitig; danach erst nach dem Intervall wieder fällig."""
+        assert archiver.due(interval=3600)
+        with archiver._exclusive() as acquired:
+            assert acquired
+            assert Archiver(data_dir=archiver.data_dir).run() is None
+
+        assert archiver.run() is not None
+        assert not archiver.due(interval=3600)
+
+    def test_jsonl_transcripts_indexed(self, archiver, temp_dir):
+        """JSONL-Transcripts werden indexiert, der Offset-Index wird entfernt."""
+        from code.utils.transcript import TranscriptWriter
+
+        writer = TranscriptWriter(temp_dir / "transcripts" / "t.jsonl")
+        writer.append_call("grep", {"pattern": "calculate_returns"}, "main.py:3", True)
+        writer.append_call("grep", {}, "", False)
+        writer.close()
+        _age(writer.path, 3600)
+
+        report = archiver.run()
+
+        assert report["transcripts"] == ["transcripts/t.jsonl.gz"]
+        assert not (temp_dir / "transcripts" / "t.idx").exists()
+        assert archiver.load_index()["transcripts/t.jsonl.gz"]["tools"] == {"grep": 2}
+        assert [h["line"] for h in archiver.search("calculate_returns", tool="grep")] == [2]
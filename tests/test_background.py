@@ -0,0 +1,146 @@
+"""Tests für utils/background.py."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from code.utils.background import BackgroundWriter, PeriodicFlusher
+
+
+class TestBackgroundWriter:
+    """Tests für BackgroundWriter."""
+
+    def test_runs_in_background_thread(self):
+        """Aufträge laufen nicht im aufrufenden Thread."""
+        writer = BackgroundWriter("test-writer")
+        threads = []
+
+        writer.submit(lambda: threads.append(threading.current_thread().name))
+        writer.close()
+
+        assert threads == ["test-writer"]
+
+    def test_order_preserved(self):
+        """Aufträge werden in Reihenfolge ausgeführt."""
+        writer = BackgroundWriter(batch_size=4)
+        results = []
+
+        for i in range(20):
+            writer.submit(results.append, i)
+        writer.flush()
+
+        assert results == list(range(20))
+        writer.close()
+
+    def test_close_drains_queue(self):
+        """close() schreibt alle ausstehenden Aufträge."""
+        writer = BackgroundWriter()
+        results = []
+
+        def slow_append(i):
+            time.sleep(0.01)
+            results.append(i)
+
+        for i in range(10):
+            writer.submit(slow_append, i)
+        writer.close()
+
+        assert results == list(range(10))
+
+    def test_full_queue_applies_backpressure(self):
+        """Volle Queue: submit() wartet auf einen freien Platz, kein Auftrag geht verloren."""
+        writer = BackgroundWriter(maxsize=2)
+        gate = threading.Event()
+        results = []
+
+        writer.submit(gate.wait)  # blockiert den Worker
+        producer = threading.Thread(target=lambda: [writer.submit(results.append, i) for i in range(50)])
+        producer.start()
+        time.sleep(0.05)
+        assert producer.is_alive()  # wartet auf Platz in der Queue
+        assert writer.pending == 2 and writer.snapshot()["throttled"] >= 1
+
+        gate.set()
+        producer.join(2.0)
+        writer.close()
+        assert results == list(range(50))
+
+    @pytest.mark.asyncio
+    async def test_submit_async_waits_without_blocking_loop(self):
+        """submit_async() bremst nur den Aufrufer; der Event-Loop läuft weiter, nichts wird verworfen."""
+        writer = BackgroundWriter(maxsize=1)
+        gate = threading.Event()
+        results = []
+
+        writer.submit(gate.wait)
+        producer = asyncio.ensure_future(asyncio.gather(*(writer.submit_async(results.append, i) for i in range(20))))
+        await asyncio.sleep(0.05)  # Loop läuft, obwohl die Queue voll ist
+        assert not producer.done() and writer.snapshot()["throttled"] >= 1
+
+        gate.set()
+        await asyncio.wait_for(producer, 2.0)
+        writer.close()
+        assert sorted(results) == list(range(20))
+
+    def test_submit_after_close_runs_inline(self):
+        """Nach close() wird direkt geschrieben."""
+        writer = BackgroundWriter()
+        writer.close()
+        results = []
+
+        writer.submit(results.append, 1)
+        assert results == [1]
+
+    def test_errors_do_not_stop_worker(self):
+        """Fehlerhafte Aufträge beenden den Worker nicht."""
+        writer = BackgroundWriter()
+        results = []
+
+        writer.submit(lambda: 1 / 0)
+        writer.submit(results.append, "after")
+        writer.close()
+
+        assert results == ["after"]
+
+
+class _Target:
+    """Zählt flush()-Aufrufe."""
+
+    def __init__(self):
+        self.flushes = 0
+        self.flushed = threading.Event()
+
+    def flush(self):
+        self.flushes += 1
+        self.flushed.set()
+
+
+class TestPeriodicFlusher:
+    """Tests für PeriodicFlusher."""
+
+    def test_coalesces_on_timer(self):
+        """Viele Änderungen zwischen zwei Durchläufen = ein flush()."""
+        flusher = PeriodicFlusher("test-flusher", interval=0.05)
+        target = _Target()
+
+        for _ in range(100):
+            flusher.mark_dirty(target)
+        assert target.flushed.wait(1.0)
+
+        assert target.flushes == 1
+        assert flusher.pending == 0
+        flusher.close()
+
+    def test_close_flushes_synchronously(self):
+        """close() schreibt Ausstehendes sofort, nicht erst nach dem Intervall."""
+        flusher = PeriodicFlusher(interval=60)
+        target = _Target()
+
+        flusher.mark_dirty(target)
+        flusher.close()
+        assert target.flushes == 1
+
+        flusher.mark_dirty(target)  # nach close(): direkt
+        assert target.flushes == 2
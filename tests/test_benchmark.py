@@ -0,0 +1,117 @@
+"""Tests für utils/benchmark.py."""
+
+import copy
+import hashlib
+from dataclasses import replace
+
+import pytest
+
+from code.utils.benchmark import (
+    MANIFEST,
+    RepoSpec,
+    compare,
+    format_comparison,
+    generate_repo,
+    parse_scale,
+    run_suite,
+)
+
+SPEC = RepoSpec(files=120, large_files=1, large_mb=1, binary_blobs=2, ignored_files=20)
+
+
+def _tree_digest(root):
+    """Hash über alle Pfade und Inhalte (ohne Manifest)."""
+    digest = hashlib.sha256()
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.name != MANIFEST:
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class TestGenerateRepo:
+    """Tests für den Repo-Generator."""
+
+    def test_deterministic(self, temp_dir):
+        """Gleiche Spec = gleiche Bytes; anderer Seed = anderes Repo."""
+        a = generate_repo(SPEC, temp_dir / "a")
+        b = generate_repo(SPEC, temp_dir / "b")
+        generate_repo(replace(SPEC, seed=7), temp_dir / "c")
+
+        assert _tree_digest(temp_dir / "a") == _tree_digest(temp_dir / "b")
+        assert _tree_digest(temp_dir / "a") != _tree_digest(temp_dir / "c")
+        assert a["targets"] == b["targets"]
+
+    @pytest.mark.parametrize("shape,depth", [("wide", 3), ("deep", 9)])
+    def test_layout(self, temp_dir, shape, depth):
+        """Quelldateien, große Datei, Blobs und versteckte Dateien wie angegeben."""
+        root = temp_dir / shape
+        manifest = generate_repo(replace(SPEC, shape=shape), root)
+
+        sources = list((root / "src").rglob("file_*"))
+        assert len(sources) == 120
+        assert max(len(p.relative_to(root).parts) for p in sources) == depth + 1
+        assert len(list((root / ".git").rglob("*"))) + len(list((root / ".venv").rglob("*"))) > 20
+        assert (root / manifest["targets"]["large"][0]["path"]).stat().st_size >= 1024 * 1024
+        assert b"\x00" in (root / manifest["targets"]["binary"][0]).read_bytes()
+
+    def test_reuse_and_safety(self, temp_dir):
+        """Vorhandenes Repo gleicher Spec wird wiederverwendet, fremde Verzeichnisse nie gelöscht."""
+        root = temp_dir / "repo"
+        generate_repo(SPEC, root)
+        marker = root / "src" / "eigene.txt"
+        marker.write_text("bleibt")
+        generate_repo(SPEC, root)
+        assert marker.exists()
+
+        foreign = temp_dir / "fremd"
+        foreign.mkdir()
+        (foreign / "wichtig.txt").write_text("x")
+        with pytest.raises(ValueError):
+            generate_repo(SPEC, foreign)
+        assert (foreign / "wichtig.txt").exists()
+
+    def test_parse_scale(self):
+        assert parse_scale("10k") == 10_000
+        assert parse_scale("250") == 250
+
+
+@pytest.fixture(scope="module")
+def result(tmp_path_factory):
+    """Ein Suite-Lauf auf dem kleinen Repo (für alle Tests gemeinsam)."""
+    root = tmp_path_factory.mktemp("bench") / "repo"
+    manifest = generate_repo(SPEC, root)
+    before = _tree_digest(root)
+    result = run_suite(root, manifest, repeat=2)
+    assert _tree_digest(root) == before  # str_replace wurde zurückgesetzt, file_write aufgeräumt
+    return result
+
+
+class TestSuite:
+    """Tests für run_suite und compare."""
+
+    def test_all_tools_measured(self, result):
+        """Jedes Tool läuft fehlerfrei warm und kalt."""
+        tools = {entry["tool"] for entry in result["cases"].values()}
+        assert tools == {"file_read", "file_write", "file_list", "glob_search", "grep", "str_replace", "diff_preview"}
+        for name, entry in result["cases"].items():
+            assert "error" not in entry, name
+            assert entry["warm"]["runs"] == 2 and entry["cold"]["runs"] == 2
+            assert entry["warm"]["min_ms"] <= entry["warm"]["median_ms"] <= entry["warm"]["max_ms"]
+        assert result["cold_method"] in ("fadvise", "none")  # ohne Opt-in nie der Host-Cache
+        assert result["repo"]["name"] == SPEC.name
+
+    def test_compare_flags_regression(self, result):
+        """Langsamer als die Schwelle = Regression, kleine Unterschiede unter dem Rauschen nicht."""
+        baseline, slower = copy.deepcopy(result), copy.deepcopy(result)
+        slower["cases"]["grep.full_scan"]["warm"]["median_ms"] = baseline["cases"]["grep.full_scan"]["warm"]["median_ms"] * 2 + 5
+        baseline["cases"]["file_list.root"]["warm"]["median_ms"] = 0.3
+        slower["cases"]["file_list.root"]["warm"]["median_ms"] = 0.6  # +100%, aber nur 0.3 ms
+        del slower["cases"]["file_read.binary"]
+
+        rows = {(r["case"], r["variant"]): r for r in compare(baseline, slower, threshold=0.2, noise_ms=1.0)}
+        assert rows[("grep.full_scan", "warm")]["status"] == "regression"
+        assert rows[("grep.full_scan", "cold")]["status"] == "ok"
+        assert rows[("file_list.root", "warm")]["status"] == "ok"
+        assert rows[("file_read.binary", "warm")]["status"] == "missing"
+        assert "1 Regression(en)" in format_comparison(list(rows.values()), baseline, slower, 0.2)
@@ -0,0 +1,140 @@
+"""Tests für Zeitbudgets (deadline_ms) und Teilergebnisse."""
+
+import asyncio
+import time
+
+import pytest
+
+from code.utils.executor import DeadlineExceeded, check_cancelled, deadline_scope
+from code.utils.scheduler import AdmissionRejected, Scheduler
+from code.utils.walk import walk_sorted
+
+
+@pytest.fixture
+def flat_dir(temp_dir):
+    """Fünf Dateien mit je einem Treffer."""
+    for name in "abcde":
+        (temp_dir / f"{name}.txt").write_text("hit\n", encoding="utf-8")
+    return temp_dir
+
+
+def _expire_after(calls: int):
+    """check_cancelled-Ersatz, der beim n-ten Aufruf das Budget überschreitet."""
+    count = 0
+
+    def check():
+        nonlocal count
+        count += 1
+        if count >= calls:
+            raise DeadlineExceeded(100)
+
+    return check
+
+
+class TestDeadlineScope:
+    """Tests für deadline_scope und check_cancelled."""
+
+    def test_expired_deadline_raises(self):
+        """Abgelaufenes Budget führt zu DeadlineExceeded."""
+        with deadline_scope(1):
+            time.sleep(0.01)
+            with pytest.raises(DeadlineExceeded, match="1 ms"):
+                check_cancelled()
+        check_cancelled()  # außerhalb wieder ohne Budget
+
+
+class TestWalkCursor:
+    """Tests für den Cursor von walk_sorted."""
+
+    def test_resume_after_cursor(self, sample_project):
+        """Fortsetzen ab Cursor liefert genau den Rest."""
+        walked = [entry.path for entry, _ in walk_sorted(sample_project)]
+        for i in range(len(walked)):
+            cursor = tuple(walked[i][len(str(sample_project)) + 1:].split("/"))
+            rest = [entry.path for entry, _ in walk_sorted(sample_project, after=cursor)]
+            assert rest == walked[i + 1:]
+
+
+class TestPartialResults:
+    """Tests für als unvollständig markierte Teilergebnisse."""
+
+    def test_grep_partial_and_resume(self, flat_dir, monkeypatch):
+        """grep liefert bis zum Ablauf gefundene Treffer plus Cursor."""
+        from code.tools.search import _grep
+
+        monkeypatch.setattr("code.tools.search.cpu_executor", lambda: None)
+        monkeypatch.setattr("code.tools.search.check_cancelled", _expire_after(3))
+        result = _grep("hit", str(flat_dir), True, False, False, "*", 0, 50)
+
+        assert "a.txt" in result and "b.txt" in result
+        assert "c.txt" not in result
+        assert '[UNVOLLSTÄNDIG: Zeitbudget von 100 ms erreicht nach 2 Dateien - fortsetzen mit after="b.txt"]' in result
+
+        monkeypatch.undo()
+        resumed = _grep("hit", str(flat_dir), True, False, False, "*", 0, 50, after="b.txt")
+        assert "b.txt" not in resumed
+        assert "c.txt" in resumed and "e.txt" in resumed
+        assert "UNVOLLSTÄNDIG" not in resumed
+
+    def test_file_list_partial_and_resume(self, flat_dir, monkeypatch):
+        """file_list bricht mit Cursor auf den letzten Eintrag ab."""
+        from code.tools.filesystem import _file_list
+
+        monkeypatch.setattr("code.tools.filesystem.walk_sorted", _limited_walk(2))
+        result = _file_list(str(flat_dir), False, 3, False)
+        assert 'fortsetzen mit after="b.txt"' in result
+
+        monkeypatch.undo()
+        resumed = _file_list(str(flat_dir), False, 3, False, after="b.txt")
+        assert "b.txt" not in resumed and "c.txt" in resumed
+
+
+def _limited_walk(entries: int):
+    """walk_sorted, das nach n Einträgen das Budget überschreitet."""
+
+    def walk(*args, **kwargs):
+        for i, item in enumerate(walk_sorted(*args, **kwargs)):
+            if i == entries:
+                raise DeadlineExceeded(100)
+            yield item
+
+    return walk
+
+
+class TestDeadlineInWrapper:
+    """Tests für deadline_ms im Tool-Wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_schema_has_deadline_ms(self):
+        """Jedes Tool bietet deadline_ms an."""
+        from code.server import mcp
+
+        for tool in await mcp.list_tools():
+            assert "deadline_ms" in tool.inputSchema["properties"], tool.name
+
+    @pytest.mark.asyncio
+    async def test_unresponsive_tool_is_cut_off(self, monkeypatch):
+        """Tools ohne Abbruchpunkt werden nach Budget + Nachfrist beendet."""
+        from code.server import with_auto_log
+
+        monkeypatch.setattr("code.server.DEADLINE_GRACE_SECONDS", 0.05)
+
+        async def tool() -> str:
+            await asyncio.sleep(5)
+            return "ok"
+
+        start = time.perf_counter()
+        result = await with_auto_log("slow", tool, log=False)(deadline_ms=50)
+        assert result == "Fehler: Zeitbudget von 50 ms überschritten"
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.asyncio
+    async def test_admission_wait_capped(self):
+        """Das Budget begrenzt auch die Wartezeit im Scheduler."""
+        scheduler = Scheduler({"scan": {"limit": 1, "priority": 0, "timeout": 10.0}})
+        await scheduler.acquire("scan")
+
+        start = time.perf_counter()
+        with pytest.raises(AdmissionRejected):
+            await scheduler.acquire("scan", timeout=0.05)
+        assert time.perf_counter() - start < 1
@@ -0,0 +1,152 @@
+"""Tests für utils/executor.py, utils/walk.py und ausgelagerte Tools."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from code.utils.executor import (
+    OperationCancelled,
+    check_cancelled,
+    run_blocking,
+)
+from code.utils.walk import walk_sorted
+
+
+class TestRunBlocking:
+    """Tests für run_blocking."""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_thread(self):
+        """Arbeit läuft nicht im Event-Loop-Thread."""
+        name = await run_blocking(lambda: threading.current_thread().name)
+        assert name.startswith("tool-io")
+
+    @pytest.mark.asyncio
+    async def test_loop_not_blocked(self):
+        """Während blockierender Arbeit tickt der Event-Loop ohne Lücke weiter."""
+        ticks = []
+        done = False
+
+        async def ticker():
+            while not done:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await run_blocking(time.sleep, 0.5)
+        end = time.perf_counter()
+        done = True
+        await task
+
+        window = [t for t in ticks if start <= t <= end]
+        assert len(window) >= 10
+        gaps = [b - a for a, b in zip([start] + window, window + [end])]
+        assert max(gaps) < 0.2
+
+    @pytest.mark.asyncio
+    async def test_cancel_stops_work(self):
+        """Abbruch des Tasks stoppt die Arbeit am nächsten Abbruchpunkt."""
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def worker():
+            started.set()
+            try:
+                while True:
+                    check_cancelled()
+                    time.sleep(0.005)
+            except OperationCancelled:
+                stopped.set()
+
+        task = asyncio.create_task(run_blocking(worker))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert await asyncio.get_running_loop().run_in_executor(None, stopped.wait, 2.0)
+
+    def test_check_outside_is_noop(self):
+        """Außerhalb von run_blocking passiert nichts."""
+        check_cancelled()
+
+
+class TestWalkSorted:
+    """Tests für walk_sorted."""
+
+    @pytest.fixture
+    def tree(self, temp_dir):
+        for rel in ["b/z.txt", "b/a/deep/x.txt", "a.txt", "c/d.txt", ".hidden/secret.txt"]:
+            path = temp_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x")
+        return temp_dir
+
+    def test_order_matches_sorted_rglob(self, tree):
+        """Reihenfolge entspricht sorted(rglob('*'))."""
+        expected = [
+            p for p in sorted(tree.rglob("*"))
+            if not any(part.startswith(".") for part in p.relative_to(tree).parts)
+        ]
+        walked = [entry.path for entry, _ in walk_sorted(tree)]
+        assert walked == [str(p) for p in expected]
+
+    def test_max_depth_prunes(self, tree):
+        """Unterhalb von max_depth wird nicht gelesen."""
+        depths = {depth for _, depth in walk_sorted(tree, max_depth=2)}
+        assert depths == {1, 2}
+
+    def test_hidden(self, tree):
+        """Versteckte Verzeichnisse nur mit show_hidden."""
+        names = {entry.name for entry, _ in walk_sorted(tree)}
+        assert "secret.txt" not in names
+        names = {entry.name for entry, _ in walk_sorted(tree, show_hidden=True)}
+        assert "secret.txt" in names
+
+    @pytest.mark.asyncio
+    async def test_hidden_relative_to_root(self, temp_dir):
+        """Versteckt zählt nur unterhalb von root: grep und file_list unter ~/.config/... finden alles."""
+        from code.tools.filesystem import file_list
+        from code.tools.search import grep
+
+        root = temp_dir / ".config" / "proj"
+        (root / "src").mkdir(parents=True)
+        (root / "src" / "m.py").write_text("needle\n")
+        (root / ".git").mkdir()
+        (root / ".git" / "HEAD").write_text("needle\n")
+
+        assert [entry.name for entry, _ in walk_sorted(root)] == ["src", "m.py"]
+        found = await grep(pattern="needle", path=str(root))
+        assert "m.py" in found and "HEAD" not in found
+        listing = await file_list(path=str(root), recursive=True)
+        assert "m.py" in listing and "HEAD" not in listing
+        assert "HEAD" in await file_list(path=str(root), recursive=True, show_hidden=True)
+
+
+class TestGrepProcessPool:
+    """grep mit optionalem Prozess-Pool."""
+
+    @pytest.mark.asyncio
+    async def test_grep_with_process_pool(self, temp_dir, monkeypatch):
+        """Ergebnisse wie ohne Pool, in sortierter Reihenfolge."""
+        from code.tools.search import grep
+        from code.utils import executor
+
+        for i in range(150):
+            (temp_dir / f"f{i:03d}.txt").write_text(f"line\nneedle {i}\n")
+
+        without_pool = await grep(pattern="needle", path=str(temp_dir), max_results=200)
+
+        monkeypatch.setattr(executor, "SEARCH_PROCESS_WORKERS", 2)
+        monkeypatch.setattr("code.tools.search.SEARCH_PROCESS_WORKERS", 2)
+        try:
+            with_pool = await grep(pattern="needle", path=str(temp_dir), max_results=200)
+        finally:
+            executor.shutdown_executors()
+
+        assert "150 in 150 Dateien" in with_pool
+        assert with_pool == without_pool
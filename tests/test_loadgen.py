@@ -0,0 +1,81 @@
+"""Tests für utils/loadgen.py und den Event-Loop-Lag."""
+
+import asyncio
+import random
+
+import pytest
+
+from code.utils.benchmark import RepoSpec, generate_repo
+from code.utils.loadgen import MIXES, RequestFactory, parse_mix, run_load
+from code.utils.metrics import LoopLagMonitor, MetricsRegistry
+
+SPEC = RepoSpec(files=60, large_files=0, binary_blobs=1, ignored_files=4)
+
+
+class TestRequests:
+    """Tests für Mischungen und Parameter."""
+
+    def test_parse_mix(self):
+        """Vordefinierte Mischungen und eigene Gewichte; unbekannte Tools abgelehnt."""
+        assert parse_mix("read") == MIXES["read"]
+        assert parse_mix("grep=3,file_read") == {"grep": 3, "file_read": 1}
+        with pytest.raises(ValueError):
+            parse_mix("rm_rf=1")
+
+    def test_factory_reproducible(self, temp_dir):
+        """Gleicher Seed = gleiche Parameter; Pfade liegen im Projekt, nicht in versteckten Verzeichnissen."""
+        generate_repo(SPEC, temp_dir / "repo")
+        factory = RequestFactory(temp_dir / "repo")
+
+        def draw(seed):
+            rng = random.Random(seed)
+            return [factory.make(tool, rng) for tool in RequestFactory.TOOLS]
+
+        assert draw(1) == draw(1)
+        paths = [p["path"] for p in draw(1) if "path" in p]
+        assert paths and all(p.startswith(str(temp_dir / "repo")) and "/." not in p for p in paths)
+        edit = draw(1)[RequestFactory.TOOLS.index("str_replace")]
+        assert edit["old_str"] == edit["new_str"]
+
+
+class TestLoopLag:
+    """Tests für LoopLagMonitor."""
+
+    @pytest.mark.asyncio
+    async def test_measures_blocking_and_stops_when_idle(self):
+        """Blockierender Code im Loop erscheint als Lag; ohne Aktivität endet die Messung."""
+        import time
+
+        registry = MetricsRegistry()
+        monitor = LoopLagMonitor(registry, interval=0.01, idle=0.1)
+        monitor.touch()
+        await asyncio.sleep(0.02)
+        time.sleep(0.05)  # blockiert den Loop
+        await asyncio.sleep(0.02)
+
+        lag = registry.snapshot()["loop_lag_us"]
+        assert lag["max"] >= 30_000
+        await asyncio.sleep(0.2)
+        assert monitor._task.done()
+        registry.record_call("cwd", 0.001, 0.0, 0, 1)
+        assert "Event-Loop-Lag" in registry.format_table()
+
+
+class TestLoad:
+    """Last gegen einen echten Server über stdio."""
+
+    def test_run_with_cancellations(self):
+        """Alle Anfragen werden beantwortet oder bestätigt abgebrochen; der Server überlebt."""
+        report = run_load(
+            {"file_read": 3, "grep": 1, "shell_exec": 1}, spec=SPEC,
+            concurrency=4, requests=80, cancel_rate=0.5, cancel_after_ms=5, timeout=30,
+        )
+        cancels = report["cancellations"]
+        assert report["calls"] + cancels["confirmed"] == 80
+        assert report["errors"] == 0
+        assert cancels["sent"] == cancels["confirmed"] + cancels["completed_first"] > 0
+        assert sum(t["cancelled"] for t in report["tools"].values()) == cancels["confirmed"]
+        assert set(report["tools"]) <= {"file_read", "grep", "shell_exec"}
+        assert report["ping_us"]["count"] > 0 and report["ping_idle_us"]["count"] == 20
+        assert report["server_loop_lag_us"]["count"] > 0
+        assert report["tools"]["file_read"]["server_exec_p95"] is not None
@@ -0,0 +1,55 @@
+"""Tests für utils/mcp_compat.py (Abbruch-Races im MCP-SDK)."""
+
+from code.utils.benchmark import RepoSpec, generate_repo
+from code.utils.mcp_compat import patch_request_cancellation
+
+SPEC = RepoSpec(files=20, large_files=0, binary_blobs=0, ignored_files=0)
+
+
+class TestPatch:
+    """Tests für patch_request_cancellation."""
+
+    def test_skips_unknown_sdk(self):
+        """Ohne _entered/_completed bleiben cancel() und respond() unverändert."""
+
+        class Responder:
+            def __init__(self):
+                self._done = False
+
+            @property
+            def cancelled(self):
+                return False
+
+            async def cancel(self):
+                pass
+
+            async def respond(self, response):
+                pass
+
+        cancel, respond = Responder.cancel, Responder.respond
+        assert patch_request_cancellation(Responder) is False
+        assert Responder.cancel is cancel and Responder.respond is respond
+
+    def test_immediate_cancel_keeps_server_alive(self, temp_dir):
+        """Abbrüche direkt nach dem Senden (vor bzw. nach dem Handler) beenden den Server nicht."""
+        from code.utils.mcp_client import McpClientError, StdioClient
+        from code.utils.replay import Sandbox
+
+        generate_repo(SPEC, temp_dir / "repo")
+        sandbox = Sandbox(temp_dir / "repo", copy=False)
+        client = StdioClient(env=sandbox.env(), cwd=sandbox.project)
+        try:
+            client.initialize()
+            path = str(sandbox.project / ".bench-repo.json")
+            for _ in range(40):
+                request_id, pending = client.send_request("tools/call", {"name": "file_read", "arguments": {"path": path}})
+                client.cancel(request_id)
+                try:
+                    client.wait(pending, 10)
+                except McpClientError as e:
+                    assert e.code == 0  # bestätigter Abbruch
+            client.ping(timeout=10)
+        finally:
+            client.close()
+            sandbox.cleanup()
+        assert client.process.returncode == 0
@@ -0,0 +1,137 @@
+"""Tests für utils/metrics.py und /stats."""
+
+import json
+
+import pytest
+
+from code.utils.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    """Tests für Histogram."""
+
+    def test_empty(self):
+        """Leeres Histogramm liefert None."""
+        assert Histogram().percentile(50) is None
+
+    def test_small_values_exact(self):
+        """Kleine Werte werden exakt gezählt."""
+        h = Histogram()
+        for v in range(1, 11):
+            h.record(v)
+        assert h.percentile(50) == 5
+        assert h.percentile(100) == 10
+        assert h.min == 1
+
+    def test_relative_error(self):
+        """Perzentile großer Werte liegen innerhalb der Bucket-Auflösung."""
+        h = Histogram()
+        for v in range(1, 100_001):
+            h.record(v * 10)
+        for p, expected in ((50, 500_000), (95, 950_000), (99, 990_000)):
+            assert abs(h.percentile(p) - expected) / expected < 0.07
+
+    def test_buckets_are_sparse(self):
+        """Nur belegte Buckets werden gespeichert."""
+        h = Histogram()
+        for _ in range(1000):
+            h.record(1234)
+        assert len(h.counts) == 1
+        assert h.percentile(99) == 1234
+
+
+class TestMetricsRegistry:
+    """Tests für MetricsRegistry."""
+
+    def test_record_and_snapshot(self):
+        """Aufrufe, Fehler und Phasen landen im Snapshot."""
+        registry = MetricsRegistry()
+        registry.record_call("grep", 0.010, 0.001, 20, 500)
+        registry.record_call("grep", 0.020, 0.0, 20, 0, "error")
+        registry.record_log("grep", 0.002)
+
+        stats = registry.snapshot()["tools"]["grep"]
+        assert stats["calls"] == 2
+        assert stats["errors"] == 1
+        assert stats["exec_us"]["max"] == 20_000
+        assert stats["log_us"]["count"] == 1
+        json.dumps(registry.snapshot())
+
+    def test_table(self):
+        """Tabelle enthält Tool und Perzentile."""
+        registry = MetricsRegistry()
+        assert "Noch keine" in registry.format_table()
+        registry.record_call("file_read", 0.005, 0.0, 10, 1000)
+        table = registry.format_table()
+        assert "| file_read | 1 | 0 | 5.0 |" in table
+
+
+class TestInstrumentation:
+    """Tests für die Messung im Tool-Wrapper."""
+
+    @pytest.fixture
+    def registry(self, monkeypatch):
+        registry = MetricsRegistry()
+        monkeypatch.setattr("code.server.metrics", registry)
+        return registry
+
+    @pytest.mark.asyncio
+    async def test_wrapper_records_queue_and_bytes(self, registry):
+        """Wrapper misst Laufzeit, Worker-Wartezeit und Größen."""
+        from code.server import with_auto_log
+        from code.utils.executor import run_blocking
+
+        async def tool(text: str) -> str:
+            return await run_blocking(str.upper, text)
+
+        wrapped = with_auto_log("upper", tool, log=False)
+        assert await wrapped(text="abc") == "ABC"
+
+        stats = registry.snapshot()["tools"]["upper"]
+        assert stats["calls"] == 1
+        assert stats["bytes_in"]["max"] == 3
+        assert stats["bytes_out"]["max"] == 3
+        assert stats["queue_us"]["count"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("result,error", [
+        ("Fehler: kaputt", True),
+        ("💻 $ sleep 9\n\nFehler: Timeout nach 1s - Prozess wurde beendet", True),
+        ("💻 $ rm -rf /\n\n❌ Blocked: Gefährliches Pattern erkannt (rm)", True),
+        ("💻 $ false\n\n[Exit Code: 1]", False),
+        ("💻 $ echo Fehler\n\nFehler", False),
+    ])
+    async def test_error_result_counted(self, registry, monkeypatch, result, error):
+        """Fehler-Ergebnisse (auch von shell_exec) zählen in Metrik und Session-Log gleich."""
+        from code.server import with_auto_log
+
+        logged = []
+
+        async def submit_async(func, tool_name, params, result_str, success, *args):
+            logged.append(success)
+
+        monkeypatch.setattr("code.server.log_writer.submit_async", submit_async)
+
+        async def tool() -> str:
+            return result
+
+        await with_auto_log("broken", tool)()
+        assert registry.snapshot()["tools"]["broken"]["errors"] == int(error)
+        assert logged == [not error]
+
+    @pytest.mark.asyncio
+    async def test_stats_command(self, monkeypatch):
+        """/stats zeigt Tabelle, JSON und setzt zurück."""
+        from code.tools.commands import command
+
+        registry = MetricsRegistry()
+        monkeypatch.setattr("code.tools.commands.metrics", registry)
+        registry.record_call("cwd", 0.001, 0.0, 0, 10)
+
+        assert "| cwd |" in await command(cmd="stats")
+        assert "Log-Queue:" in await command(cmd="stats")
+        exported = json.loads(await command(cmd="stats", arg="json"))
+        assert "cwd" in exported["tools"]
+        assert set(exported["log_writer"]) == {"pending", "throttled"}
+        await command(cmd="stats", arg="reset")
+        assert "Noch keine" in await command(cmd="stats")
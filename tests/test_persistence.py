@@ -1,6 +1,10 @@
 """Tests für persistence/."""
 
 import json
+import shutil
+import subprocess
+import sys
+
 import pytest
 from pathlib import Path
 
@@ -9,6 +13,7 @@ from code.persistence.models import (
     ToolCall,
     SessionData,
 )
+from code.persistence.digest import compact_params
 from code.persistence.session_manager import SessionManager
 
 
@@ -43,7 +48,7 @@ class TestSessionData:
         
         assert session.project_name == "testproject"
         assert session.memories == []
-        assert session.tool_log == []
+        assert len(session.tool_log) == 0
     
     def test_add_memory(self):
         """Fügt Memory-Eintrag hinzu."""
@@ -97,6 +102,49 @@ class TestSessionData:
         assert session.tool_log[-1].tool == "tool_149"
 
 
+class TestToolLogDigest:
+    """Tests für kompakte Tool-Log-Einträge."""
+
+    def test_file_content_digested(self):
+        """Dateiinhalte werden nie komplett geloggt."""
+        session = SessionData(project_path="/test", project_name="test", working_dir="/test")
+        session.log_tool_call("file_write", {"path": "a.py", "content": "print(1)\n"})
+
+        params = session.tool_log[0].params
+        assert params["path"] == "a.py"
+        assert params["content"]["size"] == 9
+        assert params["content"]["prefix"] == "print(1)\n"
+        assert len(params["content"]["sha256"]) == 16
+
+    def test_large_values_digested(self):
+        """Ohne Regel: kleine Werte bleiben, große werden zum Digest."""
+        big = "x" * 10_000
+        params = compact_params("shell_exec", {"command": big, "timeout": 5, "working_dir": "/tmp"})
+
+        assert params["timeout"] == 5 and params["working_dir"] == "/tmp"
+        assert params["command"]["size"] == 10_000
+        assert params["command"]["sha256"] == compact_params("grep", {"pattern": big})["pattern"]["sha256"]
+
+    def test_redact_rule(self, monkeypatch):
+        """redact: nur die Größe bleibt übrig."""
+        monkeypatch.setitem(sys.modules["code.persistence.digest"].TOOL_LOG_PARAM_RULES,
+                            "shell_exec", {"command": "redact"})
+        params = compact_params("shell_exec", {"command": "export TOKEN=geheim"})
+        assert params["command"] == {"redacted": True, "size": 19}
+
+    def test_loaded_log_bounded(self):
+        """Auch ein zu langes gespeichertes Log wird auf das Limit gekürzt."""
+        calls = [{"tool": f"tool_{i}", "params": {}} for i in range(150)]
+        session = SessionData.model_validate(
+            {"project_path": "/t", "project_name": "t", "working_dir": "/t", "tool_log": calls}
+        )
+
+        assert len(session.tool_log) == 100
+        session.log_tool_call("neu", {})
+        assert len(session.tool_log) == 100
+        assert session.tool_log[0].tool == "tool_51"
+
+
 class TestSessionManager:
     """Tests für SessionManager."""
     
@@ -173,3 +221,335 @@ class TestSessionManager:
         assert "## Entscheidungen" in content
         assert "## Nächste Schritte" in content
         assert "- [ ] A todo item" in content  # Checkbox für TODOs
+
+
+class TestSessionJournal:
+    """Tests für Snapshot + Journal."""
+
+    @pytest.fixture
+    def manager(self, temp_dir):
+        """SessionManager mit aktiver Session im temp Verzeichnis."""
+        manager = SessionManager(base_dir=temp_dir)
+        manager.init_session(temp_dir / "proj")
+        manager.save_session()
+        return manager
+
+    def test_tool_calls_append_only(self, manager):
+        """Tool-Aufrufe schreiben nur ins Journal, nicht den Snapshot."""
+        session_file = manager._session_file("proj")
+        snapshot = session_file.read_bytes()
+
+        for i in range(5):
+            manager.log_tool_call(f"tool_{i}", {"i": i})
+        manager.flush()
+
+        assert session_file.read_bytes() == snapshot
+        lines = manager._journal_file("proj").read_text().splitlines()
+        assert [json.loads(line)["op"] for line in lines] == ["tool"] * 5
+
+    def test_load_replays_journal(self, manager):
+        """Laden = Snapshot + Journal."""
+        manager.add_memory("erste")
+        manager.log_tool_call("grep", {"pattern": "x"})
+        manager.clear_memories()
+        manager.add_memory("zweite", category="todo")
+
+        loaded = manager.load_session("proj")
+        assert [m.content for m in loaded.memories] == ["zweite"]
+        assert loaded.tool_log[-1].tool == "grep"
+        assert loaded.journal_marks == manager.current_session.journal_marks
+
+    def test_compaction(self, manager, monkeypatch):
+        """Großes Journal wird in einen neuen Snapshot übernommen."""
+        # Modul per sys.modules - das Paket-Attribut ist die Instanz
+        module = sys.modules["code.persistence.session_manager"]
+        monkeypatch.setattr(module, "JOURNAL_COMPACT_BYTES", 1000)
+        for i in range(20):
+            manager.log_tool_call("file_read", {"path": f"datei_{i}.py"})
+
+        journal = manager._journal_file("proj")
+        assert not journal.exists() or journal.stat().st_size < 1000
+        loaded = manager.load_session("proj")
+        assert len(loaded.tool_log) == 20
+
+    def test_already_compacted_events_skipped(self, manager):
+        """Events, die schon im Snapshot stecken, werden nicht doppelt eingespielt."""
+        manager.add_memory("einmal")
+        manager.flush()
+        journal = manager._journal_file("proj").read_text()
+        manager.save_session()  # Snapshot enthält die Memory, Journal geleert
+
+        # Absturz zwischen Snapshot und Kürzen simulieren, dazu halbe Zeile
+        manager._journal_file("proj").write_text(journal + '{"seq": 99, "op"')
+
+        loaded = manager.load_session("proj")
+        assert [m.content for m in loaded.memories] == ["einmal"]
+
+    def test_events_buffered_until_flush(self, manager):
+        """Events landen gebündelt mit einem Schreibvorgang im Journal."""
+        journal = manager._journal_file("proj")
+        for i in range(10):
+            manager.log_tool_call(f"tool_{i}", {"i": i})
+        assert not journal.exists()
+
+        assert manager.flush()
+        assert len(journal.read_text().splitlines()) == 10
+        assert manager._pending == []
+
+    def test_close_writes_pending(self, manager, temp_dir):
+        """close() (Verbindungsende, Shutdown) schreibt den Puffer."""
+        manager.log_tool_call("grep", {})
+        manager.close()
+
+        loaded = SessionManager(base_dir=temp_dir).load_session("proj")
+        assert loaded.tool_log[-1].tool == "grep"
+
+    def test_list_sessions_sees_journal(self, manager):
+        """list_sessions zählt auch Memories aus dem Journal."""
+        manager.add_memory("neu")
+        assert manager.list_sessions()[0]["memories"] == 1
+
+
+class TestConcurrentWriters:
+    """Tests für mehrere Prozesse/Manager auf derselben Session."""
+
+    @pytest.fixture
+    def managers(self, temp_dir):
+        """Zwei Manager (eigene Writer-IDs) auf demselben Projekt."""
+        first = SessionManager(base_dir=temp_dir)
+        first.init_session(temp_dir / "proj")
+        first.save_session()
+        second = SessionManager(base_dir=temp_dir)
+        second.init_session(temp_dir / "proj")
+        return first, second
+
+    def test_no_lost_memories(self, managers, temp_dir):
+        """Der zweite Snapshot übernimmt die Memories des ersten."""
+        first, second = managers
+        first.add_memory("von A")
+        first.save_session(summary="A")
+        second.add_memory("von B")
+        second.save_session(summary="B")
+
+        loaded = SessionManager(base_dir=temp_dir).load_session("proj")
+        assert sorted(m.content for m in loaded.memories) == ["von A", "von B"]
+        assert loaded.summary == "B"
+        assert second.current_session.version == loaded.version == 3
+
+    def test_interleaved_journal_and_compaction(self, managers, temp_dir):
+        """Events beider Writer im Journal, Snapshot dazwischen - keine Duplikate."""
+        first, second = managers
+        first.add_memory("A1")
+        first.log_tool_call("grep", {})
+        first.flush()
+        second.add_memory("B1")
+        second.flush()
+        first.save_session()  # kompaktiert inkl. B1
+        second.add_memory("B2")
+        second.save_session()
+
+        loaded = SessionManager(base_dir=temp_dir).load_session("proj")
+        assert sorted(m.content for m in loaded.memories) == ["A1", "B1", "B2"]
+        assert [c.tool for c in loaded.tool_log] == ["grep"]
+        assert sorted(m.content for m in second.current_session.memories) == ["A1", "B1", "B2"]
+
+    def test_clear_from_other_process(self, managers, temp_dir):
+        """Ein clear_memories des anderen Prozesses wird nicht rückgängig gemacht."""
+        first, second = managers
+        first.add_memory("alt")
+        first.save_session()
+        second.clear_memories()
+        second.flush()
+        first.add_memory("neu")
+        first.save_session()
+
+        loaded = SessionManager(base_dir=temp_dir).load_session("proj")
+        assert [m.content for m in loaded.memories] == ["neu"]
+
+    def test_processes(self, temp_dir):
+        """Zwei echte Prozesse schreiben parallel, nichts geht verloren."""
+        script = (
+            "import sys; from pathlib import Path\n"
+            "from code.persistence.session_manager import SessionManager\n"
+            "base, tag = Path(sys.argv[1]), sys.argv[2]\n"
+            "m = SessionManager(base_dir=base)\n"
+            "m.init_session(base / 'proj')\n"
+            "for i in range(40):\n"
+            "    m.add_memory(f'{tag}{i}')\n"
+            "    m.log_tool_call('grep', {'i': i})\n"
+            "    if i % 7 == 0: m.save_session(summary=tag)\n"
+            "    elif i % 3 == 0: m.flush()\n"
+            "m.close()\n"
+        )
+        root = Path(__file__).parent.parent
+        procs = [
+            subprocess.Popen([sys.executable, "-c", script, str(temp_dir), tag], cwd=root)
+            for tag in ("a", "b")
+        ]
+        assert [p.wait(timeout=60) for p in procs] == [0, 0]
+
+        loaded = SessionManager(base_dir=temp_dir).load_session("proj")
+        contents = [m.content for m in loaded.memories]
+        assert sorted(contents) == sorted(f"{tag}{i}" for tag in "ab" for i in range(40))
+        project_dir = temp_dir / "sessions" / "proj"
+        assert [p.name for p in project_dir.iterdir() if p.name.endswith(".tmp")] == []
+
+
+class TestMemoryMarkdown:
+    """Tests für das verzögerte Schreiben von memory.md."""
+
+    @pytest.fixture
+    def manager(self, temp_dir):
+        """SessionManager mit gespeicherter Session und Zähler für memory.md."""
+        manager = SessionManager(base_dir=temp_dir)
+        manager.init_session(temp_dir / "proj")
+        manager.save_session(summary="Start")
+        manager.renders = 0
+        original = manager._write_memory_markdown
+
+        def counting():
+            manager.renders += 1
+            original()
+
+        manager._write_memory_markdown = counting
+        return manager
+
+    def test_tool_calls_do_not_render(self, manager):
+        """Tool-Aufrufe ändern memory.md nicht."""
+        for i in range(20):
+            manager.log_tool_call(f"tool_{i}", {})
+        manager.flush()
+        manager.save_session()
+
+        assert manager.renders == 0
+
+    def test_memory_rendered_on_flush(self, manager, monkeypatch):
+        """Neue Memories erscheinen beim nächsten flush(), einmal für alle."""
+        from code.utils.background import PeriodicFlusher
+        # Kein Timer-Flush während des Tests
+        monkeypatch.setattr(sys.modules["code.persistence.session_manager"], "session_flusher",
+                            PeriodicFlusher(interval=3600))
+        memory_file = manager._memory_file("proj")
+        manager.add_memory("erste")
+        manager.add_memory("zweite")
+        assert "erste" not in memory_file.read_text()
+
+        manager.flush()
+        content = memory_file.read_text()
+        assert "erste" in content and "zweite" in content
+        assert manager.renders == 1
+        assert [p.name for p in memory_file.parent.iterdir() if p.name.endswith(".tmp")] == []
+
+    def test_summary_change_rendered_on_save(self, manager):
+        """Neue Zusammenfassung: memory.md direkt bei save_session."""
+        manager.save_session(summary="Start")
+        assert manager.renders == 0
+
+        manager.save_session(summary="Neuer Stand")
+        assert manager.renders == 1
+        assert "Neuer Stand" in manager._memory_file("proj").read_text()
+
+
+class TestSessionManifest:
+    """Tests für das Manifest hinter list_sessions()."""
+
+    @pytest.fixture
+    def manager(self, temp_dir):
+        """SessionManager mit zwei gespeicherten Projekten."""
+        manager = SessionManager(base_dir=temp_dir)
+        for name in ["alt", "neu"]:
+            manager.init_session(temp_dir / name)
+            manager.save_session(summary=f"Projekt {name}")
+        return manager
+
+    def test_unchanged_sessions_not_parsed(self, manager, monkeypatch):
+        """Bei passenden mtimes liest list_sessions keine session.json."""
+        expected = manager.list_sessions()
+        assert manager._manifest_file().exists()
+
+        monkeypatch.setattr(manager, "_read_session_info", lambda project_dir: pytest.fail("geparst"))
+        assert manager.list_sessions() == expected
+        assert [s["name"] for s in expected] == ["neu", "alt"]
+
+    def test_updated_on_save(self, manager, monkeypatch):
+        """Speichern und Memories aktualisieren den Eintrag direkt."""
+        manager.list_sessions()
+        manager.add_memory("Notiz")
+        manager.save_session(summary="Neuer Stand")
+
+        monkeypatch.setattr(manager, "_read_session_info", lambda project_dir: pytest.fail("geparst"))
+        entry = next(s for s in manager.list_sessions() if s["name"] == "neu")
+        assert entry["summary"] == "Neuer Stand"
+        assert entry["memories"] == 1
+
+    def test_external_changes_detected(self, manager, temp_dir):
+        """Änderungen anderer Prozesse und neue/gelöschte Projekte fallen auf."""
+        manager.list_sessions()
+
+        other = SessionManager(base_dir=temp_dir)
+        other.init_session(temp_dir / "alt")
+        other.add_memory("von außen")
+        other.init_session(temp_dir / "drittes")
+        other.save_session()
+        shutil.rmtree(manager._project_dir("neu"))
+
+        sessions = {s["name"]: s for s in manager.list_sessions()}
+        assert set(sessions) == {"alt", "drittes"}
+        assert sessions["alt"]["memories"] == 1
+
+    def test_concurrent_updates_not_lost(self, manager, temp_dir, monkeypatch):
+        """Zwei Prozesse, die gleichzeitig eintragen, verlieren keine Einträge (flock)."""
+        import threading
+
+        manager.list_sessions()
+        other = SessionManager(base_dir=temp_dir)
+        other.init_session(temp_dir / "drittes")
+        manager.init_session(temp_dir / "viertes")
+        other_done = threading.Event()
+        thread = threading.Thread(target=lambda: (other.save_session(), other_done.set()))
+        write = manager._write_manifest
+
+        def interleaved(manifest):
+            # Der andere Prozess will zwischen unserem Lesen und Schreiben eintragen
+            monkeypatch.setattr(manager, "_write_manifest", write)
+            thread.start()
+            other_done.wait(0.3)
+            write(manifest)
+
+        monkeypatch.setattr(manager, "_write_manifest", interleaved)
+        manager.save_session()
+        thread.join(5)
+
+        entries = json.loads(manager._manifest_file().read_text())["entries"]
+        assert {"drittes", "viertes"} <= set(entries)
+
+    def test_corrupt_manifest_rebuilt(self, manager):
+        """Ein kaputtes Manifest wird neu aufgebaut."""
+        manager._manifest_file().write_text('{"version": 1, "entr')
+
+        assert {s["name"] for s in manager.list_sessions()} == {"alt", "neu"}
+        manifest = json.loads(manager._manifest_file().read_text())
+        assert set(manifest["entries"]) == {"alt", "neu"}
+
+
+class TestSessionScope:
+    """Tests für den SessionManager pro Verbindung."""
+
+    def test_proxy_and_background_writer(self, temp_dir):
+        """Proxy und Hintergrund-Writer nutzen den Manager des Aufrufers."""
+        from code.persistence import session_manager, session_scope
+        from code.utils.background import BackgroundWriter
+
+        manager = SessionManager(base_dir=temp_dir)
+        writer = BackgroundWriter("test-writer")
+        seen = []
+
+        with session_scope(manager):
+            session_manager.init_session(temp_dir / "proj")
+            writer.submit(lambda: seen.append(session_manager.current_project))
+            assert session_manager.current_project == "proj"
+        writer.close()
+
+        assert seen == ["proj"]
+        assert manager.current_project == "proj"
+        assert session_manager.current_project != "proj"
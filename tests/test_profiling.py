@@ -0,0 +1,95 @@
+"""Tests für utils/profiling.py und /profile."""
+
+import pstats
+import tracemalloc
+
+import pytest
+
+from code.utils.profiling import ToolProfiler
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+@pytest.fixture
+def tool_profiler(temp_dir, monkeypatch):
+    """Profiler mit Ausgabe ins temp Verzeichnis, auch für Wrapper und /profile."""
+    tool_profiler = ToolProfiler(output_dir=temp_dir / "profiles")
+    monkeypatch.setattr("code.server.profiler", tool_profiler)
+    monkeypatch.setattr("code.tools.commands.profiler", tool_profiler)
+    return tool_profiler
+
+
+class TestToolProfiler:
+    """Tests für ToolProfiler."""
+
+    def test_disabled_by_default(self, tool_profiler):
+        """Ohne /profile on wird nichts profiliert."""
+        assert tool_profiler.begin("grep") is None
+
+    def test_tool_filter(self, tool_profiler):
+        """Nur ausgewählte Tools werden profiliert."""
+        tool_profiler.enable({"grep"})
+        assert tool_profiler.begin("file_read") is None
+
+        profile = tool_profiler.begin("grep")
+        assert profile is not None
+        profile.finish()
+
+
+class TestProfiledToolCall:
+    """Tests für profilierte Tool-Aufrufe im Wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_worker_thread_profiled(self, tool_profiler, temp_dir):
+        """Arbeit in run_blocking landet im pstats-File und im Inline-Report."""
+        from code.server import with_auto_log
+        from code.utils.executor import run_blocking
+
+        async def tool() -> str:
+            return str(await run_blocking(_busy, 20000))
+
+        tool_profiler.enable()
+        result = await with_auto_log("busy", tool, log=False)()
+
+        assert "[Profil: busy |" in result
+        assert "test_profiling.py" in result
+
+        files = list((temp_dir / "profiles").glob("*-busy.pstats"))
+        assert len(files) == 1
+        stats = pstats.Stats(str(files[0]))
+        assert any(name == "_busy" for _, _, name in stats.stats)
+
+    @pytest.mark.asyncio
+    async def test_memory_report(self, tool_profiler):
+        """Mit mem werden Allokationen berichtet und tracemalloc wieder gestoppt."""
+        from code.server import with_auto_log
+
+        async def tool() -> str:
+            tool.keep = [bytearray(1024) for _ in range(100)]
+            return "ok"
+
+        tool_profiler.enable(memory=True)
+        result = await with_auto_log("alloc", tool, log=False)()
+
+        assert "[Speicher:" in result
+        assert "test_profiling.py" in result
+        assert not tracemalloc.is_tracing()
+
+
+class TestProfileCommand:
+    """Tests für /profile."""
+
+    @pytest.mark.asyncio
+    async def test_on_off(self, tool_profiler):
+        """on mit Tools und mem, danach off."""
+        from code.tools.commands import command
+
+        result = await command(cmd="profile", arg="on grep,file_read mem")
+        assert "ON" in result
+        assert tool_profiler.tools == {"grep", "file_read"}
+        assert tool_profiler.memory is True
+
+        assert "OFF" in await command(cmd="profile", arg="off")
+        assert tool_profiler.enabled is False
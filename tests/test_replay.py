@@ -0,0 +1,111 @@
+"""Tests für utils/replay.py und utils/mcp_client.py."""
+
+import gzip
+import time
+
+import pytest
+
+from code.utils.replay import RecordedCall, Sandbox, load_calls, replay, run_paced, summarize
+from code.utils.transcript import TranscriptWriter
+
+
+@pytest.fixture
+def project(temp_dir):
+    """Kleines Projekt und ein Transcript mit Aufrufen darauf."""
+    project = temp_dir / "proj"
+    (project / "src").mkdir(parents=True)
+    for i in range(3):
+        (project / "src" / f"m{i}.py").write_text(f"def f():\n    return {i}\n")
+
+    writer = TranscriptWriter(temp_dir / "t.jsonl")
+    writer.append_call("grep", {"pattern": "return", "path": str(project / "src")}, "3 Treffer", True)
+    writer.append_call("command", {"cmd": "stats"}, "", True)
+    writer.append_call("file_read", {"path": str(project / "src" / "m1.py")}, "...", True)
+    writer.append_call("str_replace", {"path": str(project / "src" / "m2.py"),
+                                       "old_str": "return 2", "new_str": "return 20"}, "ok", True)
+    writer.append_call("file_read", {"path": "/gibt/es/nicht"}, "Fehler", False)
+    writer.close()
+    return project, writer.path
+
+
+class TestLoadCalls:
+    """Tests für load_calls und Sandbox."""
+
+    def test_extracts_tool_calls(self, project, temp_dir):
+        """Aufrufe mit Parametern, ohne Kommandos; auch aus archivierten .gz-Dateien."""
+        _, transcript = project
+        calls = load_calls(transcript)
+        assert [c.tool for c in calls] == ["grep", "file_read", "str_replace", "file_read"]
+        assert calls[0].offset == 0 and all(c.offset >= 0 for c in calls)
+
+        archived = temp_dir / "t.jsonl.gz"
+        archived.write_bytes(gzip.compress(transcript.read_bytes()))
+        (first,) = load_calls(archived, tools={"file_read"}, limit=1)
+        assert (first.tool, first.params) == ("file_read", calls[1].params)
+        assert first.offset == 0  # Offsets zählen ab dem ersten gewählten Aufruf
+
+    def test_sandbox_rewrites_paths(self, project):
+        """Projektkopie mit eigenem HOME; Pfade zeigen auf die Kopie."""
+        source, _ = project
+        sandbox = Sandbox(source)
+        try:
+            params = sandbox.rewrite({"path": str(source / "src"), "paths": [str(source)], "n": 3})
+            assert params == {"path": str(sandbox.project / "src"), "paths": [str(sandbox.project)], "n": 3}
+            sibling = f"{source}2/src {source}.bak cd {source} && ls {source}/src"
+            assert sandbox.rewrite(sibling) == (
+                f"{source}2/src {source}.bak cd {sandbox.project} && ls {sandbox.project}/src"
+            )
+            assert (sandbox.project / "src" / "m1.py").exists()
+            assert sandbox.env()["HOME"] == str(sandbox.home)
+        finally:
+            sandbox.cleanup()
+        assert not sandbox.root.exists()
+
+
+class TestReplay:
+    """Tests für Pacing, Bericht und das Abspielen gegen einen Server."""
+
+    def test_recorded_speed_keeps_gaps(self):
+        """speed="recorded" wartet bis zum aufgezeichneten Zeitpunkt, "max" nicht."""
+        calls = [RecordedCall(0.0, "a", {}), RecordedCall(0.15, "b", {})]
+        _, wall = run_paced(calls, lambda tool, params: False, "recorded")
+        assert wall >= 0.15
+        _, wall = run_paced(calls, lambda tool, params: False, "max")
+        assert wall < 0.1
+
+    def test_summarize(self):
+        """Perzentile pro Tool, Fehler und Durchsatz."""
+        samples = [("grep", 1000 * i, i == 4) for i in range(1, 5)] + [("cwd", 50, False)]
+        report = summarize(samples, wall=2.0)
+        assert report["calls"] == 5 and report["errors"] == 1
+        assert report["throughput"] == 2.5
+        assert report["tools"]["grep"]["count"] == 4
+        assert report["tools"]["grep"]["errors"] == 1
+        assert report["tools"]["grep"]["p50"] == pytest.approx(2000, rel=0.04)  # Histogramm-Auflösung
+        assert report["tools"]["cwd"]["max"] == 50
+
+    @pytest.mark.parametrize("mode", ["stdio", "inprocess"])
+    def test_replay_against_fresh_server(self, project, mode):
+        """Aufrufe laufen gegen einen frischen Server in der Projektkopie."""
+        source, transcript = project
+        start = time.perf_counter()
+        report = replay(load_calls(transcript), source, mode=mode)
+
+        assert report["calls"] == 4
+        assert report["errors"] == 1  # die aufgezeichnete fehlgeschlagene Datei
+        assert set(report["tools"]) == {"grep", "file_read", "str_replace"}
+        assert report["tools"]["str_replace"]["errors"] == 0
+        assert report["server"]["peak_rss_kb"] > 0
+        assert report["wall_seconds"] < time.perf_counter() - start
+        assert "return 2\n" in (source / "src" / "m2.py").read_text()  # Original unverändert
+
+    def test_inprocess_failure_carries_log_tail(self, project, monkeypatch):
+        """Scheitert der Kindprozess, steht das Ende von server.log in der Meldung (Sandbox ist weg)."""
+        import tempfile
+
+        source, _ = project
+        monkeypatch.setattr(tempfile, "tempdir", str(source.parent))
+        before = set(source.parent.iterdir())
+        with pytest.raises(RuntimeError, match=r"(?s)Exit 1.*TimeoutError"):
+            replay([RecordedCall(0, "cwd", {})], source, mode="inprocess", timeout=0)
+        assert set(source.parent.iterdir()) == before  # Sandbox aufgeräumt
@@ -0,0 +1,138 @@
+"""Tests für utils/result_store.py und result_page."""
+
+import pytest
+
+from code.utils.result_store import ResultStore
+from code.utils.output import truncate_output
+
+
+@pytest.fixture
+def store(temp_dir, monkeypatch):
+    """Result-Store im temp Verzeichnis, auch für truncate_output/result_page."""
+    store = ResultStore(base_dir=temp_dir / "results")
+    monkeypatch.setattr("code.utils.output.result_store", store)
+    monkeypatch.setattr("code.tools.results.result_store", store)
+    return store
+
+
+class TestResultStore:
+    """Tests für ResultStore."""
+
+    def test_put_and_read_bytes(self, store):
+        """Speichert und liest Byte-Bereiche."""
+        handle = store.put("0123456789" * 10)
+
+        text, end, total = store.read_bytes(handle, 10, 20)
+        assert text == "01234567890123456789"
+        assert end == 30
+        assert total == 100
+
+    def test_read_lines(self, store):
+        """Liest Zeilenbereiche."""
+        handle = store.put("\n".join(f"line {i}" for i in range(1, 101)))
+
+        text, last, total = store.read_lines(handle, 10, 3)
+        assert text == "line 10\nline 11\nline 12\n"
+        assert last == 12
+        assert total == 100
+
+    def test_unknown_handle(self, store):
+        """Unbekannte oder ungültige Handles liefern None."""
+        assert store.read_bytes("000000000000", 0, 10) is None
+        assert store.read_bytes("../../etc/passwd", 0, 10) is None
+
+    def test_lru_eviction(self, temp_dir):
+        """Älteste, nicht genutzte Einträge werden verdrängt."""
+        store = ResultStore(base_dir=temp_dir / "lru", max_entries=2)
+        first = store.put("first")
+        second = store.put("second")
+        store.lookup(first)  # first wieder benutzt
+        store.put("third")
+
+        assert store.lookup(first) is not None
+        assert store.lookup(second) is None
+
+    def test_size_limit(self, temp_dir):
+        """Gesamtgröße wird eingehalten."""
+        store = ResultStore(base_dir=temp_dir / "size", max_bytes=25)
+        store.put("x" * 10)
+        store.put("y" * 10)
+        store.put("z" * 10)
+
+        files = list((temp_dir / "size").glob("*.txt"))
+        assert len(files) == 2
+
+    def test_larger_than_budget_rejected(self, temp_dir):
+        """Eine Ausgabe über dem Budget bekommt kein (sofort verdrängtes) Handle."""
+        store = ResultStore(base_dir=temp_dir / "big", max_bytes=25)
+        kept = store.put("x" * 10)
+        with pytest.raises(ValueError):
+            store.put("y" * 30)
+        assert store.lookup(kept) is not None
+
+    def test_evicted_between_lookup_and_read(self, store, monkeypatch):
+        """Verdrängt ein paralleles put() die Datei nach lookup(), gilt das Handle als abgelaufen."""
+        handle = store.put("weg")
+        store._path(handle).unlink()
+        monkeypatch.setattr(store, "lookup", lambda h: store._path(h))
+        assert store.read_bytes(handle, 0, 10) is None
+        assert store.read_lines(handle, 1, 10) is None
+
+    def test_index_survives_restart(self, temp_dir):
+        """Neuer Store findet bestehende Einträge wieder."""
+        handle = ResultStore(base_dir=temp_dir / "r").put("persisted")
+        assert ResultStore(base_dir=temp_dir / "r").read_bytes(handle, 0, 100)[0] == "persisted"
+
+    def test_utf8_boundary(self, store):
+        """Seiten enden nicht mitten in einem Zeichen."""
+        handle = store.put("ä" * 10)
+        text, end, _ = store.read_bytes(handle, 0, 5)
+        assert text == "ää"
+        assert end == 4
+
+
+class TestSpill:
+    """Tests für truncate_output mit spill und result_page."""
+
+    def test_truncate_with_handle(self, store):
+        """Gekürzte Ausgabe enthält ein Handle."""
+        result = truncate_output("a" * 200, max_bytes=50, spill=True)
+        assert "TRUNCATED" in result
+        assert "result_page(handle=" in result
+
+    def test_too_large_for_store_stays_inline(self, store):
+        """Passt die Ausgabe nicht in den Store, wird nur gekürzt (ohne Handle)."""
+        store.max_bytes = 100
+        result = truncate_output("x" * 500, max_bytes=50, spill=True)
+        assert "TRUNCATED (500 bytes total)" in result
+        assert "result_page" not in result
+
+    def test_no_spill_by_default(self, store):
+        """Ohne spill kein Handle."""
+        result = truncate_output("a" * 200, max_bytes=50)
+        assert "result_page" not in result
+
+    @pytest.mark.asyncio
+    async def test_result_page_continues(self, store):
+        """result_page liefert den Rest der Ausgabe."""
+        from code.tools.results import result_page
+
+        full = "".join(f"{i:04d}\n" for i in range(100))
+        truncate_output(full, max_bytes=50, spill=True)
+        handle = next(iter(store._load_index()))
+
+        page = await result_page(handle=handle, offset=50, length=20)
+        assert full[50:70] in page
+        assert "offset=70" in page
+
+        page = await result_page(handle=handle, start_line=99, line_count=5)
+        assert "0098" in page
+        assert "Zeilen 99-100 von 100" in page
+
+    @pytest.mark.asyncio
+    async def test_result_page_unknown(self, store):
+        """Unbekanntes Handle gibt Fehler."""
+        from code.tools.results import result_page
+
+        result = await result_page(handle="ffffffffffff")
+        assert "Fehler" in result
@@ -0,0 +1,137 @@
+"""Tests für utils/scheduler.py."""
+
+import asyncio
+
+import pytest
+
+from code.utils.scheduler import AdmissionRejected, Scheduler
+
+
+CLASSES = {
+    "interactive": {"limit": 4, "priority": 0, "timeout": 1.0},
+    "scan": {"limit": 1, "priority": 2, "timeout": 0.2},
+}
+
+
+class TestScheduler:
+    """Tests für Scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_class_limit(self):
+        """Klassenlimit begrenzt parallele Aufrufe."""
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        assert await scheduler.acquire("scan") == 0.0
+
+        waiting = asyncio.create_task(scheduler.acquire("scan"))
+        await asyncio.sleep(0.01)
+        assert scheduler.snapshot()["classes"]["scan"]["queued"] == 1
+
+        scheduler.release("scan")
+        assert await waiting > 0
+        assert scheduler.classes["scan"].running == 1
+
+    @pytest.mark.asyncio
+    async def test_other_class_not_blocked(self):
+        """Volle scan-Klasse blockiert interaktive Aufrufe nicht."""
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        await scheduler.acquire("scan")
+        assert await asyncio.wait_for(scheduler.acquire("interactive"), 0.1) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Bei vollem Gesamtlimit kommt die höhere Priorität zuerst."""
+        scheduler = Scheduler(CLASSES, max_concurrent=1)
+        await scheduler.acquire("interactive")
+
+        order = []
+
+        async def call(name):
+            await scheduler.acquire(name)
+            order.append(name)
+
+        scan = asyncio.create_task(call("scan"))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(call("interactive"))
+        await asyncio.sleep(0.01)
+
+        scheduler.release("interactive")
+        await interactive
+        scheduler.release("interactive")
+        await scan
+
+        assert order == ["interactive", "scan"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_rejects(self):
+        """Zu lange Wartezeit führt zu AdmissionRejected."""
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        await scheduler.acquire("scan")
+
+        with pytest.raises(AdmissionRejected):
+            await scheduler.acquire("scan")
+        assert scheduler.classes["scan"].rejected == 1
+        assert scheduler.snapshot()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancel_does_not_leak(self):
+        """Abgebrochene Wartende belegen keinen Slot."""
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        await scheduler.acquire("scan")
+
+        waiting = asyncio.create_task(scheduler.acquire("scan"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        scheduler.release("scan")
+        assert scheduler.running == 0
+        assert await scheduler.acquire("scan") == 0.0
+
+
+class TestAdmissionInWrapper:
+    """Tests für Admission Control im Tool-Wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_rejected_call_returns_error(self, monkeypatch):
+        """Abgelehnte Aufrufe liefern eine Fehlermeldung statt zu laufen."""
+        from code.server import with_auto_log
+
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        monkeypatch.setattr("code.server.scheduler", scheduler)
+        await scheduler.acquire("scan")
+
+        called = []
+
+        async def tool() -> str:
+            called.append(True)
+            return "ok"
+
+        result = await with_auto_log("scan_tool", tool, log=False, cost="scan")()
+        assert result.startswith("Fehler: Server ausgelastet")
+        assert not called
+
+        scheduler.release("scan")
+        assert await with_auto_log("scan_tool", tool, log=False, cost="scan")() == "ok"
+        assert scheduler.running == 0
+
+    @pytest.mark.asyncio
+    async def test_profiler_failure_releases_slot(self, monkeypatch):
+        """Scheitert profiler.begin(), wird der Slot trotzdem freigegeben."""
+        from code.server import with_auto_log
+
+        scheduler = Scheduler(CLASSES, max_concurrent=10)
+        monkeypatch.setattr("code.server.scheduler", scheduler)
+
+        def broken_begin(tool_name):
+            raise RuntimeError("cProfile läuft bereits")
+
+        monkeypatch.setattr("code.server.profiler.begin", broken_begin)
+
+        async def tool() -> str:
+            return "ok"
+
+        with pytest.raises(RuntimeError):
+            await with_auto_log("scan_tool", tool, log=False, cost="scan")()
+        assert scheduler.running == 0
+        assert scheduler.snapshot()["classes"]["scan"]["running"] == 0
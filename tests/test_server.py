@@ -50,3 +50,49 @@ class TestToolRegistration:
         # Wir prüfen nur, dass der Server existiert
         assert mcp is not None
         assert mcp.name == "mcp_shell_tools"
+
+
+class TestLazyStartup:
+    """Tests für verzögertes Laden der Tool-Module."""
+
+    def test_import_does_not_load_tools(self):
+        """Server-Import lädt weder Tool-Module noch Persistenz."""
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        code = (
+            "import sys, code.server; "
+            "print(sorted(m for m in sys.modules "
+            "if m.startswith(('code.tools.', 'code.persistence'))))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "[]"
+
+    @pytest.mark.asyncio
+    async def test_list_tools_registers_all(self):
+        """tools/list registriert alle Tools beim ersten Aufruf."""
+        from code.server import mcp, TOOL_SPECS
+
+        tools = await mcp.list_tools()
+        assert {t.name for t in tools} == {spec.name for spec in TOOL_SPECS}
+
+    def test_parse_importtime(self):
+        """-X importtime Ausgabe wird geparst."""
+        from code.main import _parse_importtime
+
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   code.config\n"
+            "import time:       200 |        300 | code.utils\n"
+        )
+        assert _parse_importtime(stderr) == [
+            ("code.config", 100, 100, 1),
+            ("code.utils", 200, 300, 0),
+        ]
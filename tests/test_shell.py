@@ -0,0 +1,208 @@
+"""Tests für shell_exec: Ressourcen-Accounting und Limits."""
+
+import pytest
+
+from code.tools.shell import shell_exec
+from code.utils.process import ResourceLimits
+
+
+class TestResourceLimits:
+    """Tests für ResourceLimits."""
+
+    def test_empty_limits(self):
+        """Ohne Angaben keine rlimits."""
+        assert ResourceLimits().rlimits() == []
+
+    def test_cpu_hard_limit_above_soft(self):
+        """CPU Hard-Limit liegt eine Sekunde über dem Soft-Limit."""
+        import resource
+
+        limits = ResourceLimits(cpu_seconds=5).rlimits()
+        assert limits == [(resource.RLIMIT_CPU, 5, 6)]
+
+
+class TestShellExecResources:
+    """Tests für Ressourcen-Auswertung in shell_exec."""
+
+    @pytest.mark.asyncio
+    async def test_usage_reported(self, temp_dir):
+        """Jeder Befehl meldet Wall-/CPU-Zeit, RSS und I/O."""
+        result = await shell_exec(command="echo hello", working_dir=str(temp_dir))
+
+        assert "hello" in result
+        assert "[Ressourcen:" in result
+        assert "Wall" in result
+        assert "RSS" in result
+
+    @pytest.mark.parametrize("platform,raw", [("linux", 51200), ("darwin", 51200 * 1024)])
+    def test_rss_normalised_to_kib(self, monkeypatch, platform, raw):
+        """ru_maxrss ist unter Linux KiB, unter macOS Bytes - beides ergibt 50 MB."""
+        from types import SimpleNamespace
+
+        from code.utils.process import ResourceUsage
+
+        monkeypatch.setattr("code.utils.process.sys.platform", platform)
+        rusage = SimpleNamespace(ru_utime=0.0, ru_stime=0.0, ru_maxrss=raw, ru_inblock=0, ru_oublock=0)
+        usage = ResourceUsage.from_rusage(1.0, rusage)
+
+        assert usage.max_rss_kb == 51200
+        assert "RSS 50.0 MB" in usage.format()
+
+    @pytest.mark.asyncio
+    async def test_exit_code(self, temp_dir):
+        """Exit-Code != 0 wird angezeigt."""
+        result = await shell_exec(command="exit 3", working_dir=str(temp_dir))
+        assert "[Exit Code: 3]" in result
+
+    @pytest.mark.asyncio
+    async def test_cpu_limit(self, temp_dir):
+        """CPU-Limit beendet Endlosschleife per SIGXCPU."""
+        result = await shell_exec(
+            command="while :; do :; done",
+            working_dir=str(temp_dir),
+            timeout=20,
+            cpu_limit=1,
+        )
+        assert "SIGXCPU" in result or "SIGKILL" in result
+
+    @pytest.mark.asyncio
+    async def test_output_limit(self, temp_dir):
+        """Ausgabe-Limit stoppt endlose Ausgabe."""
+        result = await shell_exec(
+            command="yes",
+            working_dir=str(temp_dir),
+            timeout=20,
+            max_output_mb=1,
+        )
+        assert "Ausgabe-Limit erreicht" in result
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process(self, temp_dir):
+        """Timeout beendet den Prozess und meldet trotzdem Ressourcen."""
+        result = await shell_exec(command="sleep 30", working_dir=str(temp_dir), timeout=1)
+        assert "Timeout nach 1s" in result
+        assert "[Ressourcen:" in result
+
+
+class TestSpawnHelper:
+    """Tests für den Spawn-Helper-Prozess."""
+
+    @pytest.fixture
+    def helper(self):
+        """Eigener Helper pro Test."""
+        from code.utils.process import SpawnHelper
+
+        helper = SpawnHelper()
+        assert helper.start()
+        yield helper
+        helper.stop()
+
+    @pytest.mark.asyncio
+    async def test_spawn_via_helper(self, helper, temp_dir):
+        """Befehl läuft im Helper mit cwd, Umgebung und rusage."""
+        proc = helper.spawn(
+            "pwd; echo $MARKER; echo err >&2; exit 4",
+            temp_dir,
+            ResourceLimits(),
+            env={"MARKER": "from-server", "PATH": "/usr/bin:/bin"},
+        )
+        result = await proc.communicate()
+
+        assert result.returncode == 4
+        assert str(temp_dir) in result.stdout.decode()
+        assert "from-server" in result.stdout.decode()
+        assert result.stderr == b"err\n"
+        assert result.usage.wall_seconds > 0
+
+    @pytest.mark.asyncio
+    async def test_limits_applied_in_helper(self, helper, temp_dir):
+        """rlimits werden im Kindprozess des Helpers gesetzt."""
+        proc = helper.spawn("ulimit -n", temp_dir, ResourceLimits(open_files=64))
+        result = await proc.communicate()
+        assert result.stdout.strip() == b"64"
+
+    def test_stop_marks_unavailable(self, helper):
+        """Nach stop() ist der Helper nicht mehr verfügbar."""
+        helper.stop()
+        assert not helper.available
+
+    @pytest.mark.asyncio
+    async def test_no_seqpacket_falls_back_to_direct(self, temp_dir, monkeypatch):
+        """Ohne SOCK_SEQPACKET (macOS) gilt der Helper als ausgefallen, gestartet wird direkt."""
+        from code.utils import process
+
+        def no_seqpacket(*args, **kwargs):
+            raise OSError(43, "Protocol not supported")
+
+        helper = process.SpawnHelper()
+        monkeypatch.setattr(process, "spawn_helper", helper)
+        monkeypatch.setattr(process, "SHELL_USE_SPAWN_HELPER", True)
+        monkeypatch.setattr(process.socket, "socketpair", no_seqpacket)
+        direct = []
+        spawn_direct = process._spawn_direct
+        monkeypatch.setattr(process, "_spawn_direct", lambda *a: direct.append(a) or spawn_direct(*a))
+
+        assert not helper.start()
+        result = await process.spawn_shell("echo direkt", temp_dir).communicate()
+
+        assert result.stdout == b"direkt\n"
+        assert len(direct) == 1 and not helper.available
+
+    @pytest.mark.asyncio
+    async def test_slow_start_does_not_block_loop(self, temp_dir, monkeypatch):
+        """Ein langsamer Start (Helper-Handshake) läuft neben dem Event-Loop."""
+        import asyncio
+        import time
+
+        from code.utils import process
+
+        def slow_spawn(*args, **kwargs):
+            time.sleep(0.3)
+            return process.spawn_shell(*args, **kwargs)
+
+        monkeypatch.setattr("code.tools.shell.spawn_shell", slow_spawn)
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        result = await shell_exec(command="echo ok", working_dir=str(temp_dir))
+        task.cancel()
+
+        assert "ok" in result
+        assert len(ticks) > 10
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.2
+
+    @pytest.mark.asyncio
+    async def test_cancel_during_start_kills_process(self, temp_dir, monkeypatch):
+        """Abbruch während des Starts: der trotzdem gestartete Prozess wird beendet."""
+        import asyncio
+        import time
+
+        from code.tools import shell
+        from code.utils import process
+
+        started = []
+
+        def slow_spawn(*args, **kwargs):
+            time.sleep(0.2)
+            proc = process.spawn_shell(*args, **kwargs)
+            started.append(proc)
+            return proc
+
+        monkeypatch.setattr("code.tools.shell.spawn_shell", slow_spawn)
+        task = asyncio.create_task(shell_exec(command="sleep 30", working_dir=str(temp_dir)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        for _ in range(100):
+            if started and started[0].returncode is not None:
+                break
+            await asyncio.sleep(0.05)
+        assert started and started[0].returncode is not None
+        assert started[0] not in shell._running_processes
@@ -0,0 +1,101 @@
+"""Tests für den Shared-Modus (utils/socket_transport.py)."""
+
+import socket
+from pathlib import Path
+
+import anyio
+import pytest
+from mcp import ClientSession
+
+from code.server import LazyFastMCP
+from code.state import state
+from code.utils.socket_transport import (
+    ServerAlreadyRunning,
+    connection_streams,
+    serve_unix,
+    server_running,
+)
+
+
+@pytest.fixture
+def socket_path(temp_dir):
+    """Kurzer Socket-Pfad (AF_UNIX erlaubt nur ~100 Zeichen)."""
+    return temp_dir / "s.sock"
+
+
+@pytest.fixture
+def shared_server():
+    """Server mit Tools, die den State der Verbindung lesen und ändern."""
+    server = LazyFastMCP("test")
+
+    @server.tool()
+    async def goto(path: str) -> str:
+        state.change_directory(Path(path))
+        return "ok"
+
+    @server.tool()
+    async def where() -> str:
+        return str(state.working_dir)
+
+    return server
+
+
+async def _visit(path: Path, target: Path) -> str:
+    """Client: wechselt nach target und fragt danach das Working Directory ab."""
+    stream = await anyio.connect_unix(path)
+    async with stream, connection_streams(stream) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            await session.call_tool("goto", {"path": str(target)})
+            await anyio.sleep(0.05)  # anderer Client wechselt dazwischen
+            result = await session.call_tool("where", {})
+            return result.content[0].text
+
+
+async def _wait_for_socket(path: Path) -> None:
+    with anyio.fail_after(5):
+        while not server_running(path):
+            await anyio.sleep(0.01)
+
+
+class TestSharedServer:
+    """Tests für mehrere Clients an einem Server."""
+
+    @pytest.mark.asyncio
+    async def test_state_per_connection(self, shared_server, socket_path, temp_dir, reset_state):
+        """Jede Verbindung hat ihr eigenes Working Directory."""
+        (temp_dir / "a").mkdir()
+        (temp_dir / "b").mkdir()
+        before = state.working_dir
+        results = {}
+
+        async def visit(name):
+            results[name] = await _visit(socket_path, temp_dir / name)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(shared_server.run_unix_async, socket_path)
+            await _wait_for_socket(socket_path)
+            async with anyio.create_task_group() as clients:
+                clients.start_soon(visit, "a")
+                clients.start_soon(visit, "b")
+            tg.cancel_scope.cancel()
+
+        assert results == {"a": str(temp_dir / "a"), "b": str(temp_dir / "b")}
+        assert state.working_dir == before
+        assert not socket_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_running_server_not_replaced(self, socket_path):
+        """Lebender Socket wird nicht übernommen, verwaister schon."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as other:
+            other.bind(str(socket_path))
+            other.listen()
+            with pytest.raises(ServerAlreadyRunning):
+                await serve_unix(socket_path, None)
+
+        # Socket-Datei bleibt nach close() verwaist zurück
+        assert socket_path.exists() and not server_running(socket_path)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(serve_unix, socket_path, None)
+            await _wait_for_socket(socket_path)
+            tg.cancel_scope.cancel()
@@ -0,0 +1,96 @@
+"""Tests für persistence/sqlite_store.py und memory_search."""
+
+import pytest
+
+from code.persistence.session_manager import SessionManager, session_scope
+from code.persistence.sqlite_store import TOOL_LOG_LIMIT, SqliteSessionManager
+
+
+@pytest.fixture
+def manager(temp_dir):
+    """SqliteSessionManager mit Datenbank im temp Verzeichnis."""
+    manager = SqliteSessionManager(base_dir=temp_dir)
+    yield manager
+    manager.close()
+
+
+def _project(manager, temp_dir, name, memories=()):
+    manager.init_session(temp_dir / name)
+    for content in memories:
+        manager.add_memory(content)
+
+
+class TestSqliteSessionManager:
+    """Tests für SqliteSessionManager."""
+
+    def test_save_and_load(self, manager, temp_dir):
+        """Session, Memories und Tool-Aufrufe überstehen einen neuen Manager."""
+        _project(manager, temp_dir, "proj", ["erste Notiz"])
+        manager.log_tool_call("grep", {"pattern": "x"}, "3 Treffer", duration_ms=1.5)
+        manager.save_session(summary="Stand")
+
+        other = SqliteSessionManager(base_dir=temp_dir)
+        loaded = other.load_session("proj")
+        other.close()
+
+        assert loaded.summary == "Stand"
+        assert [m.content for m in loaded.memories] == ["erste Notiz"]
+        assert loaded.tool_log[0].params == {"pattern": "x"}
+        assert loaded.tool_log[0].duration_ms == 1.5
+        assert manager._memory_file("proj").exists()
+        assert not manager._session_file("proj").exists()
+
+    def test_list_sessions(self, manager, temp_dir):
+        """Sortiert nach letzter Änderung, mit Anzahl Memories."""
+        _project(manager, temp_dir, "alt", ["a"])
+        _project(manager, temp_dir, "neu", ["b", "c"])
+
+        sessions = manager.list_sessions()
+        assert [s["name"] for s in sessions] == ["neu", "alt"]
+        assert sessions[0]["memories"] == 2
+
+    def test_tool_log_bounded(self, manager, temp_dir):
+        """Alte Tool-Aufrufe werden aus der Datenbank entfernt."""
+        _project(manager, temp_dir, "proj")
+        for i in range(3 * TOOL_LOG_LIMIT):
+            manager.log_tool_call(f"tool_{i}", {})
+
+        count = manager._conn().execute("SELECT count(*) FROM tool_calls").fetchone()[0]
+        assert count <= 2 * TOOL_LOG_LIMIT
+        loaded = manager.load_session("proj")
+        assert loaded.tool_log[-1].tool == f"tool_{3 * TOOL_LOG_LIMIT - 1}"
+
+
+class TestMemorySearch:
+    """Tests für die Suche über Memory-Einträge."""
+
+    def test_fulltext_across_projects(self, manager, temp_dir):
+        """Findet Einträge in allen Projekten, optional gefiltert."""
+        _project(manager, temp_dir, "a", ["SQLite statt PostgreSQL", "Tests fehlen"])
+        _project(manager, temp_dir, "b", ["Deployment mit SQLite", 'Zitat "SQLite"'])
+
+        hits = manager.search_memories("sqlite")
+        assert {hit["project"] for hit in hits} == {"a", "b"}
+        assert len(hits) == 3
+
+        hits = manager.search_memories("SQLite Deployment", project="b")
+        assert [hit["content"] for hit in hits] == ["Deployment mit SQLite"]
+
+    def test_cleared_memories_not_found(self, manager, temp_dir):
+        """Gelöschte Einträge verschwinden auch aus dem Index."""
+        _project(manager, temp_dir, "a", ["Cache invalidieren"])
+        manager.clear_memories()
+        assert manager.search_memories("Cache") == []
+
+    @pytest.mark.asyncio
+    async def test_tool_with_file_backend(self, temp_dir):
+        """memory_search funktioniert auch mit dem Datei-Backend."""
+        from code.tools.memory import memory_search
+
+        files = SessionManager(base_dir=temp_dir)
+        _project(files, temp_dir, "proj", ["Bug in calculate_returns", "Anderes"])
+
+        with session_scope(files):
+            result = await memory_search(query="bug")
+            assert "**proj**" in result and "calculate_returns" in result
+            assert "Keine Einträge" in await memory_search(query="bug", project="sonst")
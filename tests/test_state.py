@@ -66,3 +66,60 @@ class TestWorkstationState:
         
         resolved = state.resolve_path("../file.txt")
         assert resolved == (temp_dir / "file.txt").resolve()
+
+
+class TestStateScope:
+    """Tests für den State pro Verbindung."""
+
+    def test_proxy_follows_scope(self, temp_dir, reset_state):
+        """Die globale Instanz greift im Scope auf den Verbindungs-State zu."""
+        from code.state import state, state_scope
+
+        before = state.working_dir
+        with state_scope(WorkstationState()) as scoped:
+            state.change_directory(temp_dir)
+            assert scoped.working_dir == temp_dir
+            assert state.resolve_path("x") == temp_dir / "x"
+        assert state.working_dir == before
+
+
+class TestRequestScope:
+    """Tests für die State-Kopie pro Tool-Aufruf."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_calls_see_stable_cwd(self, temp_dir, reset_state):
+        """Ein paralleles cd ändert das cwd laufender Aufrufe nicht."""
+        import asyncio
+
+        from code.server import with_auto_log
+        from code.state import state
+
+        before = state.working_dir
+        changed = asyncio.Event()
+
+        async def change() -> str:
+            state.change_directory(temp_dir)
+            changed.set()
+            return "ok"
+
+        async def read() -> str:
+            await changed.wait()
+            return str(state.resolve_path("x"))
+
+        reader = asyncio.create_task(with_auto_log("read", read, log=False)())
+        await asyncio.sleep(0)
+        await with_auto_log("change", change, log=False)()
+
+        assert await reader == str((before / "x").resolve())
+        assert state.working_dir == temp_dir
+
+    def test_failed_call_not_committed(self, temp_dir, reset_state):
+        """Bei einer Exception bleibt der geteilte State unverändert."""
+        from code.state import request_scope, state
+
+        before = state.working_dir
+        with pytest.raises(RuntimeError):
+            with request_scope():
+                state.change_directory(temp_dir)
+                raise RuntimeError
+        assert state.working_dir == before
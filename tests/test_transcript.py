@@ -0,0 +1,243 @@
+"""Tests für utils/transcript.py, /transcript und transcript_search."""
+
+import json
+import os
+
+import pytest
+
+from code.utils.transcript import (
+    TranscriptCatalog,
+    TranscriptIndex,
+    TranscriptWriter,
+    index_path,
+    iter_events,
+    load_index,
+    read_call,
+    render_markdown,
+    terms_path,
+)
+
+# Ergebnisse, die im alten Markdown-Format nicht zurückzulesen waren
+RESULTS = [
+    "zeile 1\nzeile 2\n```\ncode\n```",
+    "binär: \x00\x1b[31m\udcff ende",
+    "Umlaute äöü und 🚀",
+]
+
+
+@pytest.fixture
+def writer(temp_dir):
+    """TranscriptWriter in einem temp Verzeichnis."""
+    writer = TranscriptWriter(temp_dir / "t.jsonl")
+    yield writer
+    writer.close()
+
+
+class TestTranscriptWriter:
+    """Tests für TranscriptWriter und die Lesefunktionen."""
+
+    def test_roundtrip_and_random_access(self, writer):
+        """Jeder Aufruf ist per Index-Offset exakt wieder lesbar."""
+        for i, result in enumerate(RESULTS):
+            writer.append_call("shell_exec", {"cmd": f"echo {i}"}, result, i != 1, duration_ms=1.5)
+        writer.close()
+
+        entries = load_index(writer.path)
+        assert [e["seq"] for e in entries] == [1, 2, 3]
+        assert [e["ok"] for e in entries] == [True, False, True]
+        for entry, result in zip(entries, RESULTS):
+            call = read_call(writer.path, entry["off"], entry["len"])
+            assert call["result"] == result
+            assert call["duration_ms"] == 1.5
+
+        kinds = [event["type"] for _, event in iter_events(writer.path)]
+        assert kinds == ["start", "call", "call", "call", "end"]
+
+    def test_buffered_until_flush(self, writer):
+        """append_call schreibt nur in den Puffer; flush() bringt alles auf die Platte."""
+        writer.flush()
+        on_disk = writer.path.stat().st_size
+        writer.append_call("grep", {"pattern": "x"}, "treffer", True)
+
+        assert writer.path.stat().st_size == on_disk
+        writer.flush()
+        assert writer.path.stat().st_size == writer.size
+        assert len(index_path(writer.path).read_bytes().splitlines()) == 1
+
+    def test_result_truncated(self, writer):
+        """Sehr lange Ergebnisse werden gekürzt, die Originallänge bleibt erhalten."""
+        writer.append_call("file_read", {}, "x" * 60_000, True)
+        writer.flush()
+
+        entry = load_index(writer.path)[0]
+        call = read_call(writer.path, entry["off"], entry["len"])
+        assert len(call["result"]) == 50_000
+        assert call["result_chars"] == 60_000
+
+    def test_index_rebuilt_after_crash(self, writer):
+        """Fehlender Index und abgeschnittene letzte Zeile: Index wird aus der .jsonl gebaut."""
+        for i in range(3):
+            writer.append_call("grep", {"i": i}, f"r{i}", True)
+        writer.flush()
+        with open(writer.path, "ab") as f:
+            f.write(b'{"type": "call", "seq": 4, "ts"')  # Absturz mitten im Schreiben
+        index_path(writer.path).unlink()
+
+        entries = load_index(writer.path)
+        assert [e["seq"] for e in entries] == [1, 2, 3]
+        assert read_call(writer.path, entries[2]["off"], entries[2]["len"])["result"] == "r2"
+        assert index_path(writer.path).exists()
+
+    def test_render_markdown(self, writer):
+        """Markdown wird aus der JSONL erzeugt; Backticks im Ergebnis brechen den Block nicht."""
+        writer.append_call("shell_exec", {"cmd": "cat x"}, RESULTS[0], False)
+        writer.close()
+
+        markdown = render_markdown(writer.path)
+        assert markdown.startswith("# MCP Shell Tools Transcript")
+        assert "✗ `shell_exec`" in markdown
+        assert "  cmd: cat x" in markdown
+        assert "````\n" + RESULTS[0] + "\n````" in markdown
+        assert "**Beendet:**" in markdown
+
+
+class TestTranscriptCommand:
+    """Tests für /transcript mit dem JSONL-Writer."""
+
+    @pytest.fixture
+    def settings(self, temp_dir, monkeypatch):
+        from code.tools import commands
+
+        monkeypatch.setattr(commands, "TRANSCRIPT_DIR", temp_dir)
+        settings = commands.CommandSettings()
+        yield settings
+        settings._stop_transcript()
+
+    def test_auto_start_and_markdown(self, settings, temp_dir):
+        """Erster Aufruf startet das Transcript; md rendert den aktuellen Stand."""
+        settings.log_call("grep", {"pattern": "x"}, "3 Treffer", True, 2.0)
+
+        assert settings.transcript_file.suffix == ".jsonl"
+        result = settings.render_transcript()
+        markdown = settings.transcript_file.with_suffix(".md").read_text(encoding="utf-8")
+        assert "Markdown geschrieben" in result
+        assert "✓ `grep`" in markdown and "3 Treffer" in markdown
+
+    def test_rotation_by_counted_size(self, settings, temp_dir, monkeypatch):
+        """Rotation nutzt die mitgezählte Größe und legt eine neue Datei an."""
+        from code.tools import commands
+
+        monkeypatch.setattr(commands, "MAX_TRANSCRIPT_SIZE", 200)
+        for i in range(4):
+            settings.log_call("file_read", {"i": i}, "y" * 150, True)
+        settings._stop_transcript()
+
+        files = sorted(temp_dir.glob("*.jsonl"))
+        assert len(files) >= 2
+        calls = [
+            json.loads(line)["params"]["i"]
+            for path in files
+            for line in path.read_bytes().splitlines()
+            if json.loads(line)["type"] == "call"
+        ]
+        assert sorted(calls) == [0, 1, 2, 3]
+
+
+class TestTranscriptSearch:
+    """Tests für TranscriptCatalog und transcript_search."""
+
+    @pytest.fixture
+    def catalog(self, temp_dir):
+        """Zwei Transcripts: ein älteres (abgeschlossen) und ein aktuelles."""
+        old = TranscriptWriter(temp_dir / "2026-01-17-09-00-00.jsonl")
+        old.append_call("shell_exec", {"cmd": "pytest -q"}, "3 failed, 10 passed\nFAILED test_x", False)
+        old.append_call("grep", {"pattern": "calculate_returns"}, "main.py:3: def calculate_returns", True)
+        old.close()
+        new = TranscriptWriter(temp_dir / "2026-01-17-14-00-00.jsonl")
+        new.append_call("shell_exec", {"cmd": "pytest -q"}, "13 passed", True)
+        new.flush()
+        yield TranscriptCatalog(temp_dir), new
+        new.close()
+
+    def test_filters(self, catalog):
+        """Tool, Status und Text filtern; Treffer neueste zuerst."""
+        catalog, _ = catalog
+        hits = catalog.search(tool="shell_exec")
+        assert [(p.name[:19], e["seq"]) for p, e in hits] == [
+            ("2026-01-17-14-00-00", 1), ("2026-01-17-09-00-00", 1),
+        ]
+        assert [e["result"] for _, e in catalog.search(tool="shell_exec", success=False)] == [
+            "3 failed, 10 passed\nFAILED test_x"
+        ]
+        assert [e["tool"] for _, e in catalog.search(query="Calculate_Returns")] == ["grep"]
+        assert catalog.search(query="pytest passed", limit=1)[0][1]["result"] == "13 passed"
+        assert catalog.search(query="gibtesnicht") == []
+
+    def test_time_range(self, catalog, temp_dir):
+        """Zeitraum über die Zeitstempel der Aufrufe; Dateien vor dem Zeitraum bleiben ungelesen."""
+        catalog, _ = catalog
+        old = temp_dir / "2026-01-17-09-00-00.jsonl"
+        os.utime(old, (0, 0))  # letzter Schreibzugriff 1970
+
+        hits = catalog.search(since="2026-01-01T00:00:00")
+        assert {p.name for p, _ in hits} == {"2026-01-17-14-00-00.jsonl"}
+        assert old not in catalog._indexes
+        assert catalog.search(until="2000-01-01T00:00:00") == []
+
+    def test_incremental_and_persisted(self, catalog, temp_dir):
+        """Neue Aufrufe werden nachindexiert; ein neuer Katalog nutzt die .terms-Datei."""
+        catalog, writer = catalog
+        assert catalog.search(query="coverage") == []
+        writer.append_call("shell_exec", {"cmd": "coverage report"}, "TOTAL 91%", True)
+        writer.flush()
+
+        assert [e["seq"] for _, e in catalog.search(query="coverage")] == [2]
+        stored = TranscriptIndex(writer.path)
+        assert list(stored.candidates("coverage report")) == [2]
+        assert stored.covered == writer.size
+        assert terms_path(writer.path).exists()
+
+    def test_partial_words(self, catalog):
+        """Teilwörter finden wie ein linearer Scan, auch über mehrere Begriffe."""
+        catalog, _ = catalog
+        assert [e["tool"] for _, e in catalog.search(query="return")] == ["grep"]
+        assert [e["tool"] for _, e in catalog.search(query="calc main.py")] == ["grep"]
+        assert [e["seq"] for _, e in catalog.search(query="ytes", tool="shell_exec")] == [1, 1]
+        assert catalog.search(query="calc gibtesnicht") == []
+
+    def test_terms_appended_and_merged(self, temp_dir, monkeypatch):
+        """Jeder Nachtrag hängt ein Segment an; ab dem Limit wird zusammengeführt."""
+        from code.utils import transcript
+
+        monkeypatch.setattr(transcript, "TRANSCRIPT_TERMS_SEGMENTS", 3)
+        writer = TranscriptWriter(temp_dir / "2026-01-17-09-00-00.jsonl")
+        index = TranscriptIndex(writer.path)
+        sizes = []
+        for i in range(3):
+            writer.append_call("shell_exec", {"cmd": f"make target{i}"}, "ok", True)
+            writer.flush()
+            before = terms_path(writer.path).read_bytes() if terms_path(writer.path).exists() else b""
+            index.refresh()
+            after = terms_path(writer.path).read_bytes()
+            sizes.append(len(index._segments))
+            if i < 2:
+                assert after.startswith(before)  # angehängt, nicht neu geschrieben
+        writer.close()
+
+        assert sizes == [1, 2, 1]
+        assert index.candidates("target") == {1, 2, 3}
+        fresh = TranscriptIndex(writer.path)
+        assert fresh.candidates("target2") == {3}
+        assert fresh.covered == index.covered
+
+    @pytest.mark.asyncio
+    async def test_tool(self, catalog, monkeypatch):
+        """transcript_search formatiert Treffer und prüft Zeitangaben."""
+        from code.tools import transcripts
+
+        monkeypatch.setattr(transcripts, "transcript_catalog", catalog[0])
+        result = await transcripts.transcript_search(query="failed", tool="shell_exec", since="1000d")
+        assert "#1" in result and "✗ `shell_exec`" in result and "cmd: pytest -q" in result
+        assert "FAILED test_x" in result
+        assert "Keine passenden" in await transcripts.transcript_search(tool="file_write")
+        assert (await transcripts.transcript_search(since="gestern")).startswith("Fehler:")